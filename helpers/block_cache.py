@@ -0,0 +1,94 @@
+import collections
+import threading
+
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BlockCache(Generic[T]):
+    """LRU cache of fixed-size blocks of rows backing a virtual list.
+
+    Rows are addressed by their absolute index. ``plan`` is called with the row
+    the view is asking for and returns the blocks to fetch: the block holding
+    the row, then ``prefetch_blocks`` blocks ahead in the scroll direction.
+    At most ``max_blocks`` blocks are kept, so memory stays bounded whatever
+    the number of rows.
+    """
+
+    def __init__(self, row_count: int = 0, block_size: int = 200, max_blocks: int = 50, prefetch_blocks: int = 2):
+        self.block_size = max(1, block_size)
+        self.max_blocks = max(prefetch_blocks * 2 + 1, max_blocks)
+        self.prefetch_blocks = max(0, prefetch_blocks)
+        self.row_count = max(0, row_count)
+
+        self._blocks: collections.OrderedDict[int, list[T]] = collections.OrderedDict()
+        self._pending: set[int] = set()
+        self._current_block = 0
+        self._direction = 1
+        self._lock = threading.Lock()
+
+    @property
+    def block_count(self) -> int:
+        return -(-self.row_count // self.block_size)
+
+    def block_of(self, row: int) -> int:
+        return row // self.block_size
+
+    def block_range(self, block: int) -> range:
+        start = block * self.block_size
+        return range(start, min(start + self.block_size, self.row_count))
+
+    def get(self, row: int) -> Optional[T]:
+        block, position = divmod(row, self.block_size)
+        with self._lock:
+            if (rows := self._blocks.get(block)) is None:
+                return None
+
+            self._blocks.move_to_end(block)
+
+        return rows[position] if position < len(rows) else None
+
+    def has_block(self, block: int) -> bool:
+        with self._lock:
+            return block in self._blocks
+
+    def plan(self, row: int) -> list[int]:
+        """Return the blocks to fetch so that ``row`` and the rows ahead of it become available."""
+        block = self.block_of(row)
+        with self._lock:
+            if block != self._current_block:
+                self._direction = 1 if block > self._current_block else -1
+                self._current_block = block
+
+            wanted = [block] + [block + self._direction * step for step in range(1, self.prefetch_blocks + 1)]
+            missing = [
+                candidate for candidate in wanted
+                if 0 <= candidate < self.block_count and candidate not in self._blocks and candidate not in self._pending
+            ]
+            self._pending.update(missing)
+
+        return missing
+
+    def is_wanted(self, block: int) -> bool:
+        """Tell whether a planned block is still near the viewport, so a stale fetch can be skipped."""
+        with self._lock:
+            return abs(block - self._current_block) <= self.prefetch_blocks
+
+    def discard(self, block: int):
+        with self._lock:
+            self._pending.discard(block)
+
+    def put(self, block: int, rows: list[T]):
+        with self._lock:
+            self._pending.discard(block)
+            self._blocks[block] = rows
+            self._blocks.move_to_end(block)
+
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._blocks.clear()
+            self._pending.clear()
@@ -0,0 +1,149 @@
+import array
+
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
+
+# Distinct strings shared per column; past this many, new strings are stored as they come.
+MAX_INTERNED_STRINGS = 65_536
+
+
+class _ResultColumn:
+    """Values of one result column, in a typed array while every value fits one.
+
+    The storage kind is chosen by the first non-null value: ``int`` values go to
+    a signed 64-bit array, ``float`` to a double array, ``bool`` to a byte array.
+    Anything else, or a value that does not fit the current array, moves the
+    column to a plain list. Strings are deduplicated through a per-column table.
+    """
+
+    __slots__ = ("kind", "values", "nulls", "_strings")
+
+    def __init__(self):
+        self.kind: Optional[type] = None
+        self.values: Any = []
+        self.nulls = bytearray()
+        self._strings: Optional[dict[str, str]] = {}
+
+    def _set_kind(self, value: Any):
+        kind = type(value)
+        pending = len(self.values)
+        if kind is bool:
+            self.values = array.array("b", bytes(pending))
+        elif kind is int:
+            self.values = array.array("q", bytes(8 * pending))
+        elif kind is float:
+            self.values = array.array("d", bytes(8 * pending))
+        else:
+            kind = object
+        self.kind = kind
+
+    def _to_object_list(self):
+        values = list(self.values)
+        if self.kind is bool:
+            values = [bool(value) for value in values]
+
+        self.values = values
+        self.kind = object
+
+    def _intern(self, value: str) -> str:
+        if self._strings is None:
+            return value
+
+        if (shared := self._strings.get(value)) is not None:
+            return shared
+
+        if len(self._strings) >= MAX_INTERNED_STRINGS:
+            self._strings = None
+        else:
+            self._strings[value] = value
+
+        return value
+
+    def append(self, value: Any, row: int):
+        if value is None:
+            _set_bit(self.nulls, row)
+            self.values.append(0 if self.kind not in (None, object) else None)
+            return
+
+        if self.kind is None:
+            self._set_kind(value)
+
+        if self.kind is not object:
+            if type(value) is self.kind:
+                try:
+                    self.values.append(value)
+                    return
+                except OverflowError:
+                    pass
+
+            self._to_object_list()
+
+        self.values.append(self._intern(value) if type(value) is str else value)
+
+    def get(self, row: int) -> Any:
+        if _get_bit(self.nulls, row):
+            return None
+
+        value = self.values[row]
+        return bool(value) if self.kind is bool else value
+
+
+def _set_bit(bits: bytearray, index: int):
+    byte_index = index >> 3
+    if byte_index >= len(bits):
+        bits.extend(bytes(byte_index - len(bits) + 1))
+    bits[byte_index] |= 1 << (index & 7)
+
+
+def _get_bit(bits: bytearray, index: int) -> bool:
+    byte_index = index >> 3
+    return byte_index < len(bits) and bool(bits[byte_index] & (1 << (index & 7)))
+
+
+class ColumnarResultSet(Sequence[tuple]):
+    """Query result rows stored column by column instead of as driver row objects.
+
+    Numbers and booleans live in typed arrays, repeated strings are shared and
+    nulls are kept in a bitmap, so a result takes little more memory than its
+    data. ``get(row, col)`` is O(1); indexing and iteration rebuild tuples.
+    """
+
+    def __init__(self, columns: list[str]):
+        self.columns = list(columns)
+        self._columns = [_ResultColumn() for _ in self.columns]
+        self._row_count = 0
+
+    def extend(self, rows: Sequence[Any]):
+        """Append driver rows: mappings keyed by column name, or sequences in column order."""
+        for row in rows:
+            if isinstance(row, dict):
+                values = [row.get(name) for name in self.columns]
+            else:
+                values = row
+
+            row_index = self._row_count
+            for column, value in zip(self._columns, values):
+                column.append(value, row_index)
+
+            self._row_count += 1
+
+    def get(self, row: int, col: int) -> Any:
+        return self._columns[col].get(row)
+
+    def __len__(self) -> int:
+        return self._row_count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(self._row_count))]
+
+        if row < 0:
+            row += self._row_count
+        if not 0 <= row < self._row_count:
+            raise IndexError("result row out of range")
+
+        return tuple(column.get(row) for column in self._columns)
+
+    def __iter__(self) -> Iterator[tuple]:
+        for row in range(self._row_count):
+            yield tuple(column.get(row) for column in self._columns)
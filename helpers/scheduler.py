@@ -0,0 +1,191 @@
+import enum
+import heapq
+import itertools
+import threading
+
+from typing import Any, Callable, Hashable, Optional
+
+from helpers.logger import logger
+
+DEFAULT_MAX_WORKERS = 4
+# Seconds an idle worker thread waits for a task before it exits.
+DEFAULT_WORKER_IDLE_TIMEOUT = 60.0
+
+_current = threading.local()
+
+
+class TaskPriority(enum.IntEnum):
+    """Lanes of a scheduler, most urgent first."""
+    QUERY = 0
+    RECORDS = 1
+    COUNT = 2
+    PREFETCH = 3
+
+
+class ScheduledTask:
+    """A function waiting for, or running on, a scheduler worker."""
+
+    def __init__(self, priority: TaskPriority, function: Callable[..., Any], args: tuple[Any, ...], key: Optional[Hashable]):
+        self.priority = priority
+        self.function = function
+        self.args = args
+        self.key = key
+
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._started = False
+        self._cancel_handler: Optional[Callable[[], Any]] = None
+        self._done = threading.Event()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self) -> None:
+        """Drop the task if it has not started, or call its cancel handler if it is running."""
+        with self._lock:
+            if self._cancelled or self.is_done:
+                return
+
+            self._cancelled = True
+            if not self._started:
+                self._done.set()
+            elif self._cancel_handler is not None:
+                self._call_cancel_handler(self._cancel_handler)
+
+    def set_cancel_handler(self, handler: Optional[Callable[[], Any]]) -> None:
+        """Register how the running task is interrupted, e.g. ``context.cancel_running_query``.
+
+        The handler is called under the task lock, so once it has been replaced
+        with ``None`` it can no longer reach a connection the task gave back.
+        """
+        with self._lock:
+            self._cancel_handler = handler
+            if self._cancelled and handler is not None:
+                self._call_cancel_handler(handler)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._started = True
+            return True
+
+    def _finish(self) -> None:
+        self._done.set()
+
+    @staticmethod
+    def _call_cancel_handler(handler: Callable[[], Any]) -> None:
+        try:
+            handler()
+        except Exception as ex:
+            logger.warning("Cancelling a background task failed: %s", ex)
+
+
+def current_task() -> Optional[ScheduledTask]:
+    """Return the task the calling scheduler worker is running, if any."""
+    return getattr(_current, "task", None)
+
+
+class BackgroundScheduler:
+    """A bounded pool of worker threads serving tasks by priority.
+
+    Lower ``TaskPriority`` values are served first, in submission order within
+    a lane. Submitting a task with the ``key`` of one still queued drops the
+    older one, and with ``cancel_running`` also cancels it while it runs, so a
+    burst of requests for the same thing costs one round trip. Worker threads
+    are started on demand and exit after ``worker_idle_timeout`` without work.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, name: str = "background", worker_idle_timeout: float = DEFAULT_WORKER_IDLE_TIMEOUT):
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self.worker_idle_timeout = worker_idle_timeout
+
+        self._queue: list[tuple[int, int, ScheduledTask]] = []
+        self._sequence = itertools.count()
+        self._tasks_by_key: dict[Hashable, ScheduledTask] = {}
+        self._running: set[ScheduledTask] = set()
+        self._workers = 0
+        self._idle_workers = 0
+        self._condition = threading.Condition()
+
+    def submit(
+            self,
+            priority: TaskPriority,
+            function: Callable[..., Any],
+            *args: Any,
+            key: Optional[Hashable] = None,
+            cancel_running: bool = False,
+    ) -> ScheduledTask:
+        """Queue ``function(*args)`` in the ``priority`` lane and return its task."""
+        task = ScheduledTask(priority, function, args, key)
+        superseded = None
+
+        with self._condition:
+            if key is not None:
+                superseded = self._tasks_by_key.get(key)
+                self._tasks_by_key[key] = task
+
+            heapq.heappush(self._queue, (int(priority), next(self._sequence), task))
+
+            if len(self._queue) > self._idle_workers and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._work, name=f"{self.name}-worker", daemon=True).start()
+            self._condition.notify()
+
+        if superseded is not None and (cancel_running or not superseded._started):
+            superseded.cancel()
+
+        return task
+
+    def cancel_all(self) -> None:
+        """Cancel every queued and running task."""
+        with self._condition:
+            tasks = [task for _priority, _sequence, task in self._queue]
+            self._queue.clear()
+            tasks.extend(self._running)
+            self._tasks_by_key.clear()
+
+        for task in tasks:
+            task.cancel()
+
+    def _next_task(self) -> Optional[ScheduledTask]:
+        with self._condition:
+            while True:
+                while self._queue:
+                    _priority, _sequence, task = heapq.heappop(self._queue)
+                    if task._start():
+                        self._running.add(task)
+                        return task
+
+                self._idle_workers += 1
+                has_work = self._condition.wait(self.worker_idle_timeout)
+                self._idle_workers -= 1
+
+                if not has_work and not self._queue:
+                    self._workers -= 1
+                    return None
+
+    def _work(self) -> None:
+        while (task := self._next_task()) is not None:
+            _current.task = task
+            try:
+                task.function(*task.args)
+            except Exception as ex:
+                logger.error("Background task %s failed: %s", getattr(task.function, "__qualname__", task.function), ex, exc_info=True)
+            finally:
+                _current.task = None
+                task._finish()
+
+                with self._condition:
+                    self._running.discard(task)
+                    if task.key is not None and self._tasks_by_key.get(task.key) is task:
+                        del self._tasks_by_key[task.key]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+PeterSQL autocomplete latency on the golden cases
+
+Replays every case of tests/autocomplete/cases against its schema padded with
+synthetic tables, keeping one SQLCompletionProvider per schema the way an
+editor does, and reports the latency of SQLCompletionProvider.get(): p50 and
+p95 over all cases, and the slowest cases.
+
+  --tables <n>    Synthetic tables added to each schema (default: 2000)
+  --columns <n>   Columns of each synthetic table (default: 25)
+  --repeat <n>    Calls per case (default: 5)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.autocomplete.autocomplete_adapter import AutocompleteRequest, _create_mock_database, _resolve_current_table, _select_vocab
+from windows.components.stc.autocomplete.auto_complete import SQLCompletionProvider
+
+CASES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "autocomplete")
+
+
+def _padded_schema(schema: dict, tables: int, columns: int) -> dict:
+    synthetic = [
+        {"name": f"synthetic_{index:05d}", "columns": [{"name": f"field_{column:03d}"} for column in range(columns)]}
+        for index in range(tables)
+    ]
+    return {**schema, "tables": list(schema.get("tables", [])) + synthetic}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL autocomplete on the golden cases")
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(CASES_DIRECTORY, "test_config.json"), encoding="utf-8") as file_handle:
+        config = json.load(file_handle)
+
+    databases = {}
+    for variant in ("small", "big"):
+        schema = _padded_schema(config[f"schema_{variant}"], args.tables, args.columns)
+        request = AutocompleteRequest(sql="", dialect="generic", current_table=None, schema=schema)
+        databases[variant] = _create_mock_database(schema, _select_vocab(request))
+
+    providers: dict[tuple[str, str], SQLCompletionProvider] = {}
+    latencies: dict[str, list[float]] = {}
+
+    for file_name in sorted(os.listdir(os.path.join(CASES_DIRECTORY, "cases"))):
+        with open(os.path.join(CASES_DIRECTORY, "cases", file_name), encoding="utf-8") as file_handle:
+            cases = json.load(file_handle)["cases"]
+
+        for case in cases:
+            database = databases[case.get("schema_variant", "small")]
+            current_table_name = case.get("current_table")
+            key = (case.get("schema_variant", "small"), current_table_name or "")
+            if (provider := providers.get(key)) is None:
+                current_table = _resolve_current_table(database, current_table_name)
+                provider = providers[key] = SQLCompletionProvider(get_database=lambda database=database: database, get_current_table=lambda table=current_table: table)
+                # The first call builds what the provider keeps per database: an editor pays it once.
+                provider.get(text="", pos=0)
+
+            position = case["sql"].find("|")
+            text = case["sql"].replace("|", "")
+            position = len(text) if position == -1 else position
+
+            samples = latencies.setdefault(f"{file_name}:{case['case_id']}", [])
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                provider.get(text=text, pos=position)
+                samples.append((time.perf_counter() - started) * 1000)
+
+    all_samples = sorted(sample for samples in latencies.values() for sample in samples)
+    percentile_95 = all_samples[min(len(all_samples) - 1, int(len(all_samples) * 0.95))]
+    print(f"{len(latencies)} cases, {args.tables} extra tables x {args.columns} columns")
+    print(f"p50 {statistics.median(all_samples):.2f} ms   p95 {percentile_95:.2f} ms")
+
+    print(f"\n{'slowest cases':<48} {'median (ms)':>12}")
+    slowest = sorted(latencies.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:10]
+    for case_name, samples in slowest:
+        print(f"{case_name:<48} {statistics.median(samples):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+PeterSQL autocomplete latency on large synthetic schemas
+
+Replays the cases of tests/autocomplete/benchmark_cases, written in the
+golden case format with one file per context group, against synthetic
+databases of growing size: a few core tables with foreign keys and a wide
+table, padded with synthetic tables referencing them. Reports the p50, p95
+and p99 latency of SQLCompletionProvider.get() per schema profile and group.
+
+The results can be saved as a baseline; later runs are compared with it and
+exit with status 1 when a p50 or p95 got slower than the threshold allows.
+
+  --profiles <names>  Schema profiles, comma separated (default: 10,1k,20k,wide)
+  --repeat <n>        Calls per case (default: 20)
+  --baseline <path>   Baseline file (default: autocomplete_benchmark_baseline.json)
+  --save-baseline     Save the results as the baseline instead of comparing
+  --threshold <r>     Slowdown allowed over the baseline (default: 0.25)
+  --min-delta <ms>    Slowdowns under this are noise, whatever the ratio (default: 0.5)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.autocomplete.autocomplete_adapter import AutocompleteRequest, _create_mock_database, _select_vocab
+from windows.components.stc.autocomplete.auto_complete import SQLCompletionProvider
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASES_DIRECTORY = os.path.join(ROOT_DIRECTORY, "tests", "autocomplete", "benchmark_cases")
+
+# name: (tables in total, columns of each synthetic table)
+PROFILES = {
+    "10": (10, 12),
+    "1k": (1_000, 12),
+    "20k": (20_000, 12),
+    "wide": (200, 400),
+}
+
+WIDE_TABLE_COLUMNS = 400
+
+CORE_SCHEMA = {
+    "tables": [
+        {"name": "users", "columns": [{"name": name} for name in ("id", "name", "email", "status", "created_at")]},
+        {
+            "name": "orders",
+            "columns": [{"name": name} for name in ("id", "user_id", "total", "status", "created_at")],
+            "foreign_keys": [{"name": "fk_orders_user_id", "columns": ["user_id"], "reference_table": "users", "reference_columns": ["id"]}],
+        },
+        {
+            "name": "order_items",
+            "columns": [{"name": name} for name in ("id", "order_id", "product_id", "quantity", "price")],
+            "foreign_keys": [
+                {"name": "fk_order_items_order_id", "columns": ["order_id"], "reference_table": "orders", "reference_columns": ["id"]},
+                {"name": "fk_order_items_product_id", "columns": ["product_id"], "reference_table": "products", "reference_columns": ["id"]},
+            ],
+        },
+        {"name": "products", "columns": [{"name": name} for name in ("id", "name", "price", "stock", "category")]},
+        {
+            "name": "events",
+            "columns": [{"name": name} for name in ("id", "user_id", "created_at")]
+            + [{"name": f"attribute_{index:04d}"} for index in range(WIDE_TABLE_COLUMNS - 3)],
+            "foreign_keys": [{"name": "fk_events_user_id", "columns": ["user_id"], "reference_table": "users", "reference_columns": ["id"]}],
+        },
+    ],
+}
+
+# Shared prefixes, so that prefix lookups match a realistic share of the tables.
+SYNTHETIC_PREFIXES = ("audit", "customer", "invoice", "order", "report", "shipment", "stage", "user")
+
+
+def _synthetic_table(database, name: str, column_count: int, references_orders: bool):
+    # Plain objects: the adapter's mocks cost too much time and memory for tens of thousands of tables.
+    table = types.SimpleNamespace(name=name, database=database, columns=[], foreign_keys=[])
+
+    column_names = ["id", "user_id", "order_id", "name", "status", "created_at"]
+    column_names += [f"value_{index:03d}" for index in range(max(0, column_count - len(column_names)))]
+    table.columns = [types.SimpleNamespace(name=column_name, table=table) for column_name in column_names[:column_count]]
+
+    references = [("user_id", "users")] + ([("order_id", "orders")] if references_orders else [])
+    table.foreign_keys = [
+        types.SimpleNamespace(
+            id=index,
+            name=f"fk_{name}_{column}",
+            table=table,
+            columns=[column],
+            reference_table=reference_table,
+            reference_columns=["id"],
+        )
+        for index, (column, reference_table) in enumerate(references, start=1)
+    ]
+    return table
+
+
+def _synthetic_database(table_count: int, column_count: int):
+    request = AutocompleteRequest(sql="", dialect="generic", current_table=None, schema=CORE_SCHEMA)
+    database = _create_mock_database(CORE_SCHEMA, _select_vocab(request))
+
+    tables = list(database.tables)
+    for index in range(max(0, table_count - len(tables))):
+        name = f"{SYNTHETIC_PREFIXES[index % len(SYNTHETIC_PREFIXES)]}_{index:05d}"
+        tables.append(_synthetic_table(database, name, column_count, references_orders=index % 2 == 0))
+
+    database.tables = tables
+    return database
+
+
+def _load_cases() -> list[tuple[str, dict]]:
+    cases = []
+    for file_name in sorted(os.listdir(CASES_DIRECTORY)):
+        with open(os.path.join(CASES_DIRECTORY, file_name), encoding="utf-8") as file_handle:
+            payload = json.load(file_handle)
+        cases.extend((payload["group"], case) for case in payload["cases"])
+    return cases
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def _run_profile(table_count: int, column_count: int, cases: list[tuple[str, dict]], repeat: int) -> dict[str, dict[str, float]]:
+    database = _synthetic_database(table_count, column_count)
+    provider = SQLCompletionProvider(get_database=lambda: database)
+    # The first call builds what the provider keeps per database: an editor pays it once.
+    provider.get(text="", pos=0)
+
+    samples: dict[str, list[float]] = {}
+    for group, case in cases:
+        position = case["sql"].find("|")
+        text = case["sql"].replace("|", "")
+        position = len(text) if position == -1 else position
+
+        group_samples = samples.setdefault(group, [])
+        for _ in range(repeat):
+            started = time.perf_counter()
+            provider.get(text=text, pos=position)
+            group_samples.append((time.perf_counter() - started) * 1000)
+
+    results = {}
+    for group, group_samples in samples.items():
+        group_samples.sort()
+        results[group] = {
+            "p50": _percentile(group_samples, 0.50),
+            "p95": _percentile(group_samples, 0.95),
+            "p99": _percentile(group_samples, 0.99),
+        }
+    return results
+
+
+def _regressions(results: dict, baseline: dict, threshold: float, min_delta: float) -> list[str]:
+    regressions = []
+    for profile, groups in results.items():
+        for group, percentiles in groups.items():
+            if (baseline_percentiles := baseline.get(profile, {}).get(group)) is None:
+                continue
+
+            for metric in ("p50", "p95"):
+                current, previous = percentiles[metric], baseline_percentiles[metric]
+                if current > previous * (1 + threshold) and current - previous > min_delta:
+                    regressions.append(f"{profile:<6} {group:<16} {metric} {previous:.2f} ms -> {current:.2f} ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL autocomplete on large synthetic schemas")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", default=os.path.join(ROOT_DIRECTORY, "autocomplete_benchmark_baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.5)
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    if unknown := [profile for profile in profiles if profile not in PROFILES]:
+        parser.error(f"unknown profiles: {', '.join(unknown)} (known: {', '.join(PROFILES)})")
+
+    cases = _load_cases()
+    results = {}
+
+    print(f"{len(cases)} cases, {args.repeat} calls each")
+    print(f"\n{'profile':<8} {'tables':>7} {'columns':>8} {'group':<16} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for profile in profiles:
+        table_count, column_count = PROFILES[profile]
+        results[profile] = _run_profile(table_count, column_count, cases, args.repeat)
+        for group, percentiles in results[profile].items():
+            print(
+                f"{profile:<8} {table_count:>7} {column_count:>8} {group:<16} "
+                f"{percentiles['p50']:>9.2f} {percentiles['p95']:>9.2f} {percentiles['p99']:>9.2f}"
+            )
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file_handle:
+            json.dump({"repeat": args.repeat, "results": results}, file_handle, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}: run with --save-baseline to create one")
+        return
+
+    with open(args.baseline, encoding="utf-8") as file_handle:
+        baseline = json.load(file_handle)
+
+    if baseline.get("repeat") != args.repeat:
+        print(f"\nnote: the baseline was measured with --repeat {baseline.get('repeat')}, its percentiles are not comparable")
+
+    if regressions := _regressions(results, baseline["results"], args.threshold, args.min_delta):
+        print(f"\n{len(regressions)} regressions over {args.threshold:.0%} against {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+    print(f"\nno regression over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
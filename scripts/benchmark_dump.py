@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+PeterSQL dump benchmark
+
+Dumps a synthetic SQLite database once with one INSERT per row and once with
+extended (multi-row) INSERTs, then restores both files into fresh databases
+and compares file size, dump time and restore time.
+
+  --rows <n>                 Rows in the synthetic table (default: 200000)
+  --max-statement-bytes <n>  Size cap of extended INSERT statements
+"""
+
+import argparse
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from structures.session import Session
+from structures.connection import Connection, ConnectionEngine
+from structures.configurations import SourceConfiguration
+from structures.engines.dump import DEFAULT_MAX_STATEMENT_BYTES
+
+
+def _create_source_database(filename: str, rows: int) -> None:
+    with sqlite3.connect(filename) as connection:
+        connection.execute(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload TEXT, amount REAL)"
+        )
+        connection.executemany(
+            "INSERT INTO events (id, kind, payload, amount) VALUES (?, ?, ?, ?)",
+            ((index, f"kind_{index % 17}", f"payload '{index}'", index * 0.5) for index in range(rows)),
+        )
+
+
+def _dump(filename: str, **dump_kwargs) -> tuple[pathlib.Path, float]:
+    connection = Connection(
+        id=1,
+        name="benchmark",
+        engine=ConnectionEngine.SQLITE,
+        configuration=SourceConfiguration(filename=filename),
+    )
+    session = Session(connection=connection)
+    session.connect()
+    try:
+        database = session.context.get_databases()[0]
+        started = time.perf_counter()
+        dump_path = pathlib.Path(database.dump(**dump_kwargs))
+        return dump_path, time.perf_counter() - started
+    finally:
+        session.disconnect()
+
+
+def _restore(dump_path: pathlib.Path, target: str) -> float:
+    script = dump_path.read_text(encoding="utf-8")
+    with sqlite3.connect(target, isolation_level=None) as connection:
+        started = time.perf_counter()
+        connection.executescript(script)
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL dump/restore")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--max-statement-bytes", type=int, default=DEFAULT_MAX_STATEMENT_BYTES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "source.db")
+        _create_source_database(source, args.rows)
+
+        modes = {
+            "single-row": dict(extended_insert=False),
+            "extended": dict(extended_insert=True, max_statement_bytes=args.max_statement_bytes),
+        }
+
+        print(f"{'mode':<12} {'size (MB)':>10} {'dump (s)':>10} {'restore (s)':>12}")
+        for mode_name, dump_kwargs in modes.items():
+            dump_path, dump_seconds = _dump(source, **dump_kwargs)
+            try:
+                restore_seconds = _restore(dump_path, os.path.join(workdir, f"{mode_name}.db"))
+                size_mb = dump_path.stat().st_size / 1024 / 1024
+                print(f"{mode_name:<12} {size_mb:>10.2f} {dump_seconds:>10.2f} {restore_seconds:>12.2f}")
+            finally:
+                dump_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+PeterSQL execute() overhead micro-benchmark
+
+Times what AbstractContext.execute() adds around the driver call, with a
+cursor that does nothing: once the way it was done before, normalising the
+whitespace of every statement, matching the write regex on the result and
+appending to an observable list whose subscriber runs on the calling thread;
+and once through the current _execute_on_cursor(). A short catalog query and
+a large multi-row INSERT are measured.
+
+  --calls <n>        Calls per short query (default: 50000)
+  --insert-rows <n>  Rows of the large INSERT (default: 20000)
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers.logger import logger
+from helpers.observables import CallbackEvent, ObservableList
+from structures.configurations import SourceConfiguration
+from structures.connection import Connection, ConnectionEngine
+from structures.session import Session
+
+_BEFORE_WRITE_QUERY_RE = re.compile(
+    r"^\s*(INSERT|UPDATE|DELETE|CREATE|DROP|ALTER|TRUNCATE|REPLACE|GRANT|REVOKE|RENAME|LOCK)\b",
+    re.IGNORECASE,
+)
+
+_CATALOG_QUERY = """
+    SELECT name, type, sql
+    FROM sqlite_master
+    WHERE type = 'table'
+      AND name = ?
+    ORDER BY name
+"""
+
+
+class _NullCursor:
+    def execute(self, query, parameters=None):
+        pass
+
+
+def _execute_before(context, cursor, query: str, query_logs: ObservableList) -> None:
+    query_clean = re.sub(r"\s+", " ", str(query)).strip()
+
+    if context.connection.read_only and _BEFORE_WRITE_QUERY_RE.match(query_clean):
+        raise PermissionError("This connection is read-only.")
+
+    logger.debug("execute query: %s", query_clean)
+    query_logs.append(query_clean)
+
+    cursor.execute(query)
+
+    if _BEFORE_WRITE_QUERY_RE.match(query_clean):
+        context.records_counts.invalidate()
+
+
+def _time(calls: int, function) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL execute() overhead")
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--insert-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    large_insert = "INSERT INTO items (id, name, note)\nVALUES\n" + ",\n".join(
+        f"    ({index}, 'item {index}', 'a  note   with   spaces')" for index in range(args.insert_rows)
+    )
+
+    # The UI subscriber used to run on the thread executing the statement.
+    query_logs = ObservableList()
+    query_logs.subscribe(lambda text: f"{text}\n", CallbackEvent.ON_APPEND)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "overhead.db")
+        session = Session(Connection(id=1, name="benchmark", engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=path)))
+        session.connect()
+        try:
+            context, cursor = session.context, _NullCursor()
+            cases = {
+                "catalog query": (_CATALOG_QUERY, args.calls),
+                f"INSERT of {len(large_insert) / 1024 / 1024:.1f} MB": (large_insert, max(1, args.calls // 1000)),
+            }
+
+            print(f"{'statement':<22} {'before (us)':>12} {'after (us)':>12}")
+            for label, (query, calls) in cases.items():
+                before = _time(calls, lambda: _execute_before(context, cursor, query, query_logs))
+                after = _time(calls, lambda: context._execute_on_cursor(cursor, query))
+                print(f"{label:<22} {before:>12.1f} {after:>12.1f}")
+        finally:
+            session.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+PeterSQL bulk edit benchmark
+
+Edits one column of every row of a synthetic SQLite table and applies the
+edits three ways: one SELECT and one UPDATE per record with the values
+written into the SQL text, as before bound parameters; one parameterised
+SELECT and UPDATE per record through SQLRecord.update(); and one
+RecordsBatch, which reads the rows back by chunk and runs the UPDATEs with
+executemany. Rows per second are reported for each.
+
+  --rows <n>         Rows in the synthetic table (default: 20000)
+  --chunk-size <n>   Rows per RecordsBatch statement
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from structures.configurations import SourceConfiguration
+from structures.connection import Connection, ConnectionEngine
+from structures.engines.records_batch import DEFAULT_CHUNK_SIZE, RecordsBatch
+from structures.session import Session
+
+
+def _create_database(path: str, rows: int) -> None:
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL, price REAL)")
+        connection.executemany(
+            "INSERT INTO items (id, name, price) VALUES (?, ?, ?)",
+            ((index, f"item {index}", index * 0.25) for index in range(1, rows + 1)),
+        )
+
+
+def _apply_literal(table, records) -> None:
+    context = table.database.context
+    for record in records:
+        with context.transaction():
+            context.execute(f"SELECT * FROM {table.fully_qualified_name} WHERE id = {record.values['id']}")
+            context.fetchone()
+            name = str(record.values["name"]).replace("'", "''")
+            context.execute(f"UPDATE {table.fully_qualified_name} SET name = '{name}' WHERE id = {record.values['id']}")
+
+
+def _apply_per_record(table, records) -> None:
+    for record in records:
+        record.update()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL bulk edits")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    modes = {
+        "literal SQL": _apply_literal,
+        "parameterised": _apply_per_record,
+        "batch": lambda table, records: RecordsBatch(table, chunk_size=args.chunk_size).save(records),
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bulk_edit.db")
+        _create_database(path, args.rows)
+
+        session = Session(Connection(id=1, name="benchmark", engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=path)))
+        session.connect()
+        try:
+            database = session.context.get_databases()[0]
+            table = next(table for table in database.tables if table.name == "items")
+            table.load_records(limit=args.rows)
+            records = list(table.records)
+
+            print(f"{'mode':<14} {'seconds':>10} {'rows/s':>12}")
+            for mode_name, apply in modes.items():
+                for record in records:
+                    record.values["name"] = f"{mode_name} {record.values['id']}"
+
+                started = time.perf_counter()
+                apply(table, records)
+                elapsed = time.perf_counter() - started
+                print(f"{mode_name:<14} {elapsed:>10.2f} {len(records) / elapsed:>12.0f}")
+        finally:
+            session.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+PeterSQL result set memory benchmark
+
+Builds a synthetic query result and measures, with tracemalloc, the memory held
+by the representations drivers hand over today (a list of dicts as returned by
+DictCursor/RealDictCursor, and a list of sqlite3.Row) against ColumnarResultSet.
+Also times random cell reads, the grid's access pattern.
+
+  --rows <n>    Rows in the synthetic result (default: 500000)
+  --reads <n>   Random cell reads to time (default: 1000000)
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers.result_set import ColumnarResultSet
+
+COLUMNS = ["id", "customer_id", "status", "amount", "paid", "note", "created_at"]
+
+
+def _create_source(count: int) -> sqlite3.Connection:
+    statuses = ["new", "paid", "shipped", "cancelled"]
+    started = datetime.datetime(2024, 1, 1)
+
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.execute(f"CREATE TABLE result ({', '.join(COLUMNS)})")
+    connection.executemany(
+        f"INSERT INTO result VALUES ({', '.join('?' * len(COLUMNS))})",
+        (
+            (
+                index,
+                index % 5000,
+                statuses[index % len(statuses)],
+                round(index * 0.37, 2),
+                index % 3 == 0,
+                None if index % 4 else f"note {index}",
+                (started + datetime.timedelta(minutes=index)).isoformat(" "),
+            )
+            for index in range(count)
+        ),
+    )
+    return connection
+
+
+def _measure(label: str, build) -> tuple[object, int]:
+    # Every representation is built from a fresh fetch, so the values it holds are counted too.
+    tracemalloc.start()
+    data = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {size / 1024 / 1024:>10.1f}")
+    return data, size
+
+
+def _fetch_columnar(connection: sqlite3.Connection) -> ColumnarResultSet:
+    cursor = connection.execute("SELECT * FROM result ORDER BY id")
+    result = ColumnarResultSet(COLUMNS)
+    while rows := cursor.fetchmany(1000):
+        result.extend(rows)
+    return result
+
+
+def _time_reads(label: str, read, row_count: int, reads: int) -> None:
+    generator = random.Random(0)
+    cells = [(generator.randrange(row_count), generator.randrange(len(COLUMNS))) for _ in range(reads)]
+
+    started = time.perf_counter()
+    for row, col in cells:
+        read(row, col)
+    elapsed = time.perf_counter() - started
+
+    print(f"{label:<22} {elapsed / reads * 1e9:>10.0f} ns/cell")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL result set memory")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--reads", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    connection = _create_source(args.rows)
+    query = "SELECT * FROM result ORDER BY id"
+
+    print(f"{'representation':<22} {'memory (MB)':>10}")
+    dict_rows, dict_size = _measure("list of dicts", lambda: [dict(row) for row in connection.execute(query)])
+    sqlite_rows, _sqlite_size = _measure("list of sqlite3.Row", lambda: connection.execute(query).fetchall())
+    columnar, columnar_size = _measure("ColumnarResultSet", lambda: _fetch_columnar(connection))
+    print(f"columnar / dicts: {columnar_size / dict_size:.0%}")
+
+    print()
+    _time_reads("list of dicts", lambda row, col: dict_rows[row][COLUMNS[col]], args.rows, args.reads)
+    _time_reads("list of sqlite3.Row", lambda row, col: sqlite_rows[row][col], args.rows, args.reads)
+    _time_reads("ColumnarResultSet", columnar.get, args.rows, args.reads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+PeterSQL SQLite introspection benchmark
+
+Creates a database with thousands of tables, each with an index and a foreign
+key, and times loading every table's columns and indexes one table at a time:
+once re-reading sqlite_master on every call, as before the per-context
+snapshot, and once with the snapshot. The bulk load used by the explorer is
+timed too. sqlite_master scans are counted from the query log.
+
+  --tables <n>   Tables in the generated database (default: 3000)
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from structures.configurations import SourceConfiguration
+from structures.connection import Connection, ConnectionEngine
+from structures.engines.context import QUERY_LOGS
+from structures.session import Session
+
+
+def _create_database(path: str, count: int) -> None:
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE t0 (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    for index in range(1, count):
+        connection.execute(
+            f"CREATE TABLE t{index} (id INTEGER PRIMARY KEY, parent_id INTEGER REFERENCES t{index - 1} (id), "
+            f"name TEXT NOT NULL, created_at TEXT, CHECK (length(name) > 0))"
+        )
+        connection.execute(f"CREATE INDEX t{index}_name ON t{index} (name)")
+    connection.commit()
+    connection.close()
+
+
+def _open_session(path: str) -> Session:
+    session = Session(Connection(id=1, name="benchmark", engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=path)))
+    session.connect()
+    return session
+
+
+def _run(label: str, load) -> None:
+    # The query log only keeps its last entries: count the scans as they are flushed.
+    scans = 0
+
+    def count_scans(entries: list[str]) -> None:
+        nonlocal scans
+        scans += sum("sqlite_master ORDER BY" in entry for entry in entries)
+
+    QUERY_LOGS.subscribe(count_scans)
+    started = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - started
+    QUERY_LOGS.flush()
+    QUERY_LOGS.unsubscribe(count_scans)
+
+    print(f"{label:<34} {elapsed:>10.2f} {scans:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PeterSQL SQLite introspection")
+    parser.add_argument("--tables", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.db")
+        _create_database(path, args.tables)
+
+        print(f"{'load':<34} {'time (s)':>10} {'scans':>10}")
+
+        session = _open_session(path)
+        context = session.context
+        tables = list(context.get_databases()[0].tables)
+
+        def reread_every_call():
+            for table in tables:
+                context._schema_version = None
+                context.get_columns(table)
+                context._schema_version = None
+                context.get_indexes(table)
+
+        def snapshot():
+            for table in tables:
+                context.get_columns(table)
+                context.get_indexes(table)
+
+        _run("per table, re-read each call", reread_every_call)
+        _run("per table, snapshot", snapshot)
+        session.disconnect()
+
+        session = _open_session(path)
+        database = session.context.get_databases()[0]
+        _run("bulk, every table", lambda: session.context.load_tables_schema(database))
+        session.disconnect()
+
+
+if __name__ == "__main__":
+    main()
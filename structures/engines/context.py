@@ -1,10 +1,13 @@
 import abc
 import contextlib
+import dataclasses
+import functools
 import re
 import threading
+import weakref
 
 from gettext import gettext as _
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
 
 import pymysql
 import psycopg2
@@ -13,7 +16,8 @@ import yaml
 
 from constants import WORKDIR
 from helpers.logger import logger
-from helpers.observables import ObservableList, ObservableLazyList
+from helpers.observables import ObservableLazyList
+from helpers.scheduler import BackgroundScheduler, ScheduledTask, TaskPriority, current_task
 
 from structures.helpers import SQLTypeAlias
 from structures.ssh_tunnel import SSHTunnel
@@ -31,20 +35,58 @@ from structures.engines.database import (
     SQLTrigger,
 )
 from structures.engines.indextype import SQLIndexType, StandardIndexType
+from structures.engines.metadata_cache import CacheScope, CachedTableSchema, CatalogRows, MetadataCache
+from structures.engines.query_log import NormalisedQuery, QueryLog
+from structures.engines.records_count import RecordsCountCache
 
-QUERY_LOGS: ObservableList[str] = ObservableList()
+QUERY_LOGS = QueryLog()
 
 SQL_SAFE_NAME_REGEX = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
 
 
+@dataclasses.dataclass(frozen=True)
+class RecordsSeek:
+    """Position of a records page expressed on key columns instead of a row offset.
+
+    With neither ``after`` nor ``before`` the page starts at the first row, or
+    ends at the last row when ``from_end`` is set.
+    """
+    key_columns: tuple[str, ...]
+    after: Optional[tuple[Any, ...]] = None
+    before: Optional[tuple[Any, ...]] = None
+    from_end: bool = False
+
+    @property
+    def is_descending(self) -> bool:
+        return self.before is not None or self.from_end
+
+
+@dataclasses.dataclass
+class TableSchema:
+    """Columns, indexes, checks and foreign keys of one table, read by bulk introspection."""
+    columns: list[SQLColumn] = dataclasses.field(default_factory=list)
+    indexes: list[SQLIndex] = dataclasses.field(default_factory=list)
+    checks: list[SQLCheck] = dataclasses.field(default_factory=list)
+    foreign_keys: list[SQLForeignKey] = dataclasses.field(default_factory=list)
+    # Catalog rows the lists were built from, by part: what the metadata cache stores.
+    rows: dict[str, list[dict[str, Any]]] = dataclasses.field(default_factory=dict, compare=False, repr=False)
+
+
+TABLE_SCHEMA_PARTS: tuple[str, ...] = ("columns", "indexes", "checks", "foreign_keys")
+
+
 class ConnectionLostError(Exception):
     """Raised when the database connection has been lost and needs user intervention."""
     pass
 
-_WRITE_QUERY_RE = re.compile(
-    r"^\s*(INSERT|UPDATE|DELETE|CREATE|DROP|ALTER|TRUNCATE|REPLACE|GRANT|REVOKE|RENAME|LOCK)\b",
-    re.IGNORECASE,
-)
+_WRITE_KEYWORDS = frozenset({"INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER", "TRUNCATE", "REPLACE", "GRANT", "REVOKE", "RENAME", "LOCK"})
+_FIRST_WORD_RE = re.compile(r"\s*(\w+)")
+
+
+def _is_write_query(query: str) -> bool:
+    # The first keyword decides: the rest of a multi-megabyte statement is never scanned.
+    return (match := _FIRST_WORD_RE.match(query)) is not None and match.group(1).upper() in _WRITE_KEYWORDS
+
 
 # PyMySQL/MySQL/MariaDB disconnect error codes and message fragments
 _PYMYSQL_DISCONNECT_CODES: frozenset[int] = frozenset({
@@ -77,6 +119,24 @@ class AbstractContext(abc.ABC):
 
     IDENTIFIER_QUOTE_CHAR: str = '"'
     DEFAULT_STATEMENT_SEPARATOR: str = ";"
+    # Marker of a bound parameter in the DB-API paramstyle of the driver.
+    PARAMETER_PLACEHOLDER: str = "%s"
+    # Most parameters a single statement may bind.
+    MAX_STATEMENT_PARAMETERS: int = 65535
+
+    # When a table's columns, indexes, checks or foreign keys are first needed,
+    # read them for every table of the database with a few catalog queries.
+    bulk_introspection: bool = True
+
+    # Catalog rows kept between sessions. Set by the application on the contexts it shows;
+    # worker contexts leave it unset.
+    metadata_cache: Optional[MetadataCache] = None
+
+    # Where background work such as metadata revalidation runs. Set by the session owning the context.
+    scheduler: Optional[BackgroundScheduler] = None
+
+    # Row counts forgotten when a write runs on this context. Set by the session and shared with worker contexts.
+    records_counts: Optional[RecordsCountCache] = None
 
     databases: ObservableLazyList[SQLDatabase]
 
@@ -87,6 +147,13 @@ class AbstractContext(abc.ABC):
         self.databases = ObservableLazyList(self.get_databases)
         self._connection_lost_handler: Optional[Callable[["AbstractContext", str], None]] = None
         self._connection_lost_lock = threading.Lock()
+        # Tables already filled by a bulk load, by id(): loading one of their lists again is a refresh.
+        self._bulk_loaded_tables: weakref.WeakValueDictionary[int, SQLTable] = weakref.WeakValueDictionary()
+        self._metadata_changed_handler: Optional[Callable[["AbstractContext", SQLDatabase, set[str], bool], None]] = None
+        self._revalidated_databases: set[str] = set()
+        # Tables whose schema a background prefetch is reading, by id(), with the task reading it.
+        self._prefetching_tables: dict[int, tuple[SQLTable, ScheduledTask]] = {}
+        self._prefetch_lock = threading.Lock()
 
     def __del__(self):
         """Ensure resources are released during object destruction."""
@@ -333,6 +400,83 @@ class AbstractContext(abc.ABC):
             raise RuntimeError("Not connected to the database. Call connect() first.")
         return self._cursor
 
+    @property
+    def supports_worker_contexts(self) -> bool:
+        """Return True when an independent connection sees the same data as this one."""
+        return True
+
+    def build_worker_connection(self) -> Connection:
+        """Return a copy of the connection that reaches the server through this context's tunnel."""
+        connection = self.connection.copy()
+
+        if not connection.has_enabled_tunnel():
+            return connection
+
+        configuration = getattr(connection, "configuration", None)
+        if configuration is not None and hasattr(configuration, "_replace"):
+            replace_kwargs = {}
+
+            if hasattr(configuration, "hostname") and getattr(self, "host", None):
+                replace_kwargs["hostname"] = self.host
+
+            if hasattr(configuration, "port") and getattr(self, "port", None) is not None:
+                replace_kwargs["port"] = int(self.port)
+
+            if replace_kwargs:
+                connection.configuration = configuration._replace(**replace_kwargs)
+
+        connection.ssh_tunnel = None
+        return connection
+
+    def create_worker_context(self, database: Optional[SQLDatabase] = None) -> "AbstractContext":
+        """Open an independent context on the same server, for use from a worker thread."""
+        context = self.__class__(self.build_worker_connection())
+        context.records_counts = self.records_counts
+
+        connect_kwargs: dict[str, Any] = dict(skip_before_connect=True, skip_after_connect=True, **self._worker_connect_kwargs())
+        if database is not None:
+            connect_kwargs["database"] = database.name
+
+        context.connect(**connect_kwargs)
+        return context
+
+    def _worker_connect_kwargs(self) -> dict[str, Any]:
+        """Engine-specific connect() arguments for worker contexts."""
+        return {}
+
+    def reset_session_state(self, database_name: Optional[str] = None) -> None:
+        """Undo what a borrower may have left on this connection before it is handed out again.
+
+        Rolls back an open transaction and restores the session settings the
+        connection was opened with, ``database_name`` included. Raises when the
+        connection no longer works.
+        """
+        # A cursor of its own, and no query log: these are not the user's statements.
+        cursor = self._connection.cursor()
+        try:
+            for statement in self._session_reset_statements(database_name):
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def _session_reset_statements(self, database_name: Optional[str]) -> list[str]:
+        return ["ROLLBACK"]
+
+    def export_snapshot(self) -> Optional[str]:
+        """Open a transaction whose snapshot other contexts can import.
+
+        Returns ``None`` when the engine cannot share snapshots between connections.
+        """
+        return None
+
+    def import_snapshot(self, snapshot_id: str) -> None:
+        """Open a transaction that reads from a snapshot exported by another context."""
+        raise NotImplementedError
+
+    def release_snapshot(self) -> None:
+        """Close the transaction opened by export_snapshot() or import_snapshot()."""
+        self.execute("COMMIT")
+
     @staticmethod
     def get_temporary_id(container: list[SQLTypeAlias]) -> int:
         """Generate a temporary negative identifier for new objects."""
@@ -393,6 +537,432 @@ class AbstractContext(abc.ABC):
         """Return foreign keys for the given table."""
         raise NotImplementedError
 
+    def get_checks(self, table: SQLTable) -> list[SQLCheck]:
+        """Return check constraints for the given table."""
+        return []
+
+    def get_tables_schema(self, database: SQLDatabase, tables: list[SQLTable]) -> Optional[dict[int, TableSchema]]:
+        """Read the schema of many tables at once, keyed by ``id(table)``.
+
+        Engines override this with a handful of set-based catalog queries;
+        ``None`` means the engine only introspects table by table.
+        """
+        return None
+
+    def table_schema_builders(self) -> dict[str, Callable[[SQLTable, CatalogRows], list[Any]]]:
+        """Return, by schema part, the builder turning one table's catalog rows into objects.
+
+        Engines that introspect from plain catalog rows return their builders, so
+        the metadata cache can rebuild a table's schema from stored rows. An empty
+        mapping keeps the engine's metadata out of the cache.
+        """
+        return {}
+
+    def table_key(self, table: SQLTable) -> str:
+        """Return the name identifying ``table`` within its database, in catalog rows and in the metadata cache."""
+        return table.name
+
+    def get_tables_fingerprints(self, database: SQLDatabase) -> dict[str, str]:
+        """Return, by table_key(), a cheap catalog value that changes when a table's definition changes."""
+        raise NotImplementedError
+
+    def _select_tables(self, database: SQLDatabase) -> CatalogRows:
+        """Read the catalog rows get_tables() builds the tables of ``database`` from."""
+        raise NotImplementedError
+
+    def _build_tables(self, database: SQLDatabase, rows: CatalogRows) -> list[SQLTable]:
+        raise NotImplementedError
+
+    def _select_tables_schema(self, database: SQLDatabase) -> dict[str, dict[str, CatalogRows]]:
+        """Read the schema catalog rows of every table of ``database``, by table_key() and part."""
+        raise NotImplementedError
+
+    def table_schema_handlers(self) -> dict[str, Callable[[SQLTable], list[Any]]]:
+        """Return the lazy-list handlers for a table built by get_tables()."""
+        return {
+            f"get_{part}_handler": functools.partial(self._load_table_schema_part, part=part)
+            for part in TABLE_SCHEMA_PARTS
+        }
+
+    def load_tables(self, database: SQLDatabase) -> list[SQLTable]:
+        """Return the tables of ``database``, from the metadata cache when it has them.
+
+        Tables served from the cache are checked against the server in the
+        background; see set_metadata_changed_handler().
+        """
+        if (scope := self._metadata_scope(database)) is None:
+            return self.get_tables(database)
+
+        if (rows := self.metadata_cache.load_tables(scope)) is not None:
+            self._revalidate_metadata(database, scope)
+            return self._build_tables(database, rows)
+
+        rows = self._select_tables(database)
+        self.metadata_cache.store_tables(scope, rows)
+        return self._build_tables(database, rows)
+
+    def load_tables_schema(self, database: SQLDatabase, tables: Optional[list[SQLTable]] = None) -> None:
+        """Fill the columns, indexes, checks and foreign keys of ``tables`` (all tables by default) in one pass.
+
+        Lists that are already loaded are left untouched.
+        """
+        self._bulk_load_tables_schema(database, list(database.tables) if tables is None else tables)
+
+    def _load_table_schema_part(self, table: SQLTable, part: str) -> list[Any]:
+        if self.bulk_introspection and not table.is_new and id(table) not in self._bulk_loaded_tables:
+            try:
+                schemas = self._bulk_load_tables_schema(table.database, list(table.database.tables), loading=getattr(table, part))
+            except Exception as ex:
+                # Catalog views differ across server versions: fall back to per-table queries for good.
+                logger.warning("Bulk introspection failed, loading tables one by one: %s", ex, exc_info=True)
+                self.bulk_introspection = False
+                schemas = {}
+
+            if (schema := schemas.get(id(table))) is not None:
+                return getattr(schema, part)
+
+        return getattr(self, f"get_{part}")(table)
+
+    def _bulk_load_tables_schema(
+            self,
+            database: SQLDatabase,
+            tables: list[SQLTable],
+            loading: Optional[ObservableLazyList] = None,
+    ) -> dict[int, TableSchema]:
+        # ``loading`` is the list whose loader triggered this call: it is filled by its own return value.
+        pending = [table for table in tables if not table.is_new and id(table) not in self._bulk_loaded_tables]
+        if not pending:
+            return {}
+
+        schemas = self._load_cached_tables_schema(database, pending)
+        if missing := [table for table in pending if id(table) not in schemas]:
+            # Fingerprints are read first: a change landing during the schema read then shows up as stale.
+            fingerprints = self._read_tables_fingerprints(database)
+            if (read := self.get_tables_schema(database, missing)) is None:
+                return {}
+
+            schemas.update(read)
+            self._store_tables_schema(database, missing, read, fingerprints)
+
+        for table in pending:
+            schema = schemas.setdefault(id(table), TableSchema())
+            self._bulk_loaded_tables[id(table)] = table
+
+            for part in TABLE_SCHEMA_PARTS:
+                lazy_list = getattr(table, part)
+                if lazy_list is not loading and not lazy_list.is_loaded:
+                    lazy_list.set_value(getattr(schema, part))
+
+        return schemas
+
+    @staticmethod
+    def _group_catalog_rows(
+            row_key: Callable[[dict[str, Any]], str],
+            rows_by_part: dict[str, CatalogRows],
+    ) -> dict[str, dict[str, CatalogRows]]:
+        """Split catalog rows read for a whole database by table, then by schema part."""
+        grouped: dict[str, dict[str, CatalogRows]] = {}
+        for part, rows in rows_by_part.items():
+            for row in rows:
+                grouped.setdefault(row_key(row), {}).setdefault(part, []).append(row)
+
+        return grouped
+
+    def _build_tables_schema(
+            self,
+            tables_by_key: dict[str, SQLTable],
+            rows_by_key: dict[str, dict[str, CatalogRows]],
+            builders: dict[str, Callable[[SQLTable, CatalogRows], list[Any]]],
+    ) -> dict[int, TableSchema]:
+        """Build each table's objects from its catalog rows, with the builders the per-table getters use."""
+        return {
+            id(table): self._build_table_schema(table, rows_by_key.get(key, {}), builders)
+            for key, table in tables_by_key.items()
+        }
+
+    @staticmethod
+    def _build_table_schema(
+            table: SQLTable,
+            rows_by_part: dict[str, CatalogRows],
+            builders: dict[str, Callable[[SQLTable, CatalogRows], list[Any]]],
+    ) -> TableSchema:
+        schema = TableSchema(rows=rows_by_part)
+        for part, build in builders.items():
+            if rows := rows_by_part.get(part):
+                setattr(schema, part, build(table, rows))
+
+        return schema
+
+    # METADATA CACHE
+    def _metadata_scope(self, database: SQLDatabase) -> Optional[CacheScope]:
+        if self.metadata_cache is None or self.connection.is_new or not self.table_schema_builders():
+            return None
+
+        return CacheScope(self.connection.id, database.name, self.server_version)
+
+    def _load_cached_tables_schema(self, database: SQLDatabase, tables: list[SQLTable]) -> dict[int, TableSchema]:
+        if (scope := self._metadata_scope(database)) is None:
+            return {}
+
+        tables_by_key = {self.table_key(table): table for table in tables}
+        if not (cached := self.metadata_cache.load_schemas(scope, list(tables_by_key))):
+            return {}
+
+        self._revalidate_metadata(database, scope)
+
+        builders = self.table_schema_builders()
+        return {
+            id(table): self._build_table_schema(table, cached[key].parts, builders)
+            for key, table in tables_by_key.items()
+            if key in cached
+        }
+
+    def _read_tables_fingerprints(self, database: SQLDatabase) -> Optional[dict[str, str]]:
+        if self._metadata_scope(database) is None:
+            return None
+
+        try:
+            return self.get_tables_fingerprints(database)
+        except Exception as ex:
+            logger.warning("Cannot read table fingerprints, schemas are not cached: %s", ex, exc_info=True)
+            return None
+
+    def _store_tables_schema(
+            self,
+            database: SQLDatabase,
+            tables: list[SQLTable],
+            schemas: dict[int, TableSchema],
+            fingerprints: Optional[dict[str, str]],
+    ) -> None:
+        if fingerprints is None or (scope := self._metadata_scope(database)) is None:
+            return
+
+        self.metadata_cache.store_schemas(scope, {
+            key: CachedTableSchema(fingerprints[key], schemas[id(table)].rows)
+            for table in tables
+            if (key := self.table_key(table)) in fingerprints and id(table) in schemas
+        })
+
+    def set_metadata_changed_handler(
+            self,
+            handler: Optional[Callable[["AbstractContext", SQLDatabase, set[str], bool], None]],
+    ) -> None:
+        """Register a callback invoked, from a worker thread, when cached metadata turns out to be stale.
+
+        It receives the context, the database, the keys of the tables whose schema
+        changed and whether the table list changed, and is expected to call
+        apply_metadata_changes() on the thread that owns the models.
+        """
+        self._metadata_changed_handler = handler
+
+    def _revalidate_metadata(self, database: SQLDatabase, scope: CacheScope) -> None:
+        # Once per database and session: later loads already read what the check stored.
+        # Background work runs on the session scheduler only: a context without one checks nothing.
+        if database.name in self._revalidated_databases or not self.supports_worker_contexts or self.scheduler is None:
+            return
+
+        self._revalidated_databases.add(database.name)
+        self.scheduler.submit(TaskPriority.PREFETCH, self._do_revalidate_metadata, database, scope, key=("revalidate", database.name))
+
+    def _do_revalidate_metadata(self, database: SQLDatabase, scope: CacheScope) -> None:
+        """Compare the cached metadata of ``database`` with the server and store what changed."""
+        cached_rows = self.metadata_cache.load_tables(scope) or []
+        cached_schemas = self.metadata_cache.load_schemas(scope)
+
+        try:
+            context = self.create_worker_context(database)
+            try:
+                table_rows = context._select_tables(database)
+                fingerprints = context.get_tables_fingerprints(database)
+                changed = {
+                    key for key, cached in cached_schemas.items()
+                    if key in fingerprints and cached.fingerprint != fingerprints[key]
+                }
+                if changed:
+                    rows_by_key = context._select_tables_schema(database)
+                    self.metadata_cache.store_schemas(scope, {
+                        key: CachedTableSchema(fingerprints[key], rows_by_key.get(key, {})) for key in changed
+                    })
+            finally:
+                context.disconnect()
+        except Exception as ex:
+            logger.warning("Cannot revalidate cached metadata of %s: %s", database.name, ex, exc_info=True)
+            return
+
+        self.metadata_cache.discard_schemas(scope, [key for key in cached_schemas if key not in fingerprints])
+        self.metadata_cache.store_tables(scope, table_rows)
+
+        table_keys = {self.table_key(table) for table in self._build_tables(database, table_rows)}
+        tables_changed = table_keys != {self.table_key(table) for table in self._build_tables(database, cached_rows)}
+        logger.debug("Revalidated cached metadata of %s: %d tables changed", database.name, len(changed))
+
+        if (changed or tables_changed) and (handler := self._metadata_changed_handler) is not None:
+            handler(self, database, changed, tables_changed)
+
+    def apply_metadata_changes(self, database: SQLDatabase, changed: set[str], tables_changed: bool) -> None:
+        """Rebuild, from the metadata cache, the loaded models a background check found stale.
+
+        Call it on the thread that owns the models.
+        """
+        if tables_changed:
+            database.tables.refresh()
+            return
+
+        if not database.tables.is_loaded:
+            return
+
+        stale = [table for table in database.tables if self.table_key(table) in changed]
+        schemas = self._load_cached_tables_schema(database, stale)
+
+        for table in stale:
+            # Lists not loaded yet are read from the cache when first needed.
+            self._bulk_loaded_tables.pop(id(table), None)
+
+            for part in TABLE_SCHEMA_PARTS:
+                if (lazy_list := getattr(table, part)).is_loaded:
+                    if (schema := schemas.get(id(table))) is not None:
+                        lazy_list.set_value(getattr(schema, part))
+                    else:
+                        lazy_list.refresh()
+
+    # SCHEMA PREFETCH
+    def prefetch_tables_schema(
+            self,
+            database: SQLDatabase,
+            on_loaded: Callable[["AbstractContext", SQLDatabase, list[SQLTable], dict[int, TableSchema]], None],
+            first: Iterable[SQLTable] = (),
+    ) -> Optional[ScheduledTask]:
+        """Read the columns, indexes, checks and foreign keys of the tables of ``database`` on a worker connection.
+
+        Tables of ``first`` are read, and handed over, before the others. Tables
+        already loaded or being read are skipped. ``on_loaded`` is called from the
+        worker thread with the context, the database, the tables read and their
+        schemas by ``id(table)``, and is expected to call apply_tables_schema() on
+        the thread that owns the models. Until then is_prefetching() tells which
+        tables are on their way. Returns ``None`` when there is nothing to read or
+        the engine cannot read it in the background.
+
+        The table list itself is read on the calling thread if it is not loaded yet.
+        """
+        if self.scheduler is None or not self.supports_worker_contexts or not self.bulk_introspection:
+            return None
+
+        first_ids = {id(table) for table in first}
+        with self._prefetch_lock:
+            pending = [
+                table for table in database.tables
+                if not table.is_new
+                and id(table) not in self._bulk_loaded_tables
+                and not self.is_prefetching(table)
+                and not table.columns.is_loaded
+            ]
+            if not pending:
+                return None
+
+            batches = [
+                batch for batch in (
+                    [table for table in pending if id(table) in first_ids],
+                    [table for table in pending if id(table) not in first_ids],
+                )
+                if batch
+            ]
+            task = self.scheduler.submit(TaskPriority.PREFETCH, self._do_prefetch_tables_schema, database, batches, on_loaded)
+            self._prefetching_tables.update((id(table), (table, task)) for table in pending)
+
+        return task
+
+    def is_prefetching(self, table: SQLTable) -> bool:
+        """Return True while a background prefetch is reading, or handing over, the schema of ``table``."""
+        if (entry := self._prefetching_tables.get(id(table))) is None:
+            return False
+
+        prefetched, task = entry
+        # A cancelled task, e.g. by a disconnect, may hand nothing over.
+        return prefetched is table and not task.is_cancelled
+
+    def apply_tables_schema(self, database: SQLDatabase, tables: list[SQLTable], schemas: dict[int, TableSchema]) -> None:
+        """Fill the lists a background prefetch read, leaving those loaded meanwhile untouched.
+
+        Call it on the thread that owns the models.
+        """
+        self._forget_prefetching(tables)
+
+        if not database.tables.is_loaded:
+            return
+
+        # The tables list may have been reloaded since: only its current tables are filled.
+        current = {id(table) for table in database.tables}
+        for table in tables:
+            if id(table) not in current or id(table) in self._bulk_loaded_tables or (schema := schemas.get(id(table))) is None:
+                continue
+
+            self._bulk_loaded_tables[id(table)] = table
+            for part in TABLE_SCHEMA_PARTS:
+                if not (lazy_list := getattr(table, part)).is_loaded:
+                    lazy_list.set_value(getattr(schema, part))
+
+    def _do_prefetch_tables_schema(
+            self,
+            database: SQLDatabase,
+            batches: list[list[SQLTable]],
+            on_loaded: Callable[["AbstractContext", SQLDatabase, list[SQLTable], dict[int, TableSchema]], None],
+    ) -> None:
+        task = current_task()
+        handed_over = 0
+
+        try:
+            context = self.create_worker_context(database)
+            if task is not None:
+                task.set_cancel_handler(context.cancel_running_query)
+            try:
+                for tables in batches:
+                    if task is not None and task.is_cancelled:
+                        break
+
+                    schemas = self._read_tables_schema_with(context, database, tables)
+                    on_loaded(self, database, tables, schemas)
+                    handed_over += 1
+            finally:
+                if task is not None:
+                    task.set_cancel_handler(None)
+                context.disconnect()
+        except Exception as ex:
+            if task is None or not task.is_cancelled:
+                logger.warning("Cannot prefetch the schema of %s: %s", database.name, ex, exc_info=True)
+        finally:
+            # Tables not handed over are read on first use, as without a prefetch.
+            self._forget_prefetching([table for tables in batches[handed_over:] for table in tables])
+
+    def _read_tables_schema_with(self, context: "AbstractContext", database: SQLDatabase, tables: list[SQLTable]) -> dict[int, TableSchema]:
+        """Read the schema of ``tables`` from the metadata cache, or through ``context``, storing what the server returned."""
+        schemas = self._load_cached_tables_schema(database, tables)
+        if missing := [table for table in tables if id(table) not in schemas]:
+            fingerprints = None
+            if self._metadata_scope(database) is not None:
+                try:
+                    fingerprints = context.get_tables_fingerprints(database)
+                except Exception as ex:
+                    logger.warning("Cannot read table fingerprints, schemas are not cached: %s", ex, exc_info=True)
+
+            if (read := context.get_tables_schema(database, missing)) is not None:
+                schemas.update(read)
+                self._store_tables_schema(database, missing, read, fingerprints)
+
+        return schemas
+
+    def _forget_prefetching(self, tables: list[SQLTable]) -> None:
+        with self._prefetch_lock:
+            for table in tables:
+                if (entry := self._prefetching_tables.get(id(table))) is not None and entry[0] is table:
+                    del self._prefetching_tables[id(table)]
+
+    def _table_filter(self, column: str, table_name: Optional[str]) -> tuple[str, list[Any]]:
+        """Return the condition restricting a catalog query to one table, or nothing for the whole database, with its parameters."""
+        if table_name is None:
+            return "", []
+
+        return f"AND {column} = {self.PARAMETER_PLACEHOLDER}", [table_name]
+
     @abc.abstractmethod
     def build_empty_database(self, /, name: str = "") -> SQLDatabase:
         """Build a new in-memory database model with default values."""
@@ -523,8 +1093,12 @@ class AbstractContext(abc.ABC):
             limit: int = 1000,
             offset: int = 0,
             orders: Optional[str] = None,
+            parameters: Optional[Sequence[Any]] = None,
     ) -> list[dict[str, Any]]:
-        """Fetch records from a table using optional filtering and pagination."""
+        """Fetch records from a table using optional filtering and pagination.
+
+        ``parameters`` are bound to the placeholders of ``filters``.
+        """
         logger.debug(f"get records for table={table.name}")
         QUERY_LOGS.append(f"/* get_records for table={table.name} */")
         if table is None or table.is_new:
@@ -538,39 +1112,237 @@ class AbstractContext(abc.ABC):
         if orders:
             order = f"ORDER BY {orders}"
 
-        database_identifier = table.database.quoted_name if table.database else ""
-        table_identifier = table.quoted_name
-
-        if database_identifier:
-            from_clause = f"{database_identifier}.{table_identifier}"
-        else:
-            from_clause = table_identifier
-
         query = [
             f"SELECT *",
-            f"FROM {from_clause}",
+            f"FROM {self._records_from_clause(table)}",
             f"{where}",
             f"{order}",
             f"LIMIT {limit} OFFSET {offset}",
         ]
 
-        self.execute(" ".join(query))
+        self.execute(" ".join(query), parameters)
 
         return self.fetchall()
 
+    def get_records_page(
+            self,
+            table: SQLTable,
+            seek: RecordsSeek,
+            /,
+            *,
+            filters: Optional[str] = None,
+            limit: int = 1000,
+            offset: int = 0,
+            first_id: int = 0,
+    ) -> list[SQLRecord]:
+        """Fetch a page of records by seeking on key columns instead of skipping rows.
+
+        The cost of a page does not depend on its position, unlike LIMIT/OFFSET.
+        Pages read backwards (previous and last page) are returned in ascending order.
+        ``offset`` skips rows past the seek position, for jumps with no known key.
+        """
+        direction = "DESC" if seek.is_descending else "ASC"
+        orders = ", ".join(f"{self.quote_identifier(column)} {direction}" for column in seek.key_columns)
+
+        # Key values are bound, not rendered: binary keys and backslashes reach the server unchanged.
+        conditions, parameters = [], []
+        if seek.after is not None:
+            conditions.append(self._build_seek_condition(seek.key_columns, ">"))
+            parameters.extend(seek.after)
+        if seek.before is not None:
+            conditions.append(self._build_seek_condition(seek.key_columns, "<"))
+            parameters.extend(seek.before)
+        if filters:
+            conditions.insert(0, f"({self._escape_parameter_markers(filters) if parameters else filters})")
+
+        records = self.get_records(
+            table, filters=" AND ".join(conditions) or None, limit=limit, offset=offset, orders=orders, parameters=parameters
+        )
+        if seek.is_descending:
+            records.reverse()
+
+        for record_id, record in enumerate(records, start=first_id):
+            record.id = record_id
+
+        return records
+
+    def _build_seek_condition(self, key_columns: tuple[str, ...], operator: str) -> str:
+        columns_sql = ", ".join(self.quote_identifier(column) for column in key_columns)
+        values_sql = ", ".join([self.PARAMETER_PLACEHOLDER] * len(key_columns))
+        if len(key_columns) == 1:
+            return f"{columns_sql} {operator} {values_sql}"
+
+        # Row value comparison, supported by MySQL, MariaDB, PostgreSQL and SQLite >= 3.15.
+        return f"({columns_sql}) {operator} ({values_sql})"
+
+    def _escape_parameter_markers(self, sql: str) -> str:
+        """Return ``sql`` as it must be written in a query run with bound parameters."""
+        # With the pyformat paramstyle, the driver reads every % of the query once parameters are bound.
+        if self.PARAMETER_PLACEHOLDER == "%s":
+            return sql.replace("%", "%%")
+        return sql
+
+    def stream_records(
+            self,
+            table: SQLTable,
+            /,
+            *,
+            orders: Optional[str] = None,
+            batch_size: int = 1000,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield the raw rows of a table in batches without buffering the whole result set.
+
+        Rows are read from a dedicated streaming cursor, so memory stays bounded
+        by ``batch_size`` whatever the size of the table.
+        """
+        if table is None or table.is_new:
+            return
+
+        order = f"ORDER BY {orders}" if orders else ""
+        query = f"SELECT * FROM {self._records_from_clause(table)} {order}"
+
+        QUERY_LOGS.append(f"/* stream_records for table={table.name} */")
+        cursor = self._open_stream_cursor()
+        try:
+            self._execute_on_cursor(cursor, query)
+            while rows := cursor.fetchmany(batch_size):
+                yield [dict(row) for row in rows]
+        finally:
+            self._close_stream_cursor(cursor)
+
+    def estimate_records_count(self, table: SQLTable, filters: Optional[str] = None) -> Optional[int]:
+        """Return how many rows of ``table`` match ``filters`` according to statistics, without reading them.
+
+        Catalog statistics serve unfiltered tables, the planner's estimate
+        filtered ones. Returns ``None`` when the engine has no estimate.
+        """
+        return None
+
+    def count_records(self, table: SQLTable, filters: Optional[str] = None, timeout: Optional[float] = None) -> int:
+        """Count the rows of ``table`` matching ``filters``.
+
+        With ``timeout``, in seconds, the count is stopped by the engine when it
+        runs longer and the engine error is raised.
+        """
+        where = f" WHERE {filters}" if filters else ""
+
+        QUERY_LOGS.append(f"/* count_records for table={table.name} */")
+        with self._statement_timeout(timeout):
+            self.execute(f"SELECT COUNT(*) AS total_rows FROM {self._records_from_clause(table)}{where}")
+            row = self.fetchone()
+
+        return int(row["total_rows"] or 0)
+
+    @contextlib.contextmanager
+    def _statement_timeout(self, timeout: Optional[float]) -> Iterator[None]:
+        """Limit the statements run in the block to ``timeout`` seconds, where the engine allows it."""
+        yield
+
+    def _records_from_clause(self, table: SQLTable) -> str:
+        if table.database:
+            return f"{table.database.quoted_name}.{table.quoted_name}"
+
+        return table.quoted_name
+
+    def _open_stream_cursor(self) -> Any:
+        """Return a new cursor that fetches rows lazily from the server.
+
+        The default cursor is enough for engines whose driver already iterates
+        lazily (SQLite); client/server engines override this.
+        """
+        return self._connection.cursor()
+
+    def _close_stream_cursor(self, cursor: Any) -> None:
+        """Close a cursor returned by ``_open_stream_cursor``, ending whatever the engine opened for it."""
+        cursor.close()
+
+    def open_result_stream(self, query: str) -> Any:
+        """Execute ``query`` on a dedicated cursor and return it, so rows can be read with ``fetchmany``.
+
+        Row-returning statements run on a streaming cursor when the engine allows
+        it. The caller owns the cursor and must give it to ``close_result_stream``.
+        """
+        cursor = self._open_stream_cursor() if self._is_streamable_query(query) else self._connection.cursor()
+        try:
+            self._execute_on_cursor(cursor, query)
+        except Exception:
+            with contextlib.suppress(Exception):
+                self._close_stream_cursor(cursor)
+            raise
+
+        return cursor
+
+    def close_result_stream(self, cursor: Any) -> None:
+        """Close a cursor returned by ``open_result_stream``, whether or not all its rows were read."""
+        self._close_stream_cursor(cursor)
+
+    def _is_streamable_query(self, query: str) -> bool:
+        return True
+
+    def has_result_set(self, cursor: Any) -> bool:
+        """Return True when the statement executed on ``cursor`` produced rows to fetch."""
+        return cursor.description is not None
+
+    def cancel_running_query(self) -> bool:
+        """Ask the server to stop the statement running on this context's connection.
+
+        Meant to be called from another thread than the one executing. The
+        interrupted statement fails with an engine error and the connection
+        stays open. Returns False when the engine cannot cancel, so the caller
+        can fall back to closing the connection.
+        """
+        return False
+
+    def is_alive(self) -> bool:
+        """Return True when the connection still answers a no-op round trip."""
+        if self._connection is None:
+            return False
+
+        try:
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+
+        return True
+
     # EXECUTION
-    def execute(self, query: str) -> bool:
-        """Execute a SQL query and append it to query logs."""
-        query_clean = re.sub(r"\s+", " ", str(query)).strip()
+    def execute(self, query: str, parameters: Optional[Sequence[Any]] = None) -> bool:
+        """Execute a SQL query, binding ``parameters`` to its placeholders, and append it to query logs."""
+        return self._execute_on_cursor(self.cursor, query, parameters)
+
+    def executemany(self, query: str, parameters: Iterable[Sequence[Any]]) -> bool:
+        """Execute a SQL query once for every parameter row, in as few round trips as the driver allows."""
+        return self._execute_on_cursor(self.cursor, query, list(parameters), many=True)
+
+    def _executemany_on_cursor(self, cursor: Any, query: str, parameters: list[Sequence[Any]]) -> None:
+        cursor.executemany(query, parameters)
 
-        if self.connection.read_only and _WRITE_QUERY_RE.match(query_clean):
+    def _execute_parameters_on_cursor(self, cursor: Any, query: str, parameters: Sequence[Any]) -> None:
+        cursor.execute(query, parameters)
+
+    def _execute_on_cursor(self, cursor: Any, query: str, parameters: Optional[Sequence[Any]] = None, many: bool = False) -> bool:
+        query = str(query)
+        is_write = _is_write_query(query)
+
+        if is_write and self.connection.read_only:
             raise PermissionError(_("This connection is read-only."))
 
-        logger.debug("execute query: %s", query_clean)
-        QUERY_LOGS.append(query_clean)
+        # Put on one line only when a handler formats it, and by the query log when it is read.
+        logger.debug("execute query: %s", NormalisedQuery(query))
+        QUERY_LOGS.append(f"{query} /* x{len(parameters)} */" if many else query)
 
         try:
-            self.cursor.execute(query)
+            if many:
+                self._executemany_on_cursor(cursor, query, parameters)
+            elif parameters:
+                self._execute_parameters_on_cursor(cursor, query, parameters)
+            else:
+                cursor.execute(query)
         except Exception as ex:
             logger.error(query)
             QUERY_LOGS.append(f"/* {str(ex)} */")
@@ -580,6 +1352,9 @@ class AbstractContext(abc.ABC):
                 raise ConnectionLostError(error_message) from ex
             raise
 
+        if is_write and self.records_counts is not None:
+            self.records_counts.invalidate()
+
         return True
 
     def set_connection_lost_handler(self, handler: Optional[Callable[["AbstractContext", str], None]]) -> None:
@@ -4,16 +4,17 @@ import dataclasses
 import datetime
 import uuid
 
-from typing import Optional, Callable, Literal, Self
+from typing import Any, Optional, Callable, Literal, Self
 
 import wx
 
 from icons import IconList
+from helpers.logger import logger
 from helpers.observables import ObservableLazyList
 
-from structures.engines.datatype import SQLDataType
+from structures.engines.datatype import DataTypeFormat, SQLDataType
 from structures.engines.indextype import SQLIndexType
-from structures.engines.dump import create_database_dump
+from structures.engines.dump import DEFAULT_MAX_STATEMENT_BYTES, DumpCompression, DumpProgressCallback, create_database_dump
 from structures.engines.sqlite.indextype import SQLiteIndexType
 
 
@@ -113,11 +114,25 @@ class SQLDatabase(abc.ABC):
         *,
         include_schema: bool = True,
         include_records: bool = True,
+        batch_size: int = 1000,
+        extended_insert: bool = True,
+        max_statement_bytes: int = DEFAULT_MAX_STATEMENT_BYTES,
+        disable_keys: bool = True,
+        workers: int = 1,
+        compression: DumpCompression = DumpCompression.NONE,
+        on_progress: Optional[DumpProgressCallback] = None,
     ) -> str:
         return create_database_dump(
             self,
             include_schema=include_schema,
             include_records=include_records,
+            batch_size=batch_size,
+            extended_insert=extended_insert,
+            max_statement_bytes=max_statement_bytes,
+            disable_keys=disable_keys,
+            workers=workers,
+            compression=compression,
+            on_progress=on_progress,
         )
 
 
@@ -258,6 +273,17 @@ class SQLTable(abc.ABC):
         """
         raise NotImplementedError
 
+    def get_original_records_by_id(self) -> dict[int, 'SQLRecord']:
+        """Index by id the records loaded for this table, as kept by its database."""
+        return {record.id: record for record in list(self._get_original_table().records)}
+
+    def get_original_record(self, record_id: int) -> Optional['SQLRecord']:
+        """Return the record ``record_id`` as loaded for this table, without indexing them all."""
+        return next((record for record in list(self._get_original_table().records) if record.id == record_id), None)
+
+    def _get_original_table(self) -> 'SQLTable':
+        return next((table for table in self.database.tables if table.id == self.id), self)
+
     def get_identifier_indexes(self) -> list['SQLIndex']:
         identifier_indexes = []
         for index in list(self.indexes):
@@ -266,6 +292,20 @@ class SQLTable(abc.ABC):
 
         return identifier_indexes
 
+    def get_seek_columns(self) -> list[str]:
+        """Return the columns that can drive keyset pagination, or an empty list.
+
+        Unique indexes qualify only when none of their columns is nullable:
+        NULLs never compare greater or lower than a seek value.
+        """
+        nullable_columns = {column.name for column in self.columns if column.is_nullable}
+        identifier_indexes = sorted(self.get_identifier_indexes(), key=lambda index: not index.type.is_primary)
+        for index in identifier_indexes:
+            if index.columns and not nullable_columns.intersection(index.columns):
+                return list(index.columns)
+
+        return []
+
     def copy(self):
         cls = self.__class__
         field_values = {f.name: getattr(self, f.name) for f in dataclasses.fields(cls)}
@@ -668,6 +708,8 @@ class SQLRecord(abc.ABC):
     id: int
     table: 'SQLTable'
     values: dict[str, str] = dataclasses.field(default_factory=dict)
+    # The values as loaded, kept by records that are not in their table records, like the blocks of the virtual grid.
+    original_values: Optional[dict[str, Any]] = None
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, SQLRecord):
@@ -710,29 +752,111 @@ class SQLRecord(abc.ABC):
 
         return True
 
-    def _get_identifier_columns(self) -> dict[str, str]:
+    def _get_identifier_values(self, original_records: Optional[dict[int, 'SQLRecord']] = None) -> dict[str, Any]:
+        """Return the raw values, by column name, that identify the row of this record in its table.
+
+        They are read from the record as loaded: its ``original_values`` when it
+        kept them, else the record found by id in ``original_records`` (or among
+        the table records when not given), so that editing a key column still
+        updates the row it came from.
+        """
         identifier_indexes = self.table.get_identifier_indexes()
 
         if not identifier_indexes:
             raise ValueError("Cannot identify record without primary or unique index")
 
-        original_table = next((t for t in self.table.database.tables if t.id == self.table.id), None)
-        identifier_conditions = {}
-        for identifier_index in identifier_indexes:
-            columns: list[SQLColumn] = [column for column in self.table.columns if column.name in identifier_index.columns]
-            original_record = next((r for r in list(original_table.records) if r.id == self.id), None)
-
-            for column in columns:
-                if original_record is not None:
-                    identifier_conditions[column.name] = original_record.values.get(column.quoted_name)
+        if (values := self.original_values) is None:
+            if original_records is None:
+                original_record = self.table.get_original_record(self.id)
+            else:
+                original_record = original_records.get(self.id)
+            values = original_record.values if original_record is not None else self.values
 
-                if column.datatype.format is not None:
-                    identifier_conditions[column.name] = column.datatype.format(identifier_conditions[column.quoted_name])
+        identifier_values = {}
+        for identifier_index in identifier_indexes:
+            for column in self.table.columns:
+                if column.name in identifier_index.columns:
+                    identifier_values[column.name] = values.get(column.name)
 
             if identifier_index.type.is_primary:
                 break
 
-        return identifier_conditions
+        return identifier_values
+
+    @staticmethod
+    def bind_value(column: 'SQLColumn', value: Any) -> Any:
+        """Return ``value`` as a statement parameter of ``column``: the driver quotes it, only numeric formats still apply."""
+        if value is None:
+            return None
+
+        if (datatype_format := column.datatype.format) in (DataTypeFormat.INTEGER, DataTypeFormat.REAL, DataTypeFormat.BOOLEAN):
+            return datatype_format(value)
+
+        return value
+
+    def _get_insert_values(self) -> dict[str, Any]:
+        """Return the parameters, by column name, of the columns an INSERT of this record fills."""
+        columns_values = {}
+        for column in self.table.columns:
+            if column.virtuality is not None:
+                continue
+
+            value = self.values.get(column.name)
+            if value is not None and str(value).strip():
+                columns_values[column.name] = self.bind_value(column, value)
+
+        return columns_values
+
+    def _get_identifier_condition(self, identifier_values: dict[str, Any]) -> tuple[str, list[Any]]:
+        context = self.table.database.context
+        columns = {column.name: column for column in self.table.columns}
+
+        condition = " AND ".join(f"{context.quote_identifier(name)} = {context.PARAMETER_PLACEHOLDER}" for name in identifier_values)
+        return condition, [self.bind_value(columns[name], value) for name, value in identifier_values.items()]
+
+    def _build_insert_statement(self) -> Optional[tuple[str, list[Any]]]:
+        if not (columns_values := self._get_insert_values()):
+            return None
+
+        context = self.table.database.context
+        columns = ", ".join(context.quote_identifier(name) for name in columns_values)
+        placeholders = ", ".join([context.PARAMETER_PLACEHOLDER] * len(columns_values))
+
+        return f"INSERT INTO {self.table.fully_qualified_name} ({columns}) VALUES ({placeholders})", list(columns_values.values())
+
+    def _build_update_statement(self) -> Optional[tuple[str, list[Any]]]:
+        """Return the UPDATE of the columns changed since the row was read, or None when nothing changed."""
+        context = self.table.database.context
+        identifier_values = self._get_identifier_values()
+        condition, identifier_parameters = self._get_identifier_condition(identifier_values)
+
+        context.execute(f"SELECT * FROM {self.table.fully_qualified_name} WHERE {condition}", identifier_parameters)
+        if not (existing_record := context.fetchone()):
+            logger.warning(f"Record not found for update: {identifier_values}")
+            raise ValueError("Record not found for update with identifier columns")
+
+        existing_record = dict(existing_record)
+        columns = {column.name: column for column in self.table.columns}
+
+        changed_values = {}
+        for column_name, new_value in self.values.items():
+            if (column := columns.get(column_name)) is None or column.virtuality is not None:
+                continue
+
+            if (new_value or "") != (existing_record.get(column_name) or ""):
+                changed_values[column_name] = self.bind_value(column, new_value)
+
+        if not changed_values:
+            return None
+
+        set_clause = ", ".join(f"{context.quote_identifier(name)} = {context.PARAMETER_PLACEHOLDER}" for name in changed_values)
+
+        return f"UPDATE {self.table.fully_qualified_name} SET {set_clause} WHERE {condition}", [*changed_values.values(), *identifier_parameters]
+
+    def _build_delete_statement(self) -> tuple[str, list[Any]]:
+        condition, parameters = self._get_identifier_condition(self._get_identifier_values())
+
+        return f"DELETE FROM {self.table.fully_qualified_name} WHERE {condition}", parameters
 
     @abc.abstractmethod
     def insert(self):
@@ -746,20 +870,6 @@ class SQLRecord(abc.ABC):
     def delete(self):
         raise NotImplementedError
 
-    @staticmethod
-    def delete_many(table: SQLTable, records: list[Self]) -> bool:
-        results = []
-        with table.database.context.transaction() as transaction:
-            for record in records:
-                if record.is_new:
-                    continue
-
-                if raw_delete_record := record.raw_delete_record():
-                    results.append(transaction.execute(raw_delete_record))
-                    table.records.remove(record)
-
-        return all(results)
-
     def save(self) -> Optional[bool]:
         if not self.is_valid():
             raise ValueError("Record is not yet valid")
@@ -1,9 +1,202 @@
+import concurrent.futures
+import dataclasses
 import datetime
 import decimal
+import enum
+import gzip
+import io
 import json
 import pathlib
+import queue
+import shutil
+import tempfile
+import threading
+
+from typing import Any, Callable, Optional
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+# Same default as mysqldump --net-buffer-length: large enough to amortise
+# round-trips on restore, small enough to stay under max_allowed_packet.
+DEFAULT_MAX_STATEMENT_BYTES = 1024 * 1024
+
+
+class DumpCompression(enum.Enum):
+    NONE = ""
+    GZIP = "gz"
+    ZSTD = "zst"
+    LZ4 = "lz4"
+
+    @property
+    def is_available(self) -> bool:
+        if self == DumpCompression.ZSTD:
+            return zstd is not None
+        if self == DumpCompression.LZ4:
+            return lz4 is not None
+        return True
+
+    @property
+    def suffix(self) -> str:
+        return f".sql.{self.value}" if self.value else ".sql"
+
+    @staticmethod
+    def get_available() -> list["DumpCompression"]:
+        return [compression for compression in DumpCompression if compression.is_available]
+
+    @staticmethod
+    def from_path(path: pathlib.Path) -> "DumpCompression":
+        for compression in DumpCompression:
+            if compression.value and path.name.endswith(f".{compression.value}"):
+                return compression
+        return DumpCompression.NONE
+
+    def open_writer(self, stream):
+        """Wrap a binary stream with this compressor, or return None when uncompressed."""
+        if self == DumpCompression.GZIP:
+            # Level 6 is gzip's own default: most of level 9's ratio at a fraction of the CPU.
+            return gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=6)
+        if self == DumpCompression.ZSTD:
+            return zstd.ZstdFile(stream, mode="wb")
+        if self == DumpCompression.LZ4:
+            return lz4.frame.LZ4FrameFile(stream, mode="wb")
+        return None
+
+    def open_reader(self, stream):
+        """Wrap a binary stream with this decompressor, or return it unchanged when uncompressed."""
+        if self == DumpCompression.GZIP:
+            return gzip.GzipFile(fileobj=stream, mode="rb")
+        if self == DumpCompression.ZSTD:
+            return zstd.ZstdFile(stream, mode="rb")
+        if self == DumpCompression.LZ4:
+            return lz4.frame.LZ4FrameFile(stream, mode="rb")
+        return stream
+
+
+@dataclasses.dataclass(frozen=True)
+class DumpOptions:
+    batch_size: int = 1000
+    extended_insert: bool = True
+    max_statement_bytes: int = DEFAULT_MAX_STATEMENT_BYTES
+    disable_keys: bool = True
+    workers: int = 1
+
+
+@dataclasses.dataclass
+class DumpProgress:
+    table_name: str
+    table_index: int
+    table_count: int
+    rows_dumped: int = 0
+    estimated_rows: Optional[int] = None
+    completed: bool = False
+    bytes_written: int = 0
+    bytes_stored: int = 0
+
+
+# Called from worker threads when the dump runs with more than one worker.
+DumpProgressCallback = Callable[[DumpProgress], None]
+
+
+class _InsertStatementWriter:
+    """Group rendered rows into multi-row INSERT statements capped in bytes."""
+
+    def __init__(self, handle, insert_prefix: str, options: DumpOptions):
+        self._handle = handle
+        self._insert_prefix = insert_prefix
+        self._options = options
+        self._pending_rows: list[str] = []
+        self._pending_bytes = len(insert_prefix.encode("utf-8"))
+
+    def add(self, row_sql: str):
+        row_bytes = len(row_sql.encode("utf-8")) + 2
+        if self._pending_rows and self._pending_bytes + row_bytes > self._options.max_statement_bytes:
+            self.flush()
+
+        self._pending_rows.append(row_sql)
+        self._pending_bytes += row_bytes
+        if not self._options.extended_insert:
+            self.flush()
+
+    def flush(self):
+        if not self._pending_rows:
+            return
+
+        rows_sql = ",\n".join(self._pending_rows)
+        self._handle.write(f"{self._insert_prefix}{rows_sql};\n\n")
+        self._pending_rows = []
+        self._pending_bytes = len(self._insert_prefix.encode("utf-8"))
+
+
+class _CountingStream(io.RawIOBase):
+    def __init__(self, target):
+        super().__init__()
+        self._target = target
+        self.bytes_count = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._target.write(data)
+        size = len(data)
+        self.bytes_count += size
+        return size
+
+    def flush(self):
+        # Data is handed over on write(); forwarding flushes would make compressors
+        # emit sync points and lose ratio. The target is flushed when closed.
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            super().close()
+        finally:
+            self._target.close()
+
+
+class _DumpOutput:
+    """Text stream over the dump file that compresses on the fly and counts bytes.
+
+    Layers: text -> SQL byte counter -> compressor -> stored byte counter -> file.
+    """
+
+    def __init__(self, path: pathlib.Path, compression: DumpCompression):
+        self._stored = _CountingStream(path.open("wb"))
+        self._written = self._stored
 
-from typing import Any
+        if compressor := compression.open_writer(self._stored):
+            self._written = _CountingStream(compressor)
+
+        self.text = io.TextIOWrapper(io.BufferedWriter(self._written), encoding="utf-8")
+
+    def __enter__(self) -> "_DumpOutput":
+        return self
+
+    def __exit__(self, *exc_info):
+        # Compressors do not close the file object they write to.
+        try:
+            self.text.close()
+        finally:
+            self._stored.close()
+
+    @property
+    def bytes_written(self) -> int:
+        return self._written.bytes_count
+
+    @property
+    def bytes_stored(self) -> int:
+        return self._stored.bytes_count
 
 
 def create_database_dump(
@@ -12,36 +205,196 @@ def create_database_dump(
     *,
     include_schema: bool = True,
     include_records: bool = True,
+    batch_size: int = 1000,
+    extended_insert: bool = True,
+    max_statement_bytes: int = DEFAULT_MAX_STATEMENT_BYTES,
+    disable_keys: bool = True,
+    workers: int = 1,
+    compression: DumpCompression = DumpCompression.NONE,
+    on_progress: Optional[DumpProgressCallback] = None,
 ) -> str:
+    if not compression.is_available:
+        raise ValueError(f"Compression {compression.name} is not available")
+
+    options = DumpOptions(
+        batch_size=batch_size,
+        extended_insert=extended_insert,
+        max_statement_bytes=max_statement_bytes,
+        disable_keys=disable_keys,
+        workers=max(1, workers),
+    )
+
     database.context.set_database(database)
-    dump_path = _build_dump_path(database.name)
-    with dump_path.open("w", encoding="utf-8") as handle:
+    dump_path = _build_dump_path(database.name, compression)
+    with _DumpOutput(dump_path, compression) as output:
+        handle = output.text
         _write_header(handle)
         if include_schema:
             _write_schema(handle, database)
         if include_records:
-            _write_records(handle, database)
+            on_progress = _with_output_statistics(on_progress, output)
+            _write_records(handle, database, options, on_progress, dump_path.parent)
 
     return str(dump_path)
 
 
-def _build_dump_path(database_name: str) -> pathlib.Path:
+def _build_dump_path(database_name: str, compression: DumpCompression = DumpCompression.NONE) -> pathlib.Path:
     now = datetime.datetime.now()
     safe_name = "".join(char if char.isalnum() or char == "_" else "_" for char in database_name)
     suffix = now.strftime("%Y%m%d_%H%M%S_%f")
-    filename = f"petersql_backup_{safe_name}_{suffix}.sql"
+    filename = f"petersql_backup_{safe_name}_{suffix}{compression.suffix}"
     return pathlib.Path.cwd() / filename
 
 
+def _with_output_statistics(
+    on_progress: Optional[DumpProgressCallback],
+    output: _DumpOutput,
+) -> Optional[DumpProgressCallback]:
+    if on_progress is None:
+        return None
+
+    lock = threading.Lock()
+
+    def _report(progress: DumpProgress):
+        # Push buffered text through the counters; workers may report concurrently.
+        with lock:
+            output.text.flush()
+            progress.bytes_written = output.bytes_written
+            progress.bytes_stored = output.bytes_stored
+        on_progress(progress)
+
+    return _report
+
+
 def _write_header(handle):
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     handle.write(f"-- This backup was created by PeterSQL on {now}\n\n")
 
 
-def _write_records(handle, database: Any):
+def _write_records(
+    handle,
+    database: Any,
+    options: DumpOptions,
+    on_progress: Optional[DumpProgressCallback],
+    work_directory: pathlib.Path,
+):
     _write_section_title(handle, "Insert records")
-    statements = _collect_record_statements(database)
-    _write_statements(handle, statements)
+
+    disable_checks = options.disable_keys and _is_mysql_family(database.context)
+    if disable_checks:
+        handle.write("SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0;\n")
+        handle.write("SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0;\n\n")
+
+    tables = sorted(list(database.tables), key=lambda table: table.name)
+    if options.workers > 1 and len(tables) > 1 and database.context.supports_worker_contexts:
+        rows_dumped = _write_records_parallel(handle, database, tables, options, on_progress, work_directory)
+    else:
+        rows_dumped = 0
+        for table_index, table in enumerate(tables, start=1):
+            progress = _build_table_progress(table, table_index, len(tables))
+            rows_dumped += _write_table_records(handle, table, database.context, progress, options, on_progress)
+
+    if not rows_dumped:
+        handle.write("-- No statements\n\n")
+
+    if disable_checks:
+        handle.write("SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;\n")
+        handle.write("SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;\n\n")
+
+
+def _write_records_parallel(
+    handle,
+    database: Any,
+    tables: list[Any],
+    options: DumpOptions,
+    on_progress: Optional[DumpProgressCallback],
+    work_directory: pathlib.Path,
+) -> int:
+    """Dump each table into its own chunk file from a pool of worker contexts.
+
+    Chunks are appended to the dump in table order once every worker is done,
+    so the output is identical to a sequential dump.
+    """
+    context = database.context
+    # Lazy lists load through the shared context, which must not be used from worker threads.
+    for table in tables:
+        list(table.columns)
+        list(table.indexes)
+
+    worker_count = min(options.workers, len(tables))
+    worker_contexts: queue.Queue = queue.Queue()
+    snapshot_id: Optional[str] = None
+    try:
+        for worker_index in range(worker_count):
+            worker_context = context.create_worker_context(database)
+            worker_contexts.put(worker_context)
+            # The first worker keeps the snapshot open for the others: on the shared context, whatever
+            # the UI runs during the dump would join the snapshot transaction.
+            if worker_index == 0:
+                snapshot_id = worker_context.export_snapshot()
+            elif snapshot_id is not None:
+                worker_context.import_snapshot(snapshot_id)
+
+        with tempfile.TemporaryDirectory(prefix=".petersql_dump_", dir=work_directory) as chunks_directory:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=worker_count) as executor:
+                futures = [
+                    executor.submit(
+                        _write_table_chunk,
+                        pathlib.Path(chunks_directory) / f"{table_index:06}.sql",
+                        table,
+                        worker_contexts,
+                        _build_table_progress(table, table_index, len(tables)),
+                        options,
+                        on_progress,
+                    )
+                    for table_index, table in enumerate(tables, start=1)
+                ]
+                chunks = [future.result() for future in futures]
+
+            for chunk_path, _rows_dumped in chunks:
+                with chunk_path.open("r", encoding="utf-8") as chunk:
+                    shutil.copyfileobj(chunk, handle)
+
+            return sum(rows_dumped for _chunk_path, rows_dumped in chunks)
+    finally:
+        _close_worker_contexts(worker_contexts, snapshot_id is not None)
+
+
+def _write_table_chunk(
+    chunk_path: pathlib.Path,
+    table: Any,
+    worker_contexts: queue.Queue,
+    progress: DumpProgress,
+    options: DumpOptions,
+    on_progress: Optional[DumpProgressCallback],
+) -> tuple[pathlib.Path, int]:
+    context = worker_contexts.get()
+    try:
+        with chunk_path.open("w", encoding="utf-8") as chunk:
+            rows_dumped = _write_table_records(chunk, table, context, progress, options, on_progress)
+    finally:
+        worker_contexts.put(context)
+
+    return chunk_path, rows_dumped
+
+
+def _close_worker_contexts(worker_contexts: queue.Queue, release_snapshot: bool):
+    while not worker_contexts.empty():
+        worker_context = worker_contexts.get_nowait()
+        try:
+            if release_snapshot:
+                worker_context.release_snapshot()
+        finally:
+            worker_context.disconnect()
+
+
+def _build_table_progress(table: Any, table_index: int, table_count: int) -> DumpProgress:
+    return DumpProgress(
+        table_name=table.name,
+        table_index=table_index,
+        table_count=table_count,
+        estimated_rows=getattr(table, "total_rows", None),
+    )
 
 
 def _write_schema(handle, database: Any):
@@ -120,15 +473,6 @@ def _collect_index_statements(database: Any) -> list[str]:
     return [statement for statement in statements if statement]
 
 
-def _collect_record_statements(database: Any) -> list[str]:
-    statements = []
-    tables = sorted(list(database.tables), key=lambda table: table.name)
-    for table in tables:
-        statements.extend(_table_record_statements(table))
-
-    return statements
-
-
 def _collect_trigger_statements(database: Any) -> list[str]:
     context_name = database.context.__class__.__name__.lower()
     triggers = sorted(list(getattr(database, "triggers", [])), key=lambda trigger: trigger.name)
@@ -171,6 +515,11 @@ def _is_dumpable_index(index: Any, context_name: str) -> bool:
     return True
 
 
+def _is_mysql_family(context: Any) -> bool:
+    context_name = context.__class__.__name__.lower()
+    return "mysql" in context_name or "mariadb" in context_name
+
+
 def _mysql_block_statement(statement: str) -> str:
     statement = statement.strip().rstrip(";")
     return f"DELIMITER $$\n{statement}$$\nDELIMITER ;"
@@ -184,6 +533,7 @@ def _normalize_statement(statement: str) -> str:
 
 
 def _render_literal(value: Any, table: Any) -> str:
+    """Render a Python value as an SQL literal for the table's engine."""
     if value is None:
         return "NULL"
     if isinstance(value, bool):
@@ -209,56 +559,74 @@ def _render_boolean(value: bool, table: Any) -> str:
     return "1" if value else "0"
 
 
-def _table_record_statements(table: Any) -> list[str]:
-    context = table.database.context
+def _write_table_records(
+    handle,
+    table: Any,
+    context: Any,
+    progress: DumpProgress,
+    options: DumpOptions,
+    on_progress: Optional[DumpProgressCallback],
+) -> int:
+    # Resolve metadata before streaming: unbuffered cursors block the connection until drained.
     columns = [column for column in table.columns if getattr(column, "virtuality", None) is None]
-    if not columns:
-        return []
+    if columns:
+        table_name = _table_reference(table)
+        column_names = ", ".join(context.quote_identifier(column.name) for column in columns)
+        ordering = _table_record_ordering(table)
+        writer = _InsertStatementWriter(handle, f"INSERT INTO {table_name} ({column_names}) VALUES ", options)
 
-    table_name = _table_reference(table)
-    column_names = ", ".join(context.quote_identifier(column.name) for column in columns)
-    ordering = ", ".join(context.quote_identifier(column.name) for column in columns)
-    return _table_record_pages(table, table_name, column_names, columns, ordering)
+        for rows in context.stream_records(table, orders=ordering, batch_size=options.batch_size):
+            if not progress.rows_dumped:
+                _write_table_records_begin(handle, table_name, context, options)
 
+            for row in rows:
+                writer.add("(" + ", ".join(_render_literal(row.get(column.name), table) for column in columns) + ")")
 
-def _table_record_pages(
-    table: Any,
-    table_name: str,
-    column_names: str,
-    columns: list[Any],
-    ordering: str,
-) -> list[str]:
-    offset = 0
-    limit = 1000
-    statements = []
-    while True:
-        records = table.database.context.get_records(table, limit=limit, offset=offset, orders=ordering)
-        if not records:
-            break
+            progress.rows_dumped += len(rows)
+            _notify_progress(on_progress, progress)
 
-        statements.extend(_table_record_page(table, table_name, column_names, columns, records))
-        if len(records) < limit:
-            break
+        writer.flush()
+        if progress.rows_dumped:
+            _write_table_records_end(handle, table_name, context, options)
 
-        offset += limit
+    progress.completed = True
+    _notify_progress(on_progress, progress)
+    return progress.rows_dumped
 
-    return statements
 
+def _write_table_records_begin(handle, table_name: str, context: Any, options: DumpOptions):
+    if options.disable_keys and _is_mysql_family(context):
+        handle.write(f"/*!40000 ALTER TABLE {table_name} DISABLE KEYS */;\n")
+
+    # One transaction per table: a single commit instead of one per statement.
+    handle.write("BEGIN;\n\n")
+
+
+def _write_table_records_end(handle, table_name: str, context: Any, options: DumpOptions):
+    handle.write("COMMIT;\n")
+    if options.disable_keys and _is_mysql_family(context):
+        handle.write(f"/*!40000 ALTER TABLE {table_name} ENABLE KEYS */;\n")
+
+    handle.write("\n")
+
+
+def _table_record_ordering(table: Any) -> Optional[str]:
+    """Order by the primary key, which the server can walk through its index.
+
+    Tables without a primary key are streamed in storage order: sorting by
+    every column would force a full sort of the table before the first row.
+    """
+    context = table.database.context
+    for index in table.indexes:
+        if index.type.is_primary and index.columns:
+            return ", ".join(context.quote_identifier(column) for column in index.columns)
+
+    return None
 
-def _table_record_page(
-    table: Any,
-    table_name: str,
-    column_names: str,
-    columns: list[Any],
-    records: list[Any],
-) -> list[str]:
-    statements = []
-    for record in records:
-        values = [_render_literal(record.values.get(column.name), table) for column in columns]
-        values_sql = ", ".join(values)
-        statements.append(f"INSERT INTO {table_name} ({column_names}) VALUES ({values_sql});")
 
-    return statements
+def _notify_progress(on_progress: Optional[DumpProgressCallback], progress: DumpProgress):
+    if on_progress is not None:
+        on_progress(dataclasses.replace(progress))
 
 
 def _table_reference(table: Any) -> str:
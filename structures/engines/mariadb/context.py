@@ -1,17 +1,18 @@
+import contextlib
 import re
 import ssl
 
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional, Sequence
 from gettext import gettext as _
 
 import pymysql
 
-from pymysql.constants import FIELD_TYPE
+from pymysql.constants import ER, FIELD_TYPE
 
 from helpers.logger import logger
 from structures.connection import Connection
 
-from structures.engines.context import QUERY_LOGS, AbstractContext
+from structures.engines.context import QUERY_LOGS, AbstractContext, TableSchema
 from structures.engines.mariadb import MAP_COLUMN_FIELDS
 from structures.engines.database import (
     SQLDatabase,
@@ -32,6 +33,7 @@ from structures.engines.mariadb.database import (
     MariaDBView,
     MariaDBTrigger,
     MariaDBDatabase,
+    MariaDBCheck,
 )
 from structures.engines.mariadb.datatype import MariaDBDataType
 from structures.engines.mariadb.indextype import MariaDBIndexType
@@ -269,6 +271,42 @@ class MariaDBContext(AbstractContext):
     def set_database(self, database: SQLDatabase) -> None:
         self.execute(f"USE {database.quoted_name}")
 
+    def _session_reset_statements(self, database_name: Optional[str]) -> list[str]:
+        # A borrower may have switched database with USE.
+        statements = ["ROLLBACK"]
+        if database_name:
+            statements.append(f"USE {self.quote_identifier(database_name)}")
+        return statements
+
+    @contextlib.contextmanager
+    def _statement_timeout(self, timeout: Optional[float]) -> Iterator[None]:
+        if timeout is None:
+            yield
+            return
+
+        # max_statement_time is in seconds, unlike MySQL's max_execution_time.
+        self.execute(f"SET SESSION max_statement_time = {timeout}")
+        try:
+            yield
+        finally:
+            self.execute("SET SESSION max_statement_time = DEFAULT")
+
+    def estimate_records_count(self, table: SQLTable, filters: Optional[str] = None) -> Optional[int]:
+        if filters:
+            self.execute(f"EXPLAIN SELECT * FROM {self._records_from_clause(table)} WHERE {filters}")
+            if (plan := self.fetchone()) is None or plan.get("rows") is None:
+                return None
+            return int(int(plan["rows"]) * float(plan.get("filtered") or 100) / 100)
+
+        # InnoDB's sampled row count, the same figure SHOW TABLE STATUS reports; NULL for views.
+        self.execute(
+            "SELECT TABLE_ROWS AS table_rows FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            [table.database.name, table.name],
+        )
+        if (row := self.fetchone()) is None or row["table_rows"] is None:
+            return None
+        return int(row["table_rows"])
+
     def get_server_version(self) -> str:
         self.execute("SELECT VERSION() as version")
         version = self.cursor.fetchone()
@@ -299,7 +337,7 @@ class MariaDBContext(AbstractContext):
                     default_collation=row["default_collation"],
                     total_bytes=float(row["total_bytes"]),
                     context=self,
-                    get_tables_handler=self.get_tables,
+                    get_tables_handler=self.load_tables,
                     get_procedures_handler=self.get_procedures,
                     get_functions_handler=self.get_functions,
                     get_views_handler=self.get_views,
@@ -311,12 +349,13 @@ class MariaDBContext(AbstractContext):
     def get_procedures(self, database: SQLDatabase) -> list[MariaDBProcedure]:
         results: list[MariaDBProcedure] = []
         self.execute(
-            f"""
+            """
             SELECT ROUTINE_NAME
             FROM INFORMATION_SCHEMA.ROUTINES
-            WHERE ROUTINE_SCHEMA = '{database.name}' AND ROUTINE_TYPE = 'PROCEDURE'
+            WHERE ROUTINE_SCHEMA = %s AND ROUTINE_TYPE = 'PROCEDURE'
             ORDER BY ROUTINE_NAME
-            """
+            """,
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -336,12 +375,13 @@ class MariaDBContext(AbstractContext):
 
         results: list[MariaDBFunction] = []
         self.execute(
-            f"""
+            """
             SELECT ROUTINE_NAME
             FROM INFORMATION_SCHEMA.ROUTINES
-            WHERE ROUTINE_SCHEMA = '{database.name}' AND ROUTINE_TYPE = 'FUNCTION'
+            WHERE ROUTINE_SCHEMA = %s AND ROUTINE_TYPE = 'FUNCTION'
             ORDER BY ROUTINE_NAME
-            """
+            """,
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -359,7 +399,8 @@ class MariaDBContext(AbstractContext):
     def get_views(self, database: SQLDatabase):
         results: list[MariaDBView] = []
         self.execute(
-            f"SELECT TABLE_NAME, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = '{database.name}' ORDER BY TABLE_NAME"
+            "SELECT TABLE_NAME, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME",
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -386,7 +427,8 @@ class MariaDBContext(AbstractContext):
     def get_triggers(self, database: SQLDatabase) -> list[MariaDBTrigger]:
         results: list[MariaDBTrigger] = []
         self.execute(
-            f"SELECT TRIGGER_NAME, ACTION_STATEMENT FROM INFORMATION_SCHEMA.TRIGGERS WHERE TRIGGER_SCHEMA = '{database.name}' ORDER BY TRIGGER_NAME"
+            "SELECT TRIGGER_NAME, ACTION_STATEMENT FROM INFORMATION_SCHEMA.TRIGGERS WHERE TRIGGER_SCHEMA = %s ORDER BY TRIGGER_NAME",
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -401,19 +443,24 @@ class MariaDBContext(AbstractContext):
         return results
 
     def get_tables(self, database: SQLDatabase) -> list[SQLTable]:
+        return self._build_tables(database, self._select_tables(database))
+
+    def _select_tables(self, database: SQLDatabase) -> list[dict[str, Any]]:
         QUERY_LOGS.append(f"/* get_tables for database={database.name} */")
 
-        self.execute(f"""
+        self.execute("""
             SELECT TABLE_NAME, ENGINE, TABLE_COLLATION, TABLE_ROWS, AUTO_INCREMENT, ROW_FORMAT,
             CREATE_TIME, UPDATE_TIME, ROUND(DATA_LENGTH + INDEX_LENGTH, 2) as total_bytes
             FROM information_schema.TABLES
-            WHERE TABLE_SCHEMA = '{database.name}'
+            WHERE TABLE_SCHEMA = %s
             AND TABLE_TYPE = 'BASE TABLE'
             ORDER BY TABLE_NAME
-        """)
+        """, [database.name])
+        return self.fetchall()
 
+    def _build_tables(self, database: SQLDatabase, rows: list[dict[str, Any]]) -> list[SQLTable]:
         results = []
-        for i, row in enumerate(self.fetchall()):
+        for i, row in enumerate(rows):
             results.append(
                 MariaDBTable(
                     id=i,
@@ -427,32 +474,72 @@ class MariaDBContext(AbstractContext):
                     total_rows=row["TABLE_ROWS"],
                     created_at=row["CREATE_TIME"],
                     updated_at=row["UPDATE_TIME"],
-                    get_columns_handler=self.get_columns,
-                    get_indexes_handler=self.get_indexes,
-                    get_checks_handler=self.get_checks,
-                    get_foreign_keys_handler=self.get_foreign_keys,
                     get_records_handler=self.get_records,
+                    **self.table_schema_handlers(),
                 )
             )
 
         return results
 
+    def get_tables_schema(self, database: SQLDatabase, tables: list[SQLTable]) -> dict[int, TableSchema]:
+        logger.debug(f"get_tables_schema for database={database.name}")
+
+        QUERY_LOGS.append(f"/* get_tables_schema for database={database.name} */")
+
+        return self._build_tables_schema(
+            {table.name: table for table in tables},
+            self._select_tables_schema(database),
+            self.table_schema_builders(),
+        )
+
+    def _select_tables_schema(self, database: SQLDatabase) -> dict[str, dict[str, list[dict[str, Any]]]]:
+        return self._group_catalog_rows(lambda row: row["TABLE_NAME"], {
+            "columns": self._select_columns(database.name),
+            "indexes": self._select_indexes(database.name),
+            "checks": self._select_checks(database.name),
+            "foreign_keys": self._select_foreign_keys(database.name),
+        })
+
+    def table_schema_builders(self) -> dict[str, Callable[[SQLTable, list[dict[str, Any]]], list[Any]]]:
+        return {
+            "columns": self._build_columns,
+            "indexes": self._build_indexes,
+            "checks": self._build_checks,
+            "foreign_keys": self._build_foreign_keys,
+        }
+
+    def get_tables_fingerprints(self, database: SQLDatabase) -> dict[str, str]:
+        # A table rebuild moves CREATE_TIME; UPDATE_TIME also moves with data changes, which only costs a re-read.
+        self.execute("""
+            SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s
+            AND TABLE_TYPE = 'BASE TABLE'
+        """, [database.name])
+        return {row["TABLE_NAME"]: f"{row['CREATE_TIME']}|{row['UPDATE_TIME']}" for row in self.fetchall()}
+
     def get_columns(self, table: SQLTable) -> list[SQLColumn]:
-        results = []
         if table.id == -1:
-            return results
+            return []
 
         QUERY_LOGS.append(f"/* get_columns for table={table.name} */")
 
+        return self._build_columns(table, self._select_columns(table.database.name, table.name))
+
+    def _select_columns(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        table_filter, parameters = self._table_filter("TABLE_NAME", table_name)
         self.execute(f"""
-            SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE,
+            SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE,
                    IS_NULLABLE, COLUMN_DEFAULT, EXTRA, COLUMN_TYPE
             FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = '{table.database.name}' AND TABLE_NAME = '{table.name}'
-            ORDER BY ORDINAL_POSITION
-        """)
+            WHERE TABLE_SCHEMA = %s {table_filter}
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, [database_name, *parameters])
+        return self.cursor.fetchall()
 
-        for i, row in enumerate(self.cursor.fetchall()):
+    def _build_columns(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLColumn]:
+        results = []
+        for i, row in enumerate(rows):
             is_auto_increment = "auto_increment" in (row["EXTRA"] or "").lower()
             is_nullable = row["IS_NULLABLE"] == "YES"
             parse_type = self._parse_type(row["COLUMN_TYPE"])
@@ -486,16 +573,23 @@ class MariaDBContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_indexes for table={table.name} */")
 
-        results = []
+        return self._build_indexes(table, self._select_indexes(table.database.name, table.name))
 
-        # Get primary key
+    def _select_indexes(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        # STATISTICS lists the primary key too, as the index named PRIMARY.
+        table_filter, parameters = self._table_filter("TABLE_NAME", table_name)
         self.execute(f"""
-            SELECT COLUMN_NAME
-            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-            WHERE TABLE_SCHEMA = '{table.database.name}' AND TABLE_NAME = '{table.name}' AND CONSTRAINT_NAME = 'PRIMARY'
-            ORDER BY ORDINAL_POSITION
-        """)
-        pk_columns = [row["COLUMN_NAME"] for row in self.cursor.fetchall()]
+            SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX, NON_UNIQUE
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s {table_filter}
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, [database_name, *parameters])
+        return self.cursor.fetchall()
+
+    def _build_indexes(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLIndex]:
+        results = []
+
+        pk_columns = [row["COLUMN_NAME"] for row in rows if row["INDEX_NAME"] == "PRIMARY"]
         if pk_columns:
             results.append(
                 MariaDBIndex(
@@ -507,16 +601,11 @@ class MariaDBContext(AbstractContext):
                 )
             )
 
-        # Get other indexes
-        self.execute(f"""
-            SELECT INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX, NON_UNIQUE
-            FROM INFORMATION_SCHEMA.STATISTICS
-            WHERE TABLE_SCHEMA = '{table.database.name}' AND TABLE_NAME = '{table.name}' AND INDEX_NAME != 'PRIMARY'
-            ORDER BY INDEX_NAME, SEQ_IN_INDEX
-        """)
         index_data = {}
-        for row in self.cursor.fetchall():
+        for row in rows:
             idx_name = row["INDEX_NAME"]
+            if idx_name == "PRIMARY":
+                continue
             if idx_name not in index_data:
                 index_data[idx_name] = {"columns": [], "unique": not row["NON_UNIQUE"]}
             index_data[idx_name]["columns"].append(row["COLUMN_NAME"])
@@ -538,32 +627,33 @@ class MariaDBContext(AbstractContext):
         return results
 
     def get_checks(self, table: MariaDBTable) -> list["MariaDBCheck"]:
-        from structures.engines.mariadb.database import MariaDBCheck
-
         if table is None or table.is_new:
             return []
 
+        return self._build_checks(table, self._select_checks(table.database.name, table.name))
+
+    def _select_checks(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
         try:
-            query = f"""
-                SELECT 
+            table_filter, parameters = self._table_filter("tc.TABLE_NAME", table_name)
+            self.execute(f"""
+                SELECT
+                    tc.TABLE_NAME,
                     cc.CONSTRAINT_NAME,
                     cc.CHECK_CLAUSE
                 FROM information_schema.CHECK_CONSTRAINTS cc
-                JOIN information_schema.TABLE_CONSTRAINTS tc 
-                    ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA 
+                JOIN information_schema.TABLE_CONSTRAINTS tc
+                    ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
                     AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
-                WHERE tc.TABLE_SCHEMA = '{table.database.name}'
-                AND tc.TABLE_NAME = '{table.name}'
+                WHERE tc.TABLE_SCHEMA = %s {table_filter}
                 AND tc.CONSTRAINT_TYPE = 'CHECK'
-                ORDER BY cc.CONSTRAINT_NAME
-            """
-
-            self.execute(query)
-            rows = self.fetchall()
-        except Exception:
+                ORDER BY tc.TABLE_NAME, cc.CONSTRAINT_NAME
+            """, [database_name, *parameters])
+            return self.fetchall()
+        except pymysql.err.MySQLError:
             # Older MariaDB versions don't have CHECK_CONSTRAINTS table
-            rows = []
+            return []
 
+    def _build_checks(self, table: SQLTable, rows: list[dict[str, Any]]) -> list["MariaDBCheck"]:
         results = []
         for i, row in enumerate(rows):
             results.append(
@@ -585,23 +675,34 @@ class MariaDBContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_foreign_keys for table={table.name} */")
 
+        return self._build_foreign_keys(table, self._select_foreign_keys(table.database.name, table.name))
+
+    def _select_foreign_keys(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        table_filter, parameters = self._table_filter("kcu.TABLE_NAME", table_name)
         self.execute(f"""
-            SELECT 
+            SELECT
+                kcu.TABLE_NAME,
                 kcu.CONSTRAINT_NAME,
-                GROUP_CONCAT(COLUMN_NAME ORDER BY ORDINAL_POSITION) as COLUMNS_NAME,
+                GROUP_CONCAT(kcu.COLUMN_NAME ORDER BY kcu.ORDINAL_POSITION) as COLUMNS_NAME,
                 kcu.REFERENCED_TABLE_NAME,
-                GROUP_CONCAT(REFERENCED_COLUMN_NAME ORDER BY ORDINAL_POSITION) as REFERENCED_COLUMNS,
-                UPDATE_RULE,
-                DELETE_RULE
+                GROUP_CONCAT(kcu.REFERENCED_COLUMN_NAME ORDER BY kcu.ORDINAL_POSITION) as REFERENCED_COLUMNS,
+                rc.UPDATE_RULE,
+                rc.DELETE_RULE
             FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
             JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
-            ON kcu.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
-            WHERE kcu.TABLE_SCHEMA = '{table.database.name}' AND kcu.TABLE_NAME = '{table.name}'
+                ON rc.CONSTRAINT_SCHEMA = kcu.TABLE_SCHEMA
+                AND rc.TABLE_NAME = kcu.TABLE_NAME
+                AND rc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
+            WHERE kcu.TABLE_SCHEMA = %s {table_filter}
             AND kcu.REFERENCED_TABLE_NAME IS NOT NULL
-            GROUP BY CONSTRAINT_NAME
-        """)
+            GROUP BY kcu.TABLE_NAME, kcu.CONSTRAINT_NAME
+            ORDER BY kcu.TABLE_NAME, kcu.CONSTRAINT_NAME
+        """, [database_name, *parameters])
+        return self.cursor.fetchall()
+
+    def _build_foreign_keys(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLForeignKey]:
         foreign_keys = []
-        for i, row in enumerate(self.cursor.fetchall()):
+        for i, row in enumerate(rows):
             foreign_keys.append(
                 MariaDBForeignKey(
                     id=i,
@@ -626,11 +727,12 @@ class MariaDBContext(AbstractContext):
         limit: int = 1000,
         offset: int = 0,
         orders: Optional[str] = None,
+        parameters: Optional[Sequence[Any]] = None,
     ) -> list[MariaDBRecord]:
         results = []
         for i, record in enumerate(
             super().get_records(
-                table, filters=filters, limit=limit, offset=offset, orders=orders
+                table, filters=filters, limit=limit, offset=offset, orders=orders, parameters=parameters
             ),
             start=offset,
         ):
@@ -638,6 +740,43 @@ class MariaDBContext(AbstractContext):
 
         return results
 
+    def _open_stream_cursor(self) -> pymysql.cursors.SSDictCursor:
+        # Unbuffered cursor: rows are read from the socket as they are fetched.
+        return self._connection.cursor(pymysql.cursors.SSDictCursor)
+
+    def _close_stream_cursor(self, cursor: pymysql.cursors.Cursor) -> None:
+        # Closing an unbuffered cursor reads what is left of its result off the socket, possibly millions of
+        # rows: the server is asked to stop sending them first. pymysql only tells through its private _result.
+        if (result := getattr(cursor, "_result", None)) is None or not result.unbuffered_active:
+            cursor.close()
+            return
+
+        try:
+            self.cancel_running_query()
+        except Exception as ex:
+            logger.warning(f"Cannot stop the result on the server, reading the rest of it instead: {ex}")
+
+        try:
+            cursor.close()
+        except pymysql.err.OperationalError as ex:
+            # The interrupted result ends with this error; the connection takes the next statement.
+            if ex.args[0] != ER.QUERY_INTERRUPTED:
+                raise
+
+    def cancel_running_query(self) -> bool:
+        if self._connection is None:
+            return False
+
+        # The busy connection cannot take another command: KILL QUERY goes through a side connection.
+        thread_id = int(self._connection.thread_id())
+        side_context = self.create_worker_context()
+        try:
+            side_context.execute(f"KILL QUERY {thread_id}")
+        finally:
+            side_context.disconnect()
+
+        return True
+
     def build_empty_database(self, /, name: str = "") -> MariaDBDatabase:
         return MariaDBDatabase(
             id=MariaDBContext.get_temporary_id(self.databases),
@@ -0,0 +1,190 @@
+import base64
+import contextlib
+import datetime
+import decimal
+import json
+import sqlite3
+
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from helpers.logger import logger
+
+CatalogRows = list[dict[str, Any]]
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS table_list (
+        connection_id INTEGER NOT NULL,
+        database_name TEXT NOT NULL,
+        server_version TEXT NOT NULL,
+        rows TEXT NOT NULL,
+        PRIMARY KEY (connection_id, database_name, server_version)
+    );
+    CREATE TABLE IF NOT EXISTS table_schema (
+        connection_id INTEGER NOT NULL,
+        database_name TEXT NOT NULL,
+        server_version TEXT NOT NULL,
+        table_key TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        parts TEXT NOT NULL,
+        PRIMARY KEY (connection_id, database_name, server_version, table_key)
+    );
+"""
+
+
+class CacheScope(NamedTuple):
+    """What cached catalog rows belong to: a saved connection, one of its databases and the server release."""
+    connection_id: int
+    database_name: str
+    server_version: str
+
+
+class CachedTableSchema(NamedTuple):
+    fingerprint: str
+    parts: dict[str, CatalogRows]
+
+
+# Catalog values JSON cannot hold, stored as one-key objects so rows read back with their driver types.
+_TAGGED_TYPES: tuple[tuple[str, type, Callable[[Any], Any], Callable[[Any], Any]], ...] = (
+    ("$datetime", datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    ("$date", datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    ("$time", datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+    ("$decimal", decimal.Decimal, str, decimal.Decimal),
+    ("$bytes", bytes, lambda value: base64.b64encode(value).decode("ascii"), base64.b64decode),
+)
+
+
+def _encode_value(value: Any) -> Any:
+    for tag, kind, encode, _decode in _TAGGED_TYPES:
+        if isinstance(value, kind):
+            return {tag: encode(value)}
+
+    raise TypeError(f"Cannot store {type(value).__name__} in the metadata cache")
+
+
+def _decode_object(value: dict[str, Any]) -> Any:
+    if len(value) == 1:
+        for tag, _kind, _encode, decode in _TAGGED_TYPES:
+            if tag in value:
+                return decode(value[tag])
+
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_encode_value, separators=(",", ":"))
+
+
+def _loads(value: str) -> Any:
+    return json.loads(value, object_hook=_decode_object)
+
+
+class MetadataCache:
+    """Catalog rows kept on disk between sessions, so a reconnect can show tables before the server answers.
+
+    The cache holds the rows the engines read from their catalogs, not the built
+    objects: contexts rebuild tables, columns, indexes, checks and foreign keys
+    with the same builders they use for live rows. Each table's rows are stored
+    with the fingerprint the engine reported for it, which is how a background
+    check finds the tables that changed since.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._initialized = False
+
+    @contextlib.contextmanager
+    def _open(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call keeps the cache usable from the UI thread and from revalidation threads alike.
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                if not self._initialized:
+                    connection.executescript(_SCHEMA)
+                    self._initialized = True
+                yield connection
+        finally:
+            connection.close()
+
+    def load_tables(self, scope: CacheScope) -> Optional[CatalogRows]:
+        """Return the cached table list rows of ``scope``, or ``None`` when nothing is cached."""
+        try:
+            with self._open() as connection:
+                row = connection.execute(
+                    "SELECT rows FROM table_list WHERE connection_id = ? AND database_name = ? AND server_version = ?",
+                    scope,
+                ).fetchone()
+        except (sqlite3.Error, ValueError) as ex:
+            logger.warning("Cannot read the metadata cache %s: %s", self.path, ex)
+            return None
+
+        return _loads(row[0]) if row else None
+
+    def load_schemas(self, scope: CacheScope, table_keys: Optional[list[str]] = None) -> dict[str, CachedTableSchema]:
+        """Return the cached schema rows of ``scope`` by table key, restricted to ``table_keys`` when given."""
+        try:
+            with self._open() as connection:
+                rows = connection.execute(
+                    "SELECT table_key, fingerprint, parts FROM table_schema "
+                    "WHERE connection_id = ? AND database_name = ? AND server_version = ?",
+                    scope,
+                ).fetchall()
+        except (sqlite3.Error, ValueError) as ex:
+            logger.warning("Cannot read the metadata cache %s: %s", self.path, ex)
+            return {}
+
+        wanted = None if table_keys is None else set(table_keys)
+        return {
+            table_key: CachedTableSchema(fingerprint, _loads(parts))
+            for table_key, fingerprint, parts in rows
+            if wanted is None or table_key in wanted
+        }
+
+    def store_tables(self, scope: CacheScope, rows: CatalogRows) -> None:
+        """Replace the cached table list of ``scope``; rows cached for other server versions are dropped."""
+        try:
+            with self._open() as connection:
+                self._drop_other_versions(connection, scope)
+                connection.execute(
+                    "INSERT OR REPLACE INTO table_list (connection_id, database_name, server_version, rows) VALUES (?, ?, ?, ?)",
+                    (*scope, _dumps(rows)),
+                )
+        except (sqlite3.Error, TypeError, ValueError) as ex:
+            logger.warning("Cannot write the metadata cache %s: %s", self.path, ex)
+
+    def store_schemas(self, scope: CacheScope, schemas: dict[str, CachedTableSchema]) -> None:
+        """Insert or replace the schema rows of the given tables of ``scope``."""
+        try:
+            with self._open() as connection:
+                self._drop_other_versions(connection, scope)
+                connection.executemany(
+                    "INSERT OR REPLACE INTO table_schema "
+                    "(connection_id, database_name, server_version, table_key, fingerprint, parts) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (*scope, table_key, schema.fingerprint, _dumps(schema.parts))
+                        for table_key, schema in schemas.items()
+                    ],
+                )
+        except (sqlite3.Error, TypeError, ValueError) as ex:
+            logger.warning("Cannot write the metadata cache %s: %s", self.path, ex)
+
+    def discard_schemas(self, scope: CacheScope, table_keys: list[str]) -> None:
+        """Forget the schema rows of tables that no longer exist."""
+        try:
+            with self._open() as connection:
+                connection.executemany(
+                    "DELETE FROM table_schema "
+                    "WHERE connection_id = ? AND database_name = ? AND server_version = ? AND table_key = ?",
+                    [(*scope, table_key) for table_key in table_keys],
+                )
+        except (sqlite3.Error, ValueError) as ex:
+            logger.warning("Cannot write the metadata cache %s: %s", self.path, ex)
+
+    @staticmethod
+    def _drop_other_versions(connection: sqlite3.Connection, scope: CacheScope) -> None:
+        # After a server upgrade the old rows can never be served again.
+        for table in ("table_list", "table_schema"):
+            connection.execute(
+                f"DELETE FROM {table} WHERE connection_id = ? AND database_name = ? AND server_version <> ?",
+                scope,
+            )
@@ -1,17 +1,18 @@
+import contextlib
 import re
 import ssl
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional, Sequence
 
 import pymysql
 
-from pymysql.constants import FIELD_TYPE
+from pymysql.constants import ER, FIELD_TYPE
 
 from gettext import gettext as _
 
 from helpers.logger import logger
 from structures.connection import Connection
 
-from structures.engines.context import QUERY_LOGS, AbstractContext
+from structures.engines.context import QUERY_LOGS, AbstractContext, TableSchema
 from structures.engines.database import (
     SQLColumn,
     SQLDatabase,
@@ -270,6 +271,42 @@ class MySQLContext(AbstractContext):
     def set_database(self, database: SQLDatabase) -> None:
         self.execute(f"USE {database.quoted_name}")
 
+    def _session_reset_statements(self, database_name: Optional[str]) -> list[str]:
+        # A borrower may have switched database with USE.
+        statements = ["ROLLBACK"]
+        if database_name:
+            statements.append(f"USE {self.quote_identifier(database_name)}")
+        return statements
+
+    @contextlib.contextmanager
+    def _statement_timeout(self, timeout: Optional[float]) -> Iterator[None]:
+        if timeout is None:
+            yield
+            return
+
+        # max_execution_time is in milliseconds and only applies to SELECT statements.
+        self.execute(f"SET SESSION max_execution_time = {int(timeout * 1000)}")
+        try:
+            yield
+        finally:
+            self.execute("SET SESSION max_execution_time = DEFAULT")
+
+    def estimate_records_count(self, table: SQLTable, filters: Optional[str] = None) -> Optional[int]:
+        if filters:
+            self.execute(f"EXPLAIN SELECT * FROM {self._records_from_clause(table)} WHERE {filters}")
+            if (plan := self.fetchone()) is None or plan.get("rows") is None:
+                return None
+            return int(int(plan["rows"]) * float(plan.get("filtered") or 100) / 100)
+
+        # InnoDB's sampled row count, the same figure SHOW TABLE STATUS reports; NULL for views.
+        self.execute(
+            "SELECT TABLE_ROWS AS table_rows FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            [table.database.name, table.name],
+        )
+        if (row := self.fetchone()) is None or row["table_rows"] is None:
+            return None
+        return int(row["table_rows"])
+
     def get_server_version(self) -> str:
         self.execute("SELECT VERSION() as version")
         version = self.cursor.fetchone()
@@ -309,7 +346,7 @@ class MySQLContext(AbstractContext):
                     default_collation=row["default_collation"],
                     total_bytes=float(row["total_bytes"]),
                     context=self,
-                    get_tables_handler=self.get_tables,
+                    get_tables_handler=self.load_tables,
                     get_procedures_handler=self.get_procedures,
                     get_functions_handler=self.get_functions,
                     get_views_handler=self.get_views,
@@ -321,12 +358,13 @@ class MySQLContext(AbstractContext):
     def get_procedures(self, database: SQLDatabase) -> list[MySQLProcedure]:
         results: list[MySQLProcedure] = []
         self.execute(
-            f"""
+            """
             SELECT ROUTINE_NAME
             FROM INFORMATION_SCHEMA.ROUTINES
-            WHERE ROUTINE_SCHEMA = '{database.name}' AND ROUTINE_TYPE = 'PROCEDURE'
+            WHERE ROUTINE_SCHEMA = %s AND ROUTINE_TYPE = 'PROCEDURE'
             ORDER BY ROUTINE_NAME
-            """
+            """,
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -346,12 +384,13 @@ class MySQLContext(AbstractContext):
 
         results: list[MySQLFunction] = []
         self.execute(
-            f"""
+            """
             SELECT ROUTINE_NAME
             FROM INFORMATION_SCHEMA.ROUTINES
-            WHERE ROUTINE_SCHEMA = '{database.name}' AND ROUTINE_TYPE = 'FUNCTION'
+            WHERE ROUTINE_SCHEMA = %s AND ROUTINE_TYPE = 'FUNCTION'
             ORDER BY ROUTINE_NAME
-            """
+            """,
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -369,7 +408,8 @@ class MySQLContext(AbstractContext):
     def get_views(self, database: SQLDatabase):
         results: list[MySQLView] = []
         self.execute(
-            f"SELECT TABLE_NAME, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = '{database.name}' ORDER BY TABLE_NAME"
+            "SELECT TABLE_NAME, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME",
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -396,7 +436,8 @@ class MySQLContext(AbstractContext):
     def get_triggers(self, database: SQLDatabase) -> list[MySQLTrigger]:
         results: list[MySQLTrigger] = []
         self.execute(
-            f"SELECT TRIGGER_NAME, ACTION_STATEMENT FROM INFORMATION_SCHEMA.TRIGGERS WHERE TRIGGER_SCHEMA = '{database.name}' ORDER BY TRIGGER_NAME"
+            "SELECT TRIGGER_NAME, ACTION_STATEMENT FROM INFORMATION_SCHEMA.TRIGGERS WHERE TRIGGER_SCHEMA = %s ORDER BY TRIGGER_NAME",
+            [database.name],
         )
         for i, result in enumerate(self.fetchall()):
             results.append(
@@ -411,21 +452,26 @@ class MySQLContext(AbstractContext):
         return results
 
     def get_tables(self, database: SQLDatabase) -> list[SQLTable]:
+        return self._build_tables(database, self._select_tables(database))
+
+    def _select_tables(self, database: SQLDatabase) -> list[dict[str, Any]]:
         logger.debug(f"get_tables for database={database.name}")
 
         QUERY_LOGS.append(f"/* get_tables for database={database.name} */")
 
-        self.execute(f"""
+        self.execute("""
             SELECT TABLE_NAME, ENGINE, TABLE_COLLATION, TABLE_ROWS, AUTO_INCREMENT, ROW_FORMAT,
             ROUND((DATA_LENGTH + INDEX_LENGTH), 2) as total_bytes
             FROM information_schema.TABLES
-            WHERE TABLE_SCHEMA = '{database.name}'
+            WHERE TABLE_SCHEMA = %s
             AND TABLE_TYPE = 'BASE TABLE'
             ORDER BY TABLE_NAME
-        """)
+        """, [database.name])
+        return self.fetchall()
 
+    def _build_tables(self, database: SQLDatabase, rows: list[dict[str, Any]]) -> list[SQLTable]:
         results = []
-        for i, row in enumerate(self.cursor.fetchall()):
+        for i, row in enumerate(rows):
             results.append(
                 MySQLTable(
                     id=i,
@@ -437,34 +483,127 @@ class MySQLContext(AbstractContext):
                     auto_increment=int(row["AUTO_INCREMENT"] or 0),
                     total_bytes=row["total_bytes"],
                     total_rows=row["TABLE_ROWS"],
-                    get_columns_handler=self.get_columns,
-                    get_indexes_handler=self.get_indexes,
-                    get_checks_handler=self.get_checks,
-                    get_foreign_keys_handler=self.get_foreign_keys,
                     get_records_handler=self.get_records,
+                    **self.table_schema_handlers(),
                 )
             )
 
         return results
 
+    def get_tables_schema(self, database: SQLDatabase, tables: list[SQLTable]) -> dict[int, TableSchema]:
+        logger.debug(f"get_tables_schema for database={database.name}")
+
+        QUERY_LOGS.append(f"/* get_tables_schema for database={database.name} */")
+
+        return self._build_tables_schema(
+            {table.name: table for table in tables},
+            self._select_tables_schema(database),
+            self.table_schema_builders(),
+        )
+
+    def _select_tables_schema(self, database: SQLDatabase) -> dict[str, dict[str, list[dict[str, Any]]]]:
+        return self._group_catalog_rows(lambda row: row["TABLE_NAME"], {
+            "columns": self._select_columns(database.name),
+            "indexes": self._select_indexes(database.name),
+            "checks": self._select_checks(database.name),
+            "foreign_keys": self._select_foreign_keys(database.name),
+        })
+
+    def table_schema_builders(self) -> dict[str, Callable[[SQLTable, list[dict[str, Any]]], list[Any]]]:
+        return {
+            "columns": self._build_columns,
+            "indexes": self._build_indexes,
+            "checks": self._build_checks,
+            "foreign_keys": self._build_foreign_keys,
+        }
+
+    @contextlib.contextmanager
+    def _fingerprint_session(self) -> Iterator[None]:
+        # GROUP_CONCAT stops at 1024 bytes by default, less than the columns of a wide table.
+        settings = {"group_concat_max_len": 16 * 1024 * 1024}
+        # From MySQL 8.0, information_schema.TABLES is answered from statistics cached for 24 h by default.
+        self.server_version = self.server_version or self.get_server_version()
+        if int(re.match(r"\d*", self.server_version).group() or 0) >= 8:
+            settings["information_schema_stats_expiry"] = 0
+
+        for name, value in settings.items():
+            self.execute(f"SET SESSION {name} = {value}")
+        try:
+            yield
+        finally:
+            for name in settings:
+                self.execute(f"SET SESSION {name} = DEFAULT")
+
+    def get_tables_fingerprints(self, database: SQLDatabase) -> dict[str, str]:
+        # In-place and instant ALTERs leave CREATE_TIME alone: the columns, indexes and constraints are hashed too.
+        with self._fingerprint_session():
+            self.execute("""
+                SELECT tab.TABLE_NAME, tab.CREATE_TIME, col.fingerprint AS columns_fingerprint,
+                       sta.fingerprint AS indexes_fingerprint, con.fingerprint AS constraints_fingerprint
+                FROM information_schema.TABLES tab
+                LEFT JOIN (
+                    SELECT TABLE_NAME, MD5(GROUP_CONCAT(
+                        CONCAT_WS(':', ORDINAL_POSITION, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, IFNULL(COLUMN_DEFAULT, 'NULL'),
+                                  EXTRA, IFNULL(COLLATION_NAME, ''), COLUMN_COMMENT)
+                        ORDER BY ORDINAL_POSITION SEPARATOR '|'
+                    )) AS fingerprint
+                    FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = %s
+                    GROUP BY TABLE_NAME
+                ) col ON col.TABLE_NAME = tab.TABLE_NAME
+                LEFT JOIN (
+                    SELECT TABLE_NAME, MD5(GROUP_CONCAT(
+                        CONCAT_WS(':', INDEX_NAME, SEQ_IN_INDEX, IFNULL(COLUMN_NAME, ''), NON_UNIQUE, INDEX_TYPE, IFNULL(SUB_PART, ''))
+                        ORDER BY INDEX_NAME, SEQ_IN_INDEX SEPARATOR '|'
+                    )) AS fingerprint
+                    FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = %s
+                    GROUP BY TABLE_NAME
+                ) sta ON sta.TABLE_NAME = tab.TABLE_NAME
+                LEFT JOIN (
+                    SELECT TABLE_NAME, MD5(GROUP_CONCAT(
+                        CONCAT_WS(':', CONSTRAINT_NAME, CONSTRAINT_TYPE) ORDER BY CONSTRAINT_NAME SEPARATOR '|'
+                    )) AS fingerprint
+                    FROM information_schema.TABLE_CONSTRAINTS
+                    WHERE TABLE_SCHEMA = %s
+                    GROUP BY TABLE_NAME
+                ) con ON con.TABLE_NAME = tab.TABLE_NAME
+                WHERE tab.TABLE_SCHEMA = %s
+                AND tab.TABLE_TYPE = 'BASE TABLE'
+            """, [database.name] * 4)
+            rows = self.fetchall()
+
+        return {
+            row["TABLE_NAME"]: "|".join(
+                str(row[part]) for part in ("CREATE_TIME", "columns_fingerprint", "indexes_fingerprint", "constraints_fingerprint")
+            )
+            for row in rows
+        }
+
     def get_columns(self, table: SQLTable) -> list[SQLColumn]:
-        results = []
         if table.id == -1:
-            return results
+            return []
 
         logger.debug(f"get_columns for table={table.name}")
 
         QUERY_LOGS.append(f"/* get_columns for table={table.name} */")
 
+        return self._build_columns(table, self._select_columns(table.database.name, table.name))
+
+    def _select_columns(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        table_filter, parameters = self._table_filter("TABLE_NAME", table_name)
         self.execute(f"""
-            SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE,
+            SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE,
                    IS_NULLABLE, COLUMN_DEFAULT, EXTRA, COLUMN_TYPE
             FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = '{table.database.name}' AND TABLE_NAME = '{table.name}'
-            ORDER BY ORDINAL_POSITION
-        """)
+            WHERE TABLE_SCHEMA = %s {table_filter}
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, [database_name, *parameters])
+        return self.cursor.fetchall()
 
-        for i, row in enumerate(self.cursor.fetchall()):
+    def _build_columns(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLColumn]:
+        results = []
+        for i, row in enumerate(rows):
             is_auto_increment = "auto_increment" in (row["EXTRA"] or "").lower()
             is_nullable = row["IS_NULLABLE"] == "YES"
             parse_type = self._parse_type(row["COLUMN_TYPE"])
@@ -498,16 +637,23 @@ class MySQLContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_indexes for table={table.name} */")
 
-        results = []
+        return self._build_indexes(table, self._select_indexes(table.database.name, table.name))
 
-        # Get primary key
+    def _select_indexes(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        # STATISTICS lists the primary key too, as the index named PRIMARY.
+        table_filter, parameters = self._table_filter("TABLE_NAME", table_name)
         self.execute(f"""
-            SELECT COLUMN_NAME
-            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-            WHERE TABLE_SCHEMA = '{table.database.name}' AND TABLE_NAME = '{table.name}' AND CONSTRAINT_NAME = 'PRIMARY'
-            ORDER BY ORDINAL_POSITION
-        """)
-        pk_columns = [row["COLUMN_NAME"] for row in self.cursor.fetchall()]
+            SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX, NON_UNIQUE
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s {table_filter}
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, [database_name, *parameters])
+        return self.cursor.fetchall()
+
+    def _build_indexes(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLIndex]:
+        results = []
+
+        pk_columns = [row["COLUMN_NAME"] for row in rows if row["INDEX_NAME"] == "PRIMARY"]
         if pk_columns:
             results.append(
                 MySQLIndex(
@@ -519,16 +665,11 @@ class MySQLContext(AbstractContext):
                 )
             )
 
-        # Get other indexes
-        self.execute(f"""
-            SELECT INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX, NON_UNIQUE
-            FROM INFORMATION_SCHEMA.STATISTICS
-            WHERE TABLE_SCHEMA = '{table.database.name}' AND TABLE_NAME = '{table.name}' AND INDEX_NAME != 'PRIMARY'
-            ORDER BY INDEX_NAME, SEQ_IN_INDEX
-        """)
         index_data = {}
-        for row in self.cursor.fetchall():
+        for row in rows:
             idx_name = row["INDEX_NAME"]
+            if idx_name == "PRIMARY":
+                continue
             if idx_name not in index_data:
                 index_data[idx_name] = {"columns": [], "unique": not row["NON_UNIQUE"]}
             index_data[idx_name]["columns"].append(row["COLUMN_NAME"])
@@ -548,28 +689,33 @@ class MySQLContext(AbstractContext):
         return results
 
     def get_checks(self, table: MySQLTable) -> list["MySQLCheck"]:
-        from structures.engines.mysql.database import MySQLCheck
-
         if table is None or table.is_new:
             return []
 
-        query = f"""
-            SELECT 
-                cc.CONSTRAINT_NAME,
-                cc.CHECK_CLAUSE
-            FROM information_schema.CHECK_CONSTRAINTS cc
-            JOIN information_schema.TABLE_CONSTRAINTS tc 
-                ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA 
-                AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
-            WHERE tc.TABLE_SCHEMA = '{table.database.name}'
-            AND tc.TABLE_NAME = '{table.name}'
-            AND tc.CONSTRAINT_TYPE = 'CHECK'
-            ORDER BY cc.CONSTRAINT_NAME
-        """
-
-        self.execute(query)
-        rows = self.fetchall()
+        return self._build_checks(table, self._select_checks(table.database.name, table.name))
+
+    def _select_checks(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        try:
+            table_filter, parameters = self._table_filter("tc.TABLE_NAME", table_name)
+            self.execute(f"""
+                SELECT
+                    tc.TABLE_NAME,
+                    cc.CONSTRAINT_NAME,
+                    cc.CHECK_CLAUSE
+                FROM information_schema.CHECK_CONSTRAINTS cc
+                JOIN information_schema.TABLE_CONSTRAINTS tc
+                    ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+                    AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+                WHERE tc.TABLE_SCHEMA = %s {table_filter}
+                AND tc.CONSTRAINT_TYPE = 'CHECK'
+                ORDER BY tc.TABLE_NAME, cc.CONSTRAINT_NAME
+            """, [database_name, *parameters])
+            return self.fetchall()
+        except pymysql.err.MySQLError:
+            # MySQL before 8.0.16 has no CHECK_CONSTRAINTS table
+            return []
 
+    def _build_checks(self, table: SQLTable, rows: list[dict[str, Any]]) -> list["MySQLCheck"]:
         results = []
         for i, row in enumerate(rows):
             results.append(
@@ -591,21 +737,33 @@ class MySQLContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_foreign_keys for table={table.name} */")
 
+        return self._build_foreign_keys(table, self._select_foreign_keys(table.database.name, table.name))
+
+    def _select_foreign_keys(self, database_name: str, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        table_filter, parameters = self._table_filter("isKcu.TABLE_NAME", table_name)
         self.execute(f"""
             SELECT
+                isKcu.TABLE_NAME,
                 isKcu.CONSTRAINT_NAME,
                 GROUP_CONCAT(isKcu.COLUMN_NAME ORDER BY isKcu.ORDINAL_POSITION) as COLUMNS_NAMES,
                 isKcu.REFERENCED_TABLE_NAME,
-                GROUP_CONCAT(isKcu.REFERENCED_COLUMN_NAME ORDER BY ORDINAL_POSITION) as REFERENCED_COLUMNS,
+                GROUP_CONCAT(isKcu.REFERENCED_COLUMN_NAME ORDER BY isKcu.ORDINAL_POSITION) as REFERENCED_COLUMNS,
                 isRc.UPDATE_RULE,
                 isRc.DELETE_RULE
             FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE isKcu
-            JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS isRc ON isRc.CONSTRAINT_NAME = isKcu.CONSTRAINT_NAME
-            WHERE isKcu.TABLE_SCHEMA = '{table.database.name}' AND isKcu.TABLE_NAME = '{table.name}'
-            GROUP BY CONSTRAINT_NAME, REFERENCED_TABLE_NAME, UPDATE_RULE, DELETE_RULE
-        """)
+            JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS isRc
+                ON isRc.CONSTRAINT_SCHEMA = isKcu.TABLE_SCHEMA
+                AND isRc.TABLE_NAME = isKcu.TABLE_NAME
+                AND isRc.CONSTRAINT_NAME = isKcu.CONSTRAINT_NAME
+            WHERE isKcu.TABLE_SCHEMA = %s {table_filter}
+            GROUP BY isKcu.TABLE_NAME, isKcu.CONSTRAINT_NAME, isKcu.REFERENCED_TABLE_NAME, isRc.UPDATE_RULE, isRc.DELETE_RULE
+            ORDER BY isKcu.TABLE_NAME, isKcu.CONSTRAINT_NAME
+        """, [database_name, *parameters])
+        return self.cursor.fetchall()
+
+    def _build_foreign_keys(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLForeignKey]:
         foreign_keys = []
-        for i, row in enumerate(self.cursor.fetchall()):
+        for i, row in enumerate(rows):
             foreign_keys.append(
                 MySQLForeignKey(
                     id=i,
@@ -630,6 +788,7 @@ class MySQLContext(AbstractContext):
         limit: int = 1000,
         offset: int = 0,
         orders: Optional[str] = None,
+        parameters: Optional[Sequence[Any]] = None,
     ) -> list[MySQLRecord]:
         QUERY_LOGS.append(f"/* get_records for table={table.name} */")
         if table is None or table.is_new:
@@ -641,7 +800,7 @@ class MySQLContext(AbstractContext):
         if orders:
             query += f" ORDER BY {orders}"
         query += f" LIMIT {limit} OFFSET {offset}"
-        self.execute(query)
+        self.execute(query, parameters)
 
         results = []
         for i, record in enumerate(self.cursor.fetchall(), start=offset):
@@ -649,6 +808,43 @@ class MySQLContext(AbstractContext):
         logger.debug(f"get records for table={table.name}")
         return results
 
+    def _open_stream_cursor(self) -> pymysql.cursors.SSDictCursor:
+        # Unbuffered cursor: rows are read from the socket as they are fetched.
+        return self._connection.cursor(pymysql.cursors.SSDictCursor)
+
+    def _close_stream_cursor(self, cursor: pymysql.cursors.Cursor) -> None:
+        # Closing an unbuffered cursor reads what is left of its result off the socket, possibly millions of
+        # rows: the server is asked to stop sending them first. pymysql only tells through its private _result.
+        if (result := getattr(cursor, "_result", None)) is None or not result.unbuffered_active:
+            cursor.close()
+            return
+
+        try:
+            self.cancel_running_query()
+        except Exception as ex:
+            logger.warning(f"Cannot stop the result on the server, reading the rest of it instead: {ex}")
+
+        try:
+            cursor.close()
+        except pymysql.err.OperationalError as ex:
+            # The interrupted result ends with this error; the connection takes the next statement.
+            if ex.args[0] != ER.QUERY_INTERRUPTED:
+                raise
+
+    def cancel_running_query(self) -> bool:
+        if self._connection is None:
+            return False
+
+        # The busy connection cannot take another command: KILL QUERY goes through a side connection.
+        thread_id = int(self._connection.thread_id())
+        side_context = self.create_worker_context()
+        try:
+            side_context.execute(f"KILL QUERY {thread_id}")
+        finally:
+            side_context.disconnect()
+
+        return True
+
     def build_empty_database(self, /, name: str = "") -> MySQLDatabase:
         return MySQLDatabase(
             id=MySQLContext.get_temporary_id(self.databases),
@@ -0,0 +1,203 @@
+import contextlib
+import dataclasses
+import threading
+import time
+
+from typing import Iterator, Optional
+
+from helpers.logger import logger
+
+from structures.engines.context import AbstractContext
+from structures.engines.database import SQLDatabase
+
+DEFAULT_MIN_SIZE = 1
+DEFAULT_MAX_SIZE = 8
+DEFAULT_IDLE_TIMEOUT = 300.0
+# A connection idle for less than this is handed out without a ping.
+DEFAULT_HEALTH_CHECK_AFTER = 5.0
+DEFAULT_ACQUIRE_TIMEOUT = 30.0
+
+
+class PoolExhaustedError(Exception):
+    """Every connection of the pool stayed borrowed for the whole acquire timeout."""
+
+
+@dataclasses.dataclass
+class _IdleContext:
+    context: AbstractContext
+    database_name: Optional[str]
+    released_at: float
+
+
+class ContextPool:
+    """Worker contexts of a session, kept open between background jobs.
+
+    Query runs, record pages and row counts borrow a context on a database and
+    give it back when done, instead of paying a connect (and TLS handshake,
+    through the SSH tunnel of the session) for every click. Idle contexts are
+    pinged before reuse once they have rested for a while, closed after
+    ``idle_timeout`` (keeping ``min_size`` of them) and reset on return, so a
+    borrower never sees a transaction or session setting left by the previous one.
+    """
+
+    def __init__(
+            self,
+            context: AbstractContext,
+            min_size: int = DEFAULT_MIN_SIZE,
+            max_size: int = DEFAULT_MAX_SIZE,
+            idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+            health_check_after: float = DEFAULT_HEALTH_CHECK_AFTER,
+            acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+    ):
+        self.context = context
+        self.max_size = max(1, max_size)
+        self.min_size = min(max(0, min_size), self.max_size)
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: list[_IdleContext] = []
+        # Borrowed contexts by id(), with the name of the database each was opened on.
+        self._borrowed: dict[int, tuple[AbstractContext, Optional[str]]] = {}
+        # Connections being opened, counted against max_size before they exist.
+        self._opening = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        with self._condition:
+            return len(self._idle) + len(self._borrowed) + self._opening
+
+    def _is_full(self) -> bool:
+        return len(self._idle) + len(self._borrowed) + self._opening >= self.max_size
+
+    def acquire(self, database: Optional[SQLDatabase] = None) -> AbstractContext:
+        """Borrow a context connected to ``database``, opening one when none is idle."""
+        database_name = getattr(database, "name", None)
+        deadline = time.monotonic() + self.acquire_timeout
+
+        stale: list[AbstractContext] = []
+
+        while True:
+            self._disconnect(stale)
+            stale = []
+
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("The connection pool is closed")
+
+                stale.extend(self._prune())
+
+                if (idle := self._take_idle(database_name)) is None:
+                    if self._is_full() and self._idle:
+                        # Full, but with a context idle on another database: it makes room.
+                        stale.append(self._idle.pop(0).context)
+
+                    if self._is_full():
+                        if (remaining := deadline - time.monotonic()) <= 0:
+                            raise PoolExhaustedError(f"All {self.max_size} pooled connections are in use")
+                        self._condition.wait(remaining)
+                        continue
+
+                    self._opening += 1
+
+            self._disconnect(stale)
+
+            if idle is None:
+                return self._open(database, database_name)
+
+            if time.monotonic() - idle.released_at < self.health_check_after or idle.context.is_alive():
+                with self._condition:
+                    self._borrowed[id(idle.context)] = (idle.context, database_name)
+                return idle.context
+
+            logger.debug("Dropping a pooled connection that no longer answers")
+            stale = [idle.context]
+
+    def release(self, context: AbstractContext, discard: bool = False) -> None:
+        """Give a borrowed context back; ``discard`` closes it instead, e.g. after a failed cancel."""
+        with self._condition:
+            borrowed = self._borrowed.pop(id(context), None)
+            self._condition.notify()
+
+        if borrowed is None:
+            return
+
+        _context, database_name = borrowed
+
+        if not discard and not self._closed:
+            try:
+                context.reset_session_state(database_name)
+            except Exception as ex:
+                logger.debug("Dropping a pooled connection that could not be reset: %s", ex)
+                discard = True
+
+        with self._condition:
+            if not discard and not self._closed:
+                self._idle.append(_IdleContext(context, database_name, time.monotonic()))
+                self._condition.notify()
+                return
+
+        self._disconnect([context])
+
+    @contextlib.contextmanager
+    def borrow(self, database: Optional[SQLDatabase] = None) -> Iterator[AbstractContext]:
+        """Borrow a context for the duration of a ``with`` block."""
+        context = self.acquire(database)
+        try:
+            yield context
+        finally:
+            # A connection broken by the block fails its reset and is closed there.
+            self.release(context)
+
+    def close(self) -> None:
+        """Close the idle contexts and refuse new borrows; borrowed ones close when given back."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+
+        self._disconnect([entry.context for entry in idle])
+
+    def _take_idle(self, database_name: Optional[str]) -> Optional[_IdleContext]:
+        # Most recently used first: it is the one least likely to have been dropped by the server.
+        for index in range(len(self._idle) - 1, -1, -1):
+            if self._idle[index].database_name == database_name:
+                return self._idle.pop(index)
+
+        return None
+
+    def _prune(self) -> list[AbstractContext]:
+        expired_before = time.monotonic() - self.idle_timeout
+        stale = []
+
+        for entry in list(self._idle):
+            if len(self._idle) + len(self._borrowed) <= self.min_size:
+                break
+            if entry.released_at < expired_before:
+                self._idle.remove(entry)
+                stale.append(entry.context)
+
+        return stale
+
+    def _open(self, database: Optional[SQLDatabase], database_name: Optional[str]) -> AbstractContext:
+        try:
+            context = self.context.create_worker_context(database)
+        except BaseException:
+            with self._condition:
+                self._opening -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._opening -= 1
+            self._borrowed[id(context)] = (context, database_name)
+
+        return context
+
+    @staticmethod
+    def _disconnect(contexts: list[AbstractContext]) -> None:
+        for context in contexts:
+            with contextlib.suppress(Exception):
+                context.disconnect()
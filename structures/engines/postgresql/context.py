@@ -1,15 +1,20 @@
+import contextlib
+import itertools
+import json
+import re
+
 import psycopg2
 import psycopg2.extras
 
 from psycopg2.extensions import cursor as PostgreSQLCursor
 
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional, Sequence
 from gettext import gettext as _
 
 from helpers.logger import logger
 from structures.connection import Connection
 
-from structures.engines.context import QUERY_LOGS, AbstractContext
+from structures.engines.context import QUERY_LOGS, AbstractContext, TableSchema
 from structures.engines.database import (
     SQLDatabase,
     SQLTable,
@@ -19,6 +24,7 @@ from structures.engines.database import (
     SQLTrigger,
 )
 from structures.engines.datatype import SQLDataType, DataTypeCategory, DataTypeFormat
+from structures.engines.prepared import PreparedStatementCache
 
 from structures.engines.postgresql import MAP_COLUMN_FIELDS
 from structures.engines.postgresql.database import (
@@ -30,10 +36,32 @@ from structures.engines.postgresql.database import (
     PostgreSQLView,
     PostgreSQLTrigger,
     PostgreSQLDatabase,
+    PostgreSQLCheck,
 )
 from structures.engines.postgresql.datatype import PostgreSQLDataType
 from structures.engines.postgresql.indextype import PostgreSQLIndexType
 
+_STREAMABLE_QUERY_RE = re.compile(r"^\s*(SELECT|VALUES|TABLE)\b", re.IGNORECASE)
+# Refused by DECLARE (INTO) or by a cursor WITH HOLD (locking clauses); a match in a string only costs the streaming.
+_UNSTREAMABLE_CLAUSE_RE = re.compile(r"\bINTO\b|\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+# The statements PREPARE accepts.
+_PREPARABLE_QUERY_RE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|VALUES|WITH)\b", re.IGNORECASE)
+_PYFORMAT_PLACEHOLDER_RE = re.compile(r"%%|%s")
+# invalid_sql_statement_name, after a DISCARD ALL run by the user, and
+# feature_not_supported, "cached plan must not change result type" once the table was altered.
+_STALE_PREPARED_STATEMENT_PGCODES = ("26000", "0A000")
+_SYSTEM_SCHEMAS = "('pg_catalog', 'information_schema', 'pg_toast')"
+
+
+def _count_placeholders(query: str) -> int:
+    return sum(1 for match in _PYFORMAT_PLACEHOLDER_RE.finditer(query) if match.group() == "%s")
+
+
+def _positional_placeholders(query: str) -> str:
+    """Rewrite the psycopg2 placeholders of ``query`` into the ``$n`` ones of PREPARE."""
+    positions = itertools.count(1)
+    return _PYFORMAT_PLACEHOLDER_RE.sub(lambda match: "%" if match.group() == "%%" else f"${next(positions)}", query)
+
 
 class PostgreSQLContext(AbstractContext):
     MAP_COLUMN_FIELDS = MAP_COLUMN_FIELDS
@@ -52,6 +80,10 @@ class PostgreSQLContext(AbstractContext):
         self.password = connection.configuration.password
         self.port = getattr(connection.configuration, "port", 5432)
         self._current_database: Optional[str] = None
+        self._stream_cursor_counter = 0
+        # Stream cursors that run in a transaction opened for them, closed with them.
+        self._stream_transactions: set[str] = set()
+        self._prepared_statements = PreparedStatementCache()
 
     def after_connect(self, *args, **kwargs):
         super().after_connect(*args, **kwargs)
@@ -93,13 +125,13 @@ class PostgreSQLContext(AbstractContext):
         """)
 
         for row in self.fetchall():
-            self.execute(f"""
+            self.execute("""
                 SELECT enumlabel
                 FROM pg_enum e
                 JOIN pg_type t ON e.enumtypid = t.oid
-                WHERE t.typname = '{row["typname"]}'
+                WHERE t.typname = %s
                 ORDER BY e.enumsortorder
-            """)
+            """, [row["typname"]])
             labels = [r["enumlabel"] for r in self.fetchall()]
             datatype = SQLDataType(
                 name=row["typname"],
@@ -206,6 +238,8 @@ class PostgreSQLContext(AbstractContext):
 
                 self._connection = psycopg2.connect(**base_kwargs)
                 self._connection.autocommit = True
+                self._prepared_statements.clear()
+                self._stream_transactions.clear()
                 self._cursor = self._connection.cursor(
                     cursor_factory=psycopg2.extras.RealDictCursor
                 )
@@ -226,6 +260,48 @@ class PostgreSQLContext(AbstractContext):
             self.disconnect()
             self.connect(database=database.name)
 
+    def _session_reset_statements(self, database_name: Optional[str]) -> list[str]:
+        # The database is fixed per connection; RESET ALL undoes SET search_path and the like.
+        return ["ROLLBACK", "RESET ALL"]
+
+    @contextlib.contextmanager
+    def _statement_timeout(self, timeout: Optional[float]) -> Iterator[None]:
+        if timeout is None:
+            yield
+            return
+
+        self.execute(f"SET statement_timeout = {int(timeout * 1000)}")
+        try:
+            yield
+        finally:
+            self.execute("RESET statement_timeout")
+
+    def estimate_records_count(self, table: SQLTable, filters: Optional[str] = None) -> Optional[int]:
+        if filters:
+            self.execute(f"EXPLAIN (FORMAT JSON) SELECT * FROM {self._records_from_clause(table)} WHERE {filters}")
+            if (row := self.fetchone()) is None:
+                return None
+            plan = next(iter(row.values()))
+            # psycopg2 decodes the json column unless a typecaster was registered for it.
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        # reltuples is -1 for a table never vacuumed nor analyzed.
+        self.execute("SELECT reltuples::bigint AS table_rows FROM pg_class WHERE oid = to_regclass(%s)", [self._records_from_clause(table)])
+        if (row := self.fetchone()) is None or row["table_rows"] is None or row["table_rows"] < 0:
+            return None
+        return int(row["table_rows"])
+
+    def export_snapshot(self) -> Optional[str]:
+        self.execute("BEGIN ISOLATION LEVEL REPEATABLE READ")
+        self.execute("SELECT pg_export_snapshot() AS snapshot_id")
+        return self.fetchone()["snapshot_id"]
+
+    def import_snapshot(self, snapshot_id: str) -> None:
+        self.execute("BEGIN ISOLATION LEVEL REPEATABLE READ")
+        self.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+
     def get_server_version(self) -> str:
         self.execute("SELECT version() as version")
         version = self.fetchone()
@@ -253,7 +329,7 @@ class PostgreSQLContext(AbstractContext):
                     name=row["database_name"],
                     context=self,
                     total_bytes=float(row["total_bytes"]),
-                    get_tables_handler=self.get_tables,
+                    get_tables_handler=self.load_tables,
                     get_views_handler=self.get_views,
                     get_functions_handler=self.get_functions,
                     get_procedures_handler=self.get_procedures,
@@ -269,13 +345,13 @@ class PostgreSQLContext(AbstractContext):
         try:
             QUERY_LOGS.append(f"/* get_view_columns for view={view.name} */")
             schema = view.schema if view.schema else "public"
-            self.execute(f"""
+            self.execute("""
                 SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale,
                        is_nullable, column_default
                 FROM information_schema.columns
-                WHERE table_schema = '{schema}' AND table_name = '{view.name}'
+                WHERE table_schema = %s AND table_name = %s
                 ORDER BY ordinal_position
-            """)
+            """, [schema, view.name])
             for i, row in enumerate(self.cursor.fetchall()):
                 is_nullable = row["is_nullable"] == "YES"
                 datatype = PostgreSQLDataType.get_by_name(row["data_type"])
@@ -400,6 +476,9 @@ class PostgreSQLContext(AbstractContext):
         return results
 
     def get_tables(self, database: SQLDatabase) -> list[SQLTable]:
+        return self._build_tables(database, self._select_tables(database))
+
+    def _select_tables(self, database: SQLDatabase) -> list[dict[str, Any]]:
         self.set_database(database)
         QUERY_LOGS.append(f"/* get_tables for database={database.name} */")
 
@@ -407,12 +486,14 @@ class PostgreSQLContext(AbstractContext):
             SELECT t.schemaname, t.tablename, pg_total_relation_size(quote_ident(t.schemaname) || '.' || quote_ident(t.tablename)) as total_bytes, c.reltuples as total_rows
             FROM pg_tables t
             JOIN pg_class c ON c.relname = t.tablename AND c.relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = t.schemaname)
-            WHERE t.schemaname NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+            WHERE t.schemaname NOT IN {_SYSTEM_SCHEMAS}
             ORDER BY t.schemaname, t.tablename
         """)
+        return self.fetchall()
 
+    def _build_tables(self, database: SQLDatabase, rows: list[dict[str, Any]]) -> list[SQLTable]:
         results = []
-        for i, row in enumerate(self.fetchall()):
+        for i, row in enumerate(rows):
             results.append(
                 PostgreSQLTable(
                     id=i,
@@ -421,32 +502,93 @@ class PostgreSQLContext(AbstractContext):
                     database=database,
                     total_bytes=float(row["total_bytes"]),
                     total_rows=row["total_rows"],
-                    get_columns_handler=self.get_columns,
-                    get_indexes_handler=self.get_indexes,
-                    get_checks_handler=self.get_checks,
-                    get_foreign_keys_handler=self.get_foreign_keys,
                     get_records_handler=self.get_records,
+                    **self.table_schema_handlers(),
                 )
             )
 
         return results
 
+    def get_tables_schema(self, database: SQLDatabase, tables: list[SQLTable]) -> dict[int, TableSchema]:
+        self.set_database(database)
+        QUERY_LOGS.append(f"/* get_tables_schema for database={database.name} */")
+
+        return self._build_tables_schema(
+            {self.table_key(table): table for table in tables},
+            self._select_tables_schema(database),
+            self.table_schema_builders(),
+        )
+
+    def _select_tables_schema(self, database: SQLDatabase) -> dict[str, dict[str, list[dict[str, Any]]]]:
+        return self._group_catalog_rows(lambda row: f"{row['table_schema']}.{row['table_name']}", {
+            "columns": self._select_columns(),
+            "indexes": self._select_indexes(),
+            "checks": self._select_checks(),
+            "foreign_keys": self._select_foreign_keys(),
+        })
+
+    def table_schema_builders(self) -> dict[str, Callable[[SQLTable, list[dict[str, Any]]], list[Any]]]:
+        return {
+            "columns": self._build_columns,
+            "indexes": self._build_indexes,
+            "checks": self._build_checks,
+            "foreign_keys": self._build_foreign_keys,
+        }
+
+    def table_key(self, table: SQLTable) -> str:
+        return f"{table.schema or table.database.name}.{table.name}"
+
+    def get_tables_fingerprints(self, database: SQLDatabase) -> dict[str, str]:
+        # relfilenode moves when a table is rewritten and the pg_class row's xmin on most ALTERs;
+        # index and constraint oids catch CREATE INDEX and ADD CONSTRAINT, which can leave both alone.
+        self.set_database(database)
+        self.execute(f"""
+            SELECT ns.nspname AS table_schema,
+                   cls.relname AS table_name,
+                   concat_ws('|',
+                       cls.relfilenode,
+                       cls.xmin,
+                       (SELECT string_agg(ind.indexrelid::text, ',' ORDER BY ind.indexrelid) FROM pg_index ind WHERE ind.indrelid = cls.oid),
+                       (SELECT string_agg(con.oid::text, ',' ORDER BY con.oid) FROM pg_constraint con WHERE con.conrelid = cls.oid)
+                   ) AS fingerprint
+            FROM pg_class cls
+            JOIN pg_namespace ns ON ns.oid = cls.relnamespace
+            WHERE cls.relkind IN ('r', 'p')
+            AND ns.nspname NOT IN {_SYSTEM_SCHEMAS}
+        """)
+        return {f"{row['table_schema']}.{row['table_name']}": row["fingerprint"] for row in self.fetchall()}
+
+    @staticmethod
+    def _relation_filter(schema_column: str, name_column: str, table: Optional[SQLTable]) -> tuple[str, list[Any]]:
+        """Restrict a catalog query to one table, or to every user table when ``table`` is None; return it with its parameters."""
+        if table is None:
+            return f"{schema_column} NOT IN {_SYSTEM_SCHEMAS}", []
+
+        schema_or_db = table.schema if table.schema else table.database.name
+        return f"{schema_column} = %s AND {name_column} = %s", [schema_or_db, table.name]
+
     def get_columns(self, table: SQLTable) -> list[SQLColumn]:
-        results = []
         if table.id == -1:
-            return results
+            return []
 
         QUERY_LOGS.append(f"/* get_columns for table={table.name} */")
 
+        return self._build_columns(table, self._select_columns(table))
+
+    def _select_columns(self, table: Optional[SQLTable] = None) -> list[dict[str, Any]]:
+        relation_filter, parameters = self._relation_filter("table_schema", "table_name", table)
         self.execute(f"""
-            SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale,
-                   is_nullable, column_default
+            SELECT table_schema, table_name, column_name, data_type, character_maximum_length, numeric_precision,
+                   numeric_scale, is_nullable, column_default
             FROM information_schema.columns
-            WHERE table_schema = '{table.schema}' AND table_name = '{table.name}'
-            ORDER BY ordinal_position
-        """)
+            WHERE {relation_filter}
+            ORDER BY table_schema, table_name, ordinal_position
+        """, parameters)
+        return self.cursor.fetchall()
 
-        for i, row in enumerate(self.cursor.fetchall()):
+    def _build_columns(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLColumn]:
+        results = []
+        for i, row in enumerate(rows):
             is_nullable = row["is_nullable"] == "YES"
             datatype = PostgreSQLDataType.get_by_name(row["data_type"])
 
@@ -472,37 +614,16 @@ class PostgreSQLContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_indexes for table={table.name} */")
 
-        results: list[SQLIndex] = []
-        index_data: dict[str, dict[str, Any]] = {}
-
-        # Get primary key using pg_constraint
-        schema_or_db = table.schema if table.schema else table.database.name
-        self.execute(f"""
-            SELECT a.attname AS column_name
-            FROM pg_index i
-            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-            JOIN pg_class c ON c.oid = i.indrelid
-            JOIN pg_namespace n ON n.oid = c.relnamespace
-            WHERE n.nspname = '{schema_or_db}' 
-              AND c.relname = '{table.name}'
-              AND i.indisprimary
-            ORDER BY a.attnum
-        """)
-        pk_columns = [row["column_name"] for row in self.fetchall()]
-        if pk_columns:
-            results.append(
-                PostgreSQLIndex(
-                    id=0,
-                    name="PRIMARY KEY",
-                    type=PostgreSQLIndexType.PRIMARY,
-                    columns=pk_columns,
-                    table=table,
-                )
-            )
+        return self._build_indexes(table, self._select_indexes(table))
 
-        # Get other indexes
+    def _select_indexes(self, table: Optional[SQLTable] = None) -> list[dict[str, Any]]:
+        # One row per index, the primary key included, with its columns in key order.
+        relation_filter, parameters = self._relation_filter("ns.nspname", "tbl.relname", table)
         self.execute(f"""
-            SELECT idx.relname AS index_name,
+            SELECT ns.nspname AS table_schema,
+                   tbl.relname AS table_name,
+                   idx.relname AS index_name,
+                   ind.indisprimary AS is_primary,
                    ind.indisunique AS is_unique,
                    array_agg(att.attname ORDER BY keys.ordinality) AS columns
             FROM pg_index ind
@@ -511,27 +632,40 @@ class PostgreSQLContext(AbstractContext):
             JOIN pg_class idx ON idx.oid = ind.indexrelid
             JOIN LATERAL unnest(ind.indkey) WITH ORDINALITY AS keys(attnum, ordinality) ON TRUE
             JOIN pg_attribute att ON att.attrelid = tbl.oid AND att.attnum = keys.attnum
-            WHERE ns.nspname = '{table.schema}' AND tbl.relname = '{table.name}' AND NOT ind.indisprimary
-            GROUP BY idx.relname, ind.indisunique
-        """)
-        for row in self.fetchall():
-            index_data[row["index_name"]] = {
-                "columns": list(row["columns"]) if row["columns"] else [],
-                "unique": bool(row["is_unique"]),
-            }
+            WHERE {relation_filter}
+            GROUP BY ns.nspname, tbl.relname, idx.relname, ind.indisprimary, ind.indisunique
+            ORDER BY ns.nspname, tbl.relname, idx.relname
+        """, parameters)
+        return self.fetchall()
+
+    def _build_indexes(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLIndex]:
+        results: list[SQLIndex] = []
+
+        for row in rows:
+            if row["is_primary"] and row["columns"]:
+                results.append(
+                    PostgreSQLIndex(
+                        id=0,
+                        name="PRIMARY KEY",
+                        type=PostgreSQLIndexType.PRIMARY,
+                        columns=list(row["columns"]),
+                        table=table,
+                    )
+                )
 
-        for i, (idx_name, data) in enumerate(index_data.items(), start=1):
+        secondary_rows = [row for row in rows if not row["is_primary"]]
+        for i, row in enumerate(secondary_rows, start=1):
             idx_type = (
                 PostgreSQLIndexType.UNIQUE
-                if data["unique"]
+                if row["is_unique"]
                 else PostgreSQLIndexType.INDEX
             )
             results.append(
                 PostgreSQLIndex(
                     id=i,
-                    name=idx_name,
+                    name=row["index_name"],
                     type=idx_type,
-                    columns=data["columns"],
+                    columns=list(row["columns"]) if row["columns"] else [],
                     table=table,
                 )
             )
@@ -539,29 +673,29 @@ class PostgreSQLContext(AbstractContext):
         return results
 
     def get_checks(self, table: PostgreSQLTable) -> list["PostgreSQLCheck"]:
-        from structures.engines.postgresql.database import PostgreSQLCheck
-
         if table is None or table.is_new:
             return []
 
-        schema_or_db = table.schema if table.schema else table.database.name
+        return self._build_checks(table, self._select_checks(table))
 
-        query = f"""
-            SELECT 
+    def _select_checks(self, table: Optional[SQLTable] = None) -> list[dict[str, Any]]:
+        relation_filter, parameters = self._relation_filter("nsp.nspname", "rel.relname", table)
+        self.execute(f"""
+            SELECT
+                nsp.nspname AS table_schema,
+                rel.relname AS table_name,
                 con.conname AS constraint_name,
                 pg_get_constraintdef(con.oid) AS check_clause
             FROM pg_constraint con
             JOIN pg_class rel ON rel.oid = con.conrelid
             JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
             WHERE con.contype = 'c'
-            AND nsp.nspname = '{schema_or_db}'
-            AND rel.relname = '{table.name}'
-            ORDER BY con.conname
-        """
-
-        self.execute(query)
-        rows = self.fetchall()
+            AND {relation_filter}
+            ORDER BY nsp.nspname, rel.relname, con.conname
+        """, parameters)
+        return self.fetchall()
 
+    def _build_checks(self, table: SQLTable, rows: list[dict[str, Any]]) -> list["PostgreSQLCheck"]:
         results = []
         for i, row in enumerate(rows):
             # Extract expression from "CHECK (expression)" format
@@ -587,8 +721,14 @@ class PostgreSQLContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_foreign_keys for table={table.name} */")
 
+        return self._build_foreign_keys(table, self._select_foreign_keys(table))
+
+    def _select_foreign_keys(self, table: Optional[SQLTable] = None) -> list[dict[str, Any]]:
+        relation_filter, parameters = self._relation_filter("n.nspname", "rel.relname", table)
         self.execute(f"""
             SELECT
+                n.nspname AS table_schema,
+                rel.relname AS table_name,
                 con.conname AS constraint_name,
                 array_agg(att.attname ORDER BY ord.ordinality) AS columns,
                 n2.nspname AS referenced_schema,
@@ -607,16 +747,20 @@ class PostgreSQLContext(AbstractContext):
                 ON att2.attrelid = rel2.oid
                AND att2.attnum = con.confkey[ord.ordinality]
             WHERE con.contype = 'f'
-              AND n.nspname = '{table.schema}'
-              AND rel.relname = '{table.name}'
+              AND {relation_filter}
             GROUP BY
+                n.nspname,
+                rel.relname,
                 con.conname,
                 n2.nspname,
                 rel2.relname,
                 con.confupdtype,
                 con.confdeltype
-            ORDER BY con.conname
-        """)
+            ORDER BY n.nspname, rel.relname, con.conname
+        """, parameters)
+        return self.fetchall()
+
+    def _build_foreign_keys(self, table: SQLTable, rows: list[dict[str, Any]]) -> list[SQLForeignKey]:
         foreign_keys = []
         _rule_map = {
             "a": "NO ACTION",
@@ -626,7 +770,7 @@ class PostgreSQLContext(AbstractContext):
             "d": "SET DEFAULT",
         }
 
-        for i, row in enumerate(self.fetchall()):
+        for i, row in enumerate(rows):
             foreign_keys.append(
                 PostgreSQLForeignKey(
                     id=i,
@@ -651,6 +795,7 @@ class PostgreSQLContext(AbstractContext):
         limit: int = 1000,
         offset: int = 0,
         orders: Optional[str] = None,
+        parameters: Optional[Sequence[Any]] = None,
     ) -> list[PostgreSQLRecord]:
         logger.debug(f"get records for table={table.name}")
         QUERY_LOGS.append(f"/* get_records for table={table.name} */")
@@ -673,7 +818,7 @@ class PostgreSQLContext(AbstractContext):
             f"LIMIT {limit} OFFSET {offset}",
         ]
 
-        self.execute(" ".join(query))
+        self.execute(" ".join(query), parameters)
 
         results = []
         for i, record in enumerate(self.fetchall(), start=offset):
@@ -681,6 +826,124 @@ class PostgreSQLContext(AbstractContext):
 
         return results
 
+    def _executemany_on_cursor(self, cursor: PostgreSQLCursor, query: str, parameters: list[Any]) -> None:
+        # psycopg2's executemany() makes a round trip per row; execute_batch() sends them by pages.
+        self._execute_prepared(cursor, query, lambda statement: psycopg2.extras.execute_batch(cursor, statement, parameters, page_size=100))
+
+    def _execute_parameters_on_cursor(self, cursor: PostgreSQLCursor, query: str, parameters: Any) -> None:
+        self._execute_prepared(cursor, query, lambda statement: cursor.execute(statement, parameters))
+
+    def _execute_prepared(self, cursor: PostgreSQLCursor, query: str, execute: Callable[[str], Any]) -> None:
+        if (statement := self._prepared_statement(cursor, query)) is None:
+            execute(query)
+            return
+
+        try:
+            execute(statement)
+        except psycopg2.Error as ex:
+            if getattr(ex, "pgcode", None) not in _STALE_PREPARED_STATEMENT_PGCODES:
+                raise
+
+            self._prepared_statements.discard(query)
+            # Outside a transaction nothing was lost yet: run the query again, unprepared.
+            if self._connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                raise
+            execute(query)
+
+    def _prepared_statement(self, cursor: PostgreSQLCursor, query: str) -> Optional[str]:
+        """Return an ``EXECUTE`` of ``query`` prepared on the server, preparing it if it is seen often enough.
+
+        psycopg2 interpolates parameters on the client, so without this the
+        server parses and plans every catalog lookup and record write again.
+        """
+        # Named cursors DECLARE their query, which cannot be an EXECUTE.
+        if cursor.name is not None:
+            return None
+
+        if (name := self._prepared_statements.get(query)) is None:
+            if not self._prepared_statements.should_prepare(query):
+                return None
+
+            if (name := self._prepare(cursor, query)) is None:
+                return None
+
+        return f"EXECUTE {name} ({', '.join(['%s'] * _count_placeholders(query))})"
+
+    def _prepare(self, cursor: PostgreSQLCursor, query: str) -> Optional[str]:
+        if not _PREPARABLE_QUERY_RE.match(query) or "%(" in query:
+            self._prepared_statements.reject(query)
+            return None
+
+        name, evicted = self._prepared_statements.add(query)
+        # A failed PREPARE must not abort the transaction the query belongs to.
+        in_transaction = self._connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+        try:
+            if in_transaction:
+                cursor.execute("SAVEPOINT petersql_prepare")
+            if evicted is not None:
+                cursor.execute(f"DEALLOCATE {evicted}")
+            cursor.execute(f"PREPARE {name} AS {_positional_placeholders(query)}")
+            if in_transaction:
+                cursor.execute("RELEASE SAVEPOINT petersql_prepare")
+        except psycopg2.Error as ex:
+            # Typically a parameter whose type the server cannot infer, as in "%s IS NULL".
+            logger.debug("Cannot prepare %s: %s", query, ex)
+            self._prepared_statements.reject(query)
+            if in_transaction:
+                cursor.execute("ROLLBACK TO SAVEPOINT petersql_prepare")
+                cursor.execute("RELEASE SAVEPOINT petersql_prepare")
+            return None
+
+        return name
+
+    def _records_from_clause(self, table: SQLTable) -> str:
+        return f'"{table.schema}"."{table.name}"'
+
+    def _is_streamable_query(self, query: str) -> bool:
+        # Named cursors DECLARE a cursor, which only accepts plain row-returning queries.
+        return bool(_STREAMABLE_QUERY_RE.match(query)) and not _UNSTREAMABLE_CLAUSE_RE.search(query)
+
+    def has_result_set(self, cursor: PostgreSQLCursor) -> bool:
+        # A named cursor only describes its columns after the first FETCH.
+        return cursor.name is not None or cursor.description is not None
+
+    def _open_stream_cursor(self) -> PostgreSQLCursor:
+        # Named cursors are server-side. A WITH HOLD one would survive autocommit, but the server copies its
+        # whole result when the transaction ends, right after DECLARE: it gets a transaction of its own instead.
+        self._stream_cursor_counter += 1
+        name = f"petersql_stream_{self._stream_cursor_counter}"
+
+        # Inside a transaction the user opened, a held cursor is only copied at its COMMIT.
+        is_idle = self._connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        if is_idle:
+            self._connection.autocommit = False
+            self._stream_transactions.add(name)
+
+        return self._connection.cursor(
+            name=name,
+            cursor_factory=psycopg2.extras.RealDictCursor,
+            withhold=not is_idle,
+        )
+
+    def _close_stream_cursor(self, cursor: PostgreSQLCursor) -> None:
+        try:
+            cursor.close()
+        finally:
+            # A lost connection has no transaction left to end.
+            if cursor.name in self._stream_transactions and not self._connection.closed:
+                self._stream_transactions.discard(cursor.name)
+                self._connection.commit()
+                self._connection.autocommit = True
+
+    def cancel_running_query(self) -> bool:
+        if self._connection is None:
+            return False
+
+        # libpq sends the cancel request with the backend key on its own socket, like pg_cancel_backend().
+        self._connection.cancel()
+        return True
+
     def build_empty_database(self, /, name: str = "") -> PostgreSQLDatabase:
         return PostgreSQLDatabase(
             id=PostgreSQLContext.get_temporary_id(self.databases),
@@ -1,6 +1,6 @@
 import dataclasses
 import re
-from typing import Self, Optional
+from typing import Any, Self, Optional
 
 from helpers.logger import logger
 
@@ -334,83 +334,36 @@ class PostgreSQLForeignKey(SQLForeignKey):
 
 @dataclasses.dataclass
 class PostgreSQLRecord(SQLRecord):
-    def raw_insert_record(self) -> str:
-        columns_values = {}
-
-        for column in self.table.columns:
-            if hasattr(column, 'virtuality') and column.virtuality is not None:
-                continue
-
-            value = self.values.get(column.name)
-            if value is not None and str(value).strip():
-                if column.datatype.format:
-                    value = column.datatype.format(value)
-
-                columns_values[self.table.database.context.quote_identifier(column.name)] = str(value)
-
-        if not columns_values:
+    def raw_insert_record(self) -> tuple[str, list[Any]]:
+        if (statement := self._build_insert_statement()) is None:
             raise AssertionError("No columns values")
 
-        return f"INSERT INTO {self.table.fully_qualified_name} ({', '.join(columns_values.keys())}) VALUES ({', '.join(columns_values.values())})"
-
-    def raw_update_record(self) -> Optional[str]:
-        identifier_columns = self._get_identifier_columns()
-
-        identifier_conditions = " AND ".join([f"{self.table.database.context.quote_identifier(identifier_name)} = {identifier_value}" for identifier_name, identifier_value in identifier_columns.items()])
-
-        sql_select = f"SELECT * FROM {self.table.fully_qualified_name} WHERE {identifier_conditions}"
-        self.table.database.context.execute(sql_select)
-
-        if not (existing_record := self.table.database.context.fetchone()):
-            logger.warning(f"Record not found for update: {identifier_columns}")
-            raise AssertionError("Record not found for update with identifier columns")
-
-        changed_columns = []
-
-        for col_name, new_value in self.values.items():
-            column: SQLColumn = next((c for c in self.table.columns if c.name == col_name), None)
-            existing_value = dict(existing_record).get(col_name)
-            if (new_value or "") != (existing_value or ""):
-                col_quoted = self.table.database.context.quote_identifier(col_name)
-                if new_value is None:
-                    changed_columns.append(f"{col_quoted} = NULL")
-                elif column.datatype.format:
-                    changed_columns.append(f"{col_quoted} = {column.datatype.format(new_value)}")
-                else:
-                    changed_columns.append(f"{col_quoted} = {new_value}")
-
-        if not changed_columns:
-            return None
-
-        set_clause = ", ".join(changed_columns)
-
-        return f"UPDATE {self.table.fully_qualified_name} SET {set_clause} WHERE {identifier_conditions}"
-
-    def raw_delete_record(self) -> str:
-        identifier_columns = self._get_identifier_columns()
+        return statement
 
-        identifier_conditions = " AND ".join([f"{self.table.database.context.quote_identifier(identifier_name)} = {identifier_value}" for identifier_name, identifier_value in identifier_columns.items()])
+    def raw_update_record(self) -> Optional[tuple[str, list[Any]]]:
+        return self._build_update_statement()
 
-        return f"DELETE FROM {self.table.fully_qualified_name} WHERE {identifier_conditions}"
+    def raw_delete_record(self) -> tuple[str, list[Any]]:
+        return self._build_delete_statement()
 
     def insert(self) -> bool:
         with self.table.database.context.transaction() as transaction:
             if raw_insert_record := self.raw_insert_record():
-                return transaction.execute(raw_insert_record)
+                return transaction.execute(*raw_insert_record)
 
             return False
 
     def update(self) -> bool:
         with self.table.database.context.transaction() as transaction:
             if raw_update_record := self.raw_update_record():
-                return transaction.execute(raw_update_record)
+                return transaction.execute(*raw_update_record)
 
             return False
 
     def delete(self) -> bool:
         with self.table.database.context.transaction() as transaction:
             if raw_delete_record := self.raw_delete_record():
-                return transaction.execute(raw_delete_record)
+                return transaction.execute(*raw_delete_record)
 
             return False
 
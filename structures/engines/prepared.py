@@ -0,0 +1,89 @@
+import collections
+import itertools
+import threading
+
+from typing import Optional
+
+DEFAULT_MAX_PREPARED = 32
+# A statement is prepared the second time it is seen: a one-off query does not pay for PREPARE.
+DEFAULT_USES_BEFORE_PREPARE = 2
+
+
+class PreparedStatementCache:
+    """The server-side prepared statements of one connection, least recently used first.
+
+    Queries are keyed by their text. A query is only worth preparing once it
+    has been seen ``uses_before_prepare`` times; queries the server refused to
+    prepare are remembered so they are not tried again. When more than
+    ``max_size`` statements are prepared, ``add`` returns the name of the one
+    to deallocate.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_PREPARED, uses_before_prepare: int = DEFAULT_USES_BEFORE_PREPARE, prefix: str = "petersql_stmt"):
+        self.max_size = max(1, max_size)
+        self.uses_before_prepare = max(1, uses_before_prepare)
+        self.prefix = prefix
+
+        self._prepared: collections.OrderedDict[str, str] = collections.OrderedDict()
+        # Uses of the queries not prepared yet, None for the ones that cannot be.
+        self._uses: collections.OrderedDict[str, Optional[int]] = collections.OrderedDict()
+        self._names = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._prepared)
+
+    def get(self, query: str) -> Optional[str]:
+        """Return the name ``query`` is prepared under, if it is."""
+        with self._lock:
+            if (name := self._prepared.get(query)) is not None:
+                self._prepared.move_to_end(query)
+            return name
+
+    def should_prepare(self, query: str) -> bool:
+        """Count a use of ``query``, not prepared yet; return whether it is now worth preparing."""
+        with self._lock:
+            uses = self._uses.pop(query, 0)
+            if uses is None:
+                self._uses[query] = None
+                return False
+
+            uses += 1
+            if uses >= self.uses_before_prepare:
+                return True
+
+            self._uses[query] = uses
+            # Remember a bounded number of candidates, so that a stream of one-off queries does not grow the cache.
+            while len(self._uses) > self.max_size * 8:
+                self._uses.popitem(last=False)
+            return False
+
+    def add(self, query: str) -> tuple[str, Optional[str]]:
+        """Name ``query`` as prepared; return its name and the name of the statement evicted for it, if any."""
+        with self._lock:
+            name = f"{self.prefix}_{next(self._names)}"
+            self._prepared[query] = name
+
+            evicted = None
+            if len(self._prepared) > self.max_size:
+                _query, evicted = self._prepared.popitem(last=False)
+
+            return name, evicted
+
+    def reject(self, query: str) -> None:
+        """Never prepare ``query``, e.g. because the server could not infer its parameter types."""
+        with self._lock:
+            self._prepared.pop(query, None)
+            self._uses[query] = None
+
+    def discard(self, query: str) -> Optional[str]:
+        """Forget ``query``; return the name it was prepared under, if it was."""
+        with self._lock:
+            self._uses.pop(query, None)
+            return self._prepared.pop(query, None)
+
+    def clear(self) -> None:
+        """Forget every statement, e.g. when its connection is replaced."""
+        with self._lock:
+            self._prepared.clear()
+            self._uses.clear()
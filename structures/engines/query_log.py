@@ -0,0 +1,141 @@
+import collections
+import inspect
+import re
+import threading
+import weakref
+
+from typing import Callable, Hashable, Iterator, Optional, Union
+
+from helpers.logger import logger
+
+DEFAULT_MAX_ENTRIES = 5000
+# Seconds appended entries wait, to be handed to the subscribers together.
+DEFAULT_FLUSH_INTERVAL = 0.1
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalise_query(query: str) -> str:
+    """Return ``query`` on one line, as it is shown in the query log."""
+    return _WHITESPACE_RE.sub(" ", query).strip()
+
+
+class NormalisedQuery:
+    """``query`` put on one line when, and only if, it is formatted, e.g. by a logging handler."""
+    __slots__ = ("query",)
+
+    def __init__(self, query: str):
+        self.query = query
+
+    def __str__(self) -> str:
+        return normalise_query(self.query)
+
+
+class QueryLog:
+    """The statements PeterSQL ran, kept in a ring buffer of the last ``max_entries``.
+
+    Appending is cheap enough to be done for every statement from any thread:
+    entries are stored as given and only put on one line when read. Subscribers
+    are called with the entries appended since their last call, in batches, from
+    a timer thread at most every ``flush_interval`` seconds, never from the
+    thread that ran the statement.
+
+    Positions count every entry ever appended, so ``log[len(log):]`` read later
+    returns what was appended in between, less the entries already dropped.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+
+        self._entries: collections.deque[str] = collections.deque(maxlen=max(1, max_entries))
+        self._pending: list[str] = []
+        self._appended = 0
+        self._subscribers: dict[Hashable, object] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._appended
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            entries = list(self._entries)
+        return (normalise_query(entry) for entry in entries)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, list[str]]:
+        with self._lock:
+            entries = list(self._entries)
+            appended = self._appended
+        first = appended - len(entries)
+
+        if isinstance(key, slice):
+            return [normalise_query(entries[position - first]) for position in range(*key.indices(appended)) if position >= first]
+
+        position = key + appended if key < 0 else key
+        if not first <= position < appended:
+            raise IndexError("query log entry is out of the buffer")
+        return normalise_query(entries[position - first])
+
+    def append(self, entry: str) -> None:
+        with self._lock:
+            self._entries.append(entry)
+            self._appended += 1
+
+            if not self._subscribers:
+                return
+
+            self._pending.append(entry)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def subscribe(self, callback: Callable[[list[str]], object]) -> None:
+        """Call ``callback`` with each batch of entries appended from now on; methods are held weakly."""
+        key, stored = self._callback_key(callback), callback
+        if inspect.ismethod(callback):
+            stored = weakref.WeakMethod(callback)
+
+        with self._lock:
+            self._subscribers[key] = stored
+
+    def unsubscribe(self, callback: Callable[[list[str]], object]) -> None:
+        with self._lock:
+            self._subscribers.pop(self._callback_key(callback), None)
+
+    def flush(self) -> None:
+        """Hand the pending entries to the subscribers now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            pending, self._pending = self._pending, []
+            subscribers = list(self._subscribers.items())
+
+        if not pending:
+            return
+
+        batch = [normalise_query(entry) for entry in pending]
+        for key, stored in subscribers:
+            callback = stored() if isinstance(stored, weakref.ReferenceType) else stored
+            if callback is None:
+                with self._lock:
+                    self._subscribers.pop(key, None)
+                continue
+
+            try:
+                callback(batch)
+            except Exception as ex:
+                logger.error(ex, exc_info=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    @staticmethod
+    def _callback_key(callback: Callable) -> Hashable:
+        if inspect.ismethod(callback):
+            return id(callback.__self__), id(callback.__func__)
+        return id(callback)
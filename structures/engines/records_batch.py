@@ -0,0 +1,212 @@
+import dataclasses
+import functools
+
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from structures.engines.context import ConnectionLostError
+from structures.engines.database import SQLColumn, SQLRecord, SQLTable
+
+# Rows written, or looked up, by a single statement when the engine parameter limit allows it.
+DEFAULT_CHUNK_SIZE = 500
+
+_SAVEPOINT = "petersql_records_batch"
+
+# A record and the parameters it binds to a statement.
+_Row = tuple[SQLRecord, list[Any]]
+
+
+@dataclasses.dataclass
+class RecordError:
+    record: SQLRecord
+    error: Exception
+
+    def __str__(self) -> str:
+        return str(self.error)
+
+
+class RecordsBatch:
+    """Write the pending records of a table in one transaction, with as few statements as possible.
+
+    New records filling the same columns share multi-row INSERTs; edited
+    records changing the same columns, and deleted records, share parameterised
+    ``executemany`` statements. The rows to update are read back with one
+    SELECT per chunk instead of one per record. Every chunk runs under a
+    savepoint: when it fails, its rows are replayed one at a time, so each error
+    is reported against the record that caused it and the other rows are kept.
+    """
+
+    def __init__(self, table: SQLTable, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.table = table
+        self.context = table.database.context
+        self.chunk_size = max(1, chunk_size)
+        self.errors: list[RecordError] = []
+
+        self._columns: dict[str, SQLColumn] = {column.name: column for column in table.columns}
+        self._original_records = table.get_original_records_by_id()
+
+    @classmethod
+    def save_records(cls, records: Iterable[SQLRecord]) -> list[RecordError]:
+        """Insert or update ``records``, a batch for each table they belong to."""
+        records_by_table: dict[int, list[SQLRecord]] = {}
+        for record in records:
+            records_by_table.setdefault(id(record.table), []).append(record)
+
+        errors = []
+        for table_records in records_by_table.values():
+            errors.extend(cls(table_records[0].table).save(table_records))
+
+        return errors
+
+    def save(self, records: Iterable[SQLRecord]) -> list[RecordError]:
+        """Insert the new ``records`` and update the others; return the errors of the rows that failed."""
+        inserts, updates = [], []
+        for record in records:
+            if not record.is_valid():
+                self.errors.append(RecordError(record, ValueError("Record is not yet valid")))
+            elif record.is_new:
+                inserts.append(record)
+            else:
+                updates.append(record)
+
+        with self.context.transaction():
+            self._insert(inserts)
+            self._update(updates)
+
+        return self.errors
+
+    def delete(self, records: Iterable[SQLRecord]) -> list[RecordError]:
+        """Delete the rows of ``records``; records never saved are skipped."""
+        rows = self._identify([record for record in records if not record.is_new])
+        if not rows:
+            return self.errors
+
+        identifier_columns = tuple(rows[0][1])
+        query = f"DELETE FROM {self.table.fully_qualified_name} WHERE {self._identifier_condition(identifier_columns)}"
+
+        with self.context.transaction():
+            parameters = [(record, self._bind_identifier(identifier)) for record, identifier in rows]
+            for chunk in self._chunks(parameters, 1):
+                self._run(chunk, functools.partial(self._execute_many, query))
+
+        return self.errors
+
+    def _insert(self, records: list[SQLRecord]) -> None:
+        rows_by_columns: dict[tuple[str, ...], list[_Row]] = {}
+
+        for record in records:
+            if not (values := record._get_insert_values()):
+                self.errors.append(RecordError(record, ValueError("No column values provided for insert operation")))
+                continue
+
+            rows_by_columns.setdefault(tuple(values), []).append((record, list(values.values())))
+
+        for column_names, rows in rows_by_columns.items():
+            columns_sql = ", ".join(self.context.quote_identifier(name) for name in column_names)
+            prefix = f"INSERT INTO {self.table.fully_qualified_name} ({columns_sql}) VALUES "
+            row_sql = f"({', '.join([self.context.PARAMETER_PLACEHOLDER] * len(column_names))})"
+
+            for chunk in self._chunks(rows, len(column_names)):
+                self._run(chunk, functools.partial(self._execute_insert, prefix, row_sql))
+
+    def _update(self, records: list[SQLRecord]) -> None:
+        rows = self._identify(records)
+        if not rows:
+            return
+
+        identifier_columns = tuple(rows[0][1])
+        existing_rows = self._select_existing(identifier_columns, [identifier for _record, identifier in rows])
+
+        rows_by_columns: dict[tuple[str, ...], list[_Row]] = {}
+        for record, identifier in rows:
+            if (existing := existing_rows.get(self._key(identifier.values()))) is None:
+                self.errors.append(RecordError(record, ValueError("Record not found for update with identifier columns")))
+                continue
+
+            changed = {}
+            for name, value in record.values.items():
+                column = self._columns.get(name)
+                if column is None or column.virtuality is not None:
+                    continue
+
+                if (value or "") != (existing.get(name) or ""):
+                    changed[name] = SQLRecord.bind_value(column, value)
+
+            if changed:
+                rows_by_columns.setdefault(tuple(changed), []).append((record, [*changed.values(), *self._bind_identifier(identifier)]))
+
+        where = self._identifier_condition(identifier_columns)
+        for column_names, changed_rows in rows_by_columns.items():
+            set_clause = ", ".join(f"{self.context.quote_identifier(name)} = {self.context.PARAMETER_PLACEHOLDER}" for name in column_names)
+            query = f"UPDATE {self.table.fully_qualified_name} SET {set_clause} WHERE {where}"
+
+            for chunk in self._chunks(changed_rows, 1):
+                self._run(chunk, functools.partial(self._execute_many, query))
+
+    def _identify(self, records: list[SQLRecord]) -> list[tuple[SQLRecord, dict[str, Any]]]:
+        rows = []
+        for record in records:
+            try:
+                rows.append((record, record._get_identifier_values(self._original_records)))
+            except Exception as ex:
+                self.errors.append(RecordError(record, ex))
+
+        return rows
+
+    def _select_existing(self, identifier_columns: tuple[str, ...], identifiers: list[dict[str, Any]]) -> dict[tuple, dict[str, Any]]:
+        condition = self._identifier_condition(identifier_columns)
+        existing_rows = {}
+
+        for chunk in self._chunks(identifiers, len(identifier_columns)):
+            where = " OR ".join(f"({condition})" for _identifier in chunk)
+            parameters = [value for identifier in chunk for value in self._bind_identifier(identifier)]
+
+            self.context.execute(f"SELECT * FROM {self.table.fully_qualified_name} WHERE {where}", parameters)
+            for row in self.context.fetchall():
+                row = dict(row)
+                existing_rows[self._key(row.get(name) for name in identifier_columns)] = row
+
+        return existing_rows
+
+    def _run(self, rows: list[_Row], execute: Callable[[list[_Row]], Any]) -> None:
+        """Run ``execute`` on ``rows`` under a savepoint, and on each row alone if that fails."""
+        self.context.execute(f"SAVEPOINT {_SAVEPOINT}")
+        try:
+            execute(rows)
+        except (PermissionError, ConnectionLostError):
+            raise
+        except Exception as ex:
+            self.context.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+            # Released before the replay: MySQL replaces a savepoint of the same name instead of nesting it.
+            self.context.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+
+            if len(rows) == 1:
+                self.errors.append(RecordError(rows[0][0], ex))
+                return
+
+            for row in rows:
+                self._run([row], execute)
+            return
+
+        self.context.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+
+    def _execute_insert(self, prefix: str, row_sql: str, rows: list[_Row]) -> None:
+        self.context.execute(prefix + ", ".join([row_sql] * len(rows)), [value for _record, parameters in rows for value in parameters])
+
+    def _execute_many(self, query: str, rows: list[_Row]) -> None:
+        self.context.executemany(query, [parameters for _record, parameters in rows])
+
+    def _chunks(self, items: list, parameters_per_item: int) -> Iterator[list]:
+        size = max(1, min(self.chunk_size, self.context.MAX_STATEMENT_PARAMETERS // max(1, parameters_per_item)))
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    def _identifier_condition(self, identifier_columns: Sequence[str]) -> str:
+        return " AND ".join(f"{self.context.quote_identifier(name)} = {self.context.PARAMETER_PLACEHOLDER}" for name in identifier_columns)
+
+    def _bind_identifier(self, identifier: dict[str, Any]) -> list[Any]:
+        return [SQLRecord.bind_value(self._columns[name], value) for name, value in identifier.items()]
+
+    @staticmethod
+    def _key(values: Iterable[Any]) -> tuple:
+        # Values typed by the driver and values typed in the grid compare by their text.
+        return tuple(None if value is None else str(value) for value in values)
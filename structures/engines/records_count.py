@@ -0,0 +1,43 @@
+import threading
+
+from typing import Hashable, NamedTuple, Optional
+
+
+class RecordsCount(NamedTuple):
+    rows: int
+    # False for catalog statistics and planner estimates.
+    is_exact: bool
+
+
+class RecordsCountCache:
+    """Row counts already paid for, by (table, filter), until a write goes through PeterSQL.
+
+    Any write statement run by one of the session's contexts clears the cache
+    and bumps ``generation``; a count started before the write is not stored
+    when it completes after it.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self._counts: dict[Hashable, RecordsCount] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[RecordsCount]:
+        with self._lock:
+            return self._counts.get(key)
+
+    def store(self, key: Hashable, count: RecordsCount, generation: int) -> None:
+        """Keep ``count`` unless a write happened since ``generation`` was read, or an exact count is kept already."""
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            if not count.is_exact and (current := self._counts.get(key)) is not None and current.is_exact:
+                return
+
+            self._counts[key] = count
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.generation += 1
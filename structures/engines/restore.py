@@ -0,0 +1,268 @@
+import dataclasses
+import io
+import pathlib
+import re
+import sqlite3
+import time
+
+from typing import Any, Callable, Iterator, Optional
+
+from structures.engines.dump import DumpCompression
+
+# The restore batches statements in its own transactions, so the script's
+# transaction markers are dropped instead of being nested.
+_TRANSACTION_CONTROL_RE = re.compile(r"^(BEGIN|START\s+TRANSACTION|COMMIT|END)\b\s*;?$", re.IGNORECASE)
+
+# Statements that cannot run inside a transaction block on at least one engine.
+_NON_TRANSACTIONAL_RE = re.compile(r"^(CREATE\s+DATABASE|DROP\s+DATABASE|VACUUM)\b", re.IGNORECASE)
+
+# Restored into a database that exists already, a dump does not create it unless asked to.
+_CREATE_DATABASE_RE = re.compile(r"^CREATE\s+DATABASE\b", re.IGNORECASE)
+
+_DELIMITER_RE = re.compile(r"^\s*DELIMITER\s+(\S+)\s*$", re.IGNORECASE)
+
+
+@dataclasses.dataclass
+class RestoreProgress:
+    statements_executed: int = 0
+    bytes_read: int = 0
+    total_bytes: int = 0
+    elapsed_seconds: float = 0.0
+    completed: bool = False
+
+    @property
+    def statements_per_second(self) -> float:
+        return self.statements_executed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+RestoreProgressCallback = Callable[[RestoreProgress], None]
+
+
+class RestoreError(Exception):
+    """Raised when a statement of a restored script fails."""
+
+    def __init__(self, statement_number: int, statement: str, error: Exception):
+        self.statement_number = statement_number
+        self.statement = statement
+        preview = statement if len(statement) <= 200 else f"{statement[:200]}..."
+        super().__init__(f"Statement #{statement_number} failed: {error}\n{preview}")
+
+
+class StreamingStatementSplitter:
+    """Split SQL text fed line by line into statements, without holding the whole script.
+
+    Understands quoted strings and identifiers, line and block comments,
+    ``DELIMITER`` directives (as written by MySQL dumps) and, optionally,
+    backslash escapes and PostgreSQL dollar quoting. Lines starting with a
+    backslash at a statement boundary are psql meta-commands and are skipped.
+    """
+
+    def __init__(
+        self,
+        delimiter: str = ";",
+        *,
+        backslash_escapes: bool = False,
+        dollar_quotes: bool = False,
+        is_complete: Optional[Callable[[str], bool]] = None,
+    ):
+        self._backslash_escapes = backslash_escapes
+        self._dollar_quotes = dollar_quotes
+        self._is_complete = is_complete
+        self._pending: list[str] = []
+        self._has_content = False
+        self._quote: Optional[str] = None
+        self._in_block_comment = False
+        self._set_delimiter(delimiter)
+
+    @property
+    def delimiter(self) -> str:
+        return self._delimiter
+
+    def _set_delimiter(self, delimiter: str):
+        self._delimiter = delimiter
+
+        tokens = [re.escape(delimiter)]
+        if self._backslash_escapes:
+            tokens.append(r"\\.")
+        if self._dollar_quotes:
+            tokens.append(r"\$[A-Za-z_]*\$")
+        tokens.extend([r"'", r'"', r"`", r"--", r"/\*", r"\*/"])
+        self._token_pattern = re.compile("|".join(tokens))
+
+    def _is_at_statement_start(self) -> bool:
+        return self._quote is None and not self._in_block_comment and not self._has_content
+
+    def _append(self, text: str):
+        self._pending.append(text)
+        if not self._has_content and text.strip():
+            self._has_content = True
+
+    def _reset(self):
+        self._pending = []
+        self._has_content = False
+
+    def feed_line(self, line: str) -> Iterator[str]:
+        if self._is_at_statement_start():
+            if match := _DELIMITER_RE.match(line):
+                self._reset()
+                self._set_delimiter(match.group(1))
+                return
+
+            if line.lstrip().startswith("\\"):
+                self._reset()
+                return
+
+        position = 0
+        for match in self._token_pattern.finditer(line):
+            token = match.group()
+            if self._quote is not None:
+                if token == self._quote:
+                    self._quote = None
+            elif self._in_block_comment:
+                if token == "*/":
+                    self._in_block_comment = False
+            elif token == self._delimiter:
+                yield from self._emit(line[position:match.start()])
+                position = match.end()
+            elif token == "--":
+                self._append(line[position:match.start()])
+                self._append("\n")
+                return
+            elif token == "/*":
+                self._in_block_comment = True
+            elif token in ("'", '"', "`") or token.startswith("$"):
+                self._quote = token
+
+        self._append(line[position:])
+
+    def close(self) -> Iterator[str]:
+        self._is_complete = None
+        yield from self._emit("")
+
+    def _emit(self, tail: str) -> Iterator[str]:
+        self._append(tail)
+        statement = "".join(self._pending).strip()
+        if statement and self._is_complete is not None and not self._is_complete(f"{statement}{self._delimiter}"):
+            # The delimiter belongs to the statement body (e.g. an SQLite trigger's BEGIN ... END).
+            self._pending = [statement, self._delimiter]
+            return
+
+        self._reset()
+        if statement:
+            yield statement
+
+    def split(self, lines: Iterator[str]) -> Iterator[str]:
+        for line in lines:
+            yield from self.feed_line(line)
+
+        yield from self.close()
+
+
+def restore_database_dump(
+    database: Any,
+    path: str,
+    /,
+    *,
+    batch_size: int = 500,
+    create_database: bool = False,
+    on_progress: Optional[RestoreProgressCallback] = None,
+) -> RestoreProgress:
+    dump_path = pathlib.Path(path)
+    progress = RestoreProgress(total_bytes=dump_path.stat().st_size)
+
+    context = _open_restore_context(database)
+    try:
+        with dump_path.open("rb") as raw:
+            reader = DumpCompression.from_path(dump_path).open_reader(raw)
+            lines = io.TextIOWrapper(reader, encoding="utf-8")
+            _execute_script(context, _build_splitter(context).split(lines), raw, progress, batch_size, create_database, on_progress)
+    finally:
+        if context is not database.context:
+            context.disconnect()
+
+    progress.completed = True
+    _notify_progress(on_progress, progress)
+    return progress
+
+
+def _open_restore_context(database: Any) -> Any:
+    # A dedicated connection keeps the long-running restore off the session's cursor.
+    if database.context.supports_worker_contexts:
+        return database.context.create_worker_context(database)
+
+    return database.context
+
+
+def _build_splitter(context: Any) -> StreamingStatementSplitter:
+    context_name = context.__class__.__name__.lower()
+    return StreamingStatementSplitter(
+        context.DEFAULT_STATEMENT_SEPARATOR,
+        backslash_escapes="mysql" in context_name or "mariadb" in context_name,
+        dollar_quotes="postgresql" in context_name,
+        is_complete=sqlite3.complete_statement if "sqlite" in context_name else None,
+    )
+
+
+def _execute_script(
+    context: Any,
+    statements: Iterator[str],
+    raw,
+    progress: RestoreProgress,
+    batch_size: int,
+    create_database: bool,
+    on_progress: Optional[RestoreProgressCallback],
+):
+    started = time.perf_counter()
+    batch: list[str] = []
+
+    def _flush():
+        _execute_batch(context, batch, progress)
+        batch.clear()
+        progress.bytes_read = raw.tell()
+        progress.elapsed_seconds = time.perf_counter() - started
+        _notify_progress(on_progress, progress)
+
+    for statement in statements:
+        if _TRANSACTION_CONTROL_RE.match(statement):
+            continue
+
+        if not create_database and _CREATE_DATABASE_RE.match(statement):
+            continue
+
+        if _NON_TRANSACTIONAL_RE.match(statement):
+            _flush()
+            _execute_statement(context, statement, progress)
+            continue
+
+        batch.append(statement)
+        if len(batch) >= batch_size:
+            _flush()
+
+    _flush()
+
+
+def _execute_batch(context: Any, batch: list[str], progress: RestoreProgress):
+    if not batch:
+        return
+
+    with context.transaction():
+        for statement in batch:
+            _execute_statement(context, statement, progress)
+
+
+def _execute_statement(context: Any, statement: str, progress: RestoreProgress):
+    try:
+        context.execute(statement)
+    except Exception as ex:
+        raise RestoreError(progress.statements_executed + 1, statement, ex) from ex
+
+    progress.statements_executed += 1
+
+
+def _notify_progress(on_progress: Optional[RestoreProgressCallback], progress: RestoreProgress):
+    if on_progress is not None:
+        on_progress(dataclasses.replace(progress))
@@ -137,37 +137,25 @@ ENGINE_FUNCTIONS = (
 #       ]
 #       [GENERATED ALWAYS AS (expression) [VIRTUAL | STORED]]
 
-COLUMNS_PATTERN = re.compile(r"""
+# Everything else about a column comes from pragma_table_xinfo; these read what it does not expose.
+COLUMN_TYPE_PATTERN = re.compile(r"""
 ^\s*
-    (?P<quote>["'`])?
-    (?P<name>(?(quote)[^"'\`]+|\w+))
-    (?(quote)(?P=quote))
-    \s+
     (?P<datatype>\w+)
-    (?:\s*\(
+    (?:\s*\(\s*
         (?:
             (?P<length>\d+) |
             (?P<precision>\d+)\s*,\s*(?P<scale>\d+) |
-            (?P<set>[^)]+)
+            [^)]*
         )
-    \))?
-    (?P<attributes>.*)$
+    \s*\))?
 """, re.IGNORECASE | re.VERBOSE)
 
-COLUMN_ATTRIBUTES_PATTERN = [
-    re.compile(r"""(?P<is_primary_key>PRIMARY\s+KEY)(?:\s+(?P<primary_key_order>ASC|DESC)?)?(?:\s+ON\s+CONFLICT\s+(?P<primary_key_conflict>ROLLBACK|ABORT|FAIL|IGNORE|REPLACE))?"""),
-    re.compile(r"""(?P<is_auto_increment>AUTOINCREMENT)"""),
-    re.compile(r"""(?P<is_nullable>NOT\s+NULL|NULL)(?:\s+ON\s+CONFLICT\s+(?P<nullability_conflict>ROLLBACK|ABORT|FAIL|IGNORE|REPLACE))?"""),
-    re.compile(r"""(?P<is_unique>UNIQUE)(?:\s+ON\s+CONFLICT\s+(?P<conflict>ROLLBACK|ABORT|FAIL|IGNORE|REPLACE))?"""),
-    re.compile(r"""CHECK\s*\((?P<check>[^)].*)\)"""),
-    re.compile(r"""DEFAULT\s+(?P<default>\(.*?\))(?=\s|$)"""),
-    re.compile(r"""DEFAULT\s+(?P<default>-?\d+(\.\d+)?)"""),
-    re.compile(r"""DEFAULT\s+(?P<default>\w?(\'.*\'|\".*\"))"""),
-    re.compile(r"""DEFAULT\s+(?P<default>[a-zA-Z_-]{2,})"""),
-    re.compile(r"""COLLATE\s+(?P<collate>\w+)"""),
-    re.compile(r"""GENERATED\s+ALWAYS\s+AS\s*\((?P<expression>.*?)\)\s*(?P<virtuality>VIRTUAL|STORED)"""),
-    re.compile(r"""REFERENCES\s+(?P<references>\w+)(?:\s+ON\s+DELETE\s+(?P<on_delete>SET\s+NULL|SET\s+DEFAULT|CASCADE|RESTRICT|NO\s+ACTION))?(?:\s+ON\s+UPDATE\s+(?P<on_update>SET\s+NULL|SET\s+DEFAULT|CASCADE|RESTRICT|NO\s+ACTION))?"""),
-]
+COLUMN_ATTRIBUTES_PATTERN = {
+    "check": re.compile(r"""\bCHECK\s*\((?P<check>(?:[^()]+|\([^()]*\))*)\)""", re.IGNORECASE),
+    "collate": re.compile(r"""\bCOLLATE\s+(?P<collate>\w+)""", re.IGNORECASE),
+    "expression": re.compile(r"""\bAS\s*\((?P<expression>(?:[^()]+|\([^()]*\))*)\)""", re.IGNORECASE),
+    "is_auto_increment": re.compile(r"""\b(?P<is_auto_increment>AUTOINCREMENT)\b""", re.IGNORECASE),
+}
 
 TABLE_CONSTRAINTS_PATTERN = {
     # CHECK table-level
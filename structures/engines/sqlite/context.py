@@ -1,15 +1,17 @@
+import contextlib
 import re
 import sqlite3
+import time
 
 from collections import defaultdict
 from gettext import gettext as _
-from typing import Any, Optional
+from typing import Any, Iterator, Optional, Sequence
 
 from helpers.logger import logger
 
 from structures.connection import Connection
 
-from structures.engines.context import QUERY_LOGS, AbstractContext
+from structures.engines.context import QUERY_LOGS, AbstractContext, TableSchema
 from structures.engines.database import (
     SQLDatabase,
     SQLTable,
@@ -37,14 +39,76 @@ from structures.engines.sqlite.indextype import SQLiteIndexType
 from structures.engines.sqlite import (
     COLLATIONS,
     MAP_COLUMN_FIELDS,
-    COLUMNS_PATTERN,
+    COLUMN_TYPE_PATTERN,
     COLUMN_ATTRIBUTES_PATTERN,
     TABLE_CONSTRAINTS_PATTERN,
+    INDEX_PATTERN,
     ENGINE_KEYWORDS,
     ENGINE_FUNCTIONS,
 )
 
 
+_DDL_QUERY_RE = re.compile(r"^\s*(CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+_DEFINITION_NAME_PATTERN = re.compile(
+    r"""^(?:"(?P<double>[^"]+)"|`(?P<back>[^`]+)`|\[(?P<bracket>[^\]]+)\]|'(?P<single>[^']+)'|(?P<bare>[^\s(]+))\s*(?P<rest>.*)$""",
+    re.DOTALL,
+)
+_TABLE_CONSTRAINT_KEYWORDS = frozenset({"CONSTRAINT", "PRIMARY", "UNIQUE", "CHECK", "FOREIGN"})
+
+# pragma_table_xinfo.hidden of generated columns.
+_GENERATED_COLUMN_VIRTUALITY = {2: "VIRTUAL", 3: "STORED"}
+
+
+def _split_parenthesized(sql: str) -> list[str]:
+    """Return the top-level, comma-separated items of the first parenthesized group of ``sql``.
+
+    Quoted text and nested parentheses are kept whole, comments are dropped
+    and whitespace runs are collapsed.
+    """
+    items: list[str] = []
+    current: list[str] = []
+    depth = 0
+    quote: Optional[str] = None
+    index = 0
+
+    while index < len(sql):
+        char = sql[index]
+
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in "'\"`[":
+            quote = "]" if char == "[" else char
+        elif sql.startswith("--", index):
+            index = len(sql) if (end := sql.find("\n", index)) == -1 else end
+            continue
+        elif sql.startswith("/*", index):
+            index = len(sql) if (end := sql.find("*/", index)) == -1 else end + 2
+            continue
+        elif char == "(":
+            depth += 1
+            if depth == 1:
+                index += 1
+                continue
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                items.append("".join(current))
+                break
+        elif char == "," and depth == 1:
+            items.append("".join(current))
+            current = []
+            index += 1
+            continue
+
+        if depth >= 1:
+            current.append(char)
+        index += 1
+
+    return [" ".join(item.split()) for item in items if item.strip()]
+
+
 class SQLiteContext(AbstractContext):
     ENGINES = ["default"]
     KEYWORDS = ENGINE_KEYWORDS
@@ -58,14 +122,72 @@ class SQLiteContext(AbstractContext):
 
     IDENTIFIER_QUOTE_CHAR = '"'
     DEFAULT_STATEMENT_SEPARATOR = ";"
-
-    _map_sqlite_master = defaultdict(lambda: defaultdict(dict))
+    PARAMETER_PLACEHOLDER = "?"
+    # SQLITE_MAX_VARIABLE_NUMBER of builds older than 3.32.
+    MAX_STATEMENT_PARAMETERS = 999
 
     def __init__(self, connection: Connection):
         super().__init__(connection)
 
         self.filename = connection.configuration.filename
 
+        # sqlite_master by table name, then object type, then object name; the split CREATE TABLE
+        # goes under "definitions". It is re-read only when _schema_version goes stale.
+        self._map_sqlite_master: defaultdict[str, defaultdict[str, dict]] = defaultdict(lambda: defaultdict(dict))
+        self._schema_version: Optional[int] = None
+
+    @property
+    def supports_worker_contexts(self) -> bool:
+        # Every connection to ":memory:" opens a new, empty database.
+        return self.filename not in (":memory:", "")
+
+    def _worker_connect_kwargs(self) -> dict[str, Any]:
+        # Worker contexts are handed from thread to thread (one user at a time) by the parallel dump.
+        return {"check_same_thread": False}
+
+    def _session_reset_statements(self, database_name: Optional[str]) -> list[str]:
+        # ROLLBACK without an open transaction is an error in SQLite.
+        return ["ROLLBACK"] if self._connection.in_transaction else []
+
+    def cancel_running_query(self) -> bool:
+        if self._connection is None:
+            return False
+
+        # sqlite3_interrupt() is safe to call from any thread.
+        self._connection.interrupt()
+        return True
+
+    @contextlib.contextmanager
+    def _statement_timeout(self, timeout: Optional[float]) -> Iterator[None]:
+        if timeout is None:
+            yield
+            return
+
+        deadline = time.monotonic() + timeout
+        # The handler runs every N virtual machine instructions; a true result aborts the statement as "interrupted".
+        self._connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            yield
+        finally:
+            self._connection.set_progress_handler(None, 0)
+
+    def estimate_records_count(self, table: SQLTable, filters: Optional[str] = None) -> Optional[int]:
+        # SQLite has no planner row estimate to ask for; only ANALYZE leaves figures behind, in sqlite_stat1.
+        if filters:
+            return None
+
+        # sqlite_stat1 does not exist until ANALYZE has run once on the database.
+        self.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if self.fetchone() is None:
+            return None
+
+        self.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? ORDER BY idx IS NOT NULL LIMIT 1", [table.name])
+        if (row := self.fetchone()) is None:
+            return None
+
+        # "rows [rows per distinct key...]": the first figure is the row count, whether or not idx is set.
+        return int(row["stat"].split()[0])
+
     def after_connect(self, *args, **kwargs):
         super().after_connect(*args, **kwargs)
 
@@ -98,6 +220,7 @@ class SQLiteContext(AbstractContext):
     def connect(self, **connect_kwargs) -> None:
         skip_after_connect = bool(connect_kwargs.pop("skip_after_connect", False))
         skip_before_connect = bool(connect_kwargs.pop("skip_before_connect", False))
+        check_same_thread = bool(connect_kwargs.pop("check_same_thread", True))
 
         if self._connection is None:
             try:
@@ -105,10 +228,10 @@ class SQLiteContext(AbstractContext):
                     self.before_connect()
                 if self.connection.read_only and self.filename not in (":memory:", ""):
                     self._connection = sqlite3.connect(
-                        f"file:{self.filename}?mode=ro", uri=True
+                        f"file:{self.filename}?mode=ro", uri=True, check_same_thread=check_same_thread
                     )
                 else:
-                    self._connection = sqlite3.connect(self.filename)
+                    self._connection = sqlite3.connect(self.filename, check_same_thread=check_same_thread)
 
             except Exception as e:
                 logger.error(f"Failed to connect to SQLite: {e}")
@@ -117,6 +240,7 @@ class SQLiteContext(AbstractContext):
                 self._connection.isolation_level = None
                 self._connection.row_factory = sqlite3.Row
                 self._cursor = self._connection.cursor()
+                self._schema_version = None
                 if not skip_after_connect:
                     self.after_connect()
 
@@ -141,11 +265,7 @@ class SQLiteContext(AbstractContext):
         return None
 
     def get_databases(self) -> list[SQLDatabase]:
-        self.execute("SELECT * from sqlite_master ORDER BY name")
-        for i, result in enumerate(self.fetchall()):
-            self._map_sqlite_master[result["tbl_name"]][result["type"]][
-                result["name"]
-            ] = result["sql"]
+        self._refresh_sqlite_master()
 
         self.execute(
             "SELECT page_count * page_size as total_bytes FROM pragma_page_count(), pragma_page_size();"
@@ -166,13 +286,7 @@ class SQLiteContext(AbstractContext):
     def get_tables(self, database: SQLDatabase) -> list[SQLTable]:
         QUERY_LOGS.append(f"/* get_tables for database={database.name} */")
 
-        # Refresh sqlite_master map
-        self._map_sqlite_master.clear()
-        self.execute("SELECT * from sqlite_master ORDER BY name")
-        for result in self.fetchall():
-            self._map_sqlite_master[result["tbl_name"]][result["type"]][
-                result["name"]
-            ] = result["sql"]
+        self._refresh_sqlite_master()
 
         has_sqlite_sequence = False
 
@@ -215,140 +329,163 @@ class SQLiteContext(AbstractContext):
                         total_bytes=row["total_bytes"],
                         total_rows=row["total_rows"],
                         collation_name="BINARY",
-                        get_columns_handler=self.get_columns,
-                        get_indexes_handler=self.get_indexes,
-                        get_checks_handler=self.get_checks,
-                        get_foreign_keys_handler=self.get_foreign_keys,
                         get_records_handler=self.get_records,
+                        **self.table_schema_handlers(),
                     )
                 )
 
         return results
 
-    def get_columns(self, table: SQLiteTable) -> list[SQLColumn]:
-        results = []
-        if table is None or table.is_new:
-            return results
+    def execute(self, query: str, parameters: Optional[Sequence[Any]] = None) -> bool:
+        result = super().execute(query, parameters)
+
+        # A rolled back DDL can bring schema_version back to a value already seen.
+        if _DDL_QUERY_RE.match(query):
+            self._schema_version = None
+
+        return result
+
+    def _refresh_sqlite_master(self) -> None:
+        """Re-read sqlite_master when the schema changed since it was last read."""
+        self.execute("PRAGMA schema_version")
+        if (schema_version := self.fetchone()[0]) == self._schema_version:
+            return
 
-        # Refresh sqlite_master map to get latest schema
         self._map_sqlite_master.clear()
+        self._schema_version = schema_version
         self.execute("SELECT * from sqlite_master ORDER BY name")
         for result in self.fetchall():
             self._map_sqlite_master[result["tbl_name"]][result["type"]][
                 result["name"]
             ] = result["sql"]
 
-        if not (
-            table_match := re.search(
-                r"""CREATE\s+TABLE\s+(?:[`'"]?\w+[`'"]?\s+)?\((?P<columns>.*)\)""",
-                self._map_sqlite_master[table.name]["table"][table.name],
-                re.IGNORECASE | re.DOTALL,
-            )
-        ):
-            return results
-
-        table_group_dict = table_match.groupdict()
+    def get_tables_schema(self, database: SQLDatabase, tables: list[SQLTable]) -> dict[int, TableSchema]:
+        QUERY_LOGS.append(f"/* get_tables_schema for database={database.name} */")
 
-        columns = re.sub(r"\s*--\s*.*", "", table_group_dict["columns"])
+        self._refresh_sqlite_master()
 
-        columns_matches = re.findall(
-            r"([^,(]+(?:\([^)]*\)[^,(]*)*)(?:\s*,\s*|$)", columns, re.DOTALL
+        schemas = self._build_tables_schema(
+            {table.name: table for table in tables},
+            self._group_catalog_rows(lambda row: row["table_name"], {
+                "columns": self._select_columns(),
+                "indexes": self._select_indexes(),
+                "foreign_keys": self._select_foreign_keys(),
+            }),
+            {"columns": self._build_columns, "indexes": self._build_indexes, "foreign_keys": self._build_foreign_keys},
         )
 
-        columns = [
-            re.sub(r"\s+", " ", match).strip().rstrip(",")
-            for match in columns_matches
-            if match.strip()
-        ]
+        # Checks are only in the CREATE TABLE statements just read.
+        for table in tables:
+            schemas[id(table)].checks = self._parse_checks(table)
 
-        for i, column in enumerate(columns):
-            is_special_syntax = False
-
-            for prefix in ["PRIMARY KEY", "UNIQUE", "FOREIGN KEY"]:
-                if re.match(f"^{re.escape(prefix)}", column, re.IGNORECASE):
-                    is_special_syntax = True
-                    break
-
-            for prefix in ["CONSTRAINT", "CHECK"]:
-                if re.match(
-                    f"^{re.escape(prefix)}", column[: len(prefix)], re.IGNORECASE
-                ):
-                    self._map_sqlite_master[table.name]["constraints"].setdefault(
-                        prefix, []
-                    ).append(column)
-                    is_special_syntax = True
-                    break
-
-            if is_special_syntax:
-                continue
+        return schemas
+
+    def _table_definitions(self, table_name: str) -> tuple[dict[str, str], list[str]]:
+        """Return the column definitions of a table's CREATE statement by lower-cased column name, and its table constraints.
 
-            if not (columns_match := COLUMNS_PATTERN.match(column)):
+        Column definitions are stripped of the column name. The split is kept with
+        the sqlite_master snapshot it was made from.
+        """
+        if (definitions := self._map_sqlite_master[table_name].get("definitions")) is not None:
+            return definitions
+
+        columns: dict[str, str] = {}
+        constraints: list[str] = []
+        for definition in _split_parenthesized(self._map_sqlite_master[table_name]["table"].get(table_name) or ""):
+            if not (match := _DEFINITION_NAME_PATTERN.match(definition)):
                 continue
 
-            column_dict = columns_match.groupdict()
+            if match["bare"] and match["bare"].upper() in _TABLE_CONSTRAINT_KEYWORDS:
+                constraints.append(definition)
+            else:
+                name = next(group for group in match.group("double", "back", "bracket", "single", "bare") if group)
+                columns[name.lower()] = match["rest"]
 
-            attr_dict = {}
-            attributes_str = column_dict.pop("attributes").strip()
-            for pattern in COLUMN_ATTRIBUTES_PATTERN:
-                if not attributes_str:
-                    break
+        definitions = self._map_sqlite_master[table_name]["definitions"] = (columns, constraints)
+        return definitions
 
-                if m := pattern.search(attributes_str):
-                    attributes_str = attributes_str.replace(m.group(0), "", 1).strip()
-                    attr_dict.update(
-                        {k: v for k, v in m.groupdict().items() if v is not None}
-                    )
+    def get_columns(self, table: SQLiteTable) -> list[SQLColumn]:
+        if table is None or table.is_new:
+            return []
+
+        self._refresh_sqlite_master()
+
+        return self._build_columns(table, self._select_columns(table.name))
+
+    def _select_columns(self, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        # Hidden columns (hidden = 1) belong to virtual tables and are not part of the table definition.
+        table_filter, parameters = self._table_filter("sM.name", table_name)
+        self.execute(f"""
+            SELECT sM.name AS table_name, xi.cid, xi.name, xi.type, xi."notnull" AS is_not_null,
+                   xi.dflt_value, xi.pk, xi.hidden
+            FROM sqlite_master AS sM
+            JOIN pragma_table_xinfo(sM.name) AS xi
+            WHERE sM.type = 'table' AND xi.hidden != 1 {table_filter}
+            ORDER BY sM.name, xi.cid
+        """, parameters)
+        return [dict(row) for row in self.fetchall()]
+
+    def _build_columns(self, table: SQLiteTable, rows: list[dict[str, Any]]) -> list[SQLColumn]:
+        definitions, _constraints = self._table_definitions(table.name)
+
+        results = []
+        for row in rows:
+            definition = definitions.get(row["name"].lower(), "")
+            virtuality = _GENERATED_COLUMN_VIRTUALITY.get(row["hidden"])
+
+            # CHECK text, collation, generated expressions and AUTOINCREMENT are only in the CREATE statement.
+            attributes = {}
+            for attribute, pattern in COLUMN_ATTRIBUTES_PATTERN.items():
+                if attribute == "expression" and virtuality is None:
+                    continue
+                if match := pattern.search(definition):
+                    attributes[attribute] = match[attribute]
 
-            column_dict.update(attr_dict)
+            type_match = COLUMN_TYPE_PATTERN.match(row["type"])
 
             results.append(
                 SQLiteColumn(
-                    id=i,
-                    name=column_dict["name"],
-                    datatype=SQLiteDataType.get_by_name(column_dict["datatype"]),
-                    is_nullable=column_dict.get("is_nullable", "NULL") == "NULL",
+                    id=row["cid"],
+                    name=row["name"],
+                    datatype=SQLiteDataType.get_by_name(type_match["datatype"]) if type_match else SQLiteDataType.UNKNOWN,
+                    is_nullable=not row["is_not_null"],
                     table=table,
-                    server_default=column_dict.get("default"),
-                    is_auto_increment=column_dict.get("is_auto_increment")
-                    == "AUTOINCREMENT",
-                    length=column_dict["length"],
-                    numeric_precision=column_dict["precision"],
-                    numeric_scale=column_dict["scale"],
-                    virtuality=column_dict.get("virtuality"),
-                    expression=column_dict.get("expression"),
-                    collation_name=column_dict.get("collate"),
-                    check=column_dict.get("check"),
+                    server_default=row["dflt_value"],
+                    is_auto_increment=bool(row["pk"]) and "is_auto_increment" in attributes,
+                    length=type_match["length"] if type_match else None,
+                    numeric_precision=type_match["precision"] if type_match else None,
+                    numeric_scale=type_match["scale"] if type_match else None,
+                    virtuality=virtuality,
+                    expression=attributes.get("expression"),
+                    collation_name=attributes.get("collate"),
+                    check=attributes.get("check"),
                 )
             )
 
         return results
 
     def get_checks(self, table: SQLiteTable) -> list[SQLiteCheck]:
-        results = []
         if table is None or table.is_new:
-            return results
+            return []
 
-        for check_type, constraints in self._map_sqlite_master[table.name][
-            "constraints"
-        ].items():
-            for i, constraint in enumerate(constraints):
-                if not TABLE_CONSTRAINTS_PATTERN.get(check_type):
-                    continue
+        self._refresh_sqlite_master()
 
-                if constraint_column := re.search(
-                    TABLE_CONSTRAINTS_PATTERN[check_type].pattern,
-                    constraint,
-                    re.IGNORECASE | re.DOTALL,
-                ):
-                    constraint_column_dict = constraint_column.groupdict()
-                    results.append(
-                        SQLiteCheck(
-                            id=i,
-                            name=constraint_column_dict.get("constraint_name"),
-                            table=table,
-                            expression=constraint_column_dict.get("check"),
-                        )
+        return self._parse_checks(table)
+
+    def _parse_checks(self, table: SQLiteTable) -> list[SQLiteCheck]:
+        results = []
+
+        _columns, constraints = self._table_definitions(table.name)
+        for constraint in constraints:
+            if constraint_match := TABLE_CONSTRAINTS_PATTERN["CHECK"].match(constraint):
+                results.append(
+                    SQLiteCheck(
+                        id=len(results),
+                        name=constraint_match["constraint_name"],
+                        table=table,
+                        expression=constraint_match["check"],
                     )
+                )
 
         return results
 
@@ -359,64 +496,69 @@ class SQLiteContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_indexes for table={table.name} */")
 
-        # Refresh sqlite_master map to get latest schema
-        self._map_sqlite_master.clear()
-        self.execute("SELECT * from sqlite_master ORDER BY name")
-        for result in self.fetchall():
-            self._map_sqlite_master[result["tbl_name"]][result["type"]][
-                result["name"]
-            ] = result["sql"]
+        self._refresh_sqlite_master()
+
+        return self._build_indexes(table, self._select_indexes(table.name))
 
+    def _select_indexes(self, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        # Primary key columns, then one row per key column of every other index.
+        table_filter, parameters = self._table_filter("sM.name", table_name)
+        self.execute(f"""
+            SELECT sM.name AS table_name, 'pk' AS kind, ti.pk AS seq, ti.name AS name,
+                   0 AS is_unique, 0 AS is_partial, NULL AS seqno, NULL AS cid, NULL AS column_name
+            FROM sqlite_master AS sM
+            JOIN pragma_table_info(sM.name) AS ti
+            WHERE sM.type = 'table' AND ti.pk != 0 {table_filter}
+            UNION ALL
+            SELECT sM.name, 'index', il.seq, il.name, il."unique", il.partial, ix.seqno, ix.cid, ix.name
+            FROM sqlite_master AS sM
+            JOIN pragma_index_list(sM.name) AS il
+            JOIN pragma_index_xinfo(il.name) AS ix
+            WHERE sM.type = 'table' AND il.origin != 'pk' AND ix.key = 1 {table_filter}
+        """, parameters * 2)
+        return [dict(row) for row in self.fetchall()]
+
+    def _build_indexes(self, table: SQLiteTable, rows: list[dict[str, Any]]) -> list[SQLIndex]:
         results = []
 
-        self.execute(
-            f"SELECT * FROM pragma_table_info('{table.name}') WHERE pk != 0 ORDER BY pk;"
-        )
-        if (pk_index := self.fetchall()) and len(pk_index):
+        pk_rows = sorted((row for row in rows if row["kind"] == "pk"), key=lambda row: row["seq"])
+        if pk_rows:
             results.append(
                 SQLiteIndex(
                     id=0,
                     name="PRIMARY KEY",
                     type=SQLiteIndexType.PRIMARY,
-                    columns=[col["name"] for col in pk_index],
+                    columns=[row["name"] for row in pk_rows],
                     table=table,
                 )
             )
 
-        self.execute(
-            f"SELECT * FROM pragma_index_list('{table.name}') WHERE `origin` != 'pk' order by seq desc;"
-        )
-
-        for idx in [dict(row) for row in self.cursor.fetchall()]:
-            id = int(idx["seq"]) + 1
-            name = idx["name"]
-            is_unique = bool(idx.get("unique", False))
-            is_partial = bool(idx.get("partial", False))
-
-            self.execute(f"SELECT * FROM pragma_index_info('{name}');")
-            pragma_index_info = self.fetchone()
-
-            is_expression = True if pragma_index_info["cid"] == -2 else False
-
-            columns = []
-            condition = ""
-
-            if name.startswith("sqlite_"):
-                columns = [pragma_index_info["name"]]
-            else:
-                sql = self._map_sqlite_master[table.name]["index"][name]
-
-                if search := re.search(
-                    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+\w+\s+ON\s+\w+\s*\((?P<columns>(?:[^()]+|\([^()]*\))+)\)(?:\s+WHERE\s+(?P<conditions>.+))?",
-                    sql,
-                    re.IGNORECASE | re.DOTALL,
-                ):
-                    groups = search.groupdict()
-
-                    columns = groups["columns"].strip().split(",")
-                    condition = groups.get("conditions", [])
+        index_rows: dict[str, list[dict[str, Any]]] = {}
+        for row in sorted((row for row in rows if row["kind"] == "index"), key=lambda row: (-row["seq"], row["seqno"])):
+            index_rows.setdefault(row["name"], []).append(row)
+
+        for name, key_rows in index_rows.items():
+            first = key_rows[0]
+            is_unique = bool(first["is_unique"])
+            is_partial = bool(first["is_partial"])
+            # cid -2 marks an expression key, -1 the rowid.
+            is_expression = any(row["cid"] == -2 for row in key_rows)
+
+            columns = [row["column_name"] or "rowid" for row in key_rows]
+            condition = None
+
+            # Key expressions and the WHERE clause of a partial index are only in the CREATE INDEX statement.
+            if (is_expression or is_partial) and (
+                    search := re.search(
+                        INDEX_PATTERN[0].pattern,
+                        self._map_sqlite_master[table.name]["index"].get(name) or "",
+                        re.IGNORECASE | re.DOTALL,
+                    )
+            ):
+                if is_expression:
+                    columns = _split_parenthesized(f"({search['columns']})")
+                condition = search["condition"]
 
-            # Determine index type
             index_type = SQLiteIndexType.INDEX
 
             if is_unique:
@@ -428,7 +570,7 @@ class SQLiteContext(AbstractContext):
 
             results.append(
                 SQLiteIndex(
-                    id=id,
+                    id=int(first["seq"]) + 1,
                     name=name,
                     type=index_type,
                     columns=columns,
@@ -449,14 +591,23 @@ class SQLiteContext(AbstractContext):
 
         QUERY_LOGS.append(f"/* get_foreign_keys for table={table.name} */")
 
-        self.execute(
-            f"SELECT"
-            f" `id`, `table`, GROUP_CONCAT(`from`) as `from`, GROUP_CONCAT(`to`) as `to`, `on_update`, `on_delete`"
-            f" FROM pragma_foreign_key_list('{table.name}') GROUP BY id;"
-        )
+        return self._build_foreign_keys(table, self._select_foreign_keys(table.name))
 
+    def _select_foreign_keys(self, table_name: Optional[str] = None) -> list[dict[str, Any]]:
+        table_filter, parameters = self._table_filter("sM.name", table_name)
+        self.execute(f"""
+            SELECT sM.name AS table_name, fk.`id`, fk.`table`, GROUP_CONCAT(fk.`from`) AS `from`,
+                   GROUP_CONCAT(fk.`to`) AS `to`, fk.`on_update`, fk.`on_delete`
+            FROM sqlite_master AS sM
+            JOIN pragma_foreign_key_list(sM.name) AS fk
+            WHERE sM.type = 'table' {table_filter}
+            GROUP BY sM.name, fk.`id`
+        """, parameters)
+        return [dict(row) for row in self.fetchall()]
+
+    def _build_foreign_keys(self, table: SQLiteTable, rows: list[dict[str, Any]]) -> list[SQLForeignKey]:
         foreign_keys = []
-        for fk in [dict(row) for row in self.fetchall()]:
+        for fk in rows:
             id = fk["id"]
             columns = fk["from"].split(",")
             reference_columns = fk["to"].split(",")
@@ -486,11 +637,12 @@ class SQLiteContext(AbstractContext):
         limit: int = 1000,
         offset: int = 0,
         orders: Optional[str] = None,
+        parameters: Optional[Sequence[Any]] = None,
     ) -> list[SQLiteRecord]:
         results = []
         for i, record in enumerate(
             super().get_records(
-                table, filters=filters, limit=limit, offset=offset, orders=orders
+                table, filters=filters, limit=limit, offset=offset, orders=orders, parameters=parameters
             )
         ):
             results.append(SQLiteRecord(id=i, table=table, values=dict(record)))
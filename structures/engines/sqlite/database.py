@@ -1,6 +1,6 @@
 import re
 import dataclasses
-from typing import Self, Optional
+from typing import Any, Self, Optional
 
 from helpers.logger import logger
 
@@ -12,6 +12,8 @@ from structures.engines.sqlite.builder import SQLiteColumnBuilder
 
 from structures.engines.sqlite.indextype import SQLiteIndexType
 
+_CREATE_TRIGGER_RE = re.compile(r"^\s*CREATE\s+(TEMP\s+|TEMPORARY\s+)?TRIGGER\b", re.IGNORECASE)
+
 
 @dataclasses.dataclass(eq=False)
 class SQLiteDatabase(SQLDatabase):
@@ -412,70 +414,23 @@ class SQLiteForeignKey(SQLForeignKey):
 
 
 class SQLiteRecord(SQLRecord):
-    def raw_insert_record(self) -> str:
-        columns_values = {}
-
-        for column in self.table.columns:
-            if column.virtuality is not None:
-                continue
-
-            value = self.values.get(column.name)
-            if value is not None and str(value).strip():
-                if column.datatype.format:
-                    value = column.datatype.format(value)
-
-                columns_values[column.name] = str(value)
-            # elif column. :
-
-        if not columns_values:
+    def raw_insert_record(self) -> tuple[str, list[Any]]:
+        if (statement := self._build_insert_statement()) is None:
             raise ValueError("No column values provided for insert operation")
 
-        return f"""INSERT INTO `{self.table.name}` ({', '.join(columns_values.keys())}) VALUES ({', '.join(columns_values.values())})"""
+        return statement
 
-    def raw_update_record(self) -> Optional[str]:
-        identifier_columns = self._get_identifier_columns()
+    def raw_update_record(self) -> Optional[tuple[str, list[Any]]]:
+        return self._build_update_statement()
 
-        identifier_conditions = " AND ".join([f"""`{identifier_name}` = {identifier_value}""" for identifier_name, identifier_value in identifier_columns.items()])
-
-        sql_select = f"SELECT * FROM `{self.table.name}` WHERE {identifier_conditions}"
-        self.table.database.context.execute(sql_select)
-
-        if not (existing_record := self.table.database.context.fetchone()):
-            logger.warning(f"Record not found for update: {identifier_columns}")
-            raise ValueError("Record not found for update with identifier columns")
-
-        changed_columns = []
-
-        for col_name, new_value in self.values.items():
-            column: SQLColumn = next((c for c in self.table.columns if c.name == col_name), None)
-            existing_value = dict(existing_record).get(col_name)
-            if (new_value or "") != (existing_value or ""):
-                if new_value is None:
-                    changed_columns.append(f"`{col_name}` = NULL")
-                elif column.datatype.format:
-                    changed_columns.append(f"`{col_name}` = {column.datatype.format(new_value)}")
-                else:
-                    changed_columns.append(f"`{col_name}` = {new_value}")
-
-        if not changed_columns:
-            return None
-
-        set_clause = ", ".join(changed_columns)
-
-        return f"UPDATE `{self.table.database.name}`.`{self.table.name}` SET {set_clause} WHERE {identifier_conditions}"
-
-    def raw_delete_record(self) -> str:
-        identifier_columns = self._get_identifier_columns()
-
-        identifier_conditions = " AND ".join([f"""`{identifier_name}` = {identifier_value}""" for identifier_name, identifier_value in identifier_columns.items()])
-
-        return f"DELETE FROM `{self.table.name}` WHERE {identifier_conditions}"
+    def raw_delete_record(self) -> tuple[str, list[Any]]:
+        return self._build_delete_statement()
 
     def insert(self) -> bool:
         with self.table.database.context.transaction() as transaction:
             if raw_insert_record := self.raw_insert_record():
                 try:
-                    return transaction.execute(raw_insert_record)
+                    return transaction.execute(*raw_insert_record)
                 except PermissionError:
                     raise
                 except Exception:
@@ -487,7 +442,7 @@ class SQLiteRecord(SQLRecord):
         with self.table.database.context.transaction() as transaction:
             if raw_update_record := self.raw_update_record():
                 try:
-                    return transaction.execute(raw_update_record)
+                    return transaction.execute(*raw_update_record)
                 except PermissionError:
                     raise
                 except Exception:
@@ -499,7 +454,7 @@ class SQLiteRecord(SQLRecord):
         with self.table.database.context.transaction() as transaction:
             if raw_delete_record := self.raw_delete_record():
                 try:
-                    return transaction.execute(raw_delete_record)
+                    return transaction.execute(*raw_delete_record)
                 except PermissionError:
                     raise
                 except Exception:
@@ -531,6 +486,10 @@ class SQLiteView(SQLView):
 
 class SQLiteTrigger(SQLTrigger):
     def raw_create(self) -> str:
+        # Triggers read back from sqlite_master already hold their complete CREATE TRIGGER statement.
+        if _CREATE_TRIGGER_RE.match(self.statement):
+            return self.statement
+
         return f"CREATE TRIGGER IF NOT EXISTS {self.fully_qualified_name} {self.statement}"
 
     def create(self) -> bool:
@@ -7,7 +7,11 @@ from typing import Optional, Any, Type, TYPE_CHECKING
 if TYPE_CHECKING:
     from structures.engines.context import AbstractContext
 
+from helpers.scheduler import BackgroundScheduler
+
 from structures.connection import Connection, ConnectionEngine
+from structures.engines.pool import ContextPool
+from structures.engines.records_count import RecordsCountCache
 
 
 class SessionState(enum.Enum):
@@ -27,10 +31,21 @@ class Session:
     state: SessionState = dataclasses.field(default=SessionState.DISCONNECTED, init=False)
     error: Optional[str] = dataclasses.field(default=None, init=False)
     _ssh_tunnel_process: Any = dataclasses.field(default=None, init=False, repr=False)
+    # Worker contexts background jobs borrow, opened on first use through this session's tunnel.
+    pool: ContextPool = dataclasses.field(init=False, repr=False)
+    # Background work of this session: query runs, record pages, row counts and metadata checks.
+    scheduler: BackgroundScheduler = dataclasses.field(init=False, repr=False)
+    # Row counts of the tables opened in this session, dropped by any write its contexts run.
+    records_counts: RecordsCountCache = dataclasses.field(init=False, repr=False)
 
     def __post_init__(self):
         context_class = self._get_context_class()
         self.context = context_class(self.connection)
+        self.pool = ContextPool(self.context)
+        self.scheduler = BackgroundScheduler(name=f"session-{self.connection.id}")
+        self.context.scheduler = self.scheduler
+        self.records_counts = RecordsCountCache()
+        self.context.records_counts = self.records_counts
 
     @property
     def id(self) -> int:
@@ -96,6 +111,8 @@ class Session:
         """Connect to the database."""
         self.state = SessionState.CONNECTING
         self.error = None
+        # Pooled contexts of a previous connection may go through a tunnel that is gone.
+        self.close_pool()
         try:
             self.context.connect(**kwargs)
             self.state = SessionState.CONNECTED
@@ -106,10 +123,18 @@ class Session:
 
     def disconnect(self) -> None:
         """Disconnect from the database and stop SSH tunnel."""
+        self.scheduler.cancel_all()
+        self.close_pool()
+        self.records_counts.invalidate()
         self.context.disconnect()
         self.stop_tunnel()
         self.state = SessionState.DISCONNECTED
 
+    def close_pool(self) -> None:
+        """Close the pooled worker contexts and start an empty pool."""
+        pool, self.pool = self.pool, ContextPool(self.context)
+        pool.close()
+
     def stop_tunnel(self) -> None:
         """Stop the SSH tunnel process if running."""
         if process := self._ssh_tunnel_process:
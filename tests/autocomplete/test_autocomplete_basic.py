@@ -11,6 +11,8 @@ from windows.components.stc.autocomplete.completion_types import CompletionItem
 from windows.components.stc.autocomplete.completion_types import CompletionResult
 from windows.state import CURRENT_SESSION
 
+from helpers.observables import ObservableLazyList
+
 
 def create_mock_column(col_id: int, name: str, table):
     column = Mock()
@@ -204,6 +206,35 @@ def test_dot_completion():
         assert "users." not in name
 
 
+def test_columns_being_prefetched_are_pending_instead_of_loaded():
+    database = create_mock_database()
+    orders_table = database.tables[1]
+    loaded_columns = orders_table.columns
+
+    def load_on_the_ui_thread():
+        raise AssertionError("columns being prefetched must not be loaded by autocomplete")
+
+    orders_table.columns = ObservableLazyList(load_on_the_ui_thread)
+    database.context.is_prefetching = lambda table: table is orders_table
+    provider = SQLCompletionProvider(
+        get_database=lambda: database, get_current_table=lambda: None
+    )
+
+    result = provider.get(text="SELECT orders.", pos=14)
+    assert result.items == () and result.is_pending
+
+    result = provider.get(text="SELECT * FROM orders WHERE ", pos=27)
+    assert result.is_pending
+    assert "total" not in [item.name for item in result.items]
+
+    orders_table.columns.set_value(loaded_columns)
+    database.context.is_prefetching = lambda table: False
+
+    result = provider.get(text="SELECT orders.", pos=14)
+    assert not result.is_pending
+    assert "total" in [item.name for item in result.items]
+
+
 def test_dot_completion_with_prefix_in_select_list():
     database = create_mock_database()
     provider = SQLCompletionProvider(
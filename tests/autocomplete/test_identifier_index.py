@@ -0,0 +1,96 @@
+from unittest.mock import Mock
+
+from windows.components.stc.autocomplete.identifier_index import IdentifierIndex
+
+
+def create_database(tables: dict[str, list[str]]):
+    database = Mock()
+    database.context.KEYWORDS = ["select", "set", "from"]
+    database.context.FUNCTIONS = ["count", "coalesce", "sum"]
+
+    database.tables = []
+    for table_name, column_names in tables.items():
+        table = Mock()
+        table.name = table_name
+        table.columns = []
+        for column_name in column_names:
+            column = Mock()
+            column.name = column_name
+            table.columns.append(column)
+        database.tables.append(table)
+
+    return database
+
+
+def test_tables_are_found_by_case_insensitive_prefix_in_schema_order():
+    index = IdentifierIndex(create_database({"users": [], "Orders": [], "order_items": [], "products": []}))
+
+    assert [table.name for table in index.tables_with_prefix("OR")] == ["Orders", "order_items"]
+    assert index.table("ORDERS").name == "Orders"
+    assert index.table("order") is None
+
+
+def test_columns_are_found_by_prefix_in_schema_order():
+    index = IdentifierIndex(create_database({
+        "users": ["id", "user_name", "email"],
+        "orders": ["id", "user_id", "total"],
+    }))
+
+    assert [item.name for item in index.columns_with_prefix("user")] == ["users.user_name", "orders.user_id"]
+    assert [item.name for item in index.columns_with_prefix("ID", exclude_tables={"users"})] == ["orders.id"]
+    assert [item.name for item in index.columns(exclude_tables={"orders"})] == ["users.id", "users.user_name", "users.email"]
+
+
+def test_keywords_and_functions_are_upper_cased_and_sorted():
+    index = IdentifierIndex(create_database({}))
+
+    assert index.keywords_with_prefix("se") == ["SELECT", "SET"]
+    assert index.functions_with_prefix("c") == ["COALESCE", "COUNT"]
+    assert index.functions_with_prefix("") == ["COALESCE", "COUNT", "SUM"]
+
+
+def test_refresh_reindexes_changed_columns_and_tables():
+    database = create_database({"users": ["id"], "orders": ["id"]})
+    index = IdentifierIndex(database)
+
+    added = Mock()
+    added.name = "user_email"
+    database.tables[0].columns.append(added)
+    index.refresh()
+
+    assert [item.name for item in index.columns_with_prefix("user")] == ["users.user_email"]
+
+    database.tables.pop(0)
+    index.refresh()
+
+    assert index.table("users") is None
+    assert [item.name for item in index.columns_with_prefix("")] == ["orders.id"]
+
+
+def test_table_columns_reindexes_only_the_table_asked_for():
+    database = create_database({"users": ["id"], "orders": ["id"]})
+    index = IdentifierIndex(database)
+
+    added = Mock()
+    added.name = "total"
+    database.tables[1].columns.append(added)
+    index.refresh()
+
+    assert [item.name for item in index.table_columns(database.tables[1])] == ["orders.id", "orders.total"]
+    assert [item.name for item in index.columns_with_prefix("t")] == ["orders.total"]
+
+
+def test_column_lookups_drop_the_names_table_columns_replaced():
+    database = create_database({"users": ["id", "user_name"], "orders": ["id"]})
+    index = IdentifierIndex(database)
+    assert [item.name for item in index.columns_with_prefix("user")] == ["users.user_name"]
+
+    for column_name in ("user_email", "user_phone"):
+        database.tables[0].columns = database.tables[0].columns[:1]
+        added = Mock()
+        added.name = column_name
+        database.tables[0].columns.append(added)
+        index.refresh()
+        assert [item.name for item in index.table_columns(database.tables[0])] == ["users.id", f"users.{column_name}"]
+
+    assert [item.name for item in index.columns_with_prefix("user")] == ["users.user_phone"]
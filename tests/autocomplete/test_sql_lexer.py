@@ -0,0 +1,127 @@
+import random
+
+from windows.components.stc.autocomplete.context_detector import ContextDetector
+from windows.components.stc.autocomplete.sql_lexer import LexedBuffer, LexedStatement, TokenKind, tokenize
+from windows.components.stc.autocomplete.statement_extractor import StatementExtractor, StatementIndex
+
+
+def kinds_and_texts(text: str) -> list[tuple[TokenKind, str]]:
+    return [(token.kind, text[token.start:token.end]) for token in tokenize(text)]
+
+
+def test_strings_and_comments_are_single_tokens():
+    assert kinds_and_texts("SELECT 'a;b' -- c;\n, \"x;y\" /* d; */ 1.5;") == [
+        (TokenKind.WORD, "SELECT"),
+        (TokenKind.STRING, "'a;b'"),
+        (TokenKind.COMMENT, "-- c;"),
+        (TokenKind.PUNCTUATION, ","),
+        (TokenKind.QUOTED_IDENTIFIER, '"x;y"'),
+        (TokenKind.COMMENT, "/* d; */"),
+        (TokenKind.NUMBER, "1.5"),
+        (TokenKind.PUNCTUATION, ";"),
+    ]
+
+
+def test_unterminated_quote_does_not_swallow_the_rest():
+    assert kinds_and_texts("SELECT 'abc; x") == [
+        (TokenKind.WORD, "SELECT"),
+        (TokenKind.UNTERMINATED, "'"),
+        (TokenKind.WORD, "abc"),
+        (TokenKind.PUNCTUATION, ";"),
+        (TokenKind.WORD, "x"),
+    ]
+
+
+def test_buffer_matches_a_full_lex_after_random_edits():
+    pieces = list("ab1.;'\"`[]$/*-\n \\") + ["$t$", "--", "/*", "*/", "SELECT ", "x.y"]
+    generator = random.Random(7)
+
+    for _ in range(300):
+        buffer, text = LexedBuffer(), ""
+        for _ in range(30):
+            position = generator.randint(0, len(text))
+            removed = generator.randint(0, min(4, len(text) - position))
+            inserted = "".join(generator.choice(pieces) for _ in range(generator.randint(0, 3)))
+            text = text[:position] + inserted + text[position + removed:]
+            buffer.update(text)
+
+            tokens = list(tokenize(text))
+            assert list(buffer.tokens_from(0)) == tokens
+
+            position = generator.randint(0, len(text))
+            assert list(buffer.tokens_from(position)) == [token for token in tokens if token.end >= position]
+            assert list(buffer.tokens_before(position)) == [token for token in reversed(tokens) if token.end < position]
+
+
+def test_closing_an_earlier_quote_relexes_what_follows_it():
+    buffer = LexedBuffer()
+    buffer.update("SELECT 'a; b; c")
+    buffer.update("SELECT 'a; b; c'")
+
+    assert [token.kind for token in buffer.tokens_from(0)] == [TokenKind.WORD, TokenKind.STRING]
+
+
+def test_current_statement_ignores_separators_in_strings_and_comments():
+    extractor = StatementExtractor()
+    text = "SELECT 1; SELECT ';' -- ;\nFROM users WHERE id = 1; SELECT 2"
+
+    lexed, position = extractor.extract_current_lexed_statement(text, text.index("users"))
+
+    assert lexed.text == "SELECT ';' -- ;\nFROM users WHERE id = 1"
+    assert lexed.text[position:].startswith("users")
+    assert [lexed.token_text(token) for token in lexed.tokens][-1] == "1"
+
+
+def test_word_separator_only_matches_whole_words():
+    text = "SELECT go_on FROM t\nGO\nSELECT 1"
+
+    assert StatementExtractor.extract_all_statements(text, separator="GO") == [
+        ("SELECT go_on FROM t", 0, text.index("GO\n") + 2),
+        ("SELECT 1", text.index("GO\n") + 2, len(text)),
+    ]
+
+
+def test_statement_type_ignores_keywords_in_names_and_strings():
+    detector = ContextDetector()
+
+    assert detector._detect_statement_type(LexedStatement("SELECT updated_at, 'DELETE' FROM t"), 34) == ("SELECT", 0)
+    assert detector._detect_statement_type(LexedStatement("UPDATE t SET a = 1"), 18) == ("UPDATE", 0)
+
+
+def test_name_after_returns_the_qualified_name():
+    lexed = LexedStatement("INSERT /* target */ INTO public.\"users\" (id) VALUES (1)")
+
+    assert lexed.name_after("INSERT", "INTO") == 'public."users"'
+    assert lexed.name_after("UPDATE") is None
+
+
+def test_statement_index_matches_a_full_parse_after_random_edits():
+    pieces = list("ab;'\"-/*\n ") + ["--", "/*", "*/", "SELECT 1", "GO "]
+    generator = random.Random(11)
+
+    for separator in (None, "GO"):
+        for _ in range(100):
+            index, text = StatementIndex(separator), ""
+            for _ in range(30):
+                position = generator.randint(0, len(text))
+                removed = generator.randint(0, min(4, len(text) - position))
+                inserted = "".join(generator.choice(pieces) for _ in range(generator.randint(0, 3)))
+                text = text[:position] + inserted + text[position + removed:]
+                index.edit(position, removed, inserted)
+
+                assert index.text == text
+                assert index.statements() == StatementExtractor.extract_all_statements(text, separator)
+
+
+def test_statement_at_falls_back_to_the_next_then_the_last_statement():
+    index = StatementIndex()
+    index.update("SELECT 1;  ;\nSELECT ';' FROM t;\n  ")
+
+    assert index.statement_at(3) == ("SELECT 1", 0, 9)
+    assert index.statement_at(9) == ("SELECT 1", 0, 9)
+    assert index.statement_at(10) == ("SELECT ';' FROM t", 12, 31)
+    assert index.statement_at(32) == ("SELECT ';' FROM t", 12, 31)
+
+    index.edit(0, 0, "SELECT 0;")
+    assert index.statement_at(3) == ("SELECT 0", 0, 9)
+    assert index.statement_at(12) == ("SELECT 1", 9, 18)
@@ -0,0 +1,60 @@
+from helpers.block_cache import BlockCache
+
+
+class TestBlockCache:
+    def test_plan_fetches_row_block_and_prefetches_ahead(self):
+        cache = BlockCache(row_count=1000, block_size=100, max_blocks=10, prefetch_blocks=2)
+
+        assert cache.get(0) is None
+        assert cache.plan(0) == [0, 1, 2]
+        # Blocks already planned are not requested twice.
+        assert cache.plan(50) == []
+
+        cache.put(0, list(range(100)))
+        assert cache.get(42) == 42
+
+    def test_plan_follows_scroll_direction(self):
+        cache = BlockCache(row_count=1000, block_size=100, max_blocks=10, prefetch_blocks=2)
+
+        cache.plan(500)
+        assert cache.plan(400) == [4, 3, 2]
+
+    def test_plan_stays_within_row_count(self):
+        cache = BlockCache(row_count=250, block_size=100, max_blocks=10, prefetch_blocks=2)
+
+        assert cache.plan(200) == [2]
+
+    def test_least_recently_used_blocks_are_evicted(self):
+        cache = BlockCache(row_count=10_000, block_size=10, max_blocks=5, prefetch_blocks=1)
+
+        for block in range(5):
+            cache.put(block, list(range(block * 10, block * 10 + 10)))
+
+        cache.get(0)
+        cache.put(5, list(range(50, 60)))
+
+        assert cache.has_block(0)
+        assert not cache.has_block(1)
+        assert cache.has_block(5)
+
+    def test_stale_blocks_are_not_wanted(self):
+        cache = BlockCache(row_count=10_000, block_size=100, max_blocks=10, prefetch_blocks=2)
+
+        cache.plan(0)
+        cache.plan(5_000)
+
+        assert cache.is_wanted(50)
+        assert not cache.is_wanted(1)
+
+        cache.discard(1)
+        cache.plan(100)
+        assert cache.plan(100) == []
+
+    def test_invalidate_drops_blocks(self):
+        cache = BlockCache(row_count=100, block_size=10)
+        cache.put(0, list(range(10)))
+
+        cache.invalidate()
+
+        assert cache.get(0) is None
+        assert cache.plan(0) == [0, 1, 2]
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from structures.configurations import SourceConfiguration
+from structures.connection import Connection, ConnectionEngine
+from structures.engines.pool import ContextPool, PoolExhaustedError
+from structures.session import Session
+
+
+class _Database:
+    def __init__(self, name: str):
+        self.name = name
+
+
+@pytest.fixture
+def file_session(tmp_path):
+    session = Session(Connection(id=1, name="pool", engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=str(tmp_path / "pool.db"))))
+    session.connect()
+    session.context.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT)")
+    yield session
+    session.disconnect()
+
+
+class TestContextPool:
+    def test_a_released_context_is_lent_again_for_the_same_database(self, file_session):
+        pool = ContextPool(file_session.context)
+        main = _Database("main")
+
+        context = pool.acquire(main)
+        pool.release(context)
+
+        assert pool.acquire(main) is context
+        assert pool.acquire(_Database("other")) is not context
+        assert pool.size == 2
+
+    def test_an_open_transaction_is_rolled_back_on_release(self, file_session):
+        pool = ContextPool(file_session.context)
+
+        with pool.borrow() as context:
+            context.execute("BEGIN")
+            context.execute("INSERT INTO items (label) VALUES ('left behind')")
+
+        with pool.borrow() as reused:
+            assert reused is context
+            assert not reused._connection.in_transaction
+            reused.execute("SELECT COUNT(*) AS total FROM items")
+            assert reused.fetchone()["total"] == 0
+
+    def test_a_context_that_stopped_answering_is_replaced(self, file_session):
+        pool = ContextPool(file_session.context, health_check_after=0)
+
+        context = pool.acquire()
+        pool.release(context)
+        context._connection.close()
+
+        replacement = pool.acquire()
+
+        assert replacement is not context
+        assert replacement.is_alive()
+        assert pool.size == 1
+
+    def test_idle_contexts_past_the_timeout_are_closed_down_to_min_size(self, file_session):
+        pool = ContextPool(file_session.context, min_size=1, idle_timeout=0.01)
+        first, second = pool.acquire(_Database("a")), pool.acquire(_Database("b"))
+        pool.release(first)
+        pool.release(second)
+
+        time.sleep(0.02)
+        third = pool.acquire(_Database("c"))
+
+        assert not first.is_connected
+        assert second.is_connected
+        assert pool.size == 2
+        pool.release(third)
+
+    def test_a_full_pool_waits_for_a_release(self, file_session):
+        pool = ContextPool(file_session.context, max_size=1, acquire_timeout=0.05)
+        context = pool.acquire()
+
+        with pytest.raises(PoolExhaustedError):
+            pool.acquire()
+
+        # An idle context on another database makes room instead.
+        pool.release(context)
+        other = pool.acquire(_Database("other"))
+
+        assert other is not context
+        assert not context.is_connected
+        assert pool.size == 1
+
+    def test_contexts_given_back_after_close_are_disconnected(self, file_session):
+        pool = ContextPool(file_session.context)
+        idle, borrowed = pool.acquire(), pool.acquire()
+        pool.release(idle)
+
+        pool.close()
+        pool.release(borrowed)
+
+        assert not idle.is_connected
+        assert not borrowed.is_connected
+        with pytest.raises(RuntimeError):
+            pool.acquire()
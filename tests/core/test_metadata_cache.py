@@ -0,0 +1,60 @@
+import datetime
+import decimal
+
+from structures.engines.metadata_cache import CacheScope, CachedTableSchema, MetadataCache
+
+
+class TestMetadataCache:
+    def test_rows_read_back_with_their_types(self, tmp_path):
+        cache = MetadataCache(tmp_path / "metadata_cache.sqlite")
+        scope = CacheScope(1, "shop", "8.0.36")
+        rows = [{
+            "TABLE_NAME": "orders",
+            "CREATE_TIME": datetime.datetime(2024, 5, 1, 12, 30),
+            "total_bytes": decimal.Decimal("16384.00"),
+            "TABLE_ROWS": 42,
+            "columns": ["id", "customer_id"],
+        }]
+
+        cache.store_tables(scope, rows)
+
+        assert cache.load_tables(scope) == rows
+
+    def test_nothing_is_served_for_another_scope(self, tmp_path):
+        cache = MetadataCache(tmp_path / "metadata_cache.sqlite")
+        cache.store_tables(CacheScope(1, "shop", "8.0.36"), [{"TABLE_NAME": "orders"}])
+
+        assert cache.load_tables(CacheScope(2, "shop", "8.0.36")) is None
+        assert cache.load_tables(CacheScope(1, "crm", "8.0.36")) is None
+
+    def test_a_new_server_version_drops_the_old_rows(self, tmp_path):
+        cache = MetadataCache(tmp_path / "metadata_cache.sqlite")
+        old, new = CacheScope(1, "shop", "8.0.36"), CacheScope(1, "shop", "8.4.0")
+        cache.store_schemas(old, {"orders": CachedTableSchema("a", {"columns": [{"COLUMN_NAME": "id"}]})})
+
+        cache.store_tables(new, [])
+
+        assert cache.load_schemas(old) == {}
+        assert cache.load_tables(new) == []
+
+    def test_schemas_are_replaced_and_discarded_by_table(self, tmp_path):
+        cache = MetadataCache(tmp_path / "metadata_cache.sqlite")
+        scope = CacheScope(1, "shop", "16.2")
+        cache.store_schemas(scope, {
+            "public.orders": CachedTableSchema("1|100", {"columns": [{"column_name": "id"}]}),
+            "public.users": CachedTableSchema("2|200", {"indexes": [{"index_name": "users_pkey", "columns": ["id"]}]}),
+        })
+
+        cache.store_schemas(scope, {"public.orders": CachedTableSchema("1|101", {"columns": [{"column_name": "id"}, {"column_name": "total"}]})})
+        cache.discard_schemas(scope, ["public.users"])
+
+        assert cache.load_schemas(scope) == {
+            "public.orders": CachedTableSchema("1|101", {"columns": [{"column_name": "id"}, {"column_name": "total"}]}),
+        }
+        assert cache.load_schemas(scope, ["public.users"]) == {}
+
+    def test_unreadable_cache_file_is_a_miss(self, tmp_path):
+        path = tmp_path / "metadata_cache.sqlite"
+        path.write_bytes(b"not a database")
+
+        assert MetadataCache(path).load_tables(CacheScope(1, "shop", "8.0.36")) is None
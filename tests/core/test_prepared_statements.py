@@ -0,0 +1,51 @@
+from structures.engines.prepared import PreparedStatementCache
+
+
+class TestPreparedStatementCache:
+    def test_a_query_is_prepared_from_its_second_use(self):
+        cache = PreparedStatementCache()
+
+        assert cache.should_prepare("SELECT 1") is False
+        assert cache.should_prepare("SELECT 1") is True
+
+        name, evicted = cache.add("SELECT 1")
+        assert cache.get("SELECT 1") == name
+        assert evicted is None
+
+    def test_the_least_recently_used_statement_is_evicted(self):
+        cache = PreparedStatementCache(max_size=2)
+        first, _ = cache.add("SELECT 1")
+        cache.add("SELECT 2")
+
+        cache.get("SELECT 1")
+        _name, evicted = cache.add("SELECT 3")
+
+        assert evicted is not None and evicted != first
+        assert cache.get("SELECT 2") is None
+        assert cache.get("SELECT 1") == first
+        assert len(cache) == 2
+
+    def test_names_are_never_reused(self):
+        cache = PreparedStatementCache()
+        first, _ = cache.add("SELECT 1")
+        cache.discard("SELECT 1")
+
+        second, _ = cache.add("SELECT 1")
+        assert second != first
+
+    def test_a_rejected_query_is_not_prepared_again(self):
+        cache = PreparedStatementCache(uses_before_prepare=1)
+        cache.reject("SELECT %s IS NULL")
+
+        assert cache.should_prepare("SELECT %s IS NULL") is False
+        assert cache.get("SELECT %s IS NULL") is None
+
+    def test_clear_forgets_every_statement(self):
+        cache = PreparedStatementCache()
+        cache.add("SELECT 1")
+        cache.should_prepare("SELECT 2")
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.should_prepare("SELECT 2") is False
@@ -0,0 +1,75 @@
+import threading
+
+from structures.engines.query_log import QueryLog, normalise_query
+
+
+class TestQueryLog:
+    def test_entries_are_read_on_one_line(self):
+        log = QueryLog()
+        log.append("SELECT *\n  FROM items\n WHERE id = 1")
+
+        assert log[0] == "SELECT * FROM items WHERE id = 1"
+        assert list(log) == ["SELECT * FROM items WHERE id = 1"]
+
+    def test_only_the_last_entries_are_kept(self):
+        log = QueryLog(max_entries=3)
+        for index in range(5):
+            log.append(f"SELECT {index}")
+
+        assert len(log) == 5
+        assert list(log) == ["SELECT 2", "SELECT 3", "SELECT 4"]
+        assert log[-1] == "SELECT 4"
+
+    def test_a_slice_from_a_previous_length_returns_what_was_appended_since(self):
+        log = QueryLog(max_entries=3)
+        log.append("SELECT 1")
+        logged = len(log)
+
+        for index in range(2, 6):
+            log.append(f"SELECT {index}")
+
+        assert log[logged:] == ["SELECT 3", "SELECT 4", "SELECT 5"]
+
+    def test_subscribers_get_the_appended_entries_in_one_batch(self):
+        log = QueryLog(flush_interval=60)
+        batches = []
+        log.subscribe(batches.append)
+
+        log.append("SELECT 1")
+        log.append("SELECT\n2")
+        log.flush()
+
+        assert batches == [["SELECT 1", "SELECT 2"]]
+
+    def test_subscribers_are_called_from_the_timer_thread(self):
+        log = QueryLog(flush_interval=0.01)
+        flushed = threading.Event()
+        threads = []
+
+        def on_entries(entries):
+            threads.append(threading.current_thread())
+            flushed.set()
+
+        log.subscribe(on_entries)
+        log.append("SELECT 1")
+
+        assert flushed.wait(5)
+        assert threads == [threads[0]] and threads[0] is not threading.current_thread()
+
+    def test_unsubscribed_callbacks_are_not_called(self):
+        log = QueryLog(flush_interval=60)
+        batches = []
+
+        def on_entries(entries):
+            batches.append(entries)
+
+        log.subscribe(on_entries)
+        log.unsubscribe(on_entries)
+
+        log.append("SELECT 1")
+        log.flush()
+
+        assert batches == []
+
+    def test_normalise_query(self):
+        assert normalise_query("  SELECT\t1\n\n") == "SELECT 1"
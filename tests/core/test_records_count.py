@@ -0,0 +1,30 @@
+from structures.engines.records_count import RecordsCount, RecordsCountCache
+
+
+class TestRecordsCountCache:
+    def test_an_estimate_does_not_replace_an_exact_count(self):
+        counts = RecordsCountCache()
+
+        counts.store("orders", RecordsCount(1000, is_exact=True), counts.generation)
+        counts.store("orders", RecordsCount(990, is_exact=False), counts.generation)
+
+        assert counts.get("orders") == RecordsCount(1000, is_exact=True)
+
+    def test_an_exact_count_replaces_an_estimate(self):
+        counts = RecordsCountCache()
+
+        counts.store("orders", RecordsCount(990, is_exact=False), counts.generation)
+        counts.store("orders", RecordsCount(1000, is_exact=True), counts.generation)
+
+        assert counts.get("orders") == RecordsCount(1000, is_exact=True)
+
+    def test_a_count_started_before_a_write_is_not_kept(self):
+        counts = RecordsCountCache()
+        counts.store("orders", RecordsCount(1000, is_exact=True), counts.generation)
+
+        generation = counts.generation
+        counts.invalidate()
+        counts.store("customers", RecordsCount(50, is_exact=True), generation)
+
+        assert counts.get("orders") is None
+        assert counts.get("customers") is None
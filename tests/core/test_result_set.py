@@ -0,0 +1,51 @@
+import datetime
+import decimal
+
+import pytest
+
+from helpers.result_set import ColumnarResultSet
+
+
+class TestColumnarResultSet:
+    def test_dict_and_sequence_rows_read_back_as_tuples(self):
+        result = ColumnarResultSet(["id", "name", "score", "active"])
+        result.extend([
+            {"id": 1, "name": "alice", "score": 1.5, "active": True},
+            {"id": 2, "name": None, "score": None, "active": False},
+        ])
+        result.extend([(3, "carol", 2.25, None)])
+
+        assert len(result) == 3
+        assert list(result) == [
+            (1, "alice", 1.5, True),
+            (2, None, None, False),
+            (3, "carol", 2.25, None),
+        ]
+        assert result[-1] == (3, "carol", 2.25, None)
+        assert result.get(1, 3) is False
+
+    def test_leading_nulls_are_kept_when_the_column_type_is_chosen(self):
+        result = ColumnarResultSet(["value"])
+        result.extend([(None,), (None,), (7,)])
+
+        assert [row[0] for row in result] == [None, None, 7]
+
+    def test_values_that_do_not_fit_the_typed_array_are_preserved(self):
+        result = ColumnarResultSet(["value"])
+        values = [1, 2 ** 70, "three", decimal.Decimal("4.5"), datetime.date(2024, 1, 2), None]
+        result.extend([(value,) for value in values])
+
+        assert [row[0] for row in result] == values
+
+    def test_repeated_strings_are_shared(self):
+        result = ColumnarResultSet(["kind"])
+        result.extend([("".join(["ki", "nd"]),) for _ in range(3)])
+
+        assert result.get(0, 0) is result.get(2, 0)
+
+    def test_out_of_range_row_raises(self):
+        result = ColumnarResultSet(["value"])
+        result.extend([(1,)])
+
+        with pytest.raises(IndexError):
+            result[1]
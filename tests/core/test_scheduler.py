@@ -0,0 +1,85 @@
+import threading
+
+from helpers.scheduler import BackgroundScheduler, TaskPriority, current_task
+
+
+def _blocked(scheduler: BackgroundScheduler) -> threading.Event:
+    """Occupy the only worker of ``scheduler`` until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    scheduler.submit(TaskPriority.QUERY, block)
+    assert started.wait(5)
+    return release
+
+
+class TestBackgroundScheduler:
+    def test_tasks_run_by_priority_then_submission_order(self):
+        scheduler = BackgroundScheduler(max_workers=1)
+        release = _blocked(scheduler)
+        order = []
+
+        tasks = [
+            scheduler.submit(TaskPriority.PREFETCH, order.append, "prefetch"),
+            scheduler.submit(TaskPriority.COUNT, order.append, "count"),
+            scheduler.submit(TaskPriority.RECORDS, order.append, "records"),
+            scheduler.submit(TaskPriority.QUERY, order.append, "query 1"),
+            scheduler.submit(TaskPriority.QUERY, order.append, "query 2"),
+        ]
+        release.set()
+
+        assert all(task.wait(5) for task in tasks)
+        assert order == ["query 1", "query 2", "records", "count", "prefetch"]
+
+    def test_a_queued_task_is_replaced_by_a_newer_one_with_its_key(self):
+        scheduler = BackgroundScheduler(max_workers=1)
+        release = _blocked(scheduler)
+        counted = []
+
+        first = scheduler.submit(TaskPriority.COUNT, counted.append, "orders", key="count")
+        second = scheduler.submit(TaskPriority.COUNT, counted.append, "customers", key="count")
+        release.set()
+
+        assert second.wait(5)
+        assert first.is_cancelled and first.is_done
+        assert counted == ["customers"]
+
+    def test_a_running_task_is_cancelled_through_its_handler(self):
+        scheduler = BackgroundScheduler()
+        interrupted = threading.Event()
+        running = threading.Event()
+
+        def count():
+            current_task().set_cancel_handler(interrupted.set)
+            running.set()
+            interrupted.wait(5)
+
+        first = scheduler.submit(TaskPriority.COUNT, count, key="count", cancel_running=True)
+        assert running.wait(5)
+        second = scheduler.submit(TaskPriority.COUNT, lambda: None, key="count", cancel_running=True)
+
+        assert first.wait(5) and second.wait(5)
+        assert first.is_cancelled
+        assert interrupted.is_set()
+
+    def test_at_most_max_workers_tasks_run_at_once(self):
+        scheduler = BackgroundScheduler(max_workers=2)
+        lock = threading.Lock()
+        release = threading.Event()
+        running, peak = [0], [0]
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            release.wait(0.05)
+            with lock:
+                running[0] -= 1
+
+        tasks = [scheduler.submit(TaskPriority.RECORDS, work) for _ in range(6)]
+
+        assert all(task.wait(5) for task in tasks)
+        assert peak[0] == 2
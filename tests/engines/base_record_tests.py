@@ -1,5 +1,8 @@
 import pytest
 
+from structures.engines.context import RecordsSeek
+from structures.engines.records_batch import RecordsBatch
+
 
 class BaseRecordTests:
     
@@ -54,3 +57,69 @@ class BaseRecordTests:
         assert len(table.records.get_value()) == 0
 
         table.drop()
+
+    def test_records_keyset_pagination(self, session, database, create_users_table):
+        table = create_users_table(database, session)
+        for index in range(7):
+            session.context.build_empty_record(table, values={"name": f"User {index}"}).insert()
+
+        key_columns = tuple(table.get_seek_columns())
+        assert key_columns == ("id",)
+
+        context = session.context
+        first_page = context.get_records_page(table, RecordsSeek(key_columns), limit=3)
+        second_page = context.get_records_page(table, RecordsSeek(key_columns, after=(first_page[-1].values["id"],)), limit=3, first_id=3)
+        last_page = context.get_records_page(table, RecordsSeek(key_columns, from_end=True), limit=1, first_id=6)
+        previous_page = context.get_records_page(table, RecordsSeek(key_columns, before=(second_page[0].values["id"],)), limit=3)
+
+        assert [record.values["name"] for record in first_page] == ["User 0", "User 1", "User 2"]
+        assert [record.values["name"] for record in second_page] == ["User 3", "User 4", "User 5"]
+        assert [record.id for record in second_page] == [3, 4, 5]
+        assert [record.values["name"] for record in last_page] == ["User 6"]
+        assert [record.values["name"] for record in previous_page] == ["User 0", "User 1", "User 2"]
+
+        table.drop()
+
+    def test_records_batch_inserts_updates_and_deletes(self, session, database, create_users_table):
+        table = create_users_table(database, session)
+        table.load_records()
+
+        new_records = [session.context.build_empty_record(table, values={"name": f"User {index}"}) for index in range(5)]
+        assert RecordsBatch.save_records(new_records) == []
+
+        table.load_records()
+        records = sorted(table.records.get_value(), key=lambda record: record.values["id"])
+        assert [record.values["name"] for record in records] == [f"User {index}" for index in range(5)]
+
+        records[1].values["name"] = "Renamed 1"
+        records[3].values["name"] = "Renamed 3"
+        assert RecordsBatch.save_records([records[1], records[3]]) == []
+
+        assert RecordsBatch(table).delete([records[0], records[4]]) == []
+
+        table.load_records()
+        names = [record.values["name"] for record in sorted(table.records.get_value(), key=lambda record: record.values["id"])]
+        assert names == ["Renamed 1", "User 2", "Renamed 3"]
+
+        table.drop()
+
+    def test_records_batch_reports_the_failing_row_and_keeps_the_others(self, session, database, create_users_table):
+        table = create_users_table(database, session)
+        session.context.build_empty_record(table, values={"id": 1, "name": "Taken"}).insert()
+
+        duplicate = session.context.build_empty_record(table, values={"id": 1, "name": "Duplicate"})
+        new_records = [
+            session.context.build_empty_record(table, values={"id": 2, "name": "Second"}),
+            duplicate,
+            session.context.build_empty_record(table, values={"id": 3, "name": "Third"}),
+        ]
+
+        errors = RecordsBatch.save_records(new_records)
+
+        assert [error.record for error in errors] == [duplicate]
+
+        table.load_records()
+        names = [record.values["name"] for record in sorted(table.records.get_value(), key=lambda record: record.values["id"])]
+        assert names == ["Taken", "Second", "Third"]
+
+        table.drop()
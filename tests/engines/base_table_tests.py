@@ -1,5 +1,8 @@
 import pytest
 
+from structures.engines.context import QUERY_LOGS
+from structures.engines.metadata_cache import MetadataCache
+
 
 class BaseTableTests:
     
@@ -17,6 +20,44 @@ class BaseTableTests:
         tables = database.tables.get_value()
         assert not any(t.name == "users" for t in tables)
 
+    def test_tables_schema_bulk_load_matches_per_table_queries(self, session, database, create_users_table):
+        table = create_users_table(database, session)
+        database.tables.refresh()
+        table = next(t for t in database.tables.get_value() if t.name == "users")
+
+        session.context.load_tables_schema(database)
+
+        assert table.columns.is_loaded and table.indexes.is_loaded and table.foreign_keys.is_loaded
+        assert [column.name for column in table.columns] == [column.name for column in session.context.get_columns(table)]
+        assert [(index.name, index.columns) for index in table.indexes] == [
+            (index.name, index.columns) for index in session.context.get_indexes(table)
+        ]
+
+        table.drop()
+
+    def test_tables_schema_is_served_from_the_metadata_cache(self, session, database, create_users_table, tmp_path):
+        if not session.context.table_schema_builders():
+            pytest.skip("engine metadata is not cached")
+
+        create_users_table(database, session)
+        session.context.metadata_cache = MetadataCache(tmp_path / "metadata_cache.sqlite")
+        try:
+            database.tables.refresh()
+            session.context.load_tables_schema(database)
+            expected = [column.name for column in next(t for t in database.tables if t.name == "users").columns]
+
+            database.tables.refresh()
+            table = next(t for t in database.tables.get_value() if t.name == "users")
+            logged = len(QUERY_LOGS)
+            session.context.load_tables_schema(database)
+
+            assert [column.name for column in table.columns] == expected
+            assert not any("get_tables_schema" in entry for entry in QUERY_LOGS[logged:])
+        finally:
+            session.context.metadata_cache = None
+
+        table.drop()
+
     def test_table_truncate(self, session, database, create_users_table):
         table = create_users_table(database, session)
         table.load_records()
@@ -1,3 +1,5 @@
+import time
+
 import pymysql
 import pytest
 
@@ -101,3 +103,17 @@ class TestMariaDBContext:
         assert len(databases) > 0
         db_names = [db.name for db in databases]
         assert "information_schema" in db_names
+
+    def test_context_closing_a_result_stream_leaves_its_rows_unread(self, mariadb_session):
+        ctx = mariadb_session.context
+        cursor = ctx.open_result_stream(
+            "SELECT a.ORDINAL_POSITION FROM information_schema.COLUMNS a, information_schema.COLUMNS b, information_schema.COLUMNS c"
+        )
+        assert len(cursor.fetchmany(10)) == 10
+
+        started = time.perf_counter()
+        ctx.close_result_stream(cursor)
+        assert time.perf_counter() - started < 10
+
+        ctx.execute("SELECT 1 AS val")
+        assert ctx.fetchone()["val"] == 1
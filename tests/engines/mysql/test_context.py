@@ -1,3 +1,5 @@
+import time
+
 import pymysql
 import pytest
 
@@ -95,9 +97,35 @@ class TestMySQLContext:
 
         ctx.execute(f"DROP TABLE {db_name}.test_tx")
 
+    def test_context_table_fingerprint_changes_with_an_instant_alter(self, mysql_session, mysql_database):
+        ctx = mysql_session.context
+        db_name = mysql_database.name
+
+        ctx.execute(f"CREATE TABLE {db_name}.test_fingerprint (id INT PRIMARY KEY)")
+        before = ctx.get_tables_fingerprints(mysql_database)["test_fingerprint"]
+
+        ctx.execute(f"ALTER TABLE {db_name}.test_fingerprint ADD COLUMN name VARCHAR(50), ALGORITHM=INSTANT")
+        assert ctx.get_tables_fingerprints(mysql_database)["test_fingerprint"] != before
+
+        ctx.execute(f"DROP TABLE {db_name}.test_fingerprint")
+
     def test_context_databases_list(self, mysql_session):
         ctx = mysql_session.context
         databases = ctx.databases.get_value()
         assert len(databases) > 0
         db_names = [db.name for db in databases]
         assert "information_schema" in db_names
+
+    def test_context_closing_a_result_stream_leaves_its_rows_unread(self, mysql_session):
+        ctx = mysql_session.context
+        cursor = ctx.open_result_stream(
+            "SELECT a.ORDINAL_POSITION FROM information_schema.COLUMNS a, information_schema.COLUMNS b, information_schema.COLUMNS c"
+        )
+        assert len(cursor.fetchmany(10)) == 10
+
+        started = time.perf_counter()
+        ctx.close_result_stream(cursor)
+        assert time.perf_counter() - started < 10
+
+        ctx.execute("SELECT 1 AS val")
+        assert ctx.fetchone()["val"] == 1
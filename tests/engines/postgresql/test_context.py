@@ -1,3 +1,4 @@
+import psycopg2.extensions
 import pytest
 
 
@@ -70,3 +71,55 @@ class TestPostgreSQLContext:
         """Test functions are loaded from server."""
         ctx = postgresql_session.context
         assert len(ctx.FUNCTIONS) > 0
+
+    def test_context_repeated_parameterised_query_is_prepared(self, postgresql_session):
+        """Test a parameterised query seen twice runs as a server-side prepared statement."""
+        ctx = postgresql_session.context
+        query = "SELECT %s::int + 1 AS val, '100%%' AS pct"
+
+        for value in (1, 2, 3):
+            ctx.execute(query, [value])
+            result = ctx.fetchone()
+            assert result["val"] == value + 1
+            assert result["pct"] == "100%"
+
+        ctx.execute("SELECT count(*) AS prepared FROM pg_prepared_statements WHERE statement LIKE %s", ["%$1::int + 1%"])
+        assert ctx.fetchone()["prepared"] == 1
+
+    def test_context_deallocated_statement_is_prepared_again(self, postgresql_session):
+        """Test a prepared statement dropped by DEALLOCATE ALL is run again unprepared."""
+        ctx = postgresql_session.context
+        query = "SELECT %s::int * 2 AS val"
+
+        ctx.execute(query, [1])
+        ctx.execute(query, [2])
+        ctx.execute("DEALLOCATE ALL")
+
+        ctx.execute(query, [3])
+        assert ctx.fetchone()["val"] == 6
+
+    def test_context_result_stream_runs_in_its_own_transaction(self, postgresql_session):
+        """Test a streamed result reads a cursor without hold, in a transaction ended when it is closed."""
+        ctx = postgresql_session.context
+
+        cursor = ctx.open_result_stream("SELECT generate_series(1, 10) AS val")
+        assert [row["val"] for row in cursor.fetchmany(3)] == [1, 2, 3]
+
+        ctx.execute("SELECT is_holdable FROM pg_cursors WHERE name = %s", [cursor.name])
+        assert ctx.fetchone()["is_holdable"] is False
+
+        ctx.close_result_stream(cursor)
+        assert ctx._connection.autocommit is True
+        assert ctx._connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def test_context_locking_and_into_queries_run_on_a_plain_cursor(self, postgresql_session):
+        """Test statements a cursor cannot DECLARE are not streamed."""
+        ctx = postgresql_session.context
+        ctx.execute("CREATE TEMPORARY TABLE stream_locks (id int)")
+
+        for query in ("SELECT id FROM stream_locks FOR UPDATE", "SELECT id INTO TEMPORARY stream_copy FROM stream_locks"):
+            cursor = ctx.open_result_stream(query)
+            assert cursor.name is None
+            ctx.close_result_stream(cursor)
+
+        ctx.execute("DROP TABLE stream_locks, stream_copy")
@@ -65,6 +65,29 @@ def sqlite_session():
     session.disconnect()
 
 
+@pytest.fixture
+def sqlite_file_sessions(tmp_path):
+    """Connect sessions to SQLite files of their own in ``tmp_path``, disconnected after the test."""
+    sessions = []
+
+    def _connect(name: str = "session") -> Session:
+        session = Session(Connection(id=1, name=name, engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=str(tmp_path / f"{name}.db"))))
+        session.connect()
+        sessions.append(session)
+        return session
+
+    yield _connect
+
+    for session in sessions:
+        session.disconnect()
+
+
+@pytest.fixture
+def sqlite_file_session(sqlite_file_sessions):
+    """A session connected to ``session.db`` in ``tmp_path``, for what an in-memory database cannot show."""
+    return sqlite_file_sessions()
+
+
 @pytest.fixture(scope="module")
 def sqlite_database(sqlite_session):
     # Use the database from context which has proper handlers configured
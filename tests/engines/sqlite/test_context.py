@@ -1,8 +1,19 @@
+import gzip
 import pathlib
+import sqlite3
+import threading
+
+from unittest.mock import Mock
+
+import pytest
 
 from structures.session import Session
 from structures.connection import Connection, ConnectionEngine
 from structures.configurations import SourceConfiguration
+from structures.engines.context import QUERY_LOGS, RecordsSeek
+from structures.engines.dump import DumpCompression
+from structures.engines.records_count import RecordsCount
+from structures.engines.restore import RestoreError, restore_database_dump
 
 
 class TestSQLiteContext:
@@ -92,6 +103,208 @@ class TestSQLiteContext:
         with ctx.transaction() as transaction:
             transaction.execute("DROP TABLE test_tx")
 
+    def test_cancel_running_query_keeps_connection_usable(self, sqlite_session):
+        ctx = sqlite_session.context
+        endless_query = "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq) SELECT COUNT(*) FROM seq"
+
+        timer = threading.Timer(0.2, ctx.cancel_running_query)
+        timer.start()
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+                ctx.execute(endless_query)
+        finally:
+            timer.cancel()
+
+        assert ctx.is_alive()
+        ctx.execute("SELECT 1 AS value")
+        assert ctx.fetchone()["value"] == 1
+
+    def test_first_table_schema_load_fills_every_table(self, sqlite_session):
+        ctx = sqlite_session.context
+        ctx.execute("CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+        ctx.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, author_id INTEGER REFERENCES authors (id), title TEXT)")
+        ctx.execute("CREATE INDEX idx_books_title ON books (title)")
+
+        database = ctx.get_databases()[0]
+        authors, books = sorted(database.tables.get_value(), key=lambda table: table.name)
+
+        assert [column.name for column in authors.columns] == ["id", "name"]
+
+        assert books.columns.is_loaded and books.indexes.is_loaded and books.foreign_keys.is_loaded
+        assert [column.name for column in books.columns] == ["id", "author_id", "title"]
+        assert [index.name for index in books.indexes] == ["PRIMARY KEY", "idx_books_title"]
+        assert [(fk.columns, fk.reference_table) for fk in books.foreign_keys] == [(["author_id"], "authors")]
+
+        # A later load of a bulk-loaded table is a refresh, read for that table alone.
+        ctx.execute("ALTER TABLE books ADD COLUMN isbn TEXT")
+        books.columns.refresh()
+        assert [column.name for column in books.columns] == ["id", "author_id", "title", "isbn"]
+
+    def test_sqlite_master_is_read_again_only_after_a_schema_change(self, sqlite_file_session, tmp_path):
+        ctx = sqlite_file_session.context
+        ctx.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT, CHECK (length(label) > 0))")
+        database = ctx.get_databases()[0]
+        items = database.tables.get_value()[0]
+
+        logged = len(QUERY_LOGS)
+        for _ in range(3):
+            ctx.get_columns(items)
+            ctx.get_indexes(items)
+        assert not any("sqlite_master ORDER BY" in entry for entry in QUERY_LOGS[logged:])
+        assert len(ctx.get_checks(items)) == 1
+
+        # DDL from another connection is noticed through PRAGMA schema_version.
+        other = sqlite3.connect(tmp_path / "session.db")
+        other.execute("ALTER TABLE items ADD COLUMN price REAL")
+        other.commit()
+        other.close()
+
+        assert [column.name for column in ctx.get_columns(items)] == ["id", "label", "price"]
+
+    def test_sqlite_master_is_not_shared_between_contexts(self, sqlite_file_sessions):
+        sessions = []
+        for name, columns in (("first", "id INTEGER, name TEXT"), ("second", "code TEXT")):
+            session = sqlite_file_sessions(name)
+            session.context.execute(f"CREATE TABLE shared_name ({columns})")
+            sessions.append(session)
+
+        first, second = (session.context.get_databases()[0].tables.get_value()[0] for session in sessions)
+
+        assert [column.name for column in first.columns] == ["id", "name"]
+        assert [column.name for column in second.columns] == ["code"]
+
+    def test_columns_are_read_from_pragma_table_xinfo(self, sqlite_file_session):
+        ctx = sqlite_file_session.context
+        ctx.execute("""
+            CREATE TABLE "order lines" (
+                "line id" INTEGER PRIMARY KEY AUTOINCREMENT,
+                [label] TEXT COLLATE NOCASE NOT NULL DEFAULT 'x', -- a comment, with a comma
+                untyped,
+                price DECIMAL(10, 2) CHECK (price >= 0),
+                total REAL GENERATED ALWAYS AS (price * (1 + 0.2)) STORED,
+                CONSTRAINT label_ck CHECK (length(label) > 0)
+            )
+        """)
+
+        database = ctx.get_databases()[0]
+        table = database.tables.get_value()[0]
+        columns = {column.name: column for column in ctx.get_columns(table)}
+
+        assert list(columns) == ["line id", "label", "untyped", "price", "total"]
+        assert columns["line id"].is_auto_increment
+        assert columns["label"].collation_name == "NOCASE"
+        assert not columns["label"].is_nullable and columns["label"].server_default == "'x'"
+        assert columns["untyped"].datatype.name == "UNKNOWN"
+        assert (columns["price"].numeric_precision, columns["price"].numeric_scale) == ("10", "2")
+        assert columns["price"].check == "price >= 0"
+        assert (columns["total"].virtuality, columns["total"].expression) == ("STORED", "price * (1 + 0.2)")
+        assert [(check.name, check.expression) for check in ctx.get_checks(table)] == [("label_ck", "length(label) > 0")]
+
+    def test_indexes_are_read_from_pragma_index_xinfo(self, sqlite_file_session):
+        ctx = sqlite_file_session.context
+        ctx.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT, email TEXT UNIQUE, score INTEGER)")
+        ctx.execute("CREATE INDEX idx_people_name_score ON people (name DESC, score)")
+        ctx.execute("CREATE INDEX idx_people_positive ON people (score) WHERE score > 0")
+        ctx.execute("CREATE INDEX idx_people_lower ON people (lower(name), email)")
+
+        table = ctx.get_databases()[0].tables.get_value()[0]
+        indexes = {index.name: index for index in ctx.get_indexes(table)}
+
+        assert indexes["PRIMARY KEY"].columns == ["id"]
+        assert indexes["sqlite_autoindex_people_1"].columns == ["email"]
+        assert indexes["idx_people_name_score"].columns == ["name", "score"]
+        assert (indexes["idx_people_positive"].columns, indexes["idx_people_positive"].condition) == (["score"], "score > 0")
+        assert indexes["idx_people_lower"].columns == ["lower(name)", "email"]
+
+    def test_records_page_seeks_past_a_binary_key(self, sqlite_file_session):
+        ctx = sqlite_file_session.context
+        ctx.execute("CREATE TABLE blobs (id BLOB PRIMARY KEY, label TEXT)")
+        ctx.executemany("INSERT INTO blobs (id, label) VALUES (?, ?)", [(b"\x00\x01", "first"), (b"\xde\xad", "it's"), (b"\xde\xae", "last")])
+
+        table = ctx.get_databases()[0].tables.get_value()[0]
+        page = ctx.get_records_page(table, RecordsSeek(("id",), after=(b"\x00\x01",)), filters="label LIKE '%'", limit=10)
+
+        assert [record.values["id"] for record in page] == [b"\xde\xad", b"\xde\xae"]
+
+    def test_records_are_counted_exactly_or_estimated_from_sqlite_stat1(self, sqlite_file_session):
+        ctx = sqlite_file_session.context
+        ctx.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT)")
+        ctx.execute("CREATE INDEX idx_events_kind ON events (kind)")
+        ctx.execute(
+            "WITH RECURSIVE n(value) AS (SELECT 1 UNION ALL SELECT value + 1 FROM n WHERE value < 250) "
+            "INSERT INTO events (kind) SELECT CASE value % 2 WHEN 0 THEN 'even' ELSE 'odd' END FROM n"
+        )
+
+        table = ctx.get_databases()[0].tables.get_value()[0]
+
+        assert ctx.count_records(table) == 250
+        assert ctx.count_records(table, "kind = 'odd'") == 125
+        # No statistics before ANALYZE, and never a planner estimate for a filter.
+        assert ctx.estimate_records_count(table) is None
+
+        ctx.execute("ANALYZE")
+
+        assert ctx.estimate_records_count(table) == 250
+        assert ctx.estimate_records_count(table, "kind = 'odd'") is None
+
+    def test_a_count_past_its_timeout_is_interrupted(self, sqlite_file_session):
+        ctx = sqlite_file_session.context
+        ctx.execute("CREATE TABLE numbers (value INTEGER)")
+        table = ctx.get_databases()[0].tables.get_value()[0]
+
+        # A filter that runs a long recursive query for every row it looks at.
+        ctx.execute("INSERT INTO numbers VALUES (1)")
+        slow_filter = "(WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) SELECT COUNT(*) FROM n) > 0"
+
+        with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+            ctx.count_records(table, slow_filter, timeout=0.05)
+
+        # The handler is gone once the count gave up.
+        assert ctx.count_records(table) == 1
+
+    def test_a_write_forgets_the_cached_counts(self, sqlite_file_session):
+        counts = sqlite_file_session.records_counts
+        sqlite_file_session.context.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+
+        generation = counts.generation
+        counts.store("items", RecordsCount(0, is_exact=True), generation)
+        sqlite_file_session.context.execute("SELECT COUNT(*) FROM items")
+        sqlite_file_session.context.fetchone()
+        assert counts.get("items") == RecordsCount(0, is_exact=True)
+
+        with sqlite_file_session.pool.borrow() as worker:
+            worker.execute("INSERT INTO items DEFAULT VALUES")
+
+        assert counts.get("items") is None
+        assert counts.generation > generation
+
+    def test_tables_schema_is_prefetched_on_a_worker_connection(self, sqlite_file_session):
+        ctx = sqlite_file_session.context
+        ctx.execute("CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT)")
+        ctx.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, author_id INTEGER REFERENCES authors (id))")
+        database = ctx.get_databases()[0]
+        authors, books = sorted(database.tables.get_value(), key=lambda table: table.name)
+
+        handed_over = []
+        task = ctx.prefetch_tables_schema(database, lambda context, db, tables, schemas: handed_over.append((tables, schemas)), first=[books])
+        assert task is not None and task.wait(10)
+
+        # The tables referenced first come in a batch of their own, and nothing is filled before it is applied.
+        assert [[table.name for table in tables] for tables, _schemas in handed_over] == [["books"], ["authors"]]
+        assert ctx.is_prefetching(books) and not books.columns.is_loaded
+
+        logged = len(QUERY_LOGS)
+        for tables, schemas in handed_over:
+            ctx.apply_tables_schema(database, tables, schemas)
+
+        assert not ctx.is_prefetching(books)
+        assert [column.name for column in books.columns] == ["id", "author_id"]
+        assert [(fk.columns, fk.reference_table) for fk in books.foreign_keys] == [(["author_id"], "authors")]
+        assert [column.name for column in authors.columns] == ["id", "name"]
+        assert QUERY_LOGS[logged:] == []
+
+        assert ctx.prefetch_tables_schema(database, lambda *args: None) is None
+
     def test_context_get_server_version(self, sqlite_session):
         """Test getting server version."""
         version = sqlite_session.context.get_server_version()
@@ -128,3 +341,141 @@ class TestSQLiteContext:
         assert "INSERT INTO" in content
 
         dump_path.unlink(missing_ok=True)
+
+    def test_database_dump_streams_records_with_progress(self, sqlite_session, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        ctx = sqlite_session.context
+        database = ctx.get_databases()[0]
+
+        with ctx.transaction() as transaction:
+            transaction.execute("CREATE TABLE dump_events (id INTEGER PRIMARY KEY, label TEXT)")
+            for index in range(25):
+                transaction.execute(f"INSERT INTO dump_events (id, label) VALUES ({index}, 'event {index}')")
+
+        database.tables.refresh()
+        progress_events = []
+        dump_path = pathlib.Path(database.dump(batch_size=10, extended_insert=False, on_progress=progress_events.append))
+        content = dump_path.read_text(encoding="utf-8")
+
+        table_events = [event for event in progress_events if event.table_name == "dump_events"]
+        assert [event.rows_dumped for event in table_events] == [10, 20, 25, 25]
+        assert table_events[-1].completed
+        assert content.count("INSERT INTO dump_events") == 25
+        assert content.index("VALUES (0, 'event 0')") < content.index("VALUES (24, 'event 24')")
+
+    def test_database_dump_extended_insert(self, sqlite_session, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        ctx = sqlite_session.context
+        database = ctx.get_databases()[0]
+
+        with ctx.transaction() as transaction:
+            transaction.execute("CREATE TABLE dump_metrics (id INTEGER PRIMARY KEY, value INTEGER)")
+            for index in range(50):
+                transaction.execute(f"INSERT INTO dump_metrics (id, value) VALUES ({index}, {index * 10})")
+
+        database.tables.refresh()
+        dump_path = pathlib.Path(database.dump(include_schema=False))
+        content = dump_path.read_text(encoding="utf-8")
+
+        assert content.count("INSERT INTO dump_metrics") == 1
+        assert "BEGIN;" in content and "COMMIT;" in content
+        assert "FOREIGN_KEY_CHECKS" not in content
+
+        dump_path = pathlib.Path(database.dump(include_schema=False, max_statement_bytes=200))
+        content = dump_path.read_text(encoding="utf-8")
+
+        statements = [statement for statement in content.split(";\n") if "INSERT INTO dump_metrics" in statement]
+        assert len(statements) > 1
+        assert sum(statement.count("(") - 1 for statement in statements) == 50
+
+    def test_database_dump_parallel_matches_sequential(self, sqlite_file_session, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        ctx = sqlite_file_session.context
+        with ctx.transaction() as transaction:
+            for table_index in range(4):
+                transaction.execute(f"CREATE TABLE chunk_{table_index} (id INTEGER PRIMARY KEY, label TEXT)")
+                for row_index in range(20):
+                    transaction.execute(f"INSERT INTO chunk_{table_index} (id, label) VALUES ({row_index}, 'row {row_index}')")
+
+        database = ctx.get_databases()[0]
+        sequential_path = pathlib.Path(database.dump(include_schema=False))
+        # The snapshot transaction belongs to a worker: the UI keeps using the shared context meanwhile.
+        monkeypatch.setattr(ctx, "export_snapshot", Mock(side_effect=AssertionError("snapshot exported from the shared context")))
+        parallel_path = pathlib.Path(database.dump(include_schema=False, workers=3))
+
+        sequential_records = sequential_path.read_text(encoding="utf-8").split("\n", 1)[1]
+        parallel_records = parallel_path.read_text(encoding="utf-8").split("\n", 1)[1]
+
+        assert parallel_records == sequential_records
+        assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+            ["session.db", sequential_path.name, parallel_path.name]
+        )
+
+    def test_database_dump_gzip_compression(self, sqlite_session, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        ctx = sqlite_session.context
+        database = ctx.get_databases()[0]
+
+        with ctx.transaction() as transaction:
+            transaction.execute("CREATE TABLE dump_logs (id INTEGER PRIMARY KEY, message TEXT)")
+            for index in range(100):
+                transaction.execute(f"INSERT INTO dump_logs (id, message) VALUES ({index}, 'repeated message')")
+
+        database.tables.refresh()
+        progress_events = []
+        dump_path = pathlib.Path(database.dump(compression=DumpCompression.GZIP, on_progress=progress_events.append))
+
+        with gzip.open(dump_path, "rt", encoding="utf-8") as handle:
+            content = handle.read()
+
+        assert dump_path.name.endswith(".sql.gz")
+        assert "This backup was created by PeterSQL" in content
+        assert "INSERT INTO dump_logs" in content
+        assert dump_path.stat().st_size < len(content.encode("utf-8"))
+        assert progress_events[-1].bytes_written > progress_events[-1].bytes_stored > 0
+
+    def test_database_restore_from_compressed_dump(self, sqlite_file_session, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        ctx = sqlite_file_session.context
+        with ctx.transaction() as transaction:
+            transaction.execute("CREATE TABLE restore_items (id INTEGER PRIMARY KEY, label TEXT)")
+            transaction.execute("CREATE TABLE restore_audit (item_id INTEGER)")
+            transaction.execute(
+                "CREATE TRIGGER restore_items_audit AFTER INSERT ON restore_items "
+                "BEGIN INSERT INTO restore_audit (item_id) VALUES (NEW.id); END"
+            )
+            for index in range(30):
+                transaction.execute(f"INSERT INTO restore_items (id, label) VALUES ({index}, 'it''s; item {index}')")
+
+        database = ctx.get_databases()[0]
+        dump_path = database.dump(compression=DumpCompression.GZIP)
+
+        ctx.execute("DROP TABLE restore_items")
+        ctx.execute("DROP TABLE restore_audit")
+
+        progress_events = []
+        summary = restore_database_dump(database, dump_path, batch_size=10, on_progress=progress_events.append)
+
+        ctx.execute("SELECT id, label FROM restore_items ORDER BY id")
+        assert [(row["id"], row["label"]) for row in ctx.fetchall()] == [(index, f"it's; item {index}") for index in range(30)]
+
+        assert summary.completed
+        assert summary.bytes_read == summary.total_bytes
+        # Two tables, the trigger and an extended INSERT per table; the dump's BEGIN and COMMIT are not run.
+        assert summary.statements_executed == 5
+        assert len(progress_events) > 1
+
+    def test_database_restore_skips_create_database_unless_asked(self, sqlite_file_session, tmp_path):
+        ctx = sqlite_file_session.context
+        database = ctx.get_databases()[0]
+        dump_path = tmp_path / "existing.sql"
+        dump_path.write_text("CREATE DATABASE main;\nCREATE TABLE restored (id INTEGER);\nINSERT INTO restored (id) VALUES (1), (2);\n", encoding="utf-8")
+
+        summary = restore_database_dump(database, str(dump_path))
+
+        assert summary.statements_executed == 2
+        ctx.execute("SELECT id FROM restored ORDER BY id")
+        assert [row["id"] for row in ctx.fetchall()] == [1, 2]
+
+        with pytest.raises(RestoreError, match="Statement #1 failed"):
+            restore_database_dump(database, str(dump_path), create_database=True)
@@ -1,5 +1,4 @@
 import sqlite3
-import threading
 from unittest.mock import Mock, patch
 
 import psycopg2
@@ -7,6 +6,8 @@ import pymysql
 
 import pytest
 
+from helpers.scheduler import ScheduledTask
+
 from structures.engines.context import ConnectionLostError, AbstractContext
 from structures.connection import Connection, ConnectionEngine
 from structures.configurations import CredentialsConfiguration, SourceConfiguration
@@ -75,6 +76,7 @@ def test_pymysql_operational_error_non_disconnect_not_connection_lost():
 # ---------------------------------------------------------------------------
 # execute() integration with the detection logic
 # ---------------------------------------------------------------------------
+# execute() runs its query through _execute_on_cursor(), which a Mock context would stub out.
 
 def test_execute_raises_connection_lost_for_sqlite_disk_io():
     config = SourceConfiguration(filename=":memory:")
@@ -92,7 +94,7 @@ def test_execute_raises_connection_lost_for_sqlite_disk_io():
     context.cursor.execute.side_effect = sqlite3.OperationalError("disk I/O error")
 
     with pytest.raises(ConnectionLostError):
-        AbstractContext.execute(context, "SELECT 1")
+        AbstractContext._execute_on_cursor(context, context.cursor, "SELECT 1")
 
 
 def test_execute_reraises_non_connection_error():
@@ -112,7 +114,7 @@ def test_execute_reraises_non_connection_error():
     context._is_connection_lost = Mock(return_value=False)
 
     with pytest.raises(ValueError, match="syntax error"):
-        AbstractContext.execute(context, "SELECT 1")
+        AbstractContext._execute_on_cursor(context, context.cursor, "SELECT 1")
 
 
 def test_execute_reraises_pymysql_ordinary_operational_error():
@@ -135,7 +137,7 @@ def test_execute_reraises_pymysql_ordinary_operational_error():
     context._is_connection_lost = AbstractContext._is_connection_lost
 
     with pytest.raises(pymysql.err.OperationalError):
-        AbstractContext.execute(context, "SELECT 1")
+        AbstractContext._execute_on_cursor(context, context.cursor, "SELECT 1")
 
 
 def test_global_connection_lost_handler_is_invoked():
@@ -199,22 +201,22 @@ def test_global_connection_lost_handler_is_not_invoked_for_non_connection_error(
 # ---------------------------------------------------------------------------
 
 def test_executor_refuses_second_start_while_running():
-    """execute_statements() must return early if a worker thread is already alive,
+    """execute_statements() must return early if a worker task is still running,
     without mutating _cancel_requested or _loader_context."""
     from windows.main.query.executor import QueryExecutor
 
     fake_session = Mock()
     executor = QueryExecutor(fake_session)
 
-    # Simulate a running thread
-    alive_thread = Mock(spec=threading.Thread)
-    alive_thread.is_alive.return_value = True
-    executor._current_thread = alive_thread
+    # Simulate a running task
+    running_task = Mock(spec=ScheduledTask)
+    running_task.is_done = False
+    executor._current_task = running_task
 
     on_stmt = Mock()
     on_all = Mock()
 
-    # Should return without starting a new thread or touching loader state
+    # Should return without submitting a new task or touching loader state
     with patch("windows.main.query.executor.Loader") as mock_loader:
         executor.execute_statements(
             statements=[],
@@ -226,12 +228,13 @@ def test_executor_refuses_second_start_while_running():
     # Callbacks never called
     on_stmt.assert_not_called()
     on_all.assert_not_called()
-    # The existing thread reference is unchanged
-    assert executor._current_thread is alive_thread
+    # Nothing was submitted and the existing task reference is unchanged
+    fake_session.scheduler.submit.assert_not_called()
+    assert executor._current_task is running_task
 
 
-def test_executor_is_running_reflects_thread_state():
-    """is_running() returns True only when _current_thread is alive."""
+def test_executor_is_running_reflects_task_state():
+    """is_running() returns True only while _current_task is not done."""
     from windows.main.query.executor import QueryExecutor
 
     fake_session = Mock()
@@ -239,12 +242,12 @@ def test_executor_is_running_reflects_thread_state():
 
     assert executor.is_running() is False
 
-    dead_thread = Mock(spec=threading.Thread)
-    dead_thread.is_alive.return_value = False
-    executor._current_thread = dead_thread
+    done_task = Mock(spec=ScheduledTask)
+    done_task.is_done = True
+    executor._current_task = done_task
     assert executor.is_running() is False
 
-    alive_thread = Mock(spec=threading.Thread)
-    alive_thread.is_alive.return_value = True
-    executor._current_thread = alive_thread
+    running_task = Mock(spec=ScheduledTask)
+    running_task.is_done = False
+    executor._current_task = running_task
     assert executor.is_running() is True
@@ -0,0 +1,109 @@
+from unittest.mock import Mock, patch
+
+from structures.configurations import SourceConfiguration
+from structures.connection import Connection, ConnectionEngine
+from structures.session import Session
+
+from windows.main.query.executor import QueryExecutor
+from windows.main.query.parser import ParsedStatement
+
+
+def _statement(text: str) -> ParsedStatement:
+    return ParsedStatement(text=text, start_pos=0, end_pos=len(text), statement_index=0)
+
+
+def _create_numbers(context, count: int) -> None:
+    context.execute("CREATE TABLE numbers (value INTEGER)")
+    context.execute(
+        "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %d) "
+        "INSERT INTO numbers SELECT n FROM seq" % count
+    )
+
+
+def _stream(executor: QueryExecutor, context, text: str, keep_open: bool):
+    row_counts = []
+
+    def on_rows(result, row_count):
+        row_counts.append(row_count)
+
+    result, cursor = executor._execute_single(context, _statement(text))
+    with patch.object(executor, "_dispatch_statement_result", side_effect=lambda callback, *args: callback(*args)):
+        executor._stream_rows(context, cursor, result, on_rows, executor.row_limit, keep_open=keep_open)
+
+    return result, row_counts
+
+
+def test_result_rows_stop_at_row_limit(sqlite_session):
+    context = sqlite_session.context
+    _create_numbers(context, 100)
+
+    executor = QueryExecutor(Mock(), fetch_size=10, row_limit=25)
+    result, row_counts = _stream(executor, context, "SELECT value FROM numbers ORDER BY value", keep_open=True)
+
+    assert result.first_row_ms is not None
+    assert [row[0] for row in result.rows] == list(range(1, 26))
+    assert row_counts == [20, 25, 25]
+    assert result.has_more_rows is True
+    assert executor.can_fetch_more(result)
+
+    executor._pending_stream = None
+
+
+def test_result_rows_are_all_fetched_below_row_limit(sqlite_session):
+    context = sqlite_session.context
+    _create_numbers(context, 12)
+
+    executor = QueryExecutor(Mock(), fetch_size=5, row_limit=1000)
+    result, _row_counts = _stream(executor, context, "SELECT value FROM numbers", keep_open=True)
+
+    assert len(result.rows) == 12
+    assert result.has_more_rows is False
+    assert not executor.can_fetch_more(result)
+
+
+def test_statement_without_result_set_reports_affected_rows(sqlite_session):
+    context = sqlite_session.context
+    _create_numbers(context, 3)
+
+    executor = QueryExecutor(Mock())
+    result, cursor = executor._execute_single(context, _statement("UPDATE numbers SET value = value + 1"))
+
+    assert cursor is None
+    assert result.success
+    assert result.columns is None
+    assert result.affected_rows == 3
+
+
+def test_worker_connection_is_not_returned_to_the_session_pool(tmp_path):
+    session = Session(Connection(id=1, name="pool", engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=str(tmp_path / "pool.db"))))
+    session.connect()
+    database = Mock()
+    database.name = "main"
+
+    try:
+        executor = QueryExecutor(session)
+        context = executor._acquire_worker_context(database)
+        executor._set_worker_context(context)
+        executor._clear_worker_context()
+
+        assert executor._acquire_worker_context(database) is not context
+        assert not context.is_connected
+        assert session.pool.size == 1
+    finally:
+        session.disconnect()
+
+
+def test_streamed_rows_are_handed_to_the_ui_without_waiting_for_it(sqlite_session):
+    context = sqlite_session.context
+    _create_numbers(context, 30)
+
+    executor = QueryExecutor(Mock(), fetch_size=10, row_limit=0)
+    result, cursor = executor._execute_single(context, _statement("SELECT value FROM numbers"))
+    on_rows = Mock()
+
+    # Nothing runs the posted calls: the worker must not wait for them.
+    with patch("windows.main.query.executor.wx.CallAfter") as call_after:
+        executor._stream_rows(context, cursor, result, on_rows, executor.row_limit, keep_open=False)
+
+    assert [call.args[2] for call in call_after.call_args_list] == [20, 30, 30, 30]
+    on_rows.assert_not_called()
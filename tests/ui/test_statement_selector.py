@@ -0,0 +1,126 @@
+import random
+
+from unittest.mock import Mock, patch
+
+import wx.stc
+
+from windows.main.query import parser
+from windows.main.query.parser import StatementSelector
+
+
+class _Editor:
+    """The part of a StyledTextCtrl the selector uses, positions counted in UTF-8 bytes like Scintilla."""
+
+    def __init__(self, text: str = ""):
+        self.data = text.encode()
+        self.caret = 0
+        self.on_modified = None
+
+    def Bind(self, event, handler):
+        self.on_modified = handler
+
+    def GetText(self) -> str:
+        return self.data.decode()
+
+    def GetCurrentPos(self) -> int:
+        return self.caret
+
+    def GetSelectionStart(self) -> int:
+        return self.caret
+
+    def GetSelectionEnd(self) -> int:
+        return self.caret
+
+    def insert(self, position: int, text: str) -> None:
+        self.data = self.data[:position] + text.encode() + self.data[position:]
+        self._notify(wx.stc.STC_MOD_INSERTTEXT, position, text)
+
+    def delete(self, position: int, length: int) -> None:
+        removed = self.data[position:position + length].decode()
+        self.data = self.data[:position] + self.data[position + length:]
+        self._notify(wx.stc.STC_MOD_DELETETEXT, position, removed)
+
+    def _notify(self, modification: int, position: int, text: str) -> None:
+        event = Mock()
+        event.GetModificationType.return_value = modification
+        event.GetPosition.return_value = position
+        event.GetText.return_value = text
+        self.on_modified(event)
+
+
+def test_edits_after_non_ascii_text_keep_the_index_in_sync():
+    editor = _Editor()
+    selector = StatementSelector(editor)
+
+    editor.insert(0, "SELECT 'crème brûlée';\nSELECT 2;")
+    editor.insert(len("SELECT 'crème brûlée';\nSELECT 2".encode()), " + 1")
+    editor.delete(len("SELECT 'crème ".encode()), len("brûlée".encode()))
+
+    assert selector.statement_index.text == editor.GetText()
+    assert [statement.text for statement in selector.get_statements()] == ["SELECT 'crème '", "SELECT 2 + 1"]
+
+
+def test_statement_at_caret_is_found_from_byte_positions():
+    editor = _Editor()
+    selector = StatementSelector(editor)
+    editor.insert(0, "SELECT 'ünïcödé';\nSELECT 2;\nSELECT 3;")
+
+    second = editor.data.index(b"SELECT 2")
+    editor.caret = second + 3
+    _mode, (statement,) = selector.get_execution_scope()
+
+    assert statement.text == "SELECT 2"
+    # Positions are the editor's, like a selection's.
+    assert editor.data[statement.start_pos:statement.end_pos].decode().strip() == "SELECT 2;"
+
+
+def test_a_large_text_is_lexed_on_a_thread_and_caught_up_with():
+    editor = _Editor()
+    with patch.object(parser, "_BACKGROUND_LEX_LENGTH", 16):
+        selector = StatementSelector(editor)
+        editor.insert(0, "SELECT 1;\nSELECT 'é';\nSELECT 3;")
+        # Edits made while the index is built are not lost.
+        editor.insert(0, "SELECT 0;\n")
+
+        assert [statement.text for statement in selector.get_statements()] == [
+            "SELECT 0", "SELECT 1", "SELECT 'é'", "SELECT 3",
+        ]
+        assert selector.statement_index.text == editor.GetText()
+
+
+def test_edits_while_the_text_is_ascii_move_the_conversion_anchor():
+    editor = _Editor()
+    selector = StatementSelector(editor)
+
+    editor.insert(0, "SELECT 'éé'; SELECT 2;")
+    editor.delete(len("SELECT '".encode()), len("éé".encode()))
+    editor.insert(0, "SELECT 0; ")
+    editor.insert(0, "é")
+    editor.insert(20, "Z")
+
+    assert editor.GetText() == "éSELECT 0; SELECT 'Z'; SELECT 2;"
+    assert selector.statement_index.text == editor.GetText()
+
+
+def test_index_matches_the_editor_after_random_edits_mixing_ascii_and_not():
+    pieces = ["é", "ü", "€", "a", ";", "'", " ", "\n", "SELECT "]
+    generator = random.Random(11)
+
+    for _ in range(60):
+        editor = _Editor()
+        selector = StatementSelector(editor)
+        for _ in range(20):
+            text = editor.GetText()
+            start = generator.randint(0, len(text))
+            end = generator.randint(start, min(len(text), start + 3))
+            position = len(text[:start].encode())
+            if generator.random() < 0.5 and end > start:
+                editor.delete(position, len(text[start:end].encode()))
+            else:
+                editor.insert(position, "".join(generator.choice(pieces) for _ in range(generator.randint(1, 3))))
+
+            text = editor.GetText()
+            editor.caret = len(text[:generator.randint(0, len(text))].encode())
+            selector.get_execution_scope()
+
+        assert selector.statement_index.text == editor.GetText()
@@ -0,0 +1,67 @@
+import threading
+
+from unittest.mock import patch
+
+import pytest
+
+from helpers.block_cache import BlockCache
+from helpers.observables import ObservableList
+
+from structures.configurations import SourceConfiguration
+from structures.connection import Connection, ConnectionEngine
+from structures.session import Session
+
+from structures.engines.records_batch import RecordsBatch
+
+from windows.main.table.executor import RecordsExecutor, VirtualRecordsLoader
+
+
+@pytest.fixture
+def numbers_session(tmp_path):
+    session = Session(Connection(id=1, name="loader", engine=ConnectionEngine.SQLITE, configuration=SourceConfiguration(filename=str(tmp_path / "loader.db"))))
+    session.connect()
+    session.context.execute("CREATE TABLE numbers (id INTEGER PRIMARY KEY)")
+    session.context.executemany("INSERT INTO numbers (id) VALUES (?)", [(value,) for value in range(250)])
+    yield session
+    session.disconnect()
+
+
+def _load_blocks(session, count: int) -> dict:
+    table = session.context.get_databases()[0].tables.get_value()[0]
+    # As the records controller leaves it for the virtual grid.
+    table.records = ObservableList()
+    loaded, done = {}, threading.Event()
+
+    def on_block_loaded(block, records):
+        loaded[block] = records
+        if len(loaded) == count:
+            done.set()
+
+    cache = BlockCache(250, block_size=100, max_blocks=10, prefetch_blocks=count - 1)
+    loader = VirtualRecordsLoader(RecordsExecutor(session), table, cache, on_block_loaded)
+    with patch("windows.main.table.executor.wx.CallAfter", side_effect=lambda function, *args: function(*args)):
+        loader.request(cache.plan(0))
+        assert done.wait(5)
+        loader.close()
+
+    return loaded
+
+
+def test_blocks_are_fetched_by_a_scheduler_task_on_a_pooled_connection(numbers_session):
+    loaded = _load_blocks(numbers_session, 2)
+
+    assert {block: [record.values["id"] for record in records] for block, records in loaded.items()} == {
+        0: list(range(100)), 1: list(range(100, 200)),
+    }
+    # One connection served both blocks.
+    assert numbers_session.pool.size == 1
+
+
+def test_editing_a_key_column_updates_the_row_it_was_loaded_from(numbers_session):
+    record = _load_blocks(numbers_session, 1)[0][5]
+
+    record.values["id"] = 1000
+    assert RecordsBatch.save_records([record]) == []
+
+    numbers_session.context.execute("SELECT id FROM numbers WHERE id IN (5, 1000)")
+    assert [row["id"] for row in numbers_session.context.fetchall()] == [1000]
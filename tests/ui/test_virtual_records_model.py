@@ -0,0 +1,62 @@
+from unittest.mock import Mock
+
+import pytest
+
+from windows.main.table.records import VIRTUAL_BLOCK_SIZE, VirtualRecordsModel
+
+
+@pytest.fixture
+def make_model():
+    models = []
+
+    def _make(row_count: int, is_exact: bool) -> VirtualRecordsModel:
+        model = VirtualRecordsModel(Mock(columns=[], get_seek_columns=list), Mock(), row_count, is_exact=is_exact)
+        models.append(model)
+        return model
+
+    yield _make
+
+    for model in models:
+        model.close()
+
+
+def _records(count: int) -> list:
+    return [Mock() for _ in range(count)]
+
+
+def test_an_exact_count_sizes_the_grid(make_model):
+    model = make_model(450, is_exact=True)
+
+    assert model.row_count == 450
+
+
+def test_an_underestimated_table_grows_until_a_block_comes_back_short(make_model):
+    model = make_model(150, is_exact=False)
+
+    # One probe row past the estimate, so the block holding it gets fetched.
+    assert model.row_count == 151
+
+    model._on_block_loaded(0, _records(VIRTUAL_BLOCK_SIZE))
+    assert model.row_count == VIRTUAL_BLOCK_SIZE + 1
+    assert not model.is_exact
+
+    model._on_block_loaded(1, _records(30))
+    assert model.row_count == VIRTUAL_BLOCK_SIZE + 30
+    assert model.is_exact
+
+
+def test_an_overestimated_table_shrinks_to_its_last_row(make_model):
+    model = make_model(300, is_exact=False)
+
+    model._on_block_loaded(1, _records(20))
+
+    assert model.row_count == VIRTUAL_BLOCK_SIZE + 20
+    assert model.is_exact
+
+
+def test_an_exact_count_does_not_probe_past_a_full_last_block(make_model):
+    model = make_model(VIRTUAL_BLOCK_SIZE, is_exact=True)
+
+    model._on_block_loaded(0, _records(VIRTUAL_BLOCK_SIZE))
+
+    assert model.row_count == VIRTUAL_BLOCK_SIZE
@@ -19,6 +19,7 @@ from windows.components.stc.autocomplete.sql_context import SQLContext
 from windows.components.stc.autocomplete.dot_completion_handler import (
     DotCompletionHandler,
 )
+from windows.components.stc.autocomplete.identifier_index import IdentifierIndex
 from windows.components.stc.autocomplete.statement_extractor import StatementExtractor
 from windows.components.stc.autocomplete.suggestion_builder import SuggestionBuilder
 
@@ -41,6 +42,7 @@ class SQLCompletionProvider:
 
         self._context_detector: Optional[ContextDetector] = None
         self._dot_handler: Optional[DotCompletionHandler] = None
+        self._identifier_index: Optional[IdentifierIndex] = None
         self._statement_extractor = StatementExtractor()
 
     def _get_current_dialect(self) -> Optional[str]:
@@ -62,19 +64,20 @@ class SQLCompletionProvider:
 
             safe_pos = self._clamp_position(pos=pos, text=text)
 
-            statement, relative_pos = (
-                self._statement_extractor.extract_current_statement(
+            lexed, relative_pos = (
+                self._statement_extractor.extract_current_lexed_statement(
                     text,
                     safe_pos,
                     separator=separator,
                 )
             )
+            statement = lexed.text
 
             if not self._context_detector:
                 return None
 
             context, scope, prefix = self._context_detector.detect(
-                statement, relative_pos, database
+                statement, relative_pos, database, lexed=lexed
             )
             scope.current_table = self._get_current_table()
 
@@ -98,13 +101,17 @@ class SQLCompletionProvider:
                             items=tuple(items),
                             prefix=prefix or "",
                             prefix_length=len(prefix) if prefix else 0,
+                            is_pending=self._dot_handler.has_pending_metadata,
                         )
 
-            builder = SuggestionBuilder(database, scope.current_table)
-            items = builder.build(context, scope, prefix, statement, relative_pos)
+            builder = SuggestionBuilder(database, scope.current_table, self._identifier_index)
+            items = builder.build(context, scope, prefix, statement, relative_pos, lexed=lexed)
 
             return CompletionResult(
-                items=tuple(items), prefix=prefix, prefix_length=len(prefix)
+                items=tuple(items),
+                prefix=prefix,
+                prefix_length=len(prefix),
+                is_pending=builder.has_pending_metadata,
             )
         except Exception as ex:
             logger.error(ex, exc_info=True)
@@ -131,6 +138,9 @@ class SQLCompletionProvider:
 
             self._context_detector = ContextDetector(dialect)
             self._dot_handler = DotCompletionHandler(database, None)
+            self._identifier_index = IdentifierIndex(database)
+        else:
+            self._identifier_index.refresh()
 
 
 class SQLAutoCompleteController:
@@ -160,6 +170,8 @@ class SQLAutoCompleteController:
         self._pending_call: Optional[wx.CallLater] = None
         self._popup: Optional[AutoCompletePopup] = None
         self._current_result: Optional[CompletionResult] = None
+        # Caret position and force of the last completion that waited for metadata still being read.
+        self._metadata_wait: Optional[tuple[int, bool]] = None
 
         self._editor.Bind(wx.stc.EVT_STC_CHARADDED, self._on_char_added)
         self._editor.Bind(wx.EVT_KEY_DOWN, self._on_key_down)
@@ -210,6 +222,8 @@ class SQLAutoCompleteController:
                 separator=self.get_effective_separator(),
             )
 
+            self._metadata_wait = (pos, force) if result is not None and result.is_pending else None
+
             if result is None:
                 self._hide_popup()
                 return
@@ -230,6 +244,18 @@ class SQLAutoCompleteController:
         finally:
             self._is_showing = False
 
+    def refresh(self) -> None:
+        """Build the completions again if the last ones waited for metadata, and the caret has not moved since."""
+        if self._metadata_wait is None or not self._editor:
+            return
+
+        pos, force = self._metadata_wait
+        if not self._editor.HasFocus() or self._editor.GetCurrentPos() != pos:
+            self._metadata_wait = None
+            return
+
+        self.show(force=force)
+
     def _show_popup(self, items: list[CompletionItem]) -> None:
         if not self._popup:
             self._popup = AutoCompletePopup(
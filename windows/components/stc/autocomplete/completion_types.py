@@ -21,3 +21,5 @@ class CompletionResult:
     prefix: str
     prefix_length: int
     items: tuple[CompletionItem, ...]
+    # Columns or foreign keys of some tables were still being read: the items fill in when they arrive.
+    is_pending: bool = False
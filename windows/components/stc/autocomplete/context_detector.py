@@ -11,6 +11,7 @@ from windows.components.stc.autocomplete.query_scope import (
     VirtualTable,
 )
 from windows.components.stc.autocomplete.sql_context import SQLContext
+from windows.components.stc.autocomplete.sql_lexer import LexedStatement
 
 from structures.engines.database import SQLDatabase, SQLTable
 
@@ -46,8 +47,14 @@ class ContextDetector:
     def __init__(self, dialect: Optional[str] = None):
         self._dialect = dialect
 
+    _statement_keywords = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
     def detect(
-        self, text: str, cursor_pos: int, database: Optional[SQLDatabase]
+        self,
+        text: str,
+        cursor_pos: int,
+        database: Optional[SQLDatabase],
+        lexed: Optional[LexedStatement] = None,
     ) -> tuple[SQLContext, QueryScope, str]:
         left_text = text[:cursor_pos]
         left_text_stripped = left_text.strip()
@@ -59,9 +66,11 @@ class ContextDetector:
             return SQLContext.SINGLE_TOKEN, QueryScope.empty(), left_text_stripped
 
         prefix = self._extract_prefix(text, cursor_pos)
+        if lexed is None or lexed.text != text:
+            lexed = LexedStatement(text)
 
         try:
-            scope = self._extract_scope_from_text(text, database)
+            scope = self._extract_scope_from_text(lexed, database)
         except Exception:
             scope = QueryScope.empty()
 
@@ -72,7 +81,7 @@ class ContextDetector:
             return SQLContext.DOT_COMPLETION, scope, column_prefix
 
         try:
-            context = self._detect_context_with_regex(left_text, prefix)
+            context = self._detect_context_with_regex(left_text, prefix, lexed)
             if context == SQLContext.INSERT_COMPLETE and left_text.rstrip().endswith(")"):
                 prefix = ")"
             return context, scope, prefix
@@ -104,9 +113,9 @@ class ContextDetector:
             return self._dot_pattern.search(left_text)
         return None
 
-    def _detect_context_with_regex(self, left_text: str, prefix: str) -> SQLContext:
+    def _detect_context_with_regex(self, left_text: str, prefix: str, lexed: LexedStatement) -> SQLContext:
         left_upper = left_text.upper()
-        statement_type, statement_pos = self._detect_statement_type(left_upper)
+        statement_type, statement_pos = self._detect_statement_type(lexed, len(left_text))
 
         if statement_type == "INSERT":
             return self._detect_insert_context(left_text, left_upper, prefix, statement_pos)
@@ -119,16 +128,12 @@ class ContextDetector:
 
         return self._detect_select_context(left_text, left_upper, prefix)
 
-    @staticmethod
-    def _detect_statement_type(left_upper: str) -> tuple[str, int]:
-        statement_positions = {
-            "SELECT": left_upper.rfind("SELECT"),
-            "INSERT": left_upper.rfind("INSERT"),
-            "UPDATE": left_upper.rfind("UPDATE"),
-            "DELETE": left_upper.rfind("DELETE"),
-        }
-        statement_type = max(statement_positions, key=lambda key: statement_positions[key])
-        return statement_type, statement_positions[statement_type]
+    def _detect_statement_type(self, lexed: LexedStatement, cursor_pos: int) -> tuple[str, int]:
+        # Words only: a keyword inside a string, a comment or a name such as UPDATED_AT does not count.
+        statement_type, statement_pos = lexed.last_keyword(self._statement_keywords, cursor_pos)
+        if statement_type is None:
+            return "SELECT", -1
+        return statement_type, statement_pos
 
     def _detect_select_context(
         self, left_text: str, left_upper: str, prefix: str
@@ -667,9 +672,9 @@ class ContextDetector:
         return table_name
 
     def _extract_scope_from_text(
-        self, text: str, database: Optional[SQLDatabase]
+        self, lexed: LexedStatement, database: Optional[SQLDatabase]
     ) -> QueryScope:
-        cleaned_text = re.sub(r"--[^\n]*|/\*.*?\*/", " ", text, flags=re.DOTALL)
+        cleaned_text = lexed.code_text
         cte_tables, cte_end_pos = self._parse_cte_definitions(cleaned_text)
         main_text = cleaned_text[cte_end_pos:] if cte_end_pos else cleaned_text
         cte_lookup = {ref.name.lower(): ref for ref in cte_tables}
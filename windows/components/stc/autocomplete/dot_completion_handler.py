@@ -6,6 +6,7 @@ from windows.components.stc.autocomplete.completion_types import (
     CompletionItem,
     CompletionItemType,
 )
+from windows.components.stc.autocomplete.identifier_index import is_schema_pending
 
 from structures.engines.database import SQLDatabase, SQLTable
 
@@ -31,6 +32,10 @@ class DotCompletionHandler:
         self._database = database
         self._scope = scope
         self._table_index: dict[str, SQLTable] = {}
+        self._database_table_index: dict[str, SQLTable] = {}
+        self._database_tables_source: Optional[tuple[int, int, int]] = None
+        # Set when the last completion named a table whose columns are still being read.
+        self.has_pending_metadata = False
         self._build_table_index()
 
     def is_dot_completion(self, text: str, cursor_pos: int) -> bool:
@@ -52,6 +57,7 @@ class DotCompletionHandler:
     def get_completions(
         self, text: str, cursor_pos: int
     ) -> tuple[Optional[list[CompletionItem]], str]:
+        self.has_pending_metadata = False
         if not self.is_dot_completion(text, cursor_pos):
             return None, ""
 
@@ -84,6 +90,10 @@ class DotCompletionHandler:
         if not table:
             return None, ""
 
+        if is_schema_pending(table):
+            self.has_pending_metadata = True
+            return [], prefix
+
         try:
             ordered_columns = self._order_columns(table.columns)
             columns = [
@@ -123,7 +133,10 @@ class DotCompletionHandler:
         return [col for _, col in sorted(enumerate(columns_list), key=key)]
 
     def _find_table(self, name: str) -> Optional[SQLTable]:
-        return self._table_index.get(name.lower())
+        name_lower = name.lower()
+        if (table := self._table_index.get(name_lower)) is not None:
+            return table
+        return self._database_table_index.get(name_lower)
 
     def _build_table_index(self) -> None:
         self._table_index.clear()
@@ -143,17 +156,32 @@ class DotCompletionHandler:
                 pass
 
         if not self._database:
+            self._database_table_index.clear()
+            self._database_tables_source = None
+            return
+
+        try:
+            tables = self._database.tables
+            tables_list = tables.get_value() if hasattr(tables, "get_value") else tables
+            source = (id(self._database), id(tables_list), len(tables_list))
+        except (AttributeError, TypeError):
+            source = None
+
+        # The scope changes with every statement, the tables rarely: they are only re-indexed when their list does.
+        if source is not None and source == self._database_tables_source:
             return
 
+        self._database_tables_source = source
+        self._database_table_index.clear()
         try:
             for table in self._database.tables:
                 table_name = self._normalize_identifier(table.name).lower()
-                if table_name not in self._table_index:
-                    self._table_index[table_name] = table
+                if table_name not in self._database_table_index:
+                    self._database_table_index[table_name] = table
                 if "." in table_name:
                     base_name = table_name.split(".")[-1]
-                    if base_name not in self._table_index:
-                        self._table_index[base_name] = table
+                    if base_name not in self._database_table_index:
+                        self._database_table_index[base_name] = table
         except (AttributeError, TypeError):
             pass
 
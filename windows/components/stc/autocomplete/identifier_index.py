@@ -0,0 +1,317 @@
+import bisect
+
+from typing import Any, Generic, Iterable, NamedTuple, Optional, TypeVar
+
+from helpers.observables import ObservableLazyList, ObservableList
+
+from structures.engines.database import SQLDatabase, SQLTable
+
+from windows.components.stc.autocomplete.completion_types import (
+    CompletionItem,
+    CompletionItemType,
+)
+
+T = TypeVar("T")
+
+
+def is_schema_pending(table: SQLTable, part: str = "columns") -> bool:
+    """Return True while ``part`` of ``table`` is being read in the background.
+
+    Reading the list now would run the same catalog query on the calling
+    thread: autocomplete leaves the table out until the prefetch hands it over.
+    """
+    lazy_list = getattr(table, part, None)
+    if not isinstance(lazy_list, ObservableLazyList) or lazy_list.is_loaded:
+        return False
+
+    is_prefetching = getattr(getattr(getattr(table, "database", None), "context", None), "is_prefetching", None)
+    return callable(is_prefetching) and is_prefetching(table) is True
+
+
+class PrefixIndex(Generic[T]):
+    """Values under a case-insensitive name, found by prefix with a binary search.
+
+    Entries are kept sorted by ``(name.lower(), order)``: the names starting
+    with a prefix are contiguous, so a lookup costs O(log n + k). ``order`` is
+    how the caller wants its matches back, e.g. the schema order.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[tuple[str, Any]] = []
+        self._values: list[T] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def key(name: str, order: Any) -> tuple[str, Any]:
+        return name.lower(), order
+
+    def add(self, entries: Iterable[tuple[str, Any, T]]) -> None:
+        """Index ``(name, order, value)`` entries."""
+        if not (added := [(self.key(name, order), value) for name, order, value in entries]):
+            return
+
+        # One sort of the already sorted entries followed by the new ones: Timsort merges the two runs.
+        pairs = list(zip(self._keys, self._values))
+        pairs.extend(added)
+        pairs.sort(key=lambda pair: pair[0])
+        self._keys = [key for key, _value in pairs]
+        self._values = [value for _key, value in pairs]
+
+    def remove(self, keys: Iterable[tuple[str, Any]]) -> None:
+        """Drop the entries of ``keys``, as built by ``key``."""
+        if not (removed := set(keys)):
+            return
+
+        pairs = [(key, value) for key, value in zip(self._keys, self._values) if key not in removed]
+        self._keys = [key for key, _value in pairs]
+        self._values = [value for _key, value in pairs]
+
+    def get(self, name: str) -> Optional[T]:
+        """Return the value of ``name``, the first by order when several share it."""
+        name_lower = name.lower()
+        position = bisect.bisect_left(self._keys, (name_lower,))
+        if position < len(self._keys) and self._keys[position][0] == name_lower:
+            return self._values[position]
+        return None
+
+    def find(self, prefix: str) -> list[tuple[Any, T]]:
+        """Return ``(order, value)`` of the names starting with ``prefix``, by order."""
+        prefix_lower = prefix.lower()
+        start = bisect.bisect_left(self._keys, (prefix_lower,))
+        # Every name starting with the prefix sorts before the prefix followed by the highest code point.
+        stop = bisect.bisect_left(self._keys, (prefix_lower + "\U0010ffff",), lo=start)
+        return sorted(zip((key[1] for key in self._keys[start:stop]), self._values[start:stop]), key=lambda match: match[0])
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._values.clear()
+
+
+class _IndexedColumns(NamedTuple):
+    # Identifies the columns list indexed, to notice when it is replaced or resized.
+    signature: Optional[tuple[int, int]]
+    entries: list[tuple[str, Any, tuple[str, CompletionItem]]]
+    items: list[CompletionItem]
+
+
+class IdentifierIndex:
+    """Tables, columns, keywords and functions of a database, for autocomplete lookups.
+
+    Built once per database and brought up to date by ``refresh``; the columns
+    are checked on the next column lookup, which only re-indexes the tables
+    whose columns changed. Table and column lookups are
+    case-insensitive prefix searches returning matches in schema order;
+    keywords and functions are kept upper-cased and sorted. Aliases live in
+    the statement's ``QueryScope`` and are not indexed here.
+    """
+
+    def __init__(self, database: Optional[SQLDatabase]) -> None:
+        self.database = database
+
+        self._source_tables: list[SQLTable] = []
+        self._tables: list[SQLTable] = []
+        self._positions: dict[int, int] = {}
+        self._table_names = PrefixIndex[SQLTable]()
+        self._column_names = PrefixIndex[tuple[str, CompletionItem]]()
+        self._indexed_columns: dict[int, _IndexedColumns] = {}
+        # Tables re-indexed but not yet in the column name index, with the keys they had there.
+        self._unlisted: dict[int, list[tuple[str, Any]]] = {}
+        self._columns_checked = False
+        # Tables left out of the column lookups until a background prefetch hands their columns over.
+        self._pending_tables: set[int] = set()
+
+        self._keywords_source: Optional[tuple[int, int]] = None
+        self._keywords: list[str] = []
+        self._functions_source: Optional[tuple[int, int]] = None
+        self._functions: list[str] = []
+
+        self.refresh()
+
+    @property
+    def tables(self) -> list[SQLTable]:
+        """The tables of the database, in schema order."""
+        return self._tables
+
+    @property
+    def has_pending(self) -> bool:
+        """True when the last column lookup left out tables whose columns are still being read."""
+        return bool(self._pending_tables)
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the database, re-indexing only what changed."""
+        if self.database is None:
+            return
+
+        try:
+            tables = list(self.database.tables)
+        except (AttributeError, TypeError):
+            tables = []
+
+        if len(tables) != len(self._source_tables) or any(table is not indexed for table, indexed in zip(tables, self._source_tables)):
+            self._index_tables(tables)
+
+        # Checking the columns of every table costs a pass over the tables: only the lookups spanning all of them pay it.
+        self._columns_checked = False
+
+        self._refresh_vocabulary()
+
+    def table(self, name: str) -> Optional[SQLTable]:
+        """Return the table called ``name``, ignoring case."""
+        return self._table_names.get(name)
+
+    def tables_with_prefix(self, prefix: str) -> list[SQLTable]:
+        if not prefix:
+            return list(self._tables)
+        return [table for _order, table in self._table_names.find(prefix)]
+
+    def table_columns(self, table: SQLTable) -> list[CompletionItem]:
+        """The columns of ``table`` as ``table.column`` items, in schema order."""
+        if (position := self._positions.get(id(table))) is None:
+            return []
+
+        if not self._columns_checked or id(table) in self._pending_tables:
+            columns = self._get_columns(table)
+            indexed = self._indexed_columns.get(id(table))
+            if indexed is None or indexed.signature != self._source_signature(columns):
+                self._index_columns([(position, table, columns)])
+
+        return self._indexed_columns[id(table)].items
+
+    def columns(self, exclude_tables: Iterable[str] = ()) -> list[CompletionItem]:
+        """Every column, as ``table.column`` items in schema order, except those of ``exclude_tables`` (lower-cased)."""
+        self._check_columns()
+        excluded = set(exclude_tables)
+        return [
+            item
+            for table in self._tables
+            if table.name.lower() not in excluded
+            for item in self._indexed_columns[id(table)].items
+        ]
+
+    def columns_with_prefix(self, prefix: str, exclude_tables: Iterable[str] = ()) -> list[CompletionItem]:
+        """The columns whose own name starts with ``prefix``, as ``table.column`` items in schema order."""
+        self._check_columns()
+        excluded = set(exclude_tables)
+        return [item for _order, (table_name, item) in self._column_names.find(prefix) if table_name not in excluded]
+
+    def keywords_with_prefix(self, prefix: str) -> list[str]:
+        return self._with_prefix(self._keywords, prefix)
+
+    def functions_with_prefix(self, prefix: str) -> list[str]:
+        return self._with_prefix(self._functions, prefix)
+
+    def _check_columns(self) -> None:
+        """Re-index the tables whose columns changed since the last check."""
+        if self._columns_checked:
+            return
+
+        changed = []
+        for position, table in enumerate(self._tables):
+            columns = self._get_columns(table)
+            indexed = self._indexed_columns.get(id(table))
+            if indexed is None or indexed.signature != self._source_signature(columns):
+                changed.append((position, table, columns))
+
+        self._index_columns(changed)
+        self._list_columns()
+
+        self._columns_checked = True
+
+    def _index_tables(self, tables: list[SQLTable]) -> None:
+        self._source_tables = tables
+        self._tables = [table for table in tables if isinstance(getattr(table, "name", None), str)]
+        self._positions = {id(table): position for position, table in enumerate(self._tables)}
+        self._pending_tables.clear()
+        self._table_names.clear()
+        self._column_names.clear()
+        self._indexed_columns.clear()
+        self._unlisted.clear()
+
+        self._table_names.add((table.name, position, table) for position, table in enumerate(self._tables))
+
+    def _index_columns(self, changed: list[tuple[int, SQLTable, Any]]) -> None:
+        """Index the columns of the ``changed`` tables, left out of the column name index until ``_list_columns``."""
+        for position, table, columns in changed:
+            table_entries, items = [], []
+            try:
+                for column_position, column in enumerate(columns):
+                    if not column.name:
+                        continue
+
+                    item = CompletionItem(
+                        name=f"{table.name}.{column.name}",
+                        item_type=CompletionItemType.COLUMN,
+                        description=table.name,
+                    )
+                    items.append(item)
+                    table_entries.append((column.name, (position, column_position), (table.name.lower(), item)))
+            except (AttributeError, TypeError):
+                pass
+
+            if id(table) not in self._unlisted:
+                indexed = self._indexed_columns.get(id(table))
+                entries = indexed.entries if indexed is not None else []
+                self._unlisted[id(table)] = [PrefixIndex.key(name, order) for name, order, _value in entries]
+            self._indexed_columns[id(table)] = _IndexedColumns(self._source_signature(columns), table_entries, items)
+
+    def _list_columns(self) -> None:
+        """Bring the column name index up to date with the tables re-indexed since the last call."""
+        if not self._unlisted:
+            return
+
+        # One removal and one insertion for all the tables: each costs a pass over the whole index,
+        # which table_columns would otherwise pay for every table it sees first.
+        unlisted, self._unlisted = self._unlisted, {}
+        self._column_names.remove(key for keys in unlisted.values() for key in keys)
+        self._column_names.add(entry for table_id in unlisted for entry in self._indexed_columns[table_id].entries)
+
+    def _refresh_vocabulary(self) -> None:
+        context = getattr(self.database, "context", None)
+
+        keywords = getattr(context, "KEYWORDS", None)
+        if (signature := self._source_signature(keywords)) != self._keywords_source:
+            self._keywords_source = signature
+            self._keywords = self._sorted_upper(keywords)
+
+        functions = getattr(context, "FUNCTIONS", None)
+        if (signature := self._source_signature(functions)) != self._functions_source:
+            self._functions_source = signature
+            self._functions = self._sorted_upper(functions)
+
+    def _get_columns(self, table: SQLTable) -> Any:
+        if is_schema_pending(table):
+            self._pending_tables.add(id(table))
+            return None
+
+        self._pending_tables.discard(id(table))
+        try:
+            return table.columns
+        except (AttributeError, TypeError):
+            return None
+
+    @staticmethod
+    def _source_signature(values: Any) -> Optional[tuple[int, int]]:
+        """Identify the list behind ``values`` cheaply, so a replaced or resized list is noticed."""
+        if isinstance(values, ObservableList):
+            values = values.get_value()
+        try:
+            return id(values), len(values)
+        except TypeError:
+            return None
+
+    @staticmethod
+    def _sorted_upper(values: Any) -> list[str]:
+        try:
+            return sorted(str(value).upper() for value in values)
+        except TypeError:
+            return []
+
+    @staticmethod
+    def _with_prefix(values: list[str], prefix: str) -> list[str]:
+        if not prefix:
+            return list(values)
+        prefix_upper = prefix.upper()
+        start = bisect.bisect_left(values, prefix_upper)
+        return values[start:bisect.bisect_left(values, prefix_upper + "\U0010ffff", lo=start)]
@@ -0,0 +1,329 @@
+import bisect
+import enum
+import functools
+import itertools
+import operator
+import re
+
+from typing import Iterator, NamedTuple, Optional
+
+
+class TokenKind(enum.Enum):
+    WORD = "word"
+    QUOTED_IDENTIFIER = "quoted_identifier"
+    STRING = "string"
+    NUMBER = "number"
+    COMMENT = "comment"
+    PUNCTUATION = "punctuation"
+    # A quote or comment opener never closed: lexed as one character, like punctuation.
+    UNTERMINATED = "unterminated"
+
+
+class Token(NamedTuple):
+    kind: TokenKind
+    start: int
+    end: int
+
+
+# Each match is the whitespace before a token and the token; the last one may be trailing whitespace alone.
+_TOKEN_PATTERN = re.compile(
+    r"""
+    \s*
+    (?:
+        (?P<comment>--[^\n]*|/\*.*?\*/)
+        | (?P<string>'(?:[^'\\]|\\.)*'|\$(?P<tag>[^\W\d]\w*)?\$.*?\$(?P=tag)\$)
+        | (?P<quoted_identifier>"(?:[^"\\]|\\.)*"|`[^`]*`|\[[^\]]*\])
+        | (?P<number>\d+(?:\.\d+)?)
+        | (?P<word>[^\W\d]\w*)
+        | (?P<unterminated>/\*|\$(?=[^\W\d]|\$)|['"`\[])
+        | (?P<punctuation>\S)
+        | \Z
+    )
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+_KINDS = {kind.value: kind for kind in TokenKind}
+_NAME_KINDS = (TokenKind.WORD, TokenKind.QUOTED_IDENTIFIER)
+
+# Characters past its end a token's match may have looked at, e.g. "1." before "5".
+_LOOKAHEAD = 2
+
+# Builds a Token from a (kind, start, end) tuple without the Python-level constructor of the named tuple.
+_new_token = tuple.__new__
+_end_of = operator.itemgetter(2)
+
+
+def tokenize(text: str, start: int = 0) -> Iterator[Token]:
+    """Yield the tokens of ``text`` from ``start`` in one pass, whitespace left out.
+
+    Strings and comments are single tokens, so whatever they contain (quotes,
+    separators, keywords) is never seen as code.
+    """
+    return map(_new_token, itertools.repeat(Token), _scan(text, start))
+
+
+def _scan(text: str, start: int) -> Iterator[tuple[TokenKind, int, int]]:
+    kinds = _KINDS
+    for found in _TOKEN_PATTERN.finditer(text, start):
+        if kind := found.lastgroup:
+            yield kinds[kind], found.start(kind), found.end()
+
+
+class LexedStatement:
+    """One statement and its tokens, lexed once and shared by the autocomplete components."""
+
+    def __init__(self, text: str, tokens: Optional[list[Token]] = None):
+        self.text = text
+        self.tokens = list(tokenize(text)) if tokens is None else tokens
+
+    def token_text(self, token: Token) -> str:
+        return self.text[token.start:token.end]
+
+    @functools.cached_property
+    def code_text(self) -> str:
+        """The text with its comments blanked out, positions unchanged."""
+        parts, position = [], 0
+        for token in self.tokens:
+            if token.kind == TokenKind.COMMENT:
+                parts.append(self.text[position:token.start])
+                parts.append(re.sub(r"[^\n]", " ", self.text[token.start:token.end]))
+                position = token.end
+        parts.append(self.text[position:])
+        return "".join(parts)
+
+    def last_keyword(self, keywords: set[str], before: int) -> tuple[Optional[str], int]:
+        """Return the last of ``keywords`` (upper-case) in the text before ``before``, and where it starts.
+
+        A word running past ``before`` counts for its part before it, as the
+        text left of the cursor reads.
+        """
+        for token in reversed(self.tokens):
+            if token.kind != TokenKind.WORD or token.start >= before:
+                continue
+            if (word := self.text[token.start:min(token.end, before)].upper()) in keywords:
+                return word, token.start
+        return None, -1
+
+    def name_after(self, *keywords: str) -> Optional[str]:
+        """Return the table name, qualified or not, following the first ``keywords`` (upper-case) that have one."""
+        code = [token for token in self.tokens if token.kind != TokenKind.COMMENT]
+        count = len(keywords)
+        for index in range(len(code) - count):
+            if all(
+                code[index + offset].kind == TokenKind.WORD and self.token_text(code[index + offset]).upper() == keyword
+                for offset, keyword in enumerate(keywords)
+            ):
+                if (name := self._name_at(code, index + count)) is not None:
+                    return name
+        return None
+
+    def _name_at(self, code: list[Token], index: int) -> Optional[str]:
+        name = code[index]
+        if name.kind not in _NAME_KINDS:
+            return None
+
+        if index + 2 < len(code):
+            dot, part = code[index + 1], code[index + 2]
+            if self.token_text(dot) == "." and part.kind in _NAME_KINDS and name.end == dot.start and dot.end == part.start:
+                return self.text[name.start:part.end]
+
+        return self.token_text(name)
+
+
+class TokenGap:
+    """Tokens in text order, split at a gap where the text gets edited.
+
+    Tokens before the gap keep their positions; those after it are kept in
+    reverse with positions counted from the end of the text, so an edit at
+    the gap shifts none of them. Moving the gap costs the tokens it crosses,
+    finding the tokens around a position a binary search.
+
+    Tokens are stored as plain ``(kind, start, end)`` tuples, which the
+    garbage collector stops tracking, unlike ``Token`` instances: a buffer
+    holds one every few characters. They are handed out as ``Token``.
+    """
+
+    def __init__(self) -> None:
+        self.head: list[tuple[TokenKind, int, int]] = []
+        # Reversed: the token right after the gap is last. Positions are counted from the end of the text.
+        self.tail: list[tuple[TokenKind, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.head) + len(self.tail)
+
+    def move(self, position: int, length: int) -> None:
+        """Move the gap right after the tokens ending at or before ``position``, in a text of ``length``."""
+        head, tail = self.head, self.tail
+        while head and head[-1][2] > position:
+            kind, start, end = head.pop()
+            tail.append((kind, length - start, length - end))
+
+        while tail and length - tail[-1][2] <= position:
+            kind, start_from_end, end_from_end = tail.pop()
+            head.append((kind, length - start_from_end, length - end_from_end))
+
+    def drop_tail_before(self, position: int, length: int) -> None:
+        """Drop the tokens after the gap starting before ``position``, in a text of ``length``."""
+        tail = self.tail
+        while tail and length - tail[-1][1] < position:
+            tail.pop()
+
+    def replace(self, start: int, end: int, old_length: int, length: int, tokens: list[tuple[TokenKind, int, int]]) -> None:
+        """Replace the tokens from ``start`` to ``end`` with ``tokens``, the text growing from ``old_length`` to ``length``.
+
+        ``start`` and ``end`` are positions in the new text: before ``start``
+        it is unchanged, from ``end`` it is the end of the old one.
+        """
+        self.move(start, old_length)
+        self.drop_tail_before(end, length)
+        self.head.extend(tuple(token) for token in tokens)
+
+    def first(self, length: int) -> Optional[Token]:
+        if self.head:
+            return _new_token(Token, self.head[0])
+        if self.tail:
+            kind, start_from_end, end_from_end = self.tail[-1]
+            return Token(kind, length - start_from_end, length - end_from_end)
+        return None
+
+    def tokens_from(self, position: int, length: int) -> Iterator[Token]:
+        """Yield the tokens ending at or after ``position``, in order."""
+        head = self.head
+        for index in range(bisect.bisect_left(head, position, key=_end_of), len(head)):
+            yield _new_token(Token, head[index])
+
+        tail = self.tail
+        for index in range(bisect.bisect_right(tail, length - position, key=_end_of) - 1, -1, -1):
+            kind, start_from_end, end_from_end = tail[index]
+            yield Token(kind, length - start_from_end, length - end_from_end)
+
+    def tokens_before(self, position: int, length: int) -> Iterator[Token]:
+        """Yield the tokens ending before ``position``, last first."""
+        tail = self.tail
+        for index in range(bisect.bisect_left(tail, length - position + 1, key=_end_of), len(tail)):
+            kind, start_from_end, end_from_end = tail[index]
+            yield Token(kind, length - start_from_end, length - end_from_end)
+
+        head = self.head
+        for index in range(bisect.bisect_left(head, position, key=_end_of) - 1, -1, -1):
+            yield _new_token(Token, head[index])
+
+
+class LexedBuffer:
+    """Tokens of an editor buffer, re-lexed from the edited region on each change.
+
+    The tokens are kept in a ``TokenGap`` at the last edit, so a change only
+    moves the tokens between the previous edit and this one across the gap,
+    re-lexes from the edit and stops as soon as a new token lines up with an
+    old one past the edited region.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._tokens = TokenGap()
+        # Closing one of these changes every token after it.
+        self._unterminated = TokenGap()
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def update(self, text: str) -> tuple[int, int]:
+        """Bring the tokens up to date with ``text``, the whole new buffer, and return the span re-lexed."""
+        old = self._text
+        if text == old:
+            return len(text), len(text)
+
+        prefix = _common_prefix_length(old, text)
+        suffix = _common_suffix_length(old, text, limit=min(len(old), len(text)) - prefix)
+        return self._relex(text, prefix, len(text) - suffix)
+
+    def edit(self, position: int, removed: int, inserted: str) -> tuple[int, int]:
+        """Replace ``removed`` characters at ``position`` with ``inserted``, and return the span re-lexed.
+
+        Spares the comparison of the old and new text ``update`` needs to find the edit.
+        """
+        text = self._text[:position] + inserted + self._text[position + removed:]
+        return self._relex(text, position, position + len(inserted))
+
+    def tokens_from(self, position: int) -> Iterator[Token]:
+        """Yield the tokens ending at or after ``position``, in order."""
+        return self._tokens.tokens_from(position, len(self._text))
+
+    def tokens_before(self, position: int) -> Iterator[Token]:
+        """Yield the tokens ending before ``position``, last first."""
+        return self._tokens.tokens_before(position, len(self._text))
+
+    def _relex(self, text: str, prefix: int, edit_end: int) -> tuple[int, int]:
+        old_length, length = len(self._text), len(text)
+        tokens = self._tokens
+
+        tokens.move(prefix, old_length)
+        # The tokens before the edit may have matched by looking at what it changed.
+        restart = prefix - _LOOKAHEAD
+        if (unterminated := self._unterminated.first(old_length)) is not None:
+            restart = min(restart, unterminated.start)
+        head, tail = tokens.head, tokens.tail
+        while head and head[-1][2] > restart:
+            head.pop()
+
+        start = head[-1][2] if head else 0
+        end = length
+        self._text = text
+
+        relexed = _scan(text, start)
+        relexed_from = len(head)
+        for token in relexed:
+            kind, token_start, token_end = token
+            # Old tokens the new ones went past were edited away or lexed differently.
+            tokens.drop_tail_before(token_start, length)
+            if not tail:
+                head.append(token)
+                # Nothing left to line up with: the rest is lexed in one go.
+                head.extend(relexed)
+                break
+
+            # Lexing only looks ahead: past the edit, a token the old text had too is followed by the same ones.
+            if token_start >= edit_end and tail[-1] == (kind, length - token_start, length - token_end):
+                end = token_start
+                break
+
+            head.append(token)
+        else:
+            tail.clear()
+
+        unterminated = TokenKind.UNTERMINATED
+        relexed_unterminated = [token for token in head[relexed_from:] if token[0] is unterminated]
+        self._unterminated.replace(start, end, old_length, length, relexed_unterminated)
+        return start, end
+
+
+_COMPARE_CHUNK = 4096
+
+
+def _common_prefix_length(first: str, second: str) -> int:
+    limit = min(len(first), len(second))
+    position = 0
+    # Whole chunks compare at memcmp speed; only the differing one is walked character by character.
+    while position < limit and first[position:position + _COMPARE_CHUNK] == second[position:position + _COMPARE_CHUNK]:
+        position += _COMPARE_CHUNK
+    position = min(position, limit)
+    while position < limit and first[position] == second[position]:
+        position += 1
+    return position
+
+
+def _common_suffix_length(first: str, second: str, limit: int) -> int:
+    length = 0
+    while length < limit:
+        step = min(_COMPARE_CHUNK, limit - length)
+        if first[len(first) - length - step:len(first) - length] != second[len(second) - length - step:len(second) - length]:
+            break
+        length += step
+    while length < limit and first[len(first) - length - 1] == second[len(second) - length - 1]:
+        length += 1
+    return length
@@ -1,12 +1,18 @@
 import re
 
-from typing import Optional
+from typing import Callable, Optional
 
+from windows.components.stc.autocomplete.sql_lexer import (
+    LexedBuffer,
+    LexedStatement,
+    Token,
+    TokenGap,
+    TokenKind,
+    tokenize,
+)
 
-class StatementExtractor:
-    _string_pattern = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
-    _comment_pattern = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
 
+class StatementExtractor:
     @staticmethod
     def normalize_separator(
         separator: Optional[str], *, default: str = ";"
@@ -23,88 +29,64 @@ class StatementExtractor:
 
         return default
 
-    @staticmethod
-    def _statement_boundaries(text: str, cleaned_text: str, separator: str) -> list[int]:
-        boundaries = [0]
-
-        if len(separator) == 1:
-            for idx, char in enumerate(cleaned_text):
-                if char == separator:
-                    boundaries.append(idx + 1)
-        else:
-            pattern = re.compile(rf"\b{re.escape(separator)}\b", re.IGNORECASE)
-            for match in pattern.finditer(cleaned_text):
-                boundaries.append(match.end())
-
-        boundaries.append(len(text))
-        return boundaries
+    def __init__(self) -> None:
+        # The statements of the editor buffer, re-lexed from the edit on each keystroke instead of from the top.
+        self._index: Optional[StatementIndex] = None
 
     @staticmethod
-    def _trim_statement(
-        statement: str,
-        cursor_offset: int,
-        separator: str,
-    ) -> tuple[str, int]:
-        statement_without_separator = statement
-        if len(separator) == 1:
-            if statement_without_separator.endswith(separator):
-                statement_without_separator = statement_without_separator[:-1]
-        else:
-            separator_pattern = re.compile(
-                rf"\b{re.escape(separator)}\b\s*$",
-                re.IGNORECASE,
-            )
-            statement_without_separator = separator_pattern.sub(
-                "",
-                statement_without_separator,
-                count=1,
+    def _separator_matcher(separator: str) -> Callable[[str, Token], bool]:
+        """Return whether a token of a text is the separator, which strings and comments never are."""
+        if re.fullmatch(r"\w+", separator):
+            separator_upper = separator.upper()
+            return lambda text, token: (
+                token.kind == TokenKind.WORD and text[token.start:token.end].upper() == separator_upper
             )
 
-        if statement_without_separator != statement:
-            cursor_offset = min(cursor_offset, len(statement_without_separator))
-
-        statement = statement_without_separator
-
-        leading_whitespace = len(statement) - len(statement.lstrip())
-        trimmed_statement = statement.lstrip()
-        relative_pos = max(0, cursor_offset - leading_whitespace)
-        relative_pos = min(relative_pos, len(trimmed_statement))
+        return lambda text, token: (
+            token.kind in (TokenKind.PUNCTUATION, TokenKind.UNTERMINATED) and text[token.start:token.end] == separator
+        )
 
-        return trimmed_statement, relative_pos
-    
-    @staticmethod
     def extract_current_statement(
+        self,
         text: str,
         cursor_pos: int,
         separator: Optional[str] = None,
     ) -> tuple[str, int]:
-        effective_separator = StatementExtractor.normalize_separator(separator)
-        cleaned_text = StatementExtractor._remove_strings_and_comments(text)
+        lexed, relative_pos = self.extract_current_lexed_statement(text, cursor_pos, separator)
+        return lexed.text, relative_pos
+
+    def extract_current_lexed_statement(
+        self,
+        text: str,
+        cursor_pos: int,
+        separator: Optional[str] = None,
+    ) -> tuple[LexedStatement, int]:
+        """Return the statement around ``cursor_pos`` with its tokens, and the cursor position in it."""
+        effective_separator = self.normalize_separator(separator)
+        if self._index is None or self._index.separator != effective_separator:
+            self._index = StatementIndex(effective_separator)
+        self._index.update(text)
+
+        start, end, _separator_end = self._index.segment_at(cursor_pos)
+        tokens = []
+        for token in self._index.buffer.tokens_from(start):
+            if token.start >= end:
+                break
+            if token.start >= start:
+                tokens.append(token)
+
+        statement = text[start:end]
+        cursor_offset = min(cursor_pos - start, len(statement))
+
+        leading_whitespace = len(statement) - len(statement.lstrip())
+        offset = start + leading_whitespace
+        relative_pos = min(max(0, cursor_offset - leading_whitespace), len(statement) - leading_whitespace)
+
+        return LexedStatement(
+            statement[leading_whitespace:],
+            [Token(token.kind, token.start - offset, token.end - offset) for token in tokens],
+        ), relative_pos
 
-        statement_boundaries = StatementExtractor._statement_boundaries(
-            text,
-            cleaned_text,
-            effective_separator,
-        )
-        
-        for i in range(len(statement_boundaries) - 1):
-            start = statement_boundaries[i]
-            end = statement_boundaries[i + 1]
-            
-            if start <= cursor_pos <= end:
-                statement = text[start:end]
-
-                cursor_offset = cursor_pos - start
-                statement, relative_pos = StatementExtractor._trim_statement(
-                    statement,
-                    cursor_offset,
-                    effective_separator,
-                )
-
-                return statement, relative_pos
-        
-        return text, cursor_pos
-    
     @staticmethod
     def extract_all_statements(
         text: str,
@@ -114,37 +96,116 @@ class StatementExtractor:
         if not text.strip():
             return []
 
-        effective_separator = StatementExtractor.normalize_separator(separator)
-        cleaned = StatementExtractor._remove_strings_and_comments(text)
-        boundaries = StatementExtractor._statement_boundaries(
-            text,
-            cleaned,
-            effective_separator,
-        )
+        is_separator = StatementExtractor._separator_matcher(StatementExtractor.normalize_separator(separator))
 
         results = []
-        for i in range(len(boundaries) - 1):
-            start, end = boundaries[i], boundaries[i + 1]
-            statement = text[start:end]
-            if len(effective_separator) == 1:
-                if statement.endswith(effective_separator):
-                    statement = statement[:-1]
-            else:
-                statement = re.sub(
-                    rf"\b{re.escape(effective_separator)}\b\s*$",
-                    "",
-                    statement,
-                    count=1,
-                    flags=re.IGNORECASE,
-                )
-            statement = statement.strip()
-            if statement:
-                results.append((statement, start, end))
+        start = 0
+        for token in tokenize(text):
+            if is_separator(text, token):
+                if statement := text[start:token.start].strip():
+                    results.append((statement, start, token.end))
+                start = token.end
+
+        if statement := text[start:].strip():
+            results.append((statement, start, len(text)))
 
         return results
 
-    @staticmethod
-    def _remove_strings_and_comments(text: str) -> str:
-        text = StatementExtractor._string_pattern.sub(lambda m: ' ' * len(m.group(0)), text)
-        text = StatementExtractor._comment_pattern.sub(lambda m: ' ' * len(m.group(0)), text)
-        return text
+
+class StatementIndex:
+    """Where the statements of an editor buffer start and end, kept up to date edit by edit.
+
+    Only the separators are indexed, in a ``TokenGap`` at the last edit like
+    the buffer's tokens: a change re-lexes around itself and shifts no offset,
+    and the statement at a position is found with a binary search.
+    """
+
+    def __init__(self, separator: Optional[str] = None):
+        self.separator = StatementExtractor.normalize_separator(separator)
+        self.buffer = LexedBuffer()
+
+        self._is_separator = StatementExtractor._separator_matcher(self.separator)
+        # Where the separator may be: only there is the token checked, instead of checking every token.
+        candidate = re.escape(self.separator)
+        if re.fullmatch(r"\w+", self.separator):
+            candidate = rf"{candidate}(?!\w)"
+        self._candidate_pattern = re.compile(candidate, re.IGNORECASE)
+        self._separators = TokenGap()
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text
+
+    def update(self, text: str) -> None:
+        """Bring the index up to date with ``text``, the whole new buffer."""
+        old_length = len(self.buffer.text)
+        self._index_separators(old_length, *self.buffer.update(text))
+
+    def edit(self, position: int, removed: int, inserted: str) -> None:
+        """Replace ``removed`` characters at ``position`` with ``inserted``."""
+        old_length = len(self.buffer.text)
+        self._index_separators(old_length, *self.buffer.edit(position, removed, inserted))
+
+    def segment_at(self, position: int) -> tuple[int, int, int]:
+        """Return where the statement around ``position`` starts, where its separator starts and where it ends.
+
+        A position right after a separator belongs to the statement the separator ends.
+        """
+        length = len(self.text)
+        previous = next(self._separators.tokens_before(position, length), None)
+        following = next(self._separators.tokens_from(position, length), None)
+        if following is None:
+            return previous.end if previous else 0, length, length
+        return previous.end if previous else 0, following.start, following.end
+
+    def statement_at(self, position: int) -> Optional[tuple[str, int, int]]:
+        """Return the statement around ``position`` as (text, start_pos, end_pos).
+
+        When that statement is blank, the next one is returned, or the last
+        one when there is none after it.
+        """
+        text, length = self.text, len(self.text)
+        start, separator_start, end = self.segment_at(position)
+        if statement := text[start:separator_start].strip():
+            return statement, start, end
+
+        segment_start = end
+        for separator in self._separators.tokens_from(end + 1, length):
+            if statement := text[segment_start:separator.start].strip():
+                return statement, segment_start, separator.end
+            segment_start = separator.end
+        if statement := text[segment_start:].strip():
+            return statement, segment_start, length
+
+        following = None
+        for separator in self._separators.tokens_before(start + 1, length):
+            if following is not None and (statement := text[separator.end:following.start].strip()):
+                return statement, separator.end, following.end
+            following = separator
+        if following is not None and (statement := text[:following.start].strip()):
+            return statement, 0, following.end
+
+        return None
+
+    def statements(self) -> list[tuple[str, int, int]]:
+        """Return all statements as (text, start_pos, end_pos) tuples, like ``StatementExtractor.extract_all_statements``."""
+        text, results, start = self.text, [], 0
+        for separator in self._separators.tokens_from(0, len(text)):
+            if statement := text[start:separator.start].strip():
+                results.append((statement, start, separator.end))
+            start = separator.end
+
+        if statement := text[start:].strip():
+            results.append((statement, start, len(text)))
+
+        return results
+
+    def _index_separators(self, old_length: int, start: int, end: int) -> None:
+        text = self.buffer.text
+        separators = []
+        for candidate in self._candidate_pattern.finditer(text, start, end):
+            token = next(self.buffer.tokens_from(candidate.start() + 1), None)
+            if token is not None and token.start == candidate.start() and self._is_separator(text, token):
+                separators.append(token)
+
+        self._separators.replace(start, end, old_length, len(text), separators)
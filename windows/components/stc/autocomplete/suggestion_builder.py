@@ -1,6 +1,6 @@
 import re
 
-from typing import Optional
+from typing import Any, Optional
 
 from windows.components.stc.autocomplete.completion_types import (
     CompletionItem,
@@ -9,8 +9,10 @@ from windows.components.stc.autocomplete.completion_types import (
 from windows.components.stc.autocomplete.dot_completion_handler import (
     DotCompletionHandler,
 )
+from windows.components.stc.autocomplete.identifier_index import IdentifierIndex, is_schema_pending
 from windows.components.stc.autocomplete.query_scope import QueryScope, TableReference
 from windows.components.stc.autocomplete.sql_context import SQLContext
+from windows.components.stc.autocomplete.sql_lexer import LexedStatement
 
 from structures.engines.database import SQLDatabase, SQLTable
 
@@ -93,10 +95,40 @@ class SuggestionBuilder:
     }
 
     def __init__(
-        self, database: Optional[SQLDatabase], current_table: Optional[SQLTable]
+        self,
+        database: Optional[SQLDatabase],
+        current_table: Optional[SQLTable],
+        identifier_index: Optional[IdentifierIndex] = None,
     ):
         self._database = database
         self._current_table = current_table
+        # Shared by the completion provider across keystrokes; built here for one-off builders.
+        self._index = identifier_index or IdentifierIndex(database)
+        self._has_pending_metadata = False
+        self._lexed_statement: Optional[LexedStatement] = None
+
+    @property
+    def has_pending_metadata(self) -> bool:
+        """True when tables were left out because their columns or foreign keys are still being read."""
+        return self._has_pending_metadata or self._index.has_pending
+
+    def _get_columns(self, table: SQLTable) -> Any:
+        if is_schema_pending(table, "columns"):
+            self._has_pending_metadata = True
+            return []
+        return table.columns
+
+    def _lexed(self, statement: str) -> LexedStatement:
+        """The tokens of ``statement``, those the caller lexed when it is the statement being completed."""
+        if self._lexed_statement is None or self._lexed_statement.text != statement:
+            self._lexed_statement = LexedStatement(statement)
+        return self._lexed_statement
+
+    def _get_foreign_keys(self, table: SQLTable) -> Any:
+        if is_schema_pending(table, "foreign_keys"):
+            self._has_pending_metadata = True
+            return []
+        return table.foreign_keys
 
     def _is_scope_restricted_context(self, context: SQLContext) -> bool:
         return context in self._scope_restricted_contexts
@@ -117,7 +149,11 @@ class SuggestionBuilder:
         prefix: str,
         statement: str = "",
         cursor_pos: Optional[int] = None,
+        lexed: Optional[LexedStatement] = None,
     ) -> list[CompletionItem]:
+        if lexed is not None:
+            self._lexed_statement = lexed
+
         if context in (SQLContext.EMPTY, SQLContext.SINGLE_TOKEN):
             return self._build_empty(prefix) if context == SQLContext.EMPTY else self._build_single_token(prefix)
 
@@ -339,7 +375,7 @@ class SuggestionBuilder:
                 try:
                     tables = [
                         CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
-                        for table in self._database.tables
+                        for table in self._index.tables
                         if table.name.lower() not in in_scope_table_names
                     ]
                     return sorted(tables, key=lambda x: self._table_name_sort_key(x.name))
@@ -379,6 +415,7 @@ class SuggestionBuilder:
         if prefix and statement.endswith(prefix):
             cursor_pos -= len(prefix)
         items, _resolved_prefix = handler.get_completions(statement, cursor_pos)
+        self._has_pending_metadata |= handler.has_pending_metadata
         if items is None:
             return []
         if prefix:
@@ -388,35 +425,16 @@ class SuggestionBuilder:
 
     def _get_table_by_name(self, table_name: str):
         raw_name = table_name.split(".")[-1]
-        normalized_name = self._normalize_identifier(raw_name).lower()
-        try:
-            for table in self._database.tables:
-                if table.name.lower() == normalized_name:
-                    return table
-        except (AttributeError, TypeError):
-            pass
-        return None
+        return self._index.table(self._normalize_identifier(raw_name))
 
     def _build_single_token(self, prefix: str) -> list[CompletionItem]:
         if not self._database:
             return []
 
-        try:
-            all_keywords = self._database.context.KEYWORDS
-            keywords = [
-                CompletionItem(
-                    name=str(kw).upper(), item_type=CompletionItemType.KEYWORD
-                )
-                for kw in all_keywords
-            ]
-        except (AttributeError, TypeError):
-            return []
-
-        if prefix:
-            prefix_upper = prefix.upper()
-            keywords = [kw for kw in keywords if kw.name.startswith(prefix_upper)]
-
-        return sorted(keywords, key=lambda x: x.name)
+        return [
+            CompletionItem(name=keyword, item_type=CompletionItemType.KEYWORD)
+            for keyword in self._index.keywords_with_prefix(prefix)
+        ]
 
     def _build_select_list(
         self,
@@ -530,9 +548,8 @@ class SuggestionBuilder:
 
         return reference
 
-    @staticmethod
     def _build_single_scope_prefix_columns(
-        reference: TableReference, prefix: str
+        self, reference: TableReference, prefix: str
     ) -> list[CompletionItem]:
         table = reference.table
         if not table:
@@ -544,7 +561,7 @@ class SuggestionBuilder:
         matched_columns: list[str] = []
         all_columns: list[str] = []
         try:
-            for column in table.columns:
+            for column in self._get_columns(table):
                 if not column.name:
                     continue
                 all_columns.append(column.name)
@@ -713,17 +730,7 @@ class SuggestionBuilder:
         display_name = reference.alias if reference and reference.alias else qualifier
 
         if not table and self._database:
-            try:
-                table = next(
-                    (
-                        candidate
-                        for candidate in self._database.tables
-                        if candidate.name.lower() == qualifier.lower()
-                    ),
-                    None,
-                )
-            except (AttributeError, TypeError):
-                table = None
+            table = self._index.table(qualifier)
             display_name = qualifier
 
         if not table:
@@ -732,7 +739,7 @@ class SuggestionBuilder:
         prefix_lower = prefix.lower() if prefix else None
         result = []
         try:
-            for column in table.columns:
+            for column in self._get_columns(table):
                 if not column.name:
                     continue
                 if prefix_lower and not column.name.lower().startswith(prefix_lower):
@@ -755,13 +762,10 @@ class SuggestionBuilder:
         if not database:
             return []
 
-        try:
-            physical_tables = [
-                CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
-                for table in database.tables
-            ]
-        except (AttributeError, TypeError):
-            return []
+        physical_tables = [
+            CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
+            for table in self._index.tables_with_prefix(prefix)
+        ]
 
         cte_names = [ref.name for ref in scope.cte_tables]
         cte_set = {name.lower() for name in cte_names}
@@ -919,14 +923,11 @@ class SuggestionBuilder:
             if not ref.alias
         }
 
-        try:
-            physical_tables = [
-                CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
-                for table in database.tables
-                if table.name.lower() not in in_scope_table_names
-            ]
-        except (AttributeError, TypeError):
-            return []
+        physical_tables = [
+            CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
+            for table in self._index.tables_with_prefix(prefix)
+            if table.name.lower() not in in_scope_table_names
+        ]
 
         cte_tables = [
             CompletionItem(name=ref.name, item_type=CompletionItemType.TABLE)
@@ -1132,7 +1133,7 @@ class SuggestionBuilder:
             return []
 
         try:
-            foreign_keys = list(source_table.foreign_keys)
+            foreign_keys = list(self._get_foreign_keys(source_table))
         except (AttributeError, TypeError):
             return []
 
@@ -1375,9 +1376,8 @@ class SuggestionBuilder:
 
         return self._build_single_scope_prefix_columns(reference, prefix)
 
-    @staticmethod
     def _build_qualified_columns_for_reference(
-        reference: TableReference, prefix: str = ""
+        self, reference: TableReference, prefix: str = ""
     ) -> list[CompletionItem]:
         table = reference.table
         if not table:
@@ -1387,7 +1387,7 @@ class SuggestionBuilder:
         prefix_lower = prefix.lower()
         items = []
         try:
-            for column in table.columns:
+            for column in self._get_columns(table):
                 if not column.name:
                     continue
                 if prefix and not column.name.lower().startswith(prefix_lower):
@@ -1424,9 +1424,8 @@ class SuggestionBuilder:
             )
         )
 
-    @staticmethod
     def _build_unqualified_table_columns(
-        reference: TableReference, prefix: str = ""
+        self, reference: TableReference, prefix: str = ""
     ) -> list[CompletionItem]:
         table = reference.table
         if not table:
@@ -1435,7 +1434,7 @@ class SuggestionBuilder:
         prefix_lower = prefix.lower()
         items = []
         try:
-            for column in table.columns:
+            for column in self._get_columns(table):
                 if not column.name:
                     continue
                 if prefix and not column.name.lower().startswith(prefix_lower):
@@ -1773,22 +1772,10 @@ class SuggestionBuilder:
         if not self._database:
             return []
 
-        try:
-            all_keywords = self._database.context.KEYWORDS
-            keywords = [
-                CompletionItem(
-                    name=str(kw).upper(), item_type=CompletionItemType.KEYWORD
-                )
-                for kw in all_keywords
-            ]
-        except (AttributeError, TypeError):
-            return []
-
-        if prefix:
-            prefix_upper = prefix.upper()
-            keywords = [kw for kw in keywords if kw.name.startswith(prefix_upper)]
-
-        return sorted(keywords, key=lambda x: x.name)
+        return [
+            CompletionItem(name=keyword, item_type=CompletionItemType.KEYWORD)
+            for keyword in self._index.keywords_with_prefix(prefix)
+        ]
 
     def _build_select_keywords(self, prefix: str) -> list[CompletionItem]:
         keywords = ["FROM", "WHERE", "LIMIT", "ORDER BY", "GROUP BY"]
@@ -1873,20 +1860,11 @@ class SuggestionBuilder:
         if not self._database:
             return []
 
-        try:
-            tables = list(self._database.tables)
-        except (AttributeError, TypeError):
-            return []
-
-        exact_match = next(
-            (table for table in tables if table.name.lower() == qualifier_lower), None
-        )
+        exact_match = self._index.table(qualifier)
         if exact_match is not None:
             return [f"FROM {exact_match.name}"]
 
-        prefix_matches = [
-            table for table in tables if table.name.lower().startswith(qualifier_lower)
-        ]
+        prefix_matches = self._index.tables_with_prefix(qualifier)
         if not prefix_matches:
             return []
 
@@ -1907,49 +1885,21 @@ class SuggestionBuilder:
         if not self._database:
             return []
 
-        try:
-            functions = self._database.context.FUNCTIONS
-            function_list = [
-                CompletionItem(
-                    name=str(func).upper(), item_type=CompletionItemType.FUNCTION
-                )
-                for func in functions
-                if not exclude or str(func).upper() not in exclude
-            ]
-        except (AttributeError, TypeError):
-            return []
-
-        if prefix:
-            prefix_upper = prefix.upper()
-            function_list = [
-                f for f in function_list if f.name.startswith(prefix_upper)
-            ]
-
-        return sorted(function_list, key=lambda x: x.name)
+        return [
+            CompletionItem(name=function, item_type=CompletionItemType.FUNCTION)
+            for function in self._index.functions_with_prefix(prefix)
+            if not exclude or function not in exclude
+        ]
 
     def _build_aggregate_functions(self, prefix: str) -> list[CompletionItem]:
         if not self._database:
             return []
 
-        try:
-            functions = self._database.context.FUNCTIONS
-            aggregate_list = [
-                CompletionItem(
-                    name=str(func).upper(), item_type=CompletionItemType.FUNCTION
-                )
-                for func in functions
-                if str(func).upper() in self._aggregate_functions
-            ]
-        except (AttributeError, TypeError):
-            return []
-
-        if prefix:
-            prefix_upper = prefix.upper()
-            aggregate_list = [
-                f for f in aggregate_list if f.name.startswith(prefix_upper)
-            ]
-
-        return sorted(aggregate_list, key=lambda x: x.name)
+        return [
+            CompletionItem(name=function, item_type=CompletionItemType.FUNCTION)
+            for function in self._index.functions_with_prefix(prefix)
+            if function in self._aggregate_functions
+        ]
 
     def _resolve_columns_in_scope(
         self, scope: QueryScope, prefix: str, context: Optional[SQLContext] = None
@@ -2059,7 +2009,7 @@ class SuggestionBuilder:
         ):
             qualifier = self._get_table_qualifier(self._current_table.name, scope)
             try:
-                for col in self._current_table.columns:
+                for col in self._get_columns(self._current_table):
                     if col.name:
                         columns.append(
                             CompletionItem(
@@ -2083,7 +2033,7 @@ class SuggestionBuilder:
                 qualifier = ref.name
 
                 try:
-                    for col in ref.table.columns:
+                    for col in self._get_columns(ref.table):
                         if col.name:
                             columns.append(
                                 CompletionItem(
@@ -2103,7 +2053,7 @@ class SuggestionBuilder:
                 qualifier = ref.name
 
                 try:
-                    for col in ref.table.columns:
+                    for col in self._get_columns(ref.table):
                         if col.name:
                             columns.append(
                                 CompletionItem(
@@ -2122,26 +2072,9 @@ class SuggestionBuilder:
             for ref in scope.from_tables + scope.join_tables:
                 in_scope_table_names.add(ref.name.lower())
 
-            try:
-                for table in self._database.tables:
-                    if (
-                        table.name.lower().startswith(prefix_lower)
-                        and table.name.lower() not in in_scope_table_names
-                    ):
-                        try:
-                            for col in table.columns:
-                                if col.name:
-                                    columns.append(
-                                        CompletionItem(
-                                            name=f"{table.name}.{col.name}",
-                                            item_type=CompletionItemType.COLUMN,
-                                            description=table.name,
-                                        )
-                                    )
-                        except (AttributeError, TypeError):
-                            pass
-            except (AttributeError, TypeError):
-                pass
+            for table in self._index.tables_with_prefix(prefix):
+                if table.name.lower() not in in_scope_table_names:
+                    columns.extend(self._index.table_columns(table))
 
         return columns
 
@@ -2160,7 +2093,7 @@ class SuggestionBuilder:
         if include_current_table and self._current_table:
             qualifier = self._get_table_qualifier(self._current_table.name, scope)
             try:
-                for col in self._current_table.columns:
+                for col in self._get_columns(self._current_table):
                     if col.name and col.name.lower().startswith(prefix_lower):
                         columns.append(
                             CompletionItem(
@@ -2176,7 +2109,7 @@ class SuggestionBuilder:
             if ref.table:
                 qualifier = ref.alias if ref.alias else ref.name
                 try:
-                    for col in ref.table.columns:
+                    for col in self._get_columns(ref.table):
                         if col.name and col.name.lower().startswith(prefix_lower):
                             columns.append(
                                 CompletionItem(
@@ -2192,7 +2125,7 @@ class SuggestionBuilder:
             if ref.table:
                 qualifier = ref.alias if ref.alias else ref.name
                 try:
-                    for col in ref.table.columns:
+                    for col in self._get_columns(ref.table):
                         if col.name and col.name.lower().startswith(prefix_lower):
                             columns.append(
                                 CompletionItem(
@@ -2211,25 +2144,7 @@ class SuggestionBuilder:
             for ref in scope.from_tables + scope.join_tables:
                 in_scope_table_names.add(ref.name.lower())
 
-            try:
-                for table in self._database.tables:
-                    if table.name.lower() not in in_scope_table_names:
-                        try:
-                            for col in table.columns:
-                                if col.name and col.name.lower().startswith(
-                                    prefix_lower
-                                ):
-                                    database_columns.append(
-                                        CompletionItem(
-                                            name=f"{table.name}.{col.name}",
-                                            item_type=CompletionItemType.COLUMN,
-                                            description=table.name,
-                                        )
-                                    )
-                        except (AttributeError, TypeError):
-                            pass
-            except (AttributeError, TypeError):
-                pass
+            database_columns = self._index.columns_with_prefix(prefix, in_scope_table_names)
 
         if (
             context == SQLContext.SELECT_LIST
@@ -2297,24 +2212,15 @@ class SuggestionBuilder:
         if has_scope_column_match:
             return []
 
-        hints = []
-        try:
-            for table in self._database.tables:
-                if (
-                    table.name.lower().startswith(prefix_lower)
-                    and table.name.lower() not in in_scope_table_names
-                ):
-                    hints.append(
-                        CompletionItem(
-                            name=f"{table.name} (+ Add via FROM/JOIN)",
-                            item_type=CompletionItemType.TABLE,
-                            description="",
-                        )
-                    )
-        except (AttributeError, TypeError):
-            pass
-
-        return hints
+        return [
+            CompletionItem(
+                name=f"{table.name} (+ Add via FROM/JOIN)",
+                item_type=CompletionItemType.TABLE,
+                description="",
+            )
+            for table in self._index.tables_with_prefix(prefix)
+            if table.name.lower() not in in_scope_table_names
+        ]
 
     def _is_exact_alias_match(self, prefix: str, scope: QueryScope) -> bool:
         return prefix.lower() in scope.aliases
@@ -2333,7 +2239,7 @@ class SuggestionBuilder:
                     item_type=CompletionItemType.COLUMN,
                     description=ref.name,
                 )
-                for col in ref.table.columns
+                for col in self._get_columns(ref.table)
                 if col.name
             ]
             return columns
@@ -2355,7 +2261,7 @@ class SuggestionBuilder:
                     item_type=CompletionItemType.COLUMN,
                     description=self._current_table.name,
                 )
-                for col in self._current_table.columns
+                for col in self._get_columns(self._current_table)
                 if col.name
             ]
         except (AttributeError, TypeError):
@@ -2384,7 +2290,7 @@ class SuggestionBuilder:
                         item_type=CompletionItemType.COLUMN,
                         description=ref.name,
                     )
-                    for col in ref.table.columns
+                    for col in self._get_columns(ref.table)
                     if col.name
                 ]
                 columns.extend(table_columns)
@@ -2414,7 +2320,7 @@ class SuggestionBuilder:
                         item_type=CompletionItemType.COLUMN,
                         description=ref.name,
                     )
-                    for col in ref.table.columns
+                    for col in self._get_columns(ref.table)
                     if col.name
                 ]
                 columns.extend(table_columns)
@@ -2439,28 +2345,7 @@ class SuggestionBuilder:
         for ref in scope.from_tables + scope.join_tables:
             in_scope_table_names.add(ref.name.lower())
 
-        columns = []
-
-        try:
-            for table in self._database.tables:
-                if table.name.lower() in in_scope_table_names:
-                    continue
-
-                try:
-                    table_columns = [
-                        CompletionItem(
-                            name=f"{table.name}.{col.name}",
-                            item_type=CompletionItemType.COLUMN,
-                            description=table.name,
-                        )
-                        for col in table.columns
-                        if col.name
-                    ]
-                    columns.extend(table_columns)
-                except (AttributeError, TypeError):
-                    continue
-        except (AttributeError, TypeError):
-            return []
+        columns = self._index.columns(in_scope_table_names)
 
         if prefix:
             columns = self._filter_columns_by_prefix(columns, prefix)
@@ -2511,7 +2396,7 @@ class SuggestionBuilder:
         already_listed = self._extract_already_listed_columns(statement)
         columns = []
         try:
-            for col in table.columns:
+            for col in self._get_columns(table):
                 if col.name.lower() not in already_listed:
                     if not prefix or col.name.lower().startswith(prefix.lower()):
                         columns.append(
@@ -2564,7 +2449,7 @@ class SuggestionBuilder:
         already_set = self._extract_already_set_columns(statement)
         columns = []
         try:
-            for col in table.columns:
+            for col in self._get_columns(table):
                 if col.name.lower() not in already_set:
                     if not prefix or col.name.lower().startswith(prefix.lower()):
                         columns.append(
@@ -2681,47 +2566,26 @@ class SuggestionBuilder:
     ) -> list[CompletionItem]:
         if not self._database:
             return []
-        try:
-            tables = []
-            for table in self._database.tables:
-                if exclude and table.name.lower() in exclude:
-                    continue
-                if not prefix or table.name.lower().startswith(prefix.lower()):
-                    tables.append(
-                        CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
-                    )
-            return sorted(tables, key=lambda x: self._table_name_sort_key(x.name))
-        except (AttributeError, TypeError):
-            return []
+        tables = [
+            CompletionItem(name=table.name, item_type=CompletionItemType.TABLE)
+            for table in self._index.tables_with_prefix(prefix)
+            if not exclude or table.name.lower() not in exclude
+        ]
+        return sorted(tables, key=lambda x: self._table_name_sort_key(x.name))
 
     def _find_insert_target_table(self, statement: str) -> Optional[SQLTable]:
-        match = re.search(
-            r"\bINSERT\s+INTO\s+(" + self._table_name_pattern + r")",
-            statement,
-            re.IGNORECASE,
-        )
-        if match:
-            return self._get_table_by_name(match.group(1))
+        if name := self._lexed(statement).name_after("INSERT", "INTO"):
+            return self._get_table_by_name(name)
         return None
 
     def _find_update_target_table(self, statement: str) -> Optional[SQLTable]:
-        match = re.search(
-            r"\bUPDATE\s+(" + self._table_name_pattern + r")",
-            statement,
-            re.IGNORECASE,
-        )
-        if match:
-            return self._get_table_by_name(match.group(1))
+        if name := self._lexed(statement).name_after("UPDATE"):
+            return self._get_table_by_name(name)
         return None
 
     def _find_delete_target_table(self, statement: str) -> Optional[SQLTable]:
-        match = re.search(
-            r"\bFROM\s+(" + self._table_name_pattern + r")",
-            statement,
-            re.IGNORECASE,
-        )
-        if match:
-            return self._get_table_by_name(match.group(1))
+        if name := self._lexed(statement).name_after("FROM"):
+            return self._get_table_by_name(name)
         return None
 
     def _get_table_columns_as_items(
@@ -2731,7 +2595,7 @@ class SuggestionBuilder:
             return []
         try:
             columns = []
-            for col in table.columns:
+            for col in self._get_columns(table):
                 if not prefix or col.name.lower().startswith(prefix.lower()):
                     columns.append(
                         CompletionItem(name=col.name, item_type=CompletionItemType.COLUMN)
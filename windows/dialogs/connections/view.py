@@ -8,10 +8,13 @@ from typing import Optional
 import wx
 import wx.dataview
 
+from constants import WORKDIR
+
 from helpers.loader import Loader
 from helpers.logger import logger
 
 from structures.session import Session
+from structures.engines.metadata_cache import MetadataCache
 from structures.connection import Connection, ConnectionEngine
 from structures.configurations import CredentialsConfiguration, SourceConfiguration
 
@@ -393,6 +396,9 @@ class ConnectionsManager(ConnectionsDialog):
         _walk(self._repository.connections.get_value())
 
     def do_open_session(self, session: Session):
+        if self._app.settings.get_value("runtime", "metadata_cache", default=True):
+            session.context.metadata_cache = MetadataCache(WORKDIR / "metadata_cache.sqlite")
+
         SESSIONS_LIST.append(session)
         CURRENT_SESSION(session)
 
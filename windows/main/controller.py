@@ -2,8 +2,9 @@ import contextlib
 import dataclasses
 import math
 import os
-import threading
+import re
 import time
+import weakref
 
 from collections import defaultdict
 from gettext import gettext as _
@@ -19,12 +20,14 @@ import wx.stc
 from helpers import bytes_to_human
 from helpers.loader import Loader
 from helpers.logger import logger
-from helpers.observables import CallbackEvent, ObservableList
+from helpers.observables import ObservableList
+from helpers.scheduler import TaskPriority, current_task
 
 from structures.session import Session
 from structures.connection import Connection, ConnectionEngine
-from structures.engines.context import QUERY_LOGS
+from structures.engines.context import QUERY_LOGS, AbstractContext, RecordsSeek, TableSchema
 from structures.engines.database import SQLTable, SQLColumn, SQLIndex, SQLForeignKey, SQLRecord, SQLView, SQLTrigger, SQLDatabase, SQLProcedure, SQLFunction
+from structures.engines.records_count import RecordsCount
 
 from windows.views import MainFrameView
 
@@ -54,6 +57,8 @@ from windows.main.table.foreign_key import TableForeignKeyController
 from windows.main.query.controller import QueryResultsController
 from windows.main.query.history import QueryHistoryController
 
+_IDENTIFIER_RE = re.compile(r"\w+")
+
 
 class MainFrameController(MainFrameView):
     app = wx.GetApp()
@@ -65,6 +70,8 @@ class MainFrameController(MainFrameView):
         self._query_pages: list[wx.Panel] = []
         self._query_page_counter = 1
         self._query_page_meta: dict[wx.Panel, dict[str, Any]] = {}
+        # Refreshed when a background schema prefetch hands columns over.
+        self._sql_autocomplete_controllers: weakref.WeakSet[SQLAutoCompleteController] = weakref.WeakSet()
         self._query_history_controller = QueryHistoryController(
             self.tree_ctrl_query_history,
             on_open_query=self._open_query_history_file,
@@ -109,14 +116,20 @@ class MainFrameController(MainFrameView):
         self.limit_records.SetValue(records_limit)
 
         self._records_offset = 0
+        self._records_seek: Optional[RecordsSeek] = None
         self._records_limit = records_limit
         self._records_total_rows = 0
         self._records_total_key = None
         self._records_total_request_id = 0
         self._records_total_is_loading = False
+        # False while the total is a statistics or planner estimate.
+        self._records_total_is_exact = True
+        self._records_total_generation: Optional[int] = None
+        self._records_virtual_scroll = bool(wx.GetApp().settings.get_value("records", "virtual_scroll", default=False))
         self._records_label_template = self.name_database_table.GetLabel()
 
         self.limit_records.Bind(wx.EVT_SPINCTRL, self.on_limit_records_changed)
+        self.name_database_table.Bind(wx.EVT_LEFT_DCLICK, self.on_records_count_exact)
 
         self._setup_query_editors()
 
@@ -245,12 +258,12 @@ class MainFrameController(MainFrameView):
             is_filter_editor=is_filter_editor,
         )
 
-        SQLAutoCompleteController(
+        self._sql_autocomplete_controllers.add(SQLAutoCompleteController(
             editor=styled_text_ctrl,
             provider=sql_completion_provider,
             settings=wx.GetApp().settings,
             theme_loader=wx.GetApp().theme_loader,
-        )
+        ))
 
         SQLTemplateMenuController(
             editor=styled_text_ctrl,
@@ -662,7 +675,7 @@ class MainFrameController(MainFrameView):
     def _setup_subscribers(self):
         self.toggle_panel()
 
-        QUERY_LOGS.subscribe(self._write_query_log, CallbackEvent.ON_APPEND)
+        QUERY_LOGS.subscribe(self._write_query_logs)
 
         # SESSIONS.subscribe(self._load_connection, CallbackEvent.ON_APPEND)
 
@@ -702,11 +715,12 @@ class MainFrameController(MainFrameView):
         # Initialize column toolbar states
         self._initialize_column_toolbar_states()
 
-    def _write_query_log(self, text: str):
-        wx.CallAfter(self._append_query_log, text)
+    def _write_query_logs(self, entries: list[str]):
+        # One UI update per batch: the log flushes from its own thread, many statements at a time.
+        wx.CallAfter(self._append_query_logs, entries)
 
-    def _append_query_log(self, text: str):
-        self.sql_query_logs.AppendText(f"{text}\n")
+    def _append_query_logs(self, entries: list[str]):
+        self.sql_query_logs.AppendText("".join(f"{text}\n" for text in entries))
         self.sql_query_logs.GotoLine(self.sql_query_logs.GetLineCount() - 1)
 
     def _toggle_panel(self, index: int, visible: bool):
@@ -866,40 +880,6 @@ class MainFrameController(MainFrameView):
         schema = str(getattr(table, "schema", "") or "")
         return table.database.name, schema, table.name, filters
 
-    def _count_table_records(
-            self,
-            table: SQLTable,
-            filters: str,
-            context: Optional[Any] = None,
-    ) -> int:
-        if context is None:
-            context = table.database.context
-
-        where = f" WHERE {filters}" if filters else ""
-        schema = str(getattr(table, "schema", "") or "")
-
-        if schema:
-            from_clause = context.qualify(schema, table.name)
-        else:
-            from_clause = context.qualify(table.database.name, table.name)
-
-        query = f"SELECT COUNT(*) AS total_rows FROM {from_clause}{where}"
-        context.execute(query)
-
-        row = context.fetchone() or {}
-        total_rows = None
-        try:
-            total_rows = dict(row).get("total_rows")
-        except Exception as ex:
-            logger.error(ex)
-        if total_rows is None and row:
-            try:
-                total_rows = next(iter(row.values()), 0)
-            except Exception:
-                total_rows = 0
-
-        return int(total_rows or 0)
-
     def _count_table_records_worker(
             self,
             session: Session,
@@ -907,57 +887,58 @@ class MainFrameController(MainFrameView):
             filters: str,
             total_key: tuple[str, str, str, str],
             request_id: int,
+            exact: bool,
+            exact_threshold: int,
+            timeout: Optional[float],
     ) -> None:
-        total_rows = 0
-        error = None
-        context = None
+        counts = session.records_counts
+        # Read before counting: a write committed meanwhile keeps this count out of the cache.
+        generation = counts.generation
+        estimate = None
+        task = current_task()
 
         try:
-            context = session._get_context_class()(self._build_records_count_connection(session))
-            context.connect(skip_before_connect=True, skip_after_connect=True)
-            context.set_database(table.database)
-            total_rows = self._count_table_records(table, filters, context)
-        except Exception as ex:
-            error = str(ex)
-            logger.warning("Failed async records count: %s", ex, exc_info=True)
-        finally:
-            if context is not None:
+            with session.pool.borrow(table.database) as context:
+                if not exact:
+                    try:
+                        estimate = context.estimate_records_count(table, filters or None)
+                    except Exception as ex:
+                        logger.debug("Records count estimate failed: %s", ex)
+
+                    if estimate is not None:
+                        counts.store(total_key, RecordsCount(estimate, is_exact=False), generation)
+                        # Past the threshold the estimate stands until the user asks for the exact count.
+                        is_final = estimate > exact_threshold
+                        wx.CallAfter(self._on_records_count_complete, total_key, request_id, estimate, False, is_final, None)
+                        if is_final:
+                            return
+
+                # A count for another table or filter cancels this one on the server.
+                if task is not None:
+                    task.set_cancel_handler(context.cancel_running_query)
                 try:
-                    context.disconnect()
-                except Exception:
-                    pass
-
-        wx.CallAfter(
-            self._on_records_count_complete,
-            total_key,
-            request_id,
-            total_rows,
-            error,
-        )
-
-    def _build_records_count_connection(self, session: Session) -> Connection:
-        connection = session.connection.copy()
-
-        if not connection.has_enabled_tunnel():
-            return connection
-
-        context = getattr(session, "context", None)
-        configuration = getattr(connection, "configuration", None)
-
-        if context is not None and configuration is not None and hasattr(configuration, "_replace"):
-            replace_kwargs = {}
+                    total_rows = context.count_records(table, filters or None, timeout=timeout)
+                finally:
+                    if task is not None:
+                        task.set_cancel_handler(None)
+        except Exception as ex:
+            if task is not None and task.is_cancelled:
+                return
 
-            if hasattr(configuration, "hostname") and getattr(context, "host", None):
-                replace_kwargs["hostname"] = context.host
+            if estimate is not None:
+                logger.debug("Exact records count gave up, keeping the estimate: %s", ex)
+                wx.CallAfter(self._on_records_count_complete, total_key, request_id, estimate, False, True, None)
+                return
 
-            if hasattr(configuration, "port") and getattr(context, "port", None) is not None:
-                replace_kwargs["port"] = int(context.port)
+            logger.warning("Failed async records count: %s", ex, exc_info=True)
+            wx.CallAfter(self._on_records_count_complete, total_key, request_id, 0, True, True, str(ex))
+            return
 
-            if replace_kwargs:
-                connection.configuration = configuration._replace(**replace_kwargs)
+        if task is not None and task.is_cancelled:
+            return
 
-        connection.ssh_tunnel = None
-        return connection
+        counts.store(total_key, RecordsCount(total_rows, is_exact=True), generation)
+        wx.CallAfter(self._on_records_count_complete, total_key, request_id, total_rows, True, True, None)
 
     def _format_records_number(self, value: int) -> str:
         locale = wx.GetApp().settings.get_value("language", default="en_US")
@@ -981,15 +962,6 @@ class MainFrameController(MainFrameView):
         except Exception:
             return min(100, max_limit)
 
-    def _can_skip_count_query(self, table: SQLTable, filters: str) -> bool:
-        if filters:
-            return False
-
-        if table.total_rows is None:
-            return False
-
-        return int(table.total_rows) <= self._records_limit
-
     def _get_loaded_records_count(self, table: SQLTable) -> int:
         records = getattr(table, "records", None)
         if records is None:
@@ -1001,6 +973,10 @@ class MainFrameController(MainFrameView):
         return 0
 
     def _get_loading_total_text(self, table: SQLTable, filters: str) -> str:
+        if not self._records_total_is_exact:
+            estimated = self._format_records_number(int(self._records_total_rows or 0))
+            return _("~{estimated} (Loading...)").format(estimated=estimated)
+
         if not filters and table.total_rows is not None:
             estimated = self._format_records_number(int(table.total_rows))
             return _("~{estimated} (Loading...)").format(estimated=estimated)
@@ -1008,65 +984,96 @@ class MainFrameController(MainFrameView):
         return _("~ (Loading...)")
 
     def _refresh_records_total_rows(self, table: SQLTable, filters: str) -> None:
+        session = CURRENT_SESSION.get_value()
         total_key = self._build_records_total_key(table, filters)
-        if self._records_total_key == total_key:
+        generation = session.records_counts.generation if session is not None else None
+        # A write made through PeterSQL since the last count bumps the generation.
+        if self._records_total_key == total_key and self._records_total_generation == generation:
             return
 
         self._records_total_key = total_key
+        self._records_total_generation = generation
         self._records_total_request_id += 1
+        self._records_total_is_exact = True
+
+        if session is None:
+            self._records_total_is_loading = False
+            self._update_records_label(table)
+            self._set_records_paging_buttons(table)
+            return
 
-        if self._can_skip_count_query(table, filters):
+        cached = session.records_counts.get(total_key)
+        if cached is not None and (cached.is_exact or cached.rows > self._get_records_count_exact_threshold()):
             self._records_total_is_loading = False
-            self._records_total_rows = max(int(table.total_rows or 0), 0)
+            self._records_total_is_exact = cached.is_exact
+            self._records_total_rows = cached.rows
             self._update_records_label(table)
             self._set_records_paging_buttons(table)
             return
 
+        self._submit_records_count(session, table, filters, exact=False)
+
+    def _get_records_count_exact_threshold(self) -> int:
+        return int(wx.GetApp().settings.get_value("records", "count_exact_threshold", default=100000))
+
+    def _submit_records_count(self, session: Session, table: SQLTable, filters: str, exact: bool) -> None:
+        """Count the rows of ``table`` in the background: estimate first, exact only for small tables or when ``exact``."""
         self._records_total_is_loading = True
 
         self._update_records_label(table)
         self._set_records_paging_buttons(table)
 
+        # An exact count the user asked for runs as long as it takes; a count_timeout of 0 disables the limit.
+        timeout = None if exact else (float(wx.GetApp().settings.get_value("records", "count_timeout", default=5)) or None)
+
+        session.scheduler.submit(
+            TaskPriority.COUNT,
+            self._count_table_records_worker,
+            session,
+            table,
+            filters,
+            self._records_total_key,
+            self._records_total_request_id,
+            exact,
+            self._get_records_count_exact_threshold(),
+            timeout,
+            key=("records_count", id(self)),
+            cancel_running=True,
+        )
+
+    def on_records_count_exact(self, event):
+        obj = CURRENT_TABLE.get_value() or CURRENT_VIEW.get_value()
         session = CURRENT_SESSION.get_value()
-        if session is None:
-            self._records_total_is_loading = False
-            self._update_records_label(table)
-            self._set_records_paging_buttons(table)
+        if obj is None or session is None or self._records_total_key is None or self._records_total_is_exact:
             return
 
-        worker = threading.Thread(
-            target=self._count_table_records_worker,
-            args=(
-                session,
-                table,
-                filters,
-                total_key,
-                self._records_total_request_id,
-            ),
-            daemon=True,
-        )
-        worker.start()
+        self._records_total_request_id += 1
+        self._submit_records_count(session, obj, self._get_records_filters(), exact=True)
 
     def _on_records_count_complete(
             self,
             total_key: tuple[str, str, str, str],
             request_id: int,
             total_rows: int,
+            is_exact: bool,
+            is_final: bool,
             error: Optional[str],
     ) -> None:
         logger.debug(
-            "ui trace: records._on_records_count_complete start request_id=%s expected_request_id=%s total_key=%s total_rows=%s error=%s",
+            "ui trace: records._on_records_count_complete start request_id=%s expected_request_id=%s total_key=%s total_rows=%s is_exact=%s error=%s",
             request_id,
             self._records_total_request_id,
             total_key,
             total_rows,
+            is_exact,
             error,
         )
         if request_id != self._records_total_request_id:
             logger.debug("ui trace: records._on_records_count_complete stale request ignored")
             return
 
-        self._records_total_is_loading = False
+        # An estimate posted ahead of the exact count keeps the total loading.
+        self._records_total_is_loading = not is_final
 
         if error:
             table = CURRENT_TABLE.get_value()
@@ -1095,20 +1102,13 @@ class MainFrameController(MainFrameView):
             return
 
         self._records_total_rows = max(int(total_rows), 0)
-        last_offset = self._get_records_last_offset(self._records_limit)
+        self._records_total_is_exact = is_exact
+        if self._records_virtual_scroll:
+            self.controller_list_table_records.set_virtual_row_count(self._records_total_rows, is_exact=is_exact)
 
-        if self._records_offset > last_offset:
-            self._records_offset = last_offset
-            logger.debug(
-                "ui trace: records._on_records_count_complete offset clamp reload table=%s offset=%s last_offset=%s",
-                table.name,
-                self._records_offset,
-                last_offset,
-            )
-            try:
-                self._load_records_page()
-            except Exception as ex:
-                logger.error(f"Error reloading records page after count: {ex}", exc_info=True)
+        # Only an exact count may move the user off the page they are on.
+        if is_exact and self._records_offset > self._get_records_last_offset(self._records_limit):
+            self._reload_last_records_page(table)
             return
 
         try:
@@ -1123,6 +1123,23 @@ class MainFrameController(MainFrameView):
         except Exception as ex:
             logger.error(f"Error updating records label: {ex}", exc_info=True)
 
+    def _reload_last_records_page(self, table: SQLTable) -> None:
+        self._records_offset = self._get_records_last_offset(self._records_limit)
+        self._set_records_seek(table, from_end=True)
+        logger.debug(
+            "ui trace: records._on_records_count_complete offset clamp reload table=%s offset=%s",
+            table.name,
+            self._records_offset,
+        )
+        try:
+            self._load_records_page()
+        except Exception as ex:
+            logger.error(f"Error reloading records page after count: {ex}", exc_info=True)
+
+    def _is_records_total_known(self) -> bool:
+        # An estimate may be below the real count, even once it is final: only an exact count bounds the paging.
+        return self._records_total_is_exact and not self._records_total_is_loading
+
     def _get_records_last_offset(self, limit: int) -> int:
         total_rows = int(self._records_total_rows or 0)
         if total_rows <= 0:
@@ -1130,6 +1147,30 @@ class MainFrameController(MainFrameView):
 
         return ((total_rows - 1) // limit) * limit
 
+    def _get_loaded_record_key(self, obj: Union[SQLTable, SQLView], position: int) -> Optional[tuple[Any, ...]]:
+        records = getattr(obj, "records", None)
+        if records is None or not len(records):
+            return None
+
+        key_columns = tuple(getattr(obj, "get_seek_columns", list)())
+        return tuple(records[position].values.get(column) for column in key_columns)
+
+    def _set_records_seek(
+            self,
+            obj: Union[SQLTable, SQLView],
+            *,
+            after: Optional[tuple[Any, ...]] = None,
+            before: Optional[tuple[Any, ...]] = None,
+            from_end: bool = False,
+    ) -> None:
+        # Views and tables without a usable key fall back to LIMIT/OFFSET paging.
+        key_columns = tuple(getattr(obj, "get_seek_columns", list)())
+        if not key_columns:
+            self._records_seek = None
+            return
+
+        self._records_seek = RecordsSeek(key_columns, after=after, before=before, from_end=from_end)
+
     def _load_records_page(self):
         table = CURRENT_TABLE.get_value()
         view = CURRENT_VIEW.get_value() if table is None else None
@@ -1143,9 +1184,20 @@ class MainFrameController(MainFrameView):
         filters = self._get_records_filters()
         self._refresh_records_total_rows(obj, filters)
 
-        last_offset = self._get_records_last_offset(limit)
+        if self._records_virtual_scroll:
+            self._load_records_virtual(obj, filters)
+            return
+
+        self._records_offset = max(self._records_offset, 0)
+        if self._is_records_total_known():
+            self._records_offset = min(self._records_offset, self._get_records_last_offset(limit))
+        if self._records_offset == 0:
+            self._set_records_seek(obj)
 
-        self._records_offset = min(max(self._records_offset, 0), last_offset)
+        page_limit = limit
+        if self._records_seek is not None and self._records_seek.from_end and self._records_total_rows:
+            # Reading backwards from the end: the last page holds only the remainder.
+            page_limit = max(1, int(self._records_total_rows) - self._records_offset)
 
         logger.debug(
             "ui trace: records._load_records_page start obj=%s limit=%s offset=%s filters=%s",
@@ -1159,21 +1211,47 @@ class MainFrameController(MainFrameView):
         self.controller_list_table_records.load_records_async(
             obj=obj,
             filters=filters,
-            limit=limit,
+            limit=page_limit,
             offset=self._records_offset,
+            seek=self._records_seek,
         )
 
         self._update_records_label(obj)
         self._set_records_paging_buttons(obj)
         logger.debug("ui trace: records._load_records_page end obj=%s", obj.name)
 
+    def _load_records_virtual(self, obj: Union[SQLTable, SQLView], filters: str) -> None:
+        # The virtual grid shows every row, so the count (or its estimate until it completes) sizes the list.
+        self._records_offset = 0
+        self._records_seek = None
+
+        row_count = self._records_total_rows
+        if self._records_total_is_loading and self._records_total_is_exact and not filters and (estimated := getattr(obj, "total_rows", None)) is not None:
+            row_count = int(estimated)
+
+        obj.records = ObservableList()
+        self.controller_list_table_records.load_virtual_model_for(
+            obj,
+            row_count=int(row_count or 0),
+            filters=filters or None,
+            is_exact=self._is_records_total_known(),
+        )
+
+        self._update_records_label(obj)
+        self._set_records_paging_buttons(obj)
+
     def _update_records_label(self, table: SQLTable):
         rows_count = self._get_loaded_records_count(table)
+        if self._records_virtual_scroll:
+            rows_count = int(self._records_total_rows or 0)
+
         from_row = 0 if rows_count == 0 else self._records_offset + 1
         to_row = 0 if rows_count == 0 else self._records_offset + rows_count
 
         if self._records_total_is_loading:
             total_rows_text = self._get_loading_total_text(table, self._get_records_filters())
+        elif not self._records_total_is_exact:
+            total_rows_text = "~" + self._format_records_number(int(self._records_total_rows or 0))
         else:
             total_rows_text = self._format_records_number(int(self._records_total_rows or 0))
 
@@ -1188,7 +1266,13 @@ class MainFrameController(MainFrameView):
         )
 
     def _set_records_paging_buttons(self, table: SQLTable):
-        if self._records_total_is_loading:
+        if self._records_virtual_scroll:
+            for button in (self.btn_first_records, self.btn_prev_records, self.btn_next_records, self.btn_last_records):
+                button.Enable(False)
+            return
+
+        # Paging to the last page needs the exact count.
+        if not self._is_records_total_known():
             rows_count = self._get_loaded_records_count(table)
             at_first_page = self._records_offset <= 0
             has_next_page = rows_count >= self._records_limit
@@ -1307,6 +1391,7 @@ class MainFrameController(MainFrameView):
             wx.CallAfter(self.status_bar.SetStatusText, f"{_('Uptime')}: {self._format_server_uptime(session.context.get_server_uptime())}", 3)
 
             session.context.set_connection_lost_handler(self._on_global_connection_lost)
+            session.context.set_metadata_changed_handler(self._on_metadata_changed)
 
             keywords = " ".join(k.lower() for k in session.context.KEYWORDS)
 
@@ -1351,11 +1436,44 @@ class MainFrameController(MainFrameView):
 
             self.convert_data_collation.Enable(bool(database.context.COLLATIONS))
 
+            # After the explorer has listed the tables: their columns are then read off the UI thread.
+            wx.CallAfter(self._prefetch_tables_schema, database)
+
         if (session := CURRENT_SESSION.get_value()) and session.engine in [ConnectionEngine.SQLITE]:
             self.table_collation.Enable(False)
             self.convert_data_collation.Enable(False)
             self.table_row_format.Enable(False)
 
+    def _prefetch_tables_schema(self, database: SQLDatabase) -> None:
+        if database is not CURRENT_DATABASE.get_value():
+            return
+
+        try:
+            database.context.prefetch_tables_schema(
+                database,
+                self._on_tables_schema_loaded,
+                first=self._get_tables_referenced_in_editors(database),
+            )
+        except Exception as ex:
+            logger.warning("Cannot prefetch the schema of %s: %s", database.name, ex, exc_info=True)
+
+    def _get_tables_referenced_in_editors(self, database: SQLDatabase) -> list[SQLTable]:
+        words = set()
+        for meta in self._query_page_meta.values():
+            words.update(word.lower() for word in _IDENTIFIER_RE.findall(meta["editor"].GetText()))
+
+        return [table for table in database.tables if table.name.lower() in words]
+
+    def _on_tables_schema_loaded(self, context: AbstractContext, database: SQLDatabase, tables: list[SQLTable], schemas: dict[int, TableSchema]) -> None:
+        if not wx.IsMainThread():
+            wx.CallAfter(self._on_tables_schema_loaded, context, database, tables, schemas)
+            return
+
+        context.apply_tables_schema(database, tables, schemas)
+
+        for autocomplete in list(self._sql_autocomplete_controllers):
+            autocomplete.refresh()
+
     def on_add_database(self, event):
         session = CURRENT_SESSION.get_value()
         if session is None:
@@ -1538,6 +1656,7 @@ class MainFrameController(MainFrameView):
             self._records_total_rows = 0
             self._records_total_key = None
             self._records_total_is_loading = False
+            self._records_total_is_exact = True
             self._update_records_label(current)
             self._set_records_paging_buttons(current)
             if self.MainFrameNotebook.GetSelection() == 6:
@@ -1679,6 +1798,7 @@ class MainFrameController(MainFrameView):
             self._records_total_rows = 0
             self._records_total_key = None
             self._records_total_is_loading = False
+            self._records_total_is_exact = True
             self.sql_query_filters.ClearAll()
             self._update_records_label(table)
 
@@ -2008,23 +2128,38 @@ class MainFrameController(MainFrameView):
         self._load_records_page()
 
     def on_prev_records(self, event):
+        if obj := CURRENT_TABLE.get_value() or CURRENT_VIEW.get_value():
+            if (first_key := self._get_loaded_record_key(obj, 0)) is not None:
+                self._set_records_seek(obj, before=first_key)
+            else:
+                self._records_seek = None
+
         self._records_offset = max(self._records_offset - self._records_limit, 0)
         self._load_records_page()
 
     def on_next_records(self, event):
-        if CURRENT_TABLE.get_value() is None and CURRENT_VIEW.get_value() is None:
+        if (obj := CURRENT_TABLE.get_value() or CURRENT_VIEW.get_value()) is None:
             return
 
-        self._records_offset = min(
-            self._records_offset + self._records_limit,
-            self._get_records_last_offset(self._records_limit),
-        )
+        if (last_key := self._get_loaded_record_key(obj, -1)) is not None:
+            self._set_records_seek(obj, after=last_key)
+        else:
+            self._records_seek = None
+
+        self._records_offset += self._records_limit
+        if self._is_records_total_known():
+            self._records_offset = min(self._records_offset, self._get_records_last_offset(self._records_limit))
         self._load_records_page()
 
     def on_last_records(self, event):
-        if CURRENT_TABLE.get_value() is None and CURRENT_VIEW.get_value() is None:
+        if (obj := CURRENT_TABLE.get_value() or CURRENT_VIEW.get_value()) is None:
+            return
+
+        # The last page is only known from an exact count; its button is disabled without one.
+        if not self._is_records_total_known():
             return
 
+        self._set_records_seek(obj, from_end=True)
         self._records_offset = self._get_records_last_offset(self._records_limit)
         self._load_records_page()
 
@@ -2094,6 +2229,13 @@ class MainFrameController(MainFrameView):
     def _on_query_connection_lost(self, session: Session, error: str) -> None:
         self._on_global_connection_lost(session, error)
 
+    def _on_metadata_changed(self, context: AbstractContext, database: SQLDatabase, changed: set[str], tables_changed: bool) -> None:
+        if not wx.IsMainThread():
+            wx.CallAfter(self._on_metadata_changed, context, database, changed, tables_changed)
+            return
+
+        context.apply_metadata_changes(database, changed, tables_changed)
+
     def _on_global_connection_lost(self, session: Session, error: str) -> None:
         if not wx.IsMainThread():
             wx.CallAfter(self._on_global_connection_lost, session, error)
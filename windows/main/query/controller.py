@@ -8,8 +8,8 @@ from helpers.logger import logger
 
 from structures.session import Session
 
-from windows.main.query.parser import ExecutionMode, SQLStatementParser, StatementSelector
-from windows.main.query.executor import ExecutionResult, ExecutionSummary, QueryExecutor
+from windows.main.query.parser import ExecutionMode, StatementSelector
+from windows.main.query.executor import DEFAULT_FETCH_SIZE, DEFAULT_ROW_LIMIT, ExecutionResult, ExecutionSummary, QueryExecutor
 from windows.main.query.renderer import QueryResultsRenderer
 
 
@@ -42,7 +42,6 @@ class QueryEditorController:
         self.on_before_execute = on_before_execute
         self.on_connection_lost = on_connection_lost
 
-        self.parser: Optional[SQLStatementParser] = None
         self.selector = StatementSelector(stc_editor)
         # The executor is created on demand to ensure it always uses the current session.
         self.executor: Optional[QueryExecutor] = None
@@ -65,6 +64,14 @@ class QueryEditorController:
             "save_as": settings.get_value("ui", "shortcuts", "query", "save_as", default="Ctrl+Shift+S"),
         }
 
+    @staticmethod
+    def _load_fetch_settings() -> dict[str, int]:
+        settings = wx.GetApp().settings
+        return {
+            "fetch_size": int(settings.get_value("runtime", "results_fetch_size", default=DEFAULT_FETCH_SIZE)),
+            "row_limit": int(settings.get_value("runtime", "results_row_limit", default=DEFAULT_ROW_LIMIT)),
+        }
+
     @staticmethod
     def _matches_shortcut_key(key_name: str, key_code: int) -> bool:
         if key_name == "enter":
@@ -119,21 +126,28 @@ class QueryEditorController:
         if summary.last_statement is not None:
             last_statement_label = str(summary.last_statement.statement_index + 1)
 
+        message = _(
+            "Query execution stopped after {elapsed}.\n"
+            "Completed statements: {completed}/{total}.\n"
+            "Successful: {success}.\n"
+            "Failed: {failed}.\n"
+            "Last statement: #{last}."
+        ).format(
+            elapsed=self._format_elapsed(summary.elapsed_ms),
+            completed=summary.completed_statements,
+            total=summary.total_statements,
+            success=summary.successful_statements,
+            failed=summary.failed_statements,
+            last=last_statement_label,
+        )
+
+        if summary.cancel_latency_ms is not None:
+            message += "\n" + _("Stopped {latency} after the cancel request.").format(
+                latency=self._format_elapsed(summary.cancel_latency_ms),
+            )
+
         wx.MessageBox(
-            _(
-                "Query execution stopped after {elapsed}.\n"
-                "Completed statements: {completed}/{total}.\n"
-                "Successful: {success}.\n"
-                "Failed: {failed}.\n"
-                "Last statement: #{last}."
-            ).format(
-                elapsed=self._format_elapsed(summary.elapsed_ms),
-                completed=summary.completed_statements,
-                total=summary.total_statements,
-                success=summary.successful_statements,
-                failed=summary.failed_statements,
-                last=last_statement_label,
-            ),
+            message,
             _("Query execution cancelled"),
             wx.OK | wx.ICON_INFORMATION,
         )
@@ -182,30 +196,26 @@ class QueryEditorController:
             )
             return
 
-        # Ensure the parser matches the current engine.
-        if not self.parser or self.parser.engine != session.engine:
-            self.parser = SQLStatementParser(session.engine)
-
         # Recreate the executor if the session has changed.
         if self.executor is None or getattr(self.executor, "session", None) is not session:
-            self.executor = QueryExecutor(session)
+            if self.executor is not None:
+                self.executor.close()
+            self.executor = QueryExecutor(session, **self._load_fetch_settings())
 
         # Create the renderer once; it does not depend on the session.
         if self.renderer is None:
-            self.renderer = QueryResultsRenderer(self.notebook, session)
-
-        sql_text = self.editor.GetText()
-        if not sql_text.strip():
-            return
-
-        statements = self.parser.parse(sql_text)
-        if not statements:
-            return
+            self.renderer = QueryResultsRenderer(
+                self.notebook,
+                session,
+                can_fetch_more=lambda result: self.executor is not None and self.executor.can_fetch_more(result),
+                on_fetch_more=self._on_fetch_more,
+            )
 
+        # The statements come from the selector's index, kept up to date as the editor changes.
         if mode == ExecutionMode.CURRENT or mode == ExecutionMode.SELECTION:
-            _, statements_to_execute = self.selector.get_execution_scope(statements)
+            _, statements_to_execute = self.selector.get_execution_scope()
         else:
-            statements_to_execute = statements
+            statements_to_execute = self.selector.get_statements()
 
         if not statements_to_execute:
             return
@@ -222,7 +232,8 @@ class QueryEditorController:
             on_statement_complete=self._on_statement_complete,
             on_all_complete=self._on_all_complete,
             current_database=self.get_database(),
-            stop_on_error=True
+            stop_on_error=True,
+            on_statement_rows=self._on_statement_rows,
         )
 
     def _on_statement_complete(self, result: ExecutionResult) -> None:
@@ -237,6 +248,20 @@ class QueryEditorController:
         if self.renderer:
             self.renderer.create_result_tab(result)
 
+    def _on_statement_rows(self, result: ExecutionResult, row_count: int) -> None:
+        if self.renderer:
+            self.renderer.append_rows(result, row_count)
+
+    def _on_fetch_more(self, result: ExecutionResult, fetch_all: bool) -> None:
+        if self.executor is None:
+            return
+
+        self.executor.fetch_more(
+            result,
+            on_statement_rows=self._on_statement_rows,
+            limit=None if fetch_all else self.executor.row_limit or None,
+        )
+
     def _on_all_complete(self, summary: ExecutionSummary) -> None:
         self._set_cancel_button_enabled(False)
 
@@ -8,21 +8,25 @@ from typing import Any, Callable, Optional
 import wx
 
 from helpers.loader import Loader
+from helpers.result_set import ColumnarResultSet
 from helpers.logger import logger
+from helpers.scheduler import ScheduledTask, TaskPriority
 
 from structures.session import Session
-from structures.connection import Connection, ConnectionEngine
 from structures.engines.datatype import SQLDataType
 
 from windows.main.query.parser import ParsedStatement
 
+DEFAULT_FETCH_SIZE = 500
+DEFAULT_ROW_LIMIT = 10_000
+
 
 @dataclasses.dataclass
 class ExecutionResult:
     statement: ParsedStatement
     success: bool
     columns: Optional[list[str]] = None
-    rows: Optional[list[tuple]] = None
+    rows: Optional[ColumnarResultSet] = None
     column_datatypes: Optional[list[Optional[SQLDataType]]] = None
     affected_rows: Optional[int] = None
     elapsed_ms: float = 0.0
@@ -30,6 +34,21 @@ class ExecutionResult:
     cancelled: bool = False
     warnings: list[str] = dataclasses.field(default_factory=list)
     connection_lost: bool = False
+    first_row_ms: Optional[float] = None
+    # True when the result was cut at the row cap (or its fetch stopped) before its last row.
+    has_more_rows: bool = False
+
+
+# Called with a result and its row count once a streamed batch is added; the worker may be further ahead.
+StatementRowsCallback = Callable[[ExecutionResult, int], None]
+
+
+@dataclasses.dataclass
+class _PendingResultStream:
+    """Cursor of a capped result kept open, with its connection, for "fetch more"."""
+    result: ExecutionResult
+    context: Any
+    cursor: Any
 
 
 @dataclasses.dataclass
@@ -40,14 +59,21 @@ class ExecutionSummary:
     failed_statements: int = 0
     elapsed_ms: float = 0.0
     cancelled: bool = False
+    # Time from the cancel request to the running statement giving the connection back.
+    cancel_latency_ms: Optional[float] = None
     last_statement: Optional[ParsedStatement] = None
 
 
 class QueryExecutor:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, fetch_size: int = DEFAULT_FETCH_SIZE, row_limit: int = DEFAULT_ROW_LIMIT):
         self.session = session
+        self.fetch_size = max(1, fetch_size)
+        # 0 disables the cap: every row is fetched.
+        self.row_limit = max(0, row_limit)
+        self._pending_stream: Optional[_PendingResultStream] = None
         self._cancel_requested = False
-        self._current_thread: Optional[threading.Thread] = None
+        self._cancel_requested_at: Optional[float] = None
+        self._current_task: Optional[ScheduledTask] = None
         self._worker_context: Optional[Any] = None
         self._loader_context: Optional[Any] = None
         self._lock = threading.Lock()
@@ -58,45 +84,94 @@ class QueryExecutor:
             on_statement_complete: Callable[[ExecutionResult], None],
             on_all_complete: Callable[[ExecutionSummary], None],
             current_database: Optional[Any] = None,
-            stop_on_error: bool = True
+            stop_on_error: bool = True,
+            on_statement_rows: Optional[StatementRowsCallback] = None,
     ) -> None:
-        if self._current_thread and self._current_thread.is_alive():
+        if self.is_running():
             logger.warning("Attempted to start a new execution while one is already running.")
             return
 
+        self.close_pending_stream()
         self._cancel_requested = False
+        self._cancel_requested_at = None
         self._loader_context = Loader.cursor_wait()
         self._loader_context.__enter__()
 
-        self._current_thread = threading.Thread(
-            target=self._execute_worker,
-            args=(
-                statements,
-                on_statement_complete,
-                on_all_complete,
-                current_database,
-                stop_on_error,
-            ),
-            daemon=True
+        self._current_task = self.session.scheduler.submit(
+            TaskPriority.QUERY,
+            self._execute_worker,
+            statements,
+            on_statement_complete,
+            on_all_complete,
+            current_database,
+            stop_on_error,
+            on_statement_rows,
         )
-        self._current_thread.start()
 
-    def _dispatch_statement_result(
+    def fetch_more(
             self,
-            on_statement_complete: Callable[[ExecutionResult], None],
             result: ExecutionResult,
+            on_statement_rows: StatementRowsCallback,
+            limit: Optional[int] = None,
     ) -> None:
-        ui_done_event = threading.Event()
+        """Resume fetching a capped result: ``limit`` more rows, or all of them when None."""
+        if not self.can_fetch_more(result) or self.is_running():
+            return
+
+        pending = self._pending_stream
 
-        def _on_ui_thread() -> None:
-            try:
-                on_statement_complete(result)
-            finally:
-                ui_done_event.set()
+        self._pending_stream = None
+        self._cancel_requested = False
+        self._cancel_requested_at = None
+        self._loader_context = Loader.cursor_wait()
+        self._loader_context.__enter__()
 
-        wx.CallAfter(_on_ui_thread)
-        while not ui_done_event.wait(0.05):
-            continue
+        self._current_task = self.session.scheduler.submit(
+            TaskPriority.QUERY, self._fetch_more_worker, pending, on_statement_rows, limit
+        )
+
+    def _fetch_more_worker(
+            self,
+            pending: _PendingResultStream,
+            on_statement_rows: StatementRowsCallback,
+            limit: Optional[int],
+    ) -> None:
+        self._set_worker_context(pending.context)
+        try:
+            row_limit = len(pending.result.rows or []) + limit if limit else 0
+            self._stream_rows(pending.context, pending.cursor, pending.result, on_statement_rows, row_limit, keep_open=True)
+        except Exception as ex:
+            logger.error(f"Fetch more error: {ex}", exc_info=True)
+        finally:
+            if self._pending_stream is None:
+                self._clear_worker_context()
+            else:
+                self._release_worker_context()
+
+            wx.CallAfter(self._stop_loader)
+
+    def can_fetch_more(self, result: ExecutionResult) -> bool:
+        return self._pending_stream is not None and self._pending_stream.result is result
+
+    def close_pending_stream(self) -> None:
+        """Forget the capped result waiting for "fetch more" and close its connection."""
+        pending, self._pending_stream = self._pending_stream, None
+        if pending is not None:
+            # Draining an unbuffered cursor to reuse the connection could read millions of rows.
+            self.session.pool.release(pending.context, discard=True)
+
+    def close(self) -> None:
+        """Close the connection kept by the pending result stream."""
+        self.close_pending_stream()
+
+    def _dispatch_statement_result(
+            self,
+            on_statement_complete: Callable[..., None],
+            result: ExecutionResult,
+            *args: Any,
+    ) -> None:
+        # Never waits for the UI: the rows keep growing on this thread, and the UI reads them up to the count it is handed.
+        wx.CallAfter(on_statement_complete, result, *args)
 
     def _execute_worker(
             self,
@@ -104,22 +179,23 @@ class QueryExecutor:
             on_statement_complete: Callable[[ExecutionResult], None],
             on_all_complete: Callable[[ExecutionSummary], None],
             current_database: Optional[Any],
-            stop_on_error: bool
+            stop_on_error: bool,
+            on_statement_rows: Optional[StatementRowsCallback] = None,
     ) -> None:
         time_start = time.perf_counter()
         summary = ExecutionSummary(total_statements=len(statements))
 
         try:
-            context = self._create_worker_context(current_database)
+            context = self._acquire_worker_context(current_database)
             self._set_worker_context(context)
 
-            for stmt in statements:
+            for index, stmt in enumerate(statements):
                 if self._cancel_requested:
                     summary.cancelled = True
                     break
 
                 summary.last_statement = stmt
-                result = self._execute_single(context, stmt)
+                result, cursor = self._execute_single(context, stmt)
 
                 if result.success:
                     summary.completed_statements += 1
@@ -130,6 +206,11 @@ class QueryExecutor:
 
                 self._dispatch_statement_result(on_statement_complete, result)
 
+                if cursor is not None:
+                    # Only the last statement's cursor can stay open: the next statement needs the connection.
+                    keep_open = index == len(statements) - 1
+                    self._stream_rows(context, cursor, result, on_statement_rows, self.row_limit, keep_open=keep_open)
+
                 if not result.success and stop_on_error:
                     break
 
@@ -139,43 +220,63 @@ class QueryExecutor:
             summary.cancelled = summary.cancelled or self._cancel_requested
             summary.elapsed_ms = (time.perf_counter() - time_start) * 1000
 
-            self._clear_worker_context()
+            if summary.cancelled and self._cancel_requested_at is not None:
+                summary.cancel_latency_ms = (time.perf_counter() - self._cancel_requested_at) * 1000
+                logger.info("Query cancelled in %.1f ms", summary.cancel_latency_ms)
+
+            if self._pending_stream is None:
+                self._clear_worker_context()
+            else:
+                self._release_worker_context()
 
             wx.CallAfter(self._stop_loader)
             wx.CallAfter(on_all_complete, summary)
 
-    def _execute_single(self, context: Any, statement: ParsedStatement) -> ExecutionResult:
+    def _execute_single(self, context: Any, statement: ParsedStatement) -> tuple[ExecutionResult, Optional[Any]]:
+        """Execute a statement and fetch the first batch of its rows.
+
+        Returns the result and, for statements returning rows, the open cursor
+        the remaining rows are streamed from.
+        """
         start_time = time.time()
 
         try:
-            context.execute(statement.text)
+            cursor = context.open_result_stream(statement.text)
 
-            elapsed_ms = (time.time() - start_time) * 1000
-
-            cursor = context.cursor
-            if cursor.description:
-                columns = [desc[0] for desc in cursor.description]
-                column_datatypes = context.get_result_column_datatypes(cursor)
-                rows = context.fetchall()
-
-                return ExecutionResult(
-                    statement=statement,
-                    success=True,
-                    columns=columns,
-                    rows=rows,
-                    column_datatypes=column_datatypes,
-                    affected_rows=len(rows),
-                    elapsed_ms=elapsed_ms
-                )
-            else:
+            if not context.has_result_set(cursor):
+                elapsed_ms = (time.time() - start_time) * 1000
                 affected = cursor.rowcount if cursor.rowcount >= 0 else 0
+                with contextlib.suppress(Exception):
+                    context.close_result_stream(cursor)
 
                 return ExecutionResult(
                     statement=statement,
                     success=True,
                     affected_rows=affected,
                     elapsed_ms=elapsed_ms
-                )
+                ), None
+
+            first_batch_size = min(self.fetch_size, self.row_limit) if self.row_limit else self.fetch_size
+            batch = cursor.fetchmany(first_batch_size)
+            elapsed_ms = (time.time() - start_time) * 1000
+
+            columns = [desc[0] for desc in cursor.description]
+            column_datatypes = context.get_result_column_datatypes(cursor)
+
+            rows = ColumnarResultSet(columns)
+            rows.extend(batch)
+
+            return ExecutionResult(
+                statement=statement,
+                success=True,
+                columns=columns,
+                rows=rows,
+                column_datatypes=column_datatypes,
+                affected_rows=len(rows),
+                elapsed_ms=elapsed_ms,
+                first_row_ms=elapsed_ms,
+                has_more_rows=len(batch) == first_batch_size,
+            ), cursor
 
         except Exception as ex:
             elapsed_ms = (time.time() - start_time) * 1000
@@ -191,60 +292,74 @@ class QueryExecutor:
                 cancelled=is_cancelled,
                 elapsed_ms=elapsed_ms,
                 connection_lost=connection_lost,
-            )
-
-    def _build_worker_connection(self) -> Connection:
-        connection = self.session.connection.copy()
-
-        if not connection.has_enabled_tunnel():
-            return connection
-
-        context = getattr(self.session, "context", None)
-        configuration = getattr(connection, "configuration", None)
-
-        if context is not None and configuration is not None and hasattr(configuration, "_replace"):
-            replace_kwargs = {}
-
-            if hasattr(configuration, "hostname") and getattr(context, "host", None):
-                replace_kwargs["hostname"] = context.host
-
-            if hasattr(configuration, "port") and getattr(context, "port", None) is not None:
-                replace_kwargs["port"] = int(context.port)
-
-            if replace_kwargs:
-                connection.configuration = configuration._replace(**replace_kwargs)
-
-        connection.ssh_tunnel = None
-        return connection
+            ), None
 
-    def _create_worker_context(self, current_database: Optional[Any]) -> Any:
-        context = self.session._get_context_class()(self._build_worker_connection())
+    def _stream_rows(
+            self,
+            context: Any,
+            cursor: Any,
+            result: ExecutionResult,
+            on_statement_rows: Optional[StatementRowsCallback],
+            row_limit: int,
+            keep_open: bool,
+    ) -> None:
+        """Fetch the rest of a result in batches until it is exhausted, capped or cancelled.
 
-        if self.session.engine == ConnectionEngine.POSTGRESQL:
-            connect_kwargs = {
-                "skip_before_connect": True,
-                "skip_after_connect": True,
-            }
+        Every batch is added to ``result.rows`` here, off the UI thread, then handed
+        to ``on_statement_rows`` so the grid can show the new rows. A capped result
+        whose cursor may stay open is parked for "fetch more"; otherwise the cursor
+        is closed.
+        """
+        start_time = time.time() - result.elapsed_ms / 1000
+        fetched = len(result.rows or [])
 
-            if current_database is not None and hasattr(current_database, "name"):
-                connect_kwargs["database"] = current_database.name
+        try:
+            while result.has_more_rows and not self._cancel_requested:
+                batch_size = self.fetch_size
+                if row_limit:
+                    if fetched >= row_limit:
+                        break
+                    batch_size = min(batch_size, row_limit - fetched)
+
+                rows = list(cursor.fetchmany(batch_size))
+                result.rows.extend(rows)
+                fetched += len(rows)
+                result.has_more_rows = len(rows) == batch_size
+                result.elapsed_ms = (time.time() - start_time) * 1000
+
+                if on_statement_rows is not None:
+                    self._dispatch_statement_result(on_statement_rows, result, fetched)
+        except Exception as ex:
+            logger.error(f"Error fetching rows: {ex}", exc_info=True)
+            result.has_more_rows = False
+            result.warnings.append(str(ex))
 
-            context.connect(**connect_kwargs)
-            return context
+        if result.has_more_rows and keep_open and not self._cancel_requested:
+            self._pending_stream = _PendingResultStream(result, context, cursor)
+        else:
+            with contextlib.suppress(Exception):
+                context.close_result_stream(cursor)
 
-        context.connect(skip_before_connect=True, skip_after_connect=True, database=current_database.name if current_database is not None else None)
+        if on_statement_rows is not None:
+            # Sent once more when the result is final (or parked), for the footer.
+            self._dispatch_statement_result(on_statement_rows, result, fetched)
 
-        # if current_database is not None:
-        #     with contextlib.suppress(Exception):
-        #         context.set_database(current_database)
+    def _acquire_worker_context(self, current_database: Optional[Any]) -> Any:
+        """Borrow a connection to ``current_database`` from the session pool."""
+        return self.session.pool.acquire(current_database)
 
-        return context
+    def _release_worker_context(self) -> None:
+        # The connection now belongs to the pending result stream: forget it without disconnecting.
+        with self._lock:
+            self._worker_context = None
 
     def _set_worker_context(self, context: Any) -> None:
         with self._lock:
             self._worker_context = context
 
     def _clear_worker_context(self) -> None:
+        # Never hand the editor's connection to another borrower: the user's SQL may have left
+        # table locks, temporary tables, variables or session settings that no reset fully undoes.
         context = None
 
         with self._lock:
@@ -252,8 +367,7 @@ class QueryExecutor:
             self._worker_context = None
 
         if context is not None:
-            with contextlib.suppress(Exception):
-                context.disconnect()
+            self.session.pool.release(context, discard=True)
 
     def _stop_loader(self) -> None:
         if self._loader_context is not None:
@@ -262,7 +376,25 @@ class QueryExecutor:
 
     def cancel(self) -> None:
         self._cancel_requested = True
+        self._cancel_requested_at = time.perf_counter()
+
+        # MySQL opens a side connection to send KILL QUERY: keep that round trip off the UI thread.
+        self.session.scheduler.submit(TaskPriority.QUERY, self._cancel_running_query, key=("cancel_query", id(self)))
+
+    def _cancel_running_query(self) -> None:
+        with self._lock:
+            context = self._worker_context
+
+        if context is None:
+            return
+
+        try:
+            if context.cancel_running_query():
+                return
+        except Exception as ex:
+            logger.warning(f"Server-side cancel failed, closing the connection instead: {ex}")
+
         self._clear_worker_context()
 
     def is_running(self) -> bool:
-        return self._current_thread is not None and self._current_thread.is_alive()
+        return self._current_task is not None and not self._current_task.is_done
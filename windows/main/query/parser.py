@@ -1,13 +1,15 @@
 import dataclasses
 import enum
+import threading
 
 from typing import Optional
 
 import wx.stc
 
-from structures.connection import ConnectionEngine
+from windows.components.stc.autocomplete.statement_extractor import StatementIndex
 
-from windows.components.stc.autocomplete.statement_extractor import StatementExtractor
+# Longer texts are lexed on a thread: about a third of a second of lexing on the UI thread.
+_BACKGROUND_LEX_LENGTH = 1024 * 1024
 
 
 @dataclasses.dataclass
@@ -24,25 +26,31 @@ class ExecutionMode(enum.Enum):
     CURRENT = "current"
 
 
-class SQLStatementParser:
-    def __init__(self, engine: ConnectionEngine):
-        self.engine = engine
-
-    def parse(self, sql_text: str) -> list[ParsedStatement]:
-        return [
-            ParsedStatement(text=text, start_pos=start, end_pos=end, statement_index=i)
-            for i, (text, start, end) in enumerate(StatementExtractor.extract_all_statements(sql_text))
-        ]
-
-
 class StatementSelector:
     def __init__(self, stc_editor: wx.stc.StyledTextCtrl):
         self.editor = stc_editor
+        # Kept up to date from the editor's modification events: finding the statement at the caret parses nothing.
+        self.statement_index = StatementIndex()
+        self._index_build: Optional[tuple[threading.Thread, StatementIndex]] = None
+        # A Scintilla position (UTF-8 bytes) and the index position (characters) it matches, where conversions start.
+        self._anchor = (0, 0)
+
+        self.editor.Bind(wx.stc.EVT_STC_MODIFIED, self._on_editor_modified)
+        self._rebuild_index()
 
-    def get_execution_scope(
-            self,
-            statements: list[ParsedStatement]
-    ) -> tuple[ExecutionMode, list[ParsedStatement]]:
+    def get_statements(self) -> list[ParsedStatement]:
+        self._sync_index()
+        return [
+            ParsedStatement(
+                text=text,
+                start_pos=self._editor_position(start),
+                end_pos=self._editor_position(end),
+                statement_index=i,
+            )
+            for i, (text, start, end) in enumerate(self.statement_index.statements())
+        ]
+
+    def get_execution_scope(self) -> tuple[ExecutionMode, list[ParsedStatement]]:
         selection_start = self.editor.GetSelectionStart()
         selection_end = self.editor.GetSelectionEnd()
 
@@ -57,27 +65,112 @@ class StatementSelector:
 
         caret_pos = self.editor.GetCurrentPos()
 
-        if current_stmt := self._find_statement_at_caret(caret_pos, statements):
+        if current_stmt := self._find_statement_at_caret(caret_pos):
             return (ExecutionMode.CURRENT, [current_stmt])
 
-        return (ExecutionMode.ALL, statements)
-
-    def _find_statement_at_caret(
-            self,
-            caret_pos: int,
-            statements: list[ParsedStatement]
-    ) -> Optional[ParsedStatement]:
-        for stmt in statements:
-            if stmt.start_pos <= caret_pos <= stmt.end_pos:
-                return stmt
-
-        # Caret is in whitespace: execute next statement
-        for stmt in statements:
-            if caret_pos < stmt.start_pos:
-                return stmt
-
-        # Caret after all statements: execute last
-        if statements:
-            return statements[-1]
-
-        return None
+        return (ExecutionMode.ALL, self.get_statements())
+
+    def _find_statement_at_caret(self, caret_pos: int) -> Optional[ParsedStatement]:
+        # The statement at the caret; in whitespace, the next one; after all of them, the last one.
+        self._sync_index()
+        if (found := self.statement_index.statement_at(self._index_position(caret_pos))) is None:
+            return None
+
+        text, start, end = found
+        # Numbered like a selection: it is the only statement run.
+        return ParsedStatement(
+            text=text,
+            start_pos=self._editor_position(start),
+            end_pos=self._editor_position(end),
+            statement_index=0,
+        )
+
+    def _on_editor_modified(self, event: wx.stc.StyledTextEvent) -> None:
+        event.Skip()
+
+        modification = event.GetModificationType()
+        if not modification & (wx.stc.STC_MOD_INSERTTEXT | wx.stc.STC_MOD_DELETETEXT):
+            return
+
+        if self._index_build is not None:
+            # The index being built catches up with the whole text, this change included, once it is done.
+            if not self._index_build[0].is_alive():
+                self._adopt_index_build()
+            return
+
+        text = event.GetText()
+        if len(text) > _BACKGROUND_LEX_LENGTH:
+            self._rebuild_index()
+            return
+
+        # The position is before the change, where the index's text and the editor's still agree.
+        position = self._index_position(event.GetPosition())
+        if modification & wx.stc.STC_MOD_INSERTTEXT:
+            self.statement_index.edit(position, 0, text)
+        else:
+            self.statement_index.edit(position, len(text), "")
+
+    def _rebuild_index(self) -> None:
+        text = self.editor.GetText()
+        self.statement_index = StatementIndex()
+        self._anchor = (0, 0)
+
+        if len(text) <= _BACKGROUND_LEX_LENGTH:
+            self.statement_index.update(text)
+            return
+
+        # Lexing a large text takes seconds: done on a thread, so loading or pasting a script does not freeze the editor.
+        index = StatementIndex()
+        thread = threading.Thread(target=index.update, args=(text,), daemon=True)
+        self._index_build = (thread, index)
+        thread.start()
+
+    def _adopt_index_build(self) -> None:
+        thread, index = self._index_build
+        thread.join()
+        self._index_build = None
+
+        # Edits made while it was built only re-lex where the text they left differs.
+        index.update(self.editor.GetText())
+        self.statement_index = index
+        self._anchor = (0, 0)
+
+    def _sync_index(self) -> None:
+        if self._index_build is not None:
+            self._adopt_index_build()
+
+    def _index_position(self, position: int) -> int:
+        """Convert a Scintilla position, counted in UTF-8 bytes, to a position in the index's text."""
+        text = self.statement_index.text
+        if text.isascii():
+            # Still the anchor: the next edit may be before the last converted position, which it would shift.
+            self._anchor = (position, position)
+            return position
+
+        # Only the text between the last converted position and this one is encoded.
+        editor_anchor, index_anchor = self._anchor
+        if position >= editor_anchor:
+            span = text[index_anchor:index_anchor + position - editor_anchor].encode()[:position - editor_anchor]
+            index_position = index_anchor + len(span.decode())
+        else:
+            span = text[max(0, index_anchor - (editor_anchor - position)):index_anchor].encode()
+            index_position = index_anchor - len(span[len(span) - (editor_anchor - position):].decode())
+
+        self._anchor = (position, index_position)
+        return index_position
+
+    def _editor_position(self, position: int) -> int:
+        """Convert a position in the index's text to a Scintilla position, counted in UTF-8 bytes."""
+        text = self.statement_index.text
+        if text.isascii():
+            self._anchor = (position, position)
+            return position
+
+        editor_anchor, index_anchor = self._anchor
+        if position >= index_anchor:
+            editor_position = editor_anchor + len(text[index_anchor:position].encode())
+        else:
+            editor_position = editor_anchor - len(text[position:index_anchor].encode())
+
+        self._anchor = (editor_position, position)
+        return editor_position
@@ -1,12 +1,14 @@
+import dataclasses
 import datetime
 
-from typing import Any, Optional
+from typing import Any, Callable, Optional, Union
 from gettext import gettext as _
 
 import wx
 import wx.dataview
 
 from helpers.dataview import BaseDataViewListModel
+from helpers.result_set import ColumnarResultSet
 
 from structures.session import Session
 from structures.engines.datatype import DataTypeCategory, SQLDataType
@@ -28,11 +30,30 @@ class _ReadOnlyTimeRenderer(TimeRenderer):
         return False
 
 
+@dataclasses.dataclass
+class _ResultTab:
+    panel: wx.Panel
+    tab_number: int
+    footer_label: wx.StaticText
+    fetch_more_button: Optional[wx.Button] = None
+    fetch_all_button: Optional[wx.Button] = None
+    model: Optional["QueryResultsModel"] = None
+
+
 class QueryResultsRenderer:
-    def __init__(self, notebook: wx.Notebook, session: Session):
+    def __init__(
+            self,
+            notebook: wx.Notebook,
+            session: Session,
+            can_fetch_more: Optional[Callable[[ExecutionResult], bool]] = None,
+            on_fetch_more: Optional[Callable[[ExecutionResult, bool], None]] = None,
+    ):
         self.notebook = notebook
         self.session = session
+        self.can_fetch_more = can_fetch_more or (lambda result: False)
+        self.on_fetch_more = on_fetch_more
         self._models: list[Any] = []
+        self._tabs: dict[int, _ResultTab] = {}
         self._tab_counter = 0
 
     def create_result_tab(self, result: ExecutionResult) -> wx.Panel:
@@ -41,12 +62,13 @@ class QueryResultsRenderer:
         panel = wx.Panel(self.notebook)
         sizer = wx.BoxSizer(wx.VERTICAL)
 
+        model = None
         if result.success and result.columns:
             results_dataview = QueryEditorResultsDataViewCtrl(panel)
-            self._populate_grid(results_dataview, result)
+            model = self._populate_grid(results_dataview, result)
             sizer.Add(results_dataview, 1, wx.EXPAND | wx.ALL, 5)
 
-            tab_name = self._generate_tab_name(result)
+            tab_name = self._generate_tab_name(result, self._tab_counter)
         elif result.success:
             msg = wx.StaticText(
                 panel,
@@ -66,22 +88,38 @@ class QueryResultsRenderer:
                 query_number=self._tab_counter
             )
 
-        footer = self._create_footer(panel, result)
-        sizer.Add(footer, 0, wx.EXPAND | wx.ALL, 5)
+        footer_sizer, tab = self._create_footer(panel, result)
+        tab.model = model
+        self._tabs[id(result)] = tab
+        sizer.Add(footer_sizer, 0, wx.EXPAND | wx.ALL, 5)
 
         panel.SetSizer(sizer)
         self.notebook.AddPage(panel, tab_name, select=True)
 
         return panel
 
-    def _generate_tab_name(self, result: ExecutionResult) -> str:
+    def append_rows(self, result: ExecutionResult, row_count: int) -> None:
+        """Show the first ``row_count`` streamed rows in the tab of ``result`` and refresh its footer."""
+        if (tab := self._tabs.get(id(result))) is None:
+            return
+
+        if tab.model is not None:
+            tab.model.notify_row_count(row_count)
+
+        result.affected_rows = row_count
+        self._update_footer(tab, result)
+
+        if (page_index := self.notebook.FindPage(tab.panel)) != wx.NOT_FOUND:
+            self.notebook.SetPageText(page_index, self._generate_tab_name(result, tab.tab_number))
+
+    def _generate_tab_name(self, result: ExecutionResult, tab_number: int) -> str:
         if result.columns and result.rows is not None:
             return _("Query {query_number} ({rows_count} rows × {columns_count} cols)").format(
-                query_number=self._tab_counter,
+                query_number=tab_number,
                 rows_count=len(result.rows),
                 columns_count=len(result.columns),
             )
-        return _("Query {query_number}").format(query_number=self._tab_counter)
+        return _("Query {query_number}").format(query_number=tab_number)
 
     def _get_column_datatype(self, result: ExecutionResult, column_index: int) -> Optional[SQLDataType]:
         if not result.column_datatypes:
@@ -133,9 +171,9 @@ class QueryResultsRenderer:
             self,
             results_dataview: QueryEditorResultsDataViewCtrl,
             result: ExecutionResult
-    ) -> None:
+    ) -> Optional["QueryResultsModel"]:
         if not result.columns:
-            return
+            return None
 
         for i, col_name in enumerate(result.columns):
             datatype = self._get_column_datatype(result, i)
@@ -158,7 +196,29 @@ class QueryResultsRenderer:
         results_dataview.AssociateModel(model)
         wx.CallAfter(results_dataview.autosize_columns_from_content)
 
-    def _create_footer(self, parent: wx.Panel, result: ExecutionResult) -> wx.StaticText:
+        return model
+
+    def _create_footer(self, parent: wx.Panel, result: ExecutionResult) -> tuple[wx.BoxSizer, _ResultTab]:
+        footer_sizer = wx.BoxSizer(wx.HORIZONTAL)
+
+        footer = wx.StaticText(parent, label=self._format_footer(result))
+        footer.SetForegroundColour(wx.SystemSettings.GetColour(wx.SYS_COLOUR_GRAYTEXT))
+        footer_sizer.Add(footer, 1, wx.ALIGN_CENTER_VERTICAL)
+
+        tab = _ResultTab(panel=parent, tab_number=self._tab_counter, footer_label=footer)
+
+        if result.success and result.columns:
+            tab.fetch_more_button = wx.Button(parent, label=_("Fetch more"))
+            tab.fetch_all_button = wx.Button(parent, label=_("Fetch all"))
+            tab.fetch_more_button.Bind(wx.EVT_BUTTON, lambda event: self._do_fetch_more(result, fetch_all=False))
+            tab.fetch_all_button.Bind(wx.EVT_BUTTON, lambda event: self._do_fetch_more(result, fetch_all=True))
+            footer_sizer.Add(tab.fetch_more_button, 0, wx.LEFT, 5)
+            footer_sizer.Add(tab.fetch_all_button, 0, wx.LEFT, 5)
+            self._set_fetch_buttons_shown(tab, False)
+
+        return footer_sizer, tab
+
+    def _format_footer(self, result: ExecutionResult) -> str:
         parts = []
 
         if result.affected_rows is not None:
@@ -166,6 +226,9 @@ class QueryResultsRenderer:
 
         parts.append(_("{elapsed_ms:.1f} ms").format(elapsed_ms=result.elapsed_ms))
 
+        if result.first_row_ms is not None:
+            parts.append(_("first row {first_row_ms:.1f} ms").format(first_row_ms=result.first_row_ms))
+
         if result.warnings:
             parts.append(
                 _("{warnings_count} warnings").format(
@@ -173,11 +236,28 @@ class QueryResultsRenderer:
                 )
             )
 
-        footer_text = " | ".join(parts)
-        footer = wx.StaticText(parent, label=footer_text)
-        footer.SetForegroundColour(wx.SystemSettings.GetColour(wx.SYS_COLOUR_GRAYTEXT))
+        if result.has_more_rows:
+            parts.append(_("more rows available"))
+
+        return " | ".join(parts)
+
+    def _update_footer(self, tab: _ResultTab, result: ExecutionResult) -> None:
+        tab.footer_label.SetLabel(self._format_footer(result))
+        self._set_fetch_buttons_shown(tab, self.can_fetch_more(result))
 
-        return footer
+    def _set_fetch_buttons_shown(self, tab: _ResultTab, shown: bool) -> None:
+        for button in (tab.fetch_more_button, tab.fetch_all_button):
+            if button is not None:
+                button.Show(shown)
+
+        tab.panel.Layout()
+
+    def _do_fetch_more(self, result: ExecutionResult, fetch_all: bool) -> None:
+        if self.on_fetch_more is None or (tab := self._tabs.get(id(result))) is None:
+            return
+
+        self._set_fetch_buttons_shown(tab, False)
+        self.on_fetch_more(result, fetch_all)
 
     def _create_error_panel(self, parent: wx.Panel, result: ExecutionResult) -> wx.Panel:
         error_panel = wx.Panel(parent)
@@ -202,6 +282,7 @@ class QueryResultsRenderer:
         while self.notebook.GetPageCount() > 0:
             self.notebook.DeletePage(0)
         self._models = []
+        self._tabs = {}
         self._tab_counter = 0
 
 
@@ -213,7 +294,7 @@ class QueryResultsModel(BaseDataViewListModel):
 
     def load(
             self,
-            data: list[Any],
+            data: Union[ColumnarResultSet, list[Any]],
             columns: list[str],
             column_datatypes: Optional[list[Optional[SQLDataType]]] = None,
     ):
@@ -228,7 +309,7 @@ class QueryResultsModel(BaseDataViewListModel):
         if col < 0 or col >= len(self._columns):
             return ""
 
-        value = self._get_cell_value(self.data[row], col)
+        value = self._get_cell(row, col)
         if value is None:
             return ""
 
@@ -247,6 +328,11 @@ class QueryResultsModel(BaseDataViewListModel):
     def SetValueByRow(self, value, row, col):
         return False
 
+    def notify_row_count(self, row_count: int) -> None:
+        # The executor already added the rows to the result set this model shows, maybe more than row_count by now.
+        for _row in range(self.GetCount(), row_count):
+            self.RowAppended()
+
     def HasValue(self, item, col):
         if col < 0 or col >= len(self._columns):
             return False
@@ -255,7 +341,7 @@ class QueryResultsModel(BaseDataViewListModel):
         if row < 0 or row >= len(self.data):
             return False
 
-        return self._get_cell_value(self.data[row], col) is not None
+        return self._get_cell(row, col) is not None
 
     def GetAttr(self, item, col, attr):
         datatype = self._get_column_datatype(col)
@@ -266,6 +352,12 @@ class QueryResultsModel(BaseDataViewListModel):
         attr.SetColour(wx.Colour(color))
         return super().GetAttr(item, col, attr)
 
+    def _get_cell(self, row: int, col: int) -> Any:
+        if isinstance(self.data, ColumnarResultSet):
+            return self.data.get(row, col)
+
+        return self._get_cell_value(self.data[row], col)
+
     def _get_cell_value(self, row_data: Any, col: int) -> Any:
         if isinstance(row_data, dict):
             return row_data.get(self._columns[col])
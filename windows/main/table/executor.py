@@ -1,17 +1,20 @@
+import collections
 import contextlib
 import dataclasses
 import threading
 import time
 
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterator, Optional
 
 import wx
 
+from helpers.block_cache import BlockCache
 from helpers.loader import Loader
 from helpers.logger import logger
+from helpers.scheduler import ScheduledTask, TaskPriority, current_task
 
 from structures.session import Session
-from structures.connection import Connection, ConnectionEngine
+from structures.engines.context import RecordsSeek
 from structures.engines.database import SQLTable, SQLRecord
 
 from windows.main.query.executor import QueryExecutor
@@ -45,7 +48,7 @@ class RecordsExecutor:
     def __init__(self, session: Session):
         self.session = session
         self._cancel_requested = False
-        self._current_thread: Optional[threading.Thread] = None
+        self._current_task: Optional[ScheduledTask] = None
         self._worker_context: Optional[Any] = None
         self._loader_context: Optional[Any] = None
         self._lock = threading.Lock()
@@ -57,7 +60,8 @@ class RecordsExecutor:
             filters: Optional[str] = None,
             limit: int = 1000,
             offset: int = 0,
-            orders: Optional[str] = None
+            orders: Optional[str] = None,
+            seek: Optional[RecordsSeek] = None,
     ) -> None:
         self._execute_operation(
             operation="load_records",
@@ -66,45 +70,37 @@ class RecordsExecutor:
             filters=filters,
             limit=limit,
             offset=offset,
-            orders=orders
+            orders=orders,
+            seek=seek,
         )
 
     def _execute_operation(self, **kwargs) -> None:
         self._cancel_requested = False
-        self._loader_context = Loader.cursor_wait()
-        self._loader_context.__enter__()
+        if self._loader_context is None:
+            self._loader_context = Loader.cursor_wait()
+            self._loader_context.__enter__()
 
-        self._current_thread = threading.Thread(
-            target=self._execute_worker,
-            args=(kwargs,),
-            daemon=True
+        # A page asked for before the previous one started replaces it.
+        self._current_task = self.session.scheduler.submit(
+            TaskPriority.RECORDS, self._execute_worker, kwargs, key=("records", id(self))
         )
-        self._current_thread.start()
 
     def _dispatch_operation_result(
             self,
             on_complete: Callable[[RecordsOperationResult], None],
             result: RecordsOperationResult,
     ) -> None:
-        ui_done_event = threading.Event()
-
-        def _on_ui_thread() -> None:
-            try:
-                on_complete(result)
-            finally:
-                ui_done_event.set()
-
-        wx.CallAfter(_on_ui_thread)
-        while not ui_done_event.wait(0.05):
-            continue
+        # Nothing on this thread depends on the UI having handled the result.
+        wx.CallAfter(on_complete, result)
 
     def _execute_worker(self, operation_kwargs: dict) -> None:
         time_start = time.perf_counter()
         operation = operation_kwargs.get("operation", "unknown")
         on_complete = operation_kwargs.get("on_complete")
 
+        context = None
         try:
-            context = self._create_worker_context()
+            context = self._acquire_worker_context()
             self._set_worker_context(context)
 
             result = self._execute_single_operation(context, operation_kwargs)
@@ -121,8 +117,9 @@ class RecordsExecutor:
             )
             self._dispatch_operation_result(on_complete, error_result)
         finally:
-            self._clear_worker_context()
-            wx.CallAfter(self._stop_loader)
+            if context is not None:
+                self._park_worker_context(context)
+            wx.CallAfter(self._stop_loader, current_task())
 
     def _execute_single_operation(self, context: Any, operation_kwargs: dict) -> RecordsOperationResult:
         start_time = time.time()
@@ -153,14 +150,18 @@ class RecordsExecutor:
         limit = operation_kwargs.get("limit", 1000)
         offset = operation_kwargs.get("offset", 0)
         orders = operation_kwargs.get("orders")
-
-        records = context.get_records(
-            table,
-            filters=filters,
-            limit=limit,
-            offset=offset,
-            orders=orders
-        )
+        seek = operation_kwargs.get("seek")
+
+        if seek is not None:
+            records = context.get_records_page(table, seek, filters=filters, limit=limit, first_id=offset)
+        else:
+            records = context.get_records(
+                table,
+                filters=filters,
+                limit=limit,
+                offset=offset,
+                orders=orders
+            )
 
         elapsed_ms = (time.time() - start_time) * 1000
 
@@ -173,50 +174,31 @@ class RecordsExecutor:
         )
 
 
-    def _build_worker_connection(self) -> Connection:
-        """Build a worker connection similar to QueryExecutor."""
-        connection = self.session.connection.copy()
-
-        if not connection.has_enabled_tunnel():
-            return connection
-
-        context = getattr(self.session, "context", None)
-        configuration = getattr(connection, "configuration", None)
-
-        if context is not None and configuration is not None and hasattr(configuration, "_replace"):
-            replace_kwargs = {}
-
-            if hasattr(configuration, "hostname") and getattr(context, "host", None):
-                replace_kwargs["hostname"] = context.host
+    @contextlib.contextmanager
+    def borrow_context(self) -> Iterator[Any]:
+        """Borrow a connection to the current database from the session pool for a ``with`` block."""
+        with self.session.pool.borrow(CURRENT_DATABASE.get_value()) as context:
+            yield context
 
-            if hasattr(configuration, "port") and getattr(context, "port", None) is not None:
-                replace_kwargs["port"] = int(context.port)
+    def _acquire_worker_context(self) -> Any:
+        """Borrow a connection to the current database from the session pool."""
+        return self.session.pool.acquire(CURRENT_DATABASE.get_value())
 
-            if replace_kwargs:
-                connection.configuration = configuration._replace(**replace_kwargs)
-
-        connection.ssh_tunnel = None
-        return connection
-
-    def _create_worker_context(self) -> Any:
-        """Create a worker context similar to QueryExecutor."""
-        context = self.session._get_context_class()(self._build_worker_connection())
-
-        # if self.session.engine == ConnectionEngine.POSTGRESQL:
-        #     connect_kwargs = {
-        #         "skip_before_connect": True,
-        #         "skip_after_connect": True,
-        #     }
-        #     context.connect(**connect_kwargs)
-        #     return context
-
-        context.connect(skip_before_connect=True, skip_after_connect=True, database=CURRENT_DATABASE.get_value().name)
-        return context
+    def _release_worker_context(self, context: Any) -> None:
+        self.session.pool.release(context)
 
     def _set_worker_context(self, context: Any) -> None:
         with self._lock:
             self._worker_context = context
 
+    def _park_worker_context(self, context: Any) -> None:
+        # Give the connection back to the pool; the pool ignores it when a cancel had to close it.
+        with self._lock:
+            if self._worker_context is context:
+                self._worker_context = None
+
+        self._release_worker_context(context)
+
     def _clear_worker_context(self) -> None:
         context = None
 
@@ -225,17 +207,147 @@ class RecordsExecutor:
             self._worker_context = None
 
         if context is not None:
-            with contextlib.suppress(Exception):
-                context.disconnect()
+            self.session.pool.release(context, discard=True)
+
+    def _stop_loader(self, task: Optional[ScheduledTask] = None) -> None:
+        # Only the latest operation ends the wait cursor: the earlier ones were replaced by it.
+        if task is not None and task is not self._current_task:
+            return
 
-    def _stop_loader(self) -> None:
         if self._loader_context is not None:
             self._loader_context.__exit__(None, None, None)
             self._loader_context = None
 
     def cancel(self) -> None:
         self._cancel_requested = True
+        self.session.scheduler.submit(TaskPriority.QUERY, self._cancel_running_query, key=("cancel_records", id(self)))
+
+    def _cancel_running_query(self) -> None:
+        with self._lock:
+            context = self._worker_context
+
+        if context is None:
+            return
+
+        try:
+            if context.cancel_running_query():
+                return
+        except Exception as ex:
+            logger.warning(f"Server-side cancel failed, closing the connection instead: {ex}")
+
         self._clear_worker_context()
 
     def is_running(self) -> bool:
-        return self._current_thread is not None and self._current_thread.is_alive()
+        return self._current_task is not None and not self._current_task.is_done
+
+
+class VirtualRecordsLoader:
+    """Fetch record blocks for a virtual records grid on the session scheduler.
+
+    Requested blocks are drained by one ``RECORDS`` task at a time, newest
+    first, and blocks the viewport has already scrolled away from are skipped
+    instead of fetched. A block that follows a cached one is read with a
+    keyset seek from the last key of its predecessor, so scrolling down a huge
+    table never pays for a large OFFSET.
+    """
+
+    def __init__(
+            self,
+            executor: RecordsExecutor,
+            table: SQLTable,
+            cache: BlockCache[SQLRecord],
+            on_block_loaded: Callable[[int, list[SQLRecord]], None],
+            filters: Optional[str] = None,
+    ):
+        self._executor = executor
+        self._table = table
+        self._cache = cache
+        self._on_block_loaded = on_block_loaded
+        self._filters = filters
+        self._key_columns = tuple(getattr(table, "get_seek_columns", list)())
+
+        self._requests: collections.deque[int] = collections.deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._task: Optional[ScheduledTask] = None
+
+    def request(self, blocks: list[int]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+
+            self._requests.extend(blocks)
+            # The task draining the requests picks these up too.
+            if self._task is not None:
+                return
+
+            self._task = self._executor.session.scheduler.submit(
+                TaskPriority.RECORDS, self._drain, key=("virtual_records", id(self))
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._requests.clear()
+            task, self._task = self._task, None
+
+        if task is not None:
+            task.cancel()
+
+    def _next_block(self) -> Optional[int]:
+        with self._lock:
+            if self._closed or not self._requests:
+                # Requests made from now on need a new task.
+                self._task = None
+                return None
+
+            return self._requests.pop()
+
+    def _drain(self) -> None:
+        try:
+            with self._executor.borrow_context() as context:
+                while (block := self._next_block()) is not None:
+                    if not self._cache.is_wanted(block):
+                        self._cache.discard(block)
+                        continue
+
+                    try:
+                        records = self._fetch_block(context, block)
+                    except Exception as ex:
+                        logger.error(f"Failed to load records block {block}: {ex}", exc_info=True)
+                        self._cache.discard(block)
+                        continue
+
+                    wx.CallAfter(self._on_block_loaded, block, records)
+        except Exception as ex:
+            logger.error(f"Virtual records loader error: {ex}", exc_info=True)
+            with self._lock:
+                self._task = None
+                failed, self._requests = self._requests, collections.deque()
+
+            # Forgotten as planned, so scrolling back to them asks for them again.
+            for block in failed:
+                self._cache.discard(block)
+
+    def _fetch_block(self, context: Any, block: int) -> list[SQLRecord]:
+        rows = self._cache.block_range(block)
+        limit = self._cache.block_size
+
+        if not self._key_columns:
+            records = context.get_records(self._table, filters=self._filters, limit=limit, offset=rows.start)
+            for record_id, record in enumerate(records, start=rows.start):
+                record.id = record_id
+        else:
+            seek = RecordsSeek(self._key_columns)
+            offset = rows.start
+            if rows.start and (previous := self._cache.get(rows.start - 1)) is not None:
+                seek = RecordsSeek(self._key_columns, after=tuple(previous.original_values.get(column) for column in self._key_columns))
+                offset = 0
+
+            records = context.get_records_page(self._table, seek, filters=self._filters, limit=limit, offset=offset, first_id=rows.start)
+
+        # The table records stay empty: edits to a key column still find their row from these.
+        for record in records:
+            record.original_values = dict(record.values)
+
+        return records
@@ -1,18 +1,22 @@
+import abc
 import datetime
 
 from gettext import gettext as _
-from typing import Optional
+from typing import Optional, Union
 
 import wx
 import wx.dataview
 import wx.stc
 
+from helpers.block_cache import BlockCache
 from helpers.dataview import BaseObservableDataViewListModel
 from helpers.logger import logger
 from helpers.observables import ObservableList
 
 from structures.session import Session
+from structures.engines.context import RecordsSeek
 from structures.engines.database import SQLTable, SQLDatabase, SQLColumn, SQLRecord
+from structures.engines.records_batch import RecordsBatch
 from structures.engines.datatype import DataTypeCategory
 
 from windows.views import TableRecordsDataViewCtrl
@@ -20,35 +24,36 @@ from windows.views import TableRecordsDataViewCtrl
 from windows.dialogs.column_content import ColumnContentDialogController
 
 from windows.main import CURRENT_TABLE, CURRENT_SESSION, CURRENT_DATABASE, AUTO_APPLY, CURRENT_RECORDS
-from windows.main.table.executor import RecordsExecutor, RecordsOperationResult
+from windows.main.table.executor import RecordsExecutor, RecordsOperationResult, VirtualRecordsLoader
 
 NEW_RECORDS: ObservableList[SQLRecord] = ObservableList()
 
 NULL_DISPLAY = "NULL"
 
+VIRTUAL_BLOCK_SIZE = 200
+VIRTUAL_MAX_BLOCKS = 50
+VIRTUAL_PREFETCH_BLOCKS = 2
 
-class RecordsModel(BaseObservableDataViewListModel):
-    def __init__(self, table: SQLTable, column_count: Optional[int] = None):
-        super().__init__(column_count)
 
-        self.table: SQLTable = table
+class _RecordsDisplayMixin:
+    table: SQLTable
 
-    def _load(self, data):
-        super()._load(data)
+    @abc.abstractmethod
+    def _get_record(self, row: int) -> Optional[SQLRecord]:
+        """Return the record shown at ``row``, or None while it is not loaded."""
+        raise NotImplementedError
 
     def _is_null(self, row, col):
         column = self.table.columns[col]
-        record: SQLRecord = self.data[row]
-        return record.values.get(column.name) is None
+        record = self._get_record(row)
+        return record is not None and record.values.get(column.name) is None
 
     def GetValueByRow(self, row, col):
-        if not len(self.data):
+        if (record := self._get_record(row)) is None:
             return None
 
         column = self.table.columns[col]
 
-        record: SQLRecord = self.data[row]
-
         value = record.values.get(column.name)
 
         if value is None:
@@ -82,10 +87,13 @@ class RecordsModel(BaseObservableDataViewListModel):
     def SetValueByRow(self, value, row, col):
         column: SQLColumn = self.table.columns[col]
 
+        if (record := self._get_record(row)) is None:
+            return False
+
         if value == NULL_DISPLAY or (isinstance(value, str) and not value.strip()):
             value = None
 
-        self.data[row].values[column.name] = value
+        record.values[column.name] = value
 
         return True
 
@@ -96,7 +104,7 @@ class RecordsModel(BaseObservableDataViewListModel):
             return False
 
         row = self.GetRow(item)
-        if 0 <= row < len(self.data) and self._is_null(row, col):
+        if self._is_null(row, col):
             attr.SetItalic(True)
             attr.SetColour(wx.Colour(180, 180, 120))
         else:
@@ -108,6 +116,22 @@ class RecordsModel(BaseObservableDataViewListModel):
 
         return True
 
+
+class RecordsModel(_RecordsDisplayMixin, BaseObservableDataViewListModel):
+    def __init__(self, table: SQLTable, column_count: Optional[int] = None):
+        super().__init__(column_count)
+
+        self.table: SQLTable = table
+
+    def _load(self, data):
+        super()._load(data)
+
+    def _get_record(self, row: int) -> Optional[SQLRecord]:
+        if 0 <= row < len(self.data):
+            return self.data[row]
+
+        return None
+
     def HasValue(self, item, col):
         return bool(self.data)
 
@@ -118,9 +142,121 @@ class RecordsModel(BaseObservableDataViewListModel):
         return self.GetItem(len(self.data) - 1)
 
 
+class VirtualRecordsModel(_RecordsDisplayMixin, wx.dataview.DataViewVirtualListModel):
+    """Records model reporting the total row count and fetching rows block by block on demand.
+
+    Only the blocks kept by the LRU cache live in memory. Rows inserted from the
+    grid are kept locally after the server rows until the next reload.
+
+    An estimated row count may fall short of the table, so while the count is
+    not exact one probe row is kept past the known rows: loading the block that
+    holds it reveals whether the table goes on.
+    """
+
+    def __init__(
+            self,
+            table: SQLTable,
+            executor: RecordsExecutor,
+            row_count: int = 0,
+            filters: Optional[str] = None,
+            is_exact: bool = True,
+    ):
+        row_count = max(0, row_count) + (0 if is_exact else 1)
+        wx.dataview.DataViewVirtualListModel.__init__(self, row_count)
+
+        self.table: SQLTable = table
+        self.is_exact = is_exact
+        self._column_count = len(table.columns)
+        self._pending: list[SQLRecord] = []
+        self._closed = False
+
+        self.cache: BlockCache[SQLRecord] = BlockCache(
+            row_count,
+            block_size=VIRTUAL_BLOCK_SIZE,
+            max_blocks=VIRTUAL_MAX_BLOCKS,
+            prefetch_blocks=VIRTUAL_PREFETCH_BLOCKS,
+        )
+        self.loader = VirtualRecordsLoader(executor, table, self.cache, self._on_block_loaded, filters=filters)
+
+    @property
+    def row_count(self) -> int:
+        return self.cache.row_count + len(self._pending)
+
+    def _get_record(self, row: int) -> Optional[SQLRecord]:
+        if row >= self.cache.row_count:
+            index = row - self.cache.row_count
+            return self._pending[index] if 0 <= index < len(self._pending) else None
+
+        if (record := self.cache.get(row)) is None:
+            if blocks := self.cache.plan(row):
+                self.loader.request(blocks)
+
+        return record
+
+    def _on_block_loaded(self, block: int, records: list[SQLRecord]):
+        if self._closed:
+            return
+
+        rows = self.cache.block_range(block)
+        self.cache.put(block, records)
+
+        if len(records) < len(rows):
+            # The table shrank since it was counted, or the estimate was too high: the short block is the last one.
+            self.set_row_count(rows.start + len(records))
+            return
+
+        if not self.is_exact and rows.stop == self.cache.row_count:
+            # The block holding the probe row came back filled: grow, and keep probing while blocks come back full.
+            self.set_row_count(rows.start + len(records), is_exact=len(records) < self.cache.block_size)
+            return
+
+        for row in rows:
+            self.RowChanged(row)
+
+    def set_row_count(self, row_count: int, is_exact: bool = True):
+        self.is_exact = is_exact
+        self.cache.row_count = max(0, row_count) + (0 if is_exact else 1)
+        self.Reset(self.row_count)
+
+    def reload(self):
+        # Rows added from the grid are counted as saved; if they were not, the last block comes back short.
+        self.cache.row_count += len(self._pending)
+        self._pending.clear()
+        self.cache.invalidate()
+        self.Reset(self.row_count)
+
+    def close(self):
+        self._closed = True
+        self.loader.close()
+
+    def get_data_by_row(self, row: int) -> Optional[SQLRecord]:
+        return self._get_record(row)
+
+    def get_data_by_item(self, item: wx.dataview.DataViewItem) -> Optional[SQLRecord]:
+        return self._get_record(self.GetRow(item))
+
+    def add_row(self, data: SQLRecord) -> wx.dataview.DataViewItem:
+        self._pending.append(data)
+        self.RowAppended()
+        return self.GetItem(self.row_count - 1)
+
+    def GetColumnCount(self):
+        return self._column_count
+
+    def GetColumnType(self, col):
+        return "string"
+
+    def GetCount(self):
+        return self.row_count
+
+    def HasValue(self, item, col):
+        return self._get_record(self.GetRow(item)) is not None
+
+
 class TableRecordsController:
     app = wx.GetApp()
     executor: Optional[RecordsExecutor] = None
+    model: Optional[Union[RecordsModel, VirtualRecordsModel]] = None
     def __init__(self, list_ctrl_records: TableRecordsDataViewCtrl):
         self.list_ctrl_records = list_ctrl_records
         self.list_ctrl_records.make_advanced_dialog = self.make_advanced_dialog
@@ -147,8 +283,12 @@ class TableRecordsController:
         selected_records = self.get_selected_records()
         self._update_toolbar_states(selected_records)
 
-    def load_records_async(self, obj=None, filters: Optional[str] = None, limit: int = 1000, offset: int = 0, orders: Optional[str] = None):
+    def load_records_async(self, obj=None, filters: Optional[str] = None, limit: int = 1000, offset: int = 0, orders: Optional[str] = None, seek: Optional[RecordsSeek] = None):
         """Load records asynchronously using RecordsExecutor."""
+        if obj is None and isinstance(self.model, VirtualRecordsModel):
+            self.model.reload()
+            return
+
         target = obj or self.table
         if not self.executor or not target:
             return
@@ -159,7 +299,8 @@ class TableRecordsController:
             filters=filters,
             limit=limit,
             offset=offset,
-            orders=orders
+            orders=orders,
+            seek=seek,
         )
 
     def _on_records_loaded(self, result: RecordsOperationResult, obj=None):
@@ -175,10 +316,28 @@ class TableRecordsController:
                 logger.error(f"Fallback loading also failed: {ex}", exc_info=True)
 
     def load_model_for(self, obj):
+        self._close_virtual_model()
         self.model = RecordsModel(obj, len(obj.columns))
         self.model.set_observable(obj.records)
         self.list_ctrl_records.AssociateModel(self.model)
 
+    def load_virtual_model_for(self, obj, row_count: int = 0, filters: Optional[str] = None, is_exact: bool = True):
+        """Show all the rows of ``obj`` in a virtual grid that fetches them while scrolling."""
+        self._close_virtual_model()
+        if not self.executor:
+            return
+
+        self.model = VirtualRecordsModel(obj, self.executor, row_count, filters=filters, is_exact=is_exact)
+        self.list_ctrl_records.AssociateModel(self.model)
+
+    def set_virtual_row_count(self, row_count: int, is_exact: bool = True):
+        if isinstance(self.model, VirtualRecordsModel):
+            self.model.set_row_count(row_count, is_exact=is_exact)
+
+    def _close_virtual_model(self):
+        if isinstance(self.model, VirtualRecordsModel):
+            self.model.close()
+
     def load_model(self):
         self.load_model_for(self.table)
 
@@ -195,7 +354,9 @@ class TableRecordsController:
             event.Skip()
             return
 
-        current_record = self.model.data[self.model.GetRow(item)]
+        if (current_record := self.model.get_data_by_item(item)) is None:
+            event.Skip()
+            return
 
         if AUTO_APPLY.get_value() and current_record.is_valid():
             try:
@@ -262,7 +423,9 @@ class TableRecordsController:
         return dialog
 
     def get_selected_records(self):
-        return [self.model.data[self.model.GetRow(row)] for row in self.list_ctrl_records.GetSelections()]
+        records = [self.model.get_data_by_item(item) for item in self.list_ctrl_records.GetSelections()]
+        # Rows of a virtual grid whose block is not loaded yet cannot be acted upon.
+        return [record for record in records if record is not None]
 
     def get_first_editable_column(self):
         for i, column in enumerate(self.table.columns):
@@ -303,9 +466,11 @@ class TableRecordsController:
             values=values
         )
 
-        table.records.insert(index, new_empty_record)
-
-        new_empty_item = self.model.GetItem(index)
+        if isinstance(self.model, VirtualRecordsModel):
+            new_empty_item = self.model.add_row(new_empty_record)
+        else:
+            table.records.insert(index, new_empty_record)
+            new_empty_item = self.model.GetItem(index)
 
         self.list_ctrl_records.UnselectAll()
         self.list_ctrl_records.Select(new_empty_item)
@@ -318,13 +483,11 @@ class TableRecordsController:
         if not records:
             return
 
-        errors = []
-        for record in records:
-            try:
-                record.save()
-            except Exception as ex:
-                logger.error(f"Error saving record: {ex}", exc_info=True)
-                errors.append(str(ex))
+        try:
+            errors = [str(error) for error in RecordsBatch.save_records(records)]
+        except Exception as ex:
+            logger.error(f"Error saving records: {ex}", exc_info=True)
+            errors = [str(ex)]
 
         NEW_RECORDS.clear()
 
@@ -358,7 +521,7 @@ class TableRecordsController:
         selected = self.list_ctrl_records.GetSelection()
 
         index = len(table.records)
-        if selected.IsOk():
+        if selected.IsOk() and isinstance(self.model, RecordsModel):
             current_record: SQLRecord = self.model.get_data_by_item(selected)
             index = table.records.index(current_record) + 1
 
@@ -374,7 +537,7 @@ class TableRecordsController:
             return
 
         index = len(table.records)
-        if selected.IsOk():
+        if selected.IsOk() and isinstance(self.model, RecordsModel):
             current_record: SQLRecord = self.model.get_data_by_item(selected)
             index = table.records.index(current_record) + 1
 
@@ -387,18 +550,21 @@ class TableRecordsController:
 
         if records:
             try:
-                SQLRecord.delete_many(table, records)
-                CURRENT_RECORDS.set_value([])
-                # Refresh records after successful deletion
-                self.load_records_async()
+                errors = [str(error) for error in RecordsBatch(table).delete(records)]
             except Exception as ex:
                 logger.error(f"Error deleting records: {ex}", exc_info=True)
+                errors = [str(ex)]
+
+            if errors:
                 wx.MessageBox(
-                    f"Failed to delete records: {ex}",
+                    "Failed to delete records: {errors}".format(errors="\n".join(errors)),
                     "Error",
                     wx.OK | wx.ICON_ERROR
                 )
 
+            CURRENT_RECORDS.set_value([])
+            self.load_records_async()
+
     # def update_record(self, row, record):
     #     if row < 0 or row >= len(self.list_ctrl_records.GetModel().records):
     #         return